@@ -1,8 +1,30 @@
 """
 Controlador para operações relacionadas à agenda de consultas.
 """
+import random
+import time
 from typing import List, Dict, Optional, Tuple, Any
 
+from src.controllers.disponibilidade_controller import invalidar_disponibilidade, DURACAO_PADRAO
+from src.db.financeiro_db import SQL_PAGAMENTO_DA_CONSULTA, SQL_PAGAMENTO_DO_PACIENTE_NO_DIA
+from src.utils.notificador import publicar
+
+
+# Tentativas da reserva quando o InnoDB aborta a transação por deadlock (1213) ou
+# espera de trava (1205), o que ocorre com dois terminais criando ao mesmo tempo
+# a linha de trava do primeiro horário do dia
+RESERVA_TENTATIVAS = 3
+_ERROS_REPETIR_RESERVA = (1213, 1205)
+# Contadores do processo (lidos por src/db/verificar_reserva_concorrente.py)
+metricas_reserva = {'repeticoes': 0, 'esgotadas': 0}
+
+
+def _notificar_agenda(data=None):
+    """Avisa as outras estações (hub de notificações) que a agenda mudou.
+    Sem data conhecida, publica no tópico genérico 'agenda'."""
+    publicar(f"agenda:{str(data)[:10]}" if data else 'agenda')
+
+
 class AgendaController:
     """Controlador para operações da agenda de consultas."""
     
@@ -113,6 +135,7 @@ class AgendaController:
             cursor = self.db_connection.cursor()
             cursor.execute("UPDATE consultas SET status = %s WHERE id = %s", (status, consulta_id))
             self.db_connection.commit()
+            _notificar_agenda()
             return True, "Status atualizado com sucesso."
         except Exception as e:
             if self.db_connection:
@@ -173,6 +196,13 @@ class AgendaController:
             
             cursor.execute(query, params)
             self.db_connection.commit()
+            if dados.get('id'):
+                # Data/médico anteriores não são conhecidos aqui
+                invalidar_disponibilidade()
+                _notificar_agenda()
+            else:
+                invalidar_disponibilidade(dados['medico_id'], dados['data'])
+                _notificar_agenda(dados['data'])
             return True, "Consulta salva com sucesso!"
             
         except Exception as e:
@@ -183,6 +213,165 @@ class AgendaController:
             if 'cursor' in locals():
                 cursor.close()
     
+    def reservar_horario(self, dados: Dict[str, Any], duracao: Optional[int] = None) -> Tuple[bool, str, Dict[str, Any]]:
+        """
+        Agenda uma nova consulta de forma atômica.
+
+        Numa única transação: trava a linha médico/dia em agenda_reservas_dia
+        (SELECT ... FOR UPDATE), confere no servidor se o horário está dentro do
+        atendimento do médico e se não sobrepõe outra consulta, e insere.
+        Dois terminais reservando o mesmo médico/dia são serializados pela trava.
+
+        Args:
+            dados: paciente_id, medico_id, data (YYYY-MM-DD), hora (HH:MM),
+                tipo_atendimento, status, observacoes
+            duracao: minutos; se omitido, usa exames_consultas.tempo do tipo
+
+        Returns:
+            Tupla (sucesso, mensagem, detalhe). Em sucesso detalhe = {'consulta_id': id};
+            em conflito detalhe = {'motivo': 'fora_do_horario' | 'conflito',
+            'conflito': {'id', 'hora', 'fim', 'tipo_atendimento'}}. Deadlock ou
+            espera de trava repetem a transação até RESERVA_TENTATIVAS vezes;
+            esgotadas, detalhe = {'motivo': 'concorrencia', 'conflito': None}.
+
+        Raises:
+            RuntimeError: a conexão tem uma transação aberta pelo chamador (não é
+                confirmada aqui; use uma conexão livre ou encerre a transação antes).
+        """
+        conn = self.db_connection
+        if conn and getattr(conn, 'in_transaction', False):
+            raise RuntimeError("reservar_horario: a conexão tem uma transação aberta; encerre-a antes de reservar")
+        for tentativa in range(1, RESERVA_TENTATIVAS + 1):
+            resultado = self._reservar_horario_transacao(conn, dados, duracao)
+            if resultado is not None:
+                return resultado
+            if tentativa < RESERVA_TENTATIVAS:
+                metricas_reserva['repeticoes'] += 1
+                # Espera curta e aleatória para os terminais não colidirem de novo
+                time.sleep(random.uniform(0.01, 0.05) * tentativa)
+        metricas_reserva['esgotadas'] += 1
+        return False, "Agenda ocupada por outro terminal. Tente novamente.", {'motivo': 'concorrencia', 'conflito': None}
+
+    def _reservar_horario_transacao(self, conn, dados: Dict[str, Any],
+                                    duracao: Optional[int]) -> Optional[Tuple[bool, str, Dict[str, Any]]]:
+        """Uma tentativa de reservar_horario; None se o banco abortou por deadlock/espera de trava."""
+        try:
+            if not conn:
+                raise Exception("Sem conexão com o banco de dados")
+            medico_id = int(dados['medico_id'])
+            data = dados['data']
+            hora = str(dados['hora'])[:5]
+            tipo = dados.get('tipo_atendimento', None)
+
+            conn.start_transaction()
+            cur = conn.cursor(dictionary=True)
+
+            # Trava médico/dia (cria a linha na primeira reserva do dia)
+            cur.execute(
+                """
+                INSERT INTO agenda_reservas_dia (medico_id, data, atualizado_em)
+                VALUES (%s, %s, NOW())
+                ON DUPLICATE KEY UPDATE atualizado_em = NOW()
+                """,
+                (medico_id, data)
+            )
+            cur.execute(
+                "SELECT medico_id FROM agenda_reservas_dia WHERE medico_id = %s AND data = %s FOR UPDATE",
+                (medico_id, data)
+            )
+            cur.fetchall()
+
+            if not duracao:
+                cur.execute("SELECT MAX(tempo) AS tempo FROM exames_consultas WHERE nome = %s", (tipo,))
+                row = cur.fetchone() or {}
+                try:
+                    duracao = int(row.get('tempo') or 0)
+                except (TypeError, ValueError):
+                    duracao = 0
+            duracao = int(duracao) if duracao and int(duracao) > 0 else DURACAO_PADRAO
+
+            # Dentro da faixa de atendimento do médico (dia_semana: 0=segunda)
+            cur.execute(
+                """
+                SELECT id FROM horarios_disponiveis
+                WHERE medico_id = %s AND dia_semana = WEEKDAY(%s)
+                  AND hora_inicio <= %s
+                  AND hora_fim >= ADDTIME(%s, SEC_TO_TIME(%s * 60))
+                LIMIT 1
+                """,
+                (medico_id, data, hora, hora, duracao)
+            )
+            if cur.fetchone() is None:
+                conn.rollback()
+                return False, "Médico não atende neste horário", {'motivo': 'fora_do_horario', 'conflito': None}
+
+            # Sobreposição: existente.inicio < novo.fim e existente.fim > novo.inicio
+            cur.execute(
+                """
+                SELECT x.id, x.hora, x.fim, x.tipo_atendimento
+                FROM (
+                    SELECT c.id, c.hora, c.tipo_atendimento,
+                           ADDTIME(c.hora, SEC_TO_TIME(COALESCE(NULLIF(
+                               (SELECT MAX(e.tempo) FROM exames_consultas e
+                                 WHERE e.nome = c.tipo_atendimento), 0), %s) * 60)) AS fim
+                    FROM consultas c
+                    WHERE c.medico_id = %s AND c.data = %s
+                      AND c.hora < ADDTIME(%s, SEC_TO_TIME(%s * 60))
+                ) x
+                WHERE x.fim > %s
+                ORDER BY x.hora
+                LIMIT 1
+                """,
+                (DURACAO_PADRAO, medico_id, data, hora, duracao, hora)
+            )
+            conflito = cur.fetchone()
+            if conflito:
+                conn.rollback()
+                # Cache local desatualizado (reserva feita por outro terminal)
+                invalidar_disponibilidade(medico_id, data)
+                hora_txt = str(conflito.get('hora'))
+                hora_txt = hora_txt.zfill(8)[:5] if len(hora_txt) < 8 else hora_txt[:5]
+                return False, f"Conflito com atendimento existente às {hora_txt}", {
+                    'motivo': 'conflito',
+                    'conflito': {
+                        'id': conflito.get('id'),
+                        'hora': conflito.get('hora'),
+                        'fim': conflito.get('fim'),
+                        'tipo_atendimento': conflito.get('tipo_atendimento'),
+                    },
+                }
+
+            cur.execute(
+                """
+                INSERT INTO consultas
+                (paciente_id, medico_id, data, hora, status, observacoes, tipo_atendimento)
+                VALUES (%s, %s, %s, %s, %s, %s, %s)
+                """,
+                (
+                    dados['paciente_id'], medico_id, data, hora,
+                    dados.get('status', 'Agendado'),
+                    dados.get('observacoes', ''),
+                    tipo
+                )
+            )
+            consulta_id = cur.lastrowid
+            conn.commit()
+            invalidar_disponibilidade(medico_id, data)
+            _notificar_agenda(data)
+            return True, "Consulta salva com sucesso!", {'consulta_id': consulta_id}
+        except Exception as e:
+            if conn:
+                try:
+                    conn.rollback()
+                except Exception:
+                    pass
+            if getattr(e, 'errno', None) in _ERROS_REPETIR_RESERVA:
+                return None
+            return False, f"Erro ao salvar consulta: {str(e)}", {'motivo': 'erro', 'conflito': None}
+        finally:
+            if 'cur' in locals():
+                cur.close()
+
     def atualizar_consulta(self, dados: Dict[str, Any]) -> Tuple[bool, str]:
         """
         Atualiza uma consulta existente.
@@ -230,6 +419,8 @@ class AgendaController:
             
             cursor.execute(query, params)
             self.db_connection.commit()
+            invalidar_disponibilidade()
+            _notificar_agenda()
             return True, "Consulta atualizada com sucesso!"
             
         except Exception as e:
@@ -250,6 +441,8 @@ class AgendaController:
             cursor = self.db_connection.cursor()
             cursor.execute("DELETE FROM consultas WHERE id = %s", (consulta_id,))
             self.db_connection.commit()
+            invalidar_disponibilidade()
+            _notificar_agenda()
             return True, "Consulta excluída com sucesso"
         except Exception as e:
             if self.db_connection:
@@ -294,6 +487,7 @@ class AgendaController:
                 (consulta_id,)
             )
             self.db_connection.commit()
+            _notificar_agenda()
             return True, "Chegada registrada com sucesso."
         except Exception as e:
             if self.db_connection:
@@ -311,6 +505,7 @@ class AgendaController:
             cursor = self.db_connection.cursor()
             cursor.execute("UPDATE `consultas` SET `horario_chegada` = NULL WHERE `id` = %s", (consulta_id,))
             self.db_connection.commit()
+            _notificar_agenda()
             return True, "Chegada removida com sucesso."
         except Exception as e:
             if self.db_connection:
@@ -332,16 +527,7 @@ class AgendaController:
                 raise Exception("Sem conexão com o banco de dados")
             cur = self.db_connection.cursor()
             # Busca o último pagamento (data_pagamento) para a consulta
-            cur.execute(
-                """
-                SELECT data_pagamento, data
-                FROM financeiro
-                WHERE consulta_id = %s AND tipo = 'entrada' AND status = 'pago'
-                ORDER BY COALESCE(data_pagamento, data) DESC, id DESC
-                LIMIT 1
-                """,
-                (consulta_id,)
-            )
+            cur.execute(SQL_PAGAMENTO_DA_CONSULTA, (consulta_id,))
             row = cur.fetchone()
             if row is None:
                 # Fallback: localizar pagamento pelo paciente no mesmo dia da consulta
@@ -351,17 +537,10 @@ class AgendaController:
                 if not cinfo:
                     return True, "Consulta não encontrada para sincronizar.", False
                 paciente_id, data_consulta = cinfo[0], cinfo[1]
-                # Procura último pagamento 'pago' desse paciente no mesmo dia (comparando data)
+                # Procura último pagamento 'pago' desse paciente no mesmo dia
                 cur.execute(
-                    """
-                    SELECT data_pagamento, data
-                    FROM financeiro
-                    WHERE paciente_id = %s AND tipo = 'entrada' AND status = 'pago'
-                      AND DATE(COALESCE(data_pagamento, data)) = %s
-                    ORDER BY COALESCE(data_pagamento, data) DESC, id DESC
-                    LIMIT 1
-                    """,
-                    (paciente_id, data_consulta)
+                    SQL_PAGAMENTO_DO_PACIENTE_NO_DIA,
+                    (paciente_id, data_consulta, data_consulta, data_consulta, data_consulta)
                 )
                 row = cur.fetchone()
                 if row is None:
@@ -393,6 +572,81 @@ class AgendaController:
             if 'cur' in locals():
                 cur.close()
     
+    def sincronizar_pagamentos_periodo(self, data_inicio: str, data_fim: Optional[str] = None,
+                                       medico_id: Optional[int] = None) -> tuple[bool, str, List[int]]:
+        """
+        Versão em lote de sincronizar_status_pagamento para todas as consultas em aberto
+        de uma data (ou intervalo), opcionalmente de um médico.
+        Usa a mesma regra: pagamento 'pago' vinculado pelo consulta_id ou, na falta dele,
+        pagamento do paciente no mesmo dia da consulta. Executa um SELECT e um único
+        UPDATE ... JOIN, independente da quantidade de consultas.
+        Retorna (ok, mensagem, ids_atualizados).
+        """
+        data_fim = data_fim or data_inicio
+        # Consultas em aberto do período com o último pagamento localizado (ou NULL)
+        pendentes = """
+            SELECT c.id,
+                   COALESCE(
+                       (SELECT MAX(COALESCE(f.data_pagamento, f.data))
+                          FROM financeiro f
+                         WHERE f.consulta_id = c.id
+                           AND f.tipo = 'entrada' AND f.status = 'pago'),
+                       (SELECT MAX(COALESCE(f.data_pagamento, f.data))
+                          FROM financeiro f
+                         WHERE f.paciente_id = c.paciente_id
+                           AND f.tipo = 'entrada' AND f.status = 'pago'
+                           AND (
+                                 (f.data_pagamento >= c.data AND f.data_pagamento < c.data + INTERVAL 1 DAY)
+                              OR (f.data_pagamento IS NULL AND f.data >= c.data AND f.data < c.data + INTERVAL 1 DAY)
+                           ))
+                   ) AS pago_em
+            FROM consultas c
+            WHERE c.data >= %s AND c.data <= %s
+              AND (c.status_pagameto IS NULL OR c.status_pagameto <> 1)
+        """
+        params = [data_inicio, data_fim]
+        if medico_id:
+            pendentes += " AND c.medico_id = %s"
+            params.append(medico_id)
+        try:
+            if not self.db_connection:
+                raise Exception("Sem conexão com o banco de dados")
+            cur = self.db_connection.cursor()
+            cur.execute(pendentes + " HAVING pago_em IS NOT NULL", tuple(params))
+            ids = [int(r[0]) for r in cur.fetchall()]
+            if not ids:
+                return True, "Nenhuma consulta com pagamento pendente de sincronização.", []
+
+            # GROUP BY força a materialização da derivada (MySQL não permite ler
+            # `consultas` em subconsulta mesclada do próprio UPDATE)
+            marcadores = ", ".join(["%s"] * len(ids))
+            cur.execute(
+                f"""
+                UPDATE `consultas` c
+                JOIN (
+                    SELECT p.id, MAX(p.pago_em) AS pago_em
+                    FROM ({pendentes}) p
+                    WHERE p.pago_em IS NOT NULL AND p.id IN ({marcadores})
+                    GROUP BY p.id
+                ) pg ON pg.id = c.id
+                SET c.`status_pagameto` = 1,
+                    c.`horario_chegada` = CASE
+                        WHEN DATE(pg.pago_em) = c.`data` THEN COALESCE(c.`horario_chegada`, pg.pago_em)
+                        ELSE c.`horario_chegada`
+                    END
+                """,
+                tuple(params) + tuple(ids)
+            )
+            self.db_connection.commit()
+            return True, f"{len(ids)} consulta(s) sincronizada(s) como pagas.", ids
+        except Exception as e:
+            if self.db_connection:
+                self.db_connection.rollback()
+            return False, f"Erro ao sincronizar pagamentos: {e}", []
+        finally:
+            if 'cur' in locals():
+                cur.close()
+
     def _carregar_exames_medico(self, medico_id):
         """Carrega os exames/consultas de um médico"""
         try:
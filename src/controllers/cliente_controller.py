@@ -4,6 +4,10 @@ Controlador para operações relacionadas a clientes.
 from typing import Dict, List, Optional, Any, Union, Tuple
 from datetime import datetime
 
+from src.db.migrations import migracao_aplicada
+from src.utils.busca import normalizar_texto, somente_digitos, tokens_nome
+from src.utils.indice_pacientes import indice_pacientes
+
 class ClienteController:
     """Controlador para operações relacionadas a pacientes."""
     
@@ -54,6 +58,67 @@ class ClienteController:
             except Exception:
                 pass
     
+    def _busca_normalizada(self) -> bool:
+        """Indica se as colunas normalizadas de busca (migração 0004) estão disponíveis."""
+        try:
+            return migracao_aplicada(4)
+        except Exception:
+            return False
+
+    def _campos_busca(self, dados: Dict[str, Any]) -> Dict[str, Any]:
+        """Colunas de busca derivadas de nome/telefones presentes em `dados`."""
+        campos = {}
+        if 'nome' in dados:
+            campos['nome_busca'] = normalizar_texto(dados.get('nome'))[:255]
+        if 'telefone' in dados:
+            campos['telefone_busca'] = somente_digitos(dados.get('telefone'))[:20] or None
+        if 'telefone2' in dados:
+            campos['telefone2_busca'] = somente_digitos(dados.get('telefone2'))[:20] or None
+        return campos
+
+    def _gravar_paciente(self, query: str, params, paciente_id: Optional[int] = None,
+                         nome: Optional[str] = None) -> Optional[int]:
+        """Executa o INSERT/UPDATE de pacientes e, com `nome`, regrava os tokens do nome,
+        numa única transação da mesma conexão. Retorna o id do paciente."""
+        if not self.db:
+            return None
+        if hasattr(self.db, 'checkout'):
+            with self.db.checkout() as conn:
+                return self._gravar_paciente_conn(conn, query, params, paciente_id, nome)
+        return self._gravar_paciente_conn(self.db, query, params, paciente_id, nome)
+
+    @staticmethod
+    def _gravar_paciente_conn(conn, query: str, params, paciente_id: Optional[int], nome: Optional[str]) -> Optional[int]:
+        if getattr(conn, 'in_transaction', False):
+            raise RuntimeError("Conexão com transação aberta; encerre-a antes de gravar o paciente")
+        cursor = None
+        try:
+            conn.start_transaction()
+            cursor = conn.cursor()
+            cursor.execute(query, tuple(params))
+            if paciente_id is None:
+                paciente_id = cursor.lastrowid
+            if nome is not None and paciente_id:
+                tokens = tokens_nome(nome)
+                cursor.execute("DELETE FROM pacientes_tokens WHERE paciente_id = %s", (paciente_id,))
+                if tokens:
+                    cursor.execute(
+                        "INSERT INTO pacientes_tokens (token, paciente_id) VALUES "
+                        + ', '.join(['(%s, %s)'] * len(tokens)),
+                        tuple(v for token in tokens for v in (token, paciente_id))
+                    )
+            conn.commit()
+            return paciente_id
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            if cursor:
+                cursor.close()
+
     def buscar_cliente_por_id(self, cliente_id: int) -> tuple[bool, dict]:
         """
         Busca um cliente pelo ID.
@@ -119,14 +184,25 @@ class ClienteController:
         Returns:
             Lista de dicionários com os dados dos clientes encontrados.
         """
-        query = """
-            SELECT * FROM pacientes 
-            WHERE telefone LIKE %s OR telefone2 LIKE %s
-            ORDER BY nome
-        """
         try:
-            # Adiciona % para busca parcial
-            termo_busca = f"{telefone}%"
+            digitos = somente_digitos(telefone)
+            if digitos and self._busca_normalizada():
+                # Prefixo nas colunas só com dígitos: cada ramo do UNION usa o próprio índice
+                query = """
+                    SELECT * FROM pacientes WHERE telefone_busca LIKE %s
+                    UNION
+                    SELECT * FROM pacientes WHERE telefone2_busca LIKE %s
+                    ORDER BY nome
+                """
+                termo_busca = f"{digitos}%"
+            else:
+                query = """
+                    SELECT * FROM pacientes 
+                    WHERE telefone LIKE %s OR telefone2 LIKE %s
+                    ORDER BY nome
+                """
+                # Adiciona % para busca parcial
+                termo_busca = f"{telefone}%"
             resultados = self._execute_query(query, (termo_busca, termo_busca))
             return resultados if resultados else []
         except Exception as e:
@@ -143,13 +219,32 @@ class ClienteController:
         Returns:
             Lista de dicionários com os dados dos clientes encontrados.
         """
-        query = """
-            SELECT * FROM pacientes
-            WHERE nome LIKE %s
-            ORDER BY nome
-            LIMIT 10
-        """
         try:
+            termos = tokens_nome(nome)
+            if termos and self._busca_normalizada():
+                # O termo mais longo vira range scan no índice de tokens;
+                # os demais filtram os candidatos pelo nome normalizado.
+                principal = max(termos, key=len)
+                query = """
+                    SELECT p.* FROM pacientes p
+                    JOIN (
+                        SELECT DISTINCT paciente_id FROM pacientes_tokens WHERE token LIKE %s
+                    ) t ON t.paciente_id = p.id
+                    WHERE 1=1
+                """
+                params = [f"{principal}%"]
+                for termo in termos:
+                    if termo != principal:
+                        query += " AND p.nome_busca LIKE %s"
+                        params.append(f"%{termo}%")
+                query += " ORDER BY p.nome LIMIT 10"
+                return self._execute_query(query, tuple(params))
+            query = """
+                SELECT * FROM pacientes
+                WHERE nome LIKE %s
+                ORDER BY nome
+                LIMIT 10
+            """
             return self._execute_query(query, (f"%{nome}%",))
         except Exception as e:
             print(f"Erro ao buscar cliente por nome: {e}")
@@ -189,6 +284,10 @@ class ClienteController:
                 if campo not in dados or not dados[campo]:
                     return False, f"O campo {campo} é obrigatório."
             
+            busca_ok = self._busca_normalizada()
+            if busca_ok:
+                dados = {**dados, **self._campos_busca(dados)}
+            
             # Inserir no banco de dados
             campos = ', '.join(dados.keys())
             placeholders = ', '.join(['%s'] * len(dados))
@@ -198,7 +297,9 @@ class ClienteController:
                 VALUES ({placeholders})
             """
             
-            self._execute_query(query, list(dados.values()))
+            # Paciente e tokens do nome na mesma transação
+            self._gravar_paciente(query, list(dados.values()), nome=dados.get('nome') if busca_ok else None)
+            indice_pacientes.marcar_desatualizado()
             return True, "Cliente cadastrado com sucesso."
             
         except Exception as e:
@@ -219,6 +320,10 @@ class ClienteController:
         if not dados_atualizados:
             return False, "Nenhum dado para atualizar."
         
+        busca_ok = self._busca_normalizada()
+        if busca_ok:
+            dados_atualizados = {**dados_atualizados, **self._campos_busca(dados_atualizados)}
+        
         # Preparar os pares campo=valor para a atualização
         sets = []
         valores = []
@@ -241,7 +346,10 @@ class ClienteController:
         """
         
         try:
-            self._execute_query(query, tuple(valores))
+            # Renomear regrava os tokens na mesma transação do UPDATE
+            nome = dados_atualizados.get('nome') if busca_ok and 'nome' in dados_atualizados else None
+            self._gravar_paciente(query, valores, paciente_id=cliente_id, nome=nome)
+            indice_pacientes.marcar_desatualizado()
             return True, "Cliente atualizado com sucesso."
         except Exception as e:
             print(f"Erro ao atualizar cliente: {e}")
@@ -319,6 +427,9 @@ class ClienteController:
                 
             # Executar a exclusão
             self._execute_query(query, (cliente_id,))
+            if self._busca_normalizada():
+                self._execute_query("DELETE FROM pacientes_tokens WHERE paciente_id = %s", (cliente_id,))
+            indice_pacientes.marcar_desatualizado()
             return True, "Cliente excluído permanentemente com sucesso."
             
         except Exception as e:
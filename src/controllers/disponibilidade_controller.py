@@ -0,0 +1,206 @@
+"""
+Controlador de disponibilidade da agenda.
+
+Cruza as faixas de atendimento do médico (horarios_disponiveis) com as consultas
+já marcadas (duração vinda de exames_consultas.tempo) e mantém, por médico/data,
+a lista ordenada de intervalos livres. Os resultados ficam em cache por processo
+e são invalidados quando uma consulta é salva, alterada ou excluída.
+"""
+import threading
+import time as _time
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+# Duração assumida quando o tipo de atendimento da consulta não tem tempo cadastrado
+DURACAO_PADRAO = 10
+# Intervalo entre os horários oferecidos no combobox
+PASSO_MINUTOS = 10
+# Validade do cache (consultas marcadas por outros terminais)
+CACHE_TTL = 60
+
+_cache: Dict[Tuple[int, date], Tuple[float, List[Tuple[int, int]]]] = {}
+_cache_lock = threading.Lock()
+
+
+def _para_data(valor) -> date:
+    if isinstance(valor, datetime):
+        return valor.date()
+    if isinstance(valor, date):
+        return valor
+    return datetime.strptime(str(valor)[:10], '%Y-%m-%d').date()
+
+
+def _para_minutos(valor) -> Optional[int]:
+    """Converte time | timedelta | 'HH:MM[:SS]' em minutos desde 00:00."""
+    if valor is None:
+        return None
+    if isinstance(valor, timedelta):
+        return int(valor.total_seconds()) // 60
+    if isinstance(valor, time):
+        return valor.hour * 60 + valor.minute
+    try:
+        partes = str(valor).split(':')
+        return int(partes[0]) * 60 + int(partes[1])
+    except Exception:
+        return None
+
+
+def _formatar(minutos: int) -> str:
+    return f"{minutos // 60:02d}:{minutos % 60:02d}"
+
+
+def _mesclar(intervalos: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Ordena e une intervalos sobrepostos/contíguos."""
+    resultado: List[Tuple[int, int]] = []
+    for ini, fim in sorted(i for i in intervalos if i[1] > i[0]):
+        if resultado and ini <= resultado[-1][1]:
+            if fim > resultado[-1][1]:
+                resultado[-1] = (resultado[-1][0], fim)
+        else:
+            resultado.append((ini, fim))
+    return resultado
+
+
+def _subtrair(livres: List[Tuple[int, int]], ocupados: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+    """Remove de `livres` os intervalos `ocupados` (ambos ordenados e mesclados)."""
+    resultado: List[Tuple[int, int]] = []
+    j = 0
+    for ini, fim in livres:
+        cursor = ini
+        while j < len(ocupados) and ocupados[j][1] <= cursor:
+            j += 1
+        k = j
+        while k < len(ocupados) and ocupados[k][0] < fim:
+            o_ini, o_fim = ocupados[k]
+            if o_ini > cursor:
+                resultado.append((cursor, o_ini))
+            cursor = max(cursor, o_fim)
+            k += 1
+        if cursor < fim:
+            resultado.append((cursor, fim))
+    return resultado
+
+
+def invalidar_disponibilidade(medico_id: Optional[int] = None, data=None) -> None:
+    """Descarta o cache de um médico/data, de um médico inteiro ou de todos."""
+    with _cache_lock:
+        if medico_id is None:
+            _cache.clear()
+            return
+        medico_id = int(medico_id)
+        if data is not None:
+            _cache.pop((medico_id, _para_data(data)), None)
+            return
+        for chave in [k for k in _cache if k[0] == medico_id]:
+            _cache.pop(chave, None)
+
+
+class DisponibilidadeController:
+    """Consulta de horários livres por médico/data."""
+
+    def __init__(self, db_connection=None):
+        self.db_connection = db_connection
+
+    def carregar_periodo(self, medico_id: int, data_inicio, data_fim=None) -> Dict[date, List[Tuple[int, int]]]:
+        """
+        Calcula os intervalos livres (em minutos desde 00:00) de todas as datas do
+        período com uma única consulta ao banco e grava o resultado no cache.
+        """
+        medico_id = int(medico_id)
+        data_inicio = _para_data(data_inicio)
+        data_fim = _para_data(data_fim) if data_fim else data_inicio
+        if not self.db_connection:
+            raise Exception("Sem conexão com o banco de dados")
+
+        cursor = self.db_connection.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                """
+                SELECT 'H' AS origem, NULL AS data, h.dia_semana,
+                       h.hora_inicio AS inicio, h.hora_fim AS fim, NULL AS tempo
+                FROM horarios_disponiveis h
+                WHERE h.medico_id = %s
+                UNION ALL
+                SELECT 'C' AS origem, c.data, NULL AS dia_semana,
+                       c.hora AS inicio, NULL AS fim,
+                       (SELECT MAX(e.tempo) FROM exames_consultas e
+                         WHERE e.nome = c.tipo_atendimento) AS tempo
+                FROM consultas c
+                WHERE c.medico_id = %s AND c.data >= %s AND c.data <= %s
+                """,
+                (medico_id, medico_id, data_inicio, data_fim)
+            )
+            linhas = cursor.fetchall() or []
+        finally:
+            cursor.close()
+
+        faixas: Dict[int, List[Tuple[int, int]]] = {}
+        ocupados: Dict[date, List[Tuple[int, int]]] = {}
+        for linha in linhas:
+            inicio = _para_minutos(linha.get('inicio'))
+            if inicio is None:
+                continue
+            if linha.get('origem') == 'H':
+                fim = _para_minutos(linha.get('fim'))
+                if fim is not None:
+                    faixas.setdefault(int(linha.get('dia_semana')), []).append((inicio, fim))
+            else:
+                try:
+                    duracao = int(linha.get('tempo') or 0)
+                except (TypeError, ValueError):
+                    duracao = 0
+                duracao = duracao if duracao > 0 else DURACAO_PADRAO
+                ocupados.setdefault(_para_data(linha.get('data')), []).append((inicio, inicio + duracao))
+
+        faixas = {dia: _mesclar(lista) for dia, lista in faixas.items()}
+        resultado: Dict[date, List[Tuple[int, int]]] = {}
+        agora = _time.monotonic()
+        dia = data_inicio
+        with _cache_lock:
+            while dia <= data_fim:
+                livres = _subtrair(faixas.get(dia.weekday(), []), _mesclar(ocupados.get(dia, [])))
+                resultado[dia] = livres
+                _cache[(medico_id, dia)] = (agora, livres)
+                dia += timedelta(days=1)
+        return resultado
+
+    def intervalos_livres(self, medico_id: int, data) -> List[Tuple[int, int]]:
+        """Intervalos livres do médico na data (usa o cache quando válido)."""
+        chave = (int(medico_id), _para_data(data))
+        with _cache_lock:
+            item = _cache.get(chave)
+        if item and (_time.monotonic() - item[0]) < CACHE_TTL:
+            return item[1]
+        return self.carregar_periodo(chave[0], chave[1])[chave[1]]
+
+    def horarios_livres(self, medico_id: int, data, duracao: int = DURACAO_PADRAO,
+                        passo: int = PASSO_MINUTOS) -> List[str]:
+        """Horários de início ('HH:MM') em que cabe um atendimento de `duracao` minutos."""
+        duracao = max(int(duracao or DURACAO_PADRAO), 1)
+        horarios = []
+        for ini, fim in self.intervalos_livres(medico_id, data):
+            t = ini
+            while t + duracao <= fim:
+                horarios.append(_formatar(t))
+                t += passo
+        return horarios
+
+    def proximo_horario_livre(self, medico_id: int, duracao: int = DURACAO_PADRAO,
+                              data_inicio=None, dias: int = 30,
+                              a_partir_de: Optional[str] = None) -> Optional[Tuple[date, str]]:
+        """
+        Primeiro horário com `duracao` minutos livres a partir de `data_inicio`
+        (e opcionalmente da hora `a_partir_de` no primeiro dia), buscando até `dias` dias.
+        Retorna (data, 'HH:MM') ou None.
+        """
+        data_inicio = _para_data(data_inicio) if data_inicio else date.today()
+        data_fim = data_inicio + timedelta(days=max(int(dias), 1) - 1)
+        duracao = max(int(duracao or DURACAO_PADRAO), 1)
+        minimo = _para_minutos(a_partir_de) or 0
+        periodo = self.carregar_periodo(medico_id, data_inicio, data_fim)
+        for dia in sorted(periodo):
+            for ini, fim in periodo[dia]:
+                inicio = max(ini, minimo) if dia == data_inicio else ini
+                if inicio + duracao <= fim:
+                    return dia, _formatar(inicio)
+        return None
@@ -1,5 +1,7 @@
 from datetime import datetime, time, timedelta
 
+from src.controllers.disponibilidade_controller import invalidar_disponibilidade
+
 class HorarioController:
     def __init__(self, db_connection):
         self.db_connection = db_connection
@@ -17,6 +19,7 @@ class HorarioController:
             """
             cursor.execute(query, (medico_id, dia_semana, hora_inicio, hora_fim))
             self.db_connection.commit()
+            invalidar_disponibilidade(medico_id)
             return True, "Horário salvo com sucesso!"
         except Exception as e:
             self.db_connection.rollback()
@@ -34,6 +37,7 @@ class HorarioController:
             """
             cursor.execute(query, (horario_id,))
             self.db_connection.commit()
+            invalidar_disponibilidade()
             return True, "Horário removido com sucesso!"
         except Exception as e:
             self.db_connection.rollback()
@@ -1,13 +1,65 @@
 
 
+import time
 from typing import Dict, List, Optional, Any
 from src.db.database import get_db
-from src.utils.gerenciador_permissoes_db import GerenciadorPermissoesDB
+from src.utils.gerenciador_permissoes_db import GerenciadorPermissoesDB, PermissoesCompiladas
+from src.utils.notificador import publicar
+
+# Permissões compiladas por usuário logado neste processo (carregadas no login)
+_permissoes_sessao: Dict[int, PermissoesCompiladas] = {}
+# Intervalo mínimo (s) entre conferências da versão das permissões no banco
+INTERVALO_VERSAO = 60.0
+
 
 class PermissionController:
     def __init__(self, db=None):
         self.db = db if db is not None else get_db()
         self.gerenciador = GerenciadorPermissoesDB(self.db)
+        self._versao_conferida_em = 0.0
+
+    @staticmethod
+    def _obter_usuario_id(usuario) -> Optional[int]:
+        if hasattr(usuario, 'id'):
+            return int(usuario.id)
+        if hasattr(usuario, 'get_id'):
+            return int(usuario.get_id())
+        if isinstance(usuario, (int, str)):
+            return int(usuario)
+        return None
+
+    def carregar_permissoes_sessao(self, usuario) -> Optional[PermissoesCompiladas]:
+        """Compila a matriz de permissões do usuário (chamar no login). As verificações
+        seguintes deste usuário não vão ao banco."""
+        usuario_id = self._obter_usuario_id(usuario)
+        if usuario_id is None:
+            return None
+        compiladas = self.gerenciador.compilar_permissoes(usuario_id)
+        if compiladas is not None:
+            _permissoes_sessao[usuario_id] = compiladas
+        self._versao_conferida_em = time.monotonic()
+        return compiladas
+
+    def invalidar_permissoes_sessao(self, usuario_id: Optional[int] = None) -> None:
+        """Descarta as permissões compiladas (de um usuário ou de todos); são recompiladas
+        na próxima verificação."""
+        if usuario_id is None:
+            _permissoes_sessao.clear()
+        else:
+            _permissoes_sessao.pop(int(usuario_id), None)
+
+    def _permissoes_atuais(self, usuario_id: int) -> Optional[PermissoesCompiladas]:
+        """Permissões compiladas do usuário, recompiladas se a versão no banco mudou
+        (conferida no máximo a cada INTERVALO_VERSAO segundos)."""
+        compiladas = _permissoes_sessao.get(usuario_id)
+        if compiladas is None:
+            return None
+        agora = time.monotonic()
+        if agora - self._versao_conferida_em >= INTERVALO_VERSAO:
+            self._versao_conferida_em = agora
+            if self.gerenciador.versao_permissoes() != compiladas.versao:
+                compiladas = self.carregar_permissoes_sessao(usuario_id) or compiladas
+        return compiladas
     
     def verificar_permissao(self, usuario, modulo: str, acao: Optional[str] = None) -> bool:
         """
@@ -23,15 +75,15 @@ class PermissionController:
         """
         try:
             # Se for um objeto Usuario, pega o ID
-            if hasattr(usuario, 'id'):
-                usuario_id = int(usuario.id)
-            elif hasattr(usuario, 'get_id'):
-                usuario_id = int(usuario.get_id())
-            elif isinstance(usuario, (int, str)):
-                usuario_id = int(usuario)
-            else:
+            usuario_id = self._obter_usuario_id(usuario)
+            if usuario_id is None:
                 print(f"[ERRO] Não foi possível obter o ID do usuário. Tipo: {type(usuario)}")
                 return False
+
+            # Usuário com permissões compiladas no login: verificação em memória
+            compiladas = self._permissoes_atuais(usuario_id)
+            if compiladas is not None:
+                return compiladas.permitido(modulo, acao)
         
             return self.gerenciador.verificar_permissao(usuario_id, modulo, acao)
         
@@ -61,7 +113,18 @@ class PermissionController:
         Returns:
             bool: True se as permissões foram salvas com sucesso
         """
-        return self.gerenciador.salvar_todas_permissoes(permissoes)
+        ok = self.gerenciador.salvar_todas_permissoes(permissoes)
+        if ok:
+            self._permissoes_alteradas()
+        return ok
+
+    def _permissoes_alteradas(self) -> None:
+        """Incrementa a versão das permissões, recompila as sessões deste processo e
+        avisa as demais estações (que também conferem a versão periodicamente)."""
+        self.gerenciador.incrementar_versao()
+        for usuario_id in list(_permissoes_sessao):
+            self.carregar_permissoes_sessao(usuario_id)
+        publicar('permissoes', {'versao': self.gerenciador.versao_permissoes()})
     
     def obter_todos_os_perfis(self) -> List[Dict]:
         """Obtém todos os perfis do sistema"""
@@ -139,6 +202,7 @@ class PermissionController:
                 
                 # Confirma a transação
                 self.db.connection.commit()
+                self._permissoes_alteradas()
                 return True
                 
             except Exception as e:
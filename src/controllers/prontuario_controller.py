@@ -1,9 +1,16 @@
 """
 Controlador para operações relacionadas a prontuários e modelos de texto.
 """
+import threading
+from collections import OrderedDict
 from typing import Dict, List, Optional, Any, Union, Tuple
 from datetime import datetime
 
+# Cache LRU do conteúdo dos prontuários (id -> texto), compartilhado pelas telas
+CACHE_CONTEUDO_MAX = 64
+_cache_conteudo: "OrderedDict[int, str]" = OrderedDict()
+_cache_lock = threading.Lock()
+
 class ProntuarioController:
     """Controlador para operações relacionadas a prontuários e modelos de texto."""
     
@@ -85,6 +92,85 @@ class ProntuarioController:
             print(f"Erro ao buscar prontuários do paciente: {e}")
             return []
     
+    def listar_prontuarios_paciente(self, paciente_id: int, limite: int = 30,
+                                    apos: Optional[Tuple[Any, int]] = None) -> List[Dict[str, Any]]:
+        """
+        Lista apenas os metadados dos prontuários de um paciente (sem o conteúdo),
+        mais recentes primeiro, com paginação por chave.
+        
+        Args:
+            paciente_id: ID do paciente.
+            limite: Quantidade de registros da página.
+            apos: (data, id) do último item da página anterior; None para a primeira.
+            
+        Returns:
+            Lista com id, paciente_id, consulta_id, titulo, data, usuario_id,
+            nome_medico e tamanho (caracteres do conteúdo).
+        """
+        query = """
+            SELECT 
+                p.id,
+                p.paciente_id,
+                p.consulta_id,
+                p.titulo,
+                p.data,
+                p.usuario_id,
+                u.nome AS nome_medico,
+                CHAR_LENGTH(p.conteudo) AS tamanho
+            FROM prontuarios p
+            LEFT JOIN usuarios u ON u.id = p.usuario_id
+            WHERE p.paciente_id = %s
+        """
+        params: List[Any] = [paciente_id]
+        if apos:
+            query += " AND (p.data < %s OR (p.data = %s AND p.id < %s))"
+            params.extend([apos[0], apos[0], apos[1]])
+        query += " ORDER BY p.data DESC, p.id DESC LIMIT %s"
+        params.append(int(limite))
+        try:
+            return self._execute_query(query, tuple(params)) or []
+        except Exception as e:
+            print(f"Erro ao listar prontuários do paciente: {e}")
+            return []
+
+    def obter_conteudo_prontuario(self, prontuario_id: int) -> str:
+        """Conteúdo de um prontuário, via cache LRU."""
+        prontuario_id = int(prontuario_id)
+        with _cache_lock:
+            if prontuario_id in _cache_conteudo:
+                _cache_conteudo.move_to_end(prontuario_id)
+                return _cache_conteudo[prontuario_id]
+        return self.carregar_conteudos([prontuario_id]).get(prontuario_id, '')
+
+    def carregar_conteudos(self, ids: List[int]) -> Dict[int, str]:
+        """Busca numa única consulta o conteúdo dos ids que ainda não estão no cache
+        (usado também para pré-carregar os vizinhos do carrossel)."""
+        ids = [int(i) for i in ids if i]
+        with _cache_lock:
+            faltando = [i for i in ids if i not in _cache_conteudo]
+        if faltando:
+            query = f"""
+                SELECT id, conteudo FROM prontuarios
+                WHERE id IN ({', '.join(['%s'] * len(faltando))})
+            """
+            try:
+                linhas = self._execute_query(query, tuple(faltando)) or []
+            except Exception as e:
+                print(f"Erro ao carregar conteúdo de prontuários: {e}")
+                linhas = []
+            with _cache_lock:
+                for linha in linhas:
+                    _cache_conteudo[int(linha['id'])] = linha.get('conteudo') or ''
+                    _cache_conteudo.move_to_end(int(linha['id']))
+                while len(_cache_conteudo) > CACHE_CONTEUDO_MAX:
+                    _cache_conteudo.popitem(last=False)
+        with _cache_lock:
+            return {i: _cache_conteudo[i] for i in ids if i in _cache_conteudo}
+
+    def _descartar_conteudo(self, prontuario_id: int):
+        with _cache_lock:
+            _cache_conteudo.pop(int(prontuario_id), None)
+
     def buscar_prontuario_por_id(self, prontuario_id: int) -> Optional[Dict[str, Any]]:
         """
         Busca um prontuário pelo ID.
@@ -195,6 +281,7 @@ class ProntuarioController:
         
         try:
             self._execute_query(query, tuple(valores))
+            self._descartar_conteudo(prontuario_id)
             return True, "Prontuário atualizado com sucesso."
         except Exception as e:
             print(f"Erro ao atualizar prontuário: {e}")
@@ -214,6 +301,7 @@ class ProntuarioController:
         
         try:
             self._execute_query(query, (prontuario_id,))
+            self._descartar_conteudo(prontuario_id)
             return True, "Prontuário excluído com sucesso."
         except Exception as e:
             print(f"Erro ao excluir prontuário: {e}")
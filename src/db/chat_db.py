@@ -2,6 +2,13 @@ import socket
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Optional, Tuple
 
+from src.db.migrations import garantir_schema
+
+# Sessão sem heartbeat há mais que isso não aparece como online (heartbeat a cada ~10s)
+PRESENCA_TTL = 30
+# Sessões sem heartbeat há mais que isso são removidas pela limpeza periódica
+SESSAO_EXPIRADA = 600
+
 
 class ChatDB:
     """
@@ -18,69 +25,9 @@ class ChatDB:
 
     # --- Schema ---
     def ensure_schema(self):
-        cur = self.conn.cursor()
-        
-        # Verifica se a tabela chat_sessoes já existe
-        cur.execute("""
-            SELECT COUNT(*)
-            FROM information_schema.tables
-            WHERE table_schema = DATABASE()
-            AND table_name = 'chat_sessoes'
-        """)
-        tabela_sessoes_existe = cur.fetchone()[0] > 0
-        
-        # Verifica se a tabela chat_mensagens já existe
-        cur.execute("""
-            SELECT COUNT(*)
-            FROM information_schema.tables
-            WHERE table_schema = DATABASE()
-            AND table_name = 'chat_mensagens'
-        """)
-        tabela_mensagens_existe = cur.fetchone()[0] > 0
-        
-        # Cria a tabela de sessões/heartbeat (presença) se não existir
-        if not tabela_sessoes_existe:
-            try:
-                cur.execute(
-                    """
-                    CREATE TABLE chat_sessoes (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        usuario_id INT,
-                        usuario_nome VARCHAR(255),
-                        dispositivo VARCHAR(255),
-                        ultimo_heartbeat DATETIME,
-                        UNIQUE(usuario_id, dispositivo)
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                    """
-                )
-               
-            except Exception as e:
-                print(f"Erro ao criar tabela chat_sessoes: {e}")
-        
-        # Cria a tabela de mensagens se não existir
-        if not tabela_mensagens_existe:
-            try:
-                cur.execute(
-                    """
-                    CREATE TABLE chat_mensagens (
-                        id INT AUTO_INCREMENT PRIMARY KEY,
-                        remetente_id INT,
-                        remetente_nome VARCHAR(255),
-                        remetente_dispositivo VARCHAR(255),
-                        destinatario_id INT,
-                        destinatario_nome VARCHAR(255),
-                        destinatario_dispositivo VARCHAR(255),
-                        texto TEXT,
-                        criado_em DATETIME,
-                        lido_em DATETIME
-                    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                    """
-                )
-                print("Tabela chat_mensagens criada com sucesso.")
-            except Exception as e:
-                print(f"Erro ao criar tabela chat_mensagens: {e}")
-        
-        self.conn.commit()
+        """Garante as tabelas do chat aplicando as migrações pendentes.
+        Só vai ao banco na primeira chamada do processo (ver src/db/migrations.py)."""
+        garantir_schema(self.conn)
 
     # --- Presença ---
     def heartbeat(self, usuario_id: Optional[int], usuario_nome: str, dispositivo: Optional[str] = None):
@@ -179,18 +126,53 @@ class ChatDB:
                 pass
             raise
 
-    def listar_online(self) -> List[Dict[str, Any]]:
-        """Lista todas as sessões presentes em chat_sessoes (sem filtro de tempo)."""
+    def listar_online(self, ttl_segundos: Optional[int] = PRESENCA_TTL) -> List[Dict[str, Any]]:
+        """Lista as sessões com heartbeat nos últimos `ttl_segundos` (None = todas as sessões)."""
         cur = self.conn.cursor(dictionary=True)
-        cur.execute(
-            """
-            SELECT usuario_id, COALESCE(usuario_nome,'Usuário') AS usuario_nome, dispositivo, ultimo_heartbeat
-            FROM chat_sessoes
-            ORDER BY usuario_nome ASC
-            """
-        )
+        if ttl_segundos is None:
+            cur.execute(
+                """
+                SELECT usuario_id, COALESCE(usuario_nome,'Usuário') AS usuario_nome, dispositivo, ultimo_heartbeat
+                FROM chat_sessoes
+                ORDER BY usuario_nome ASC
+                """
+            )
+        else:
+            cur.execute(
+                """
+                SELECT usuario_id, COALESCE(usuario_nome,'Usuário') AS usuario_nome, dispositivo, ultimo_heartbeat
+                FROM chat_sessoes
+                WHERE ultimo_heartbeat >= NOW() - INTERVAL %s SECOND
+                ORDER BY usuario_nome ASC
+                """,
+                (int(ttl_segundos),)
+            )
         rows = cur.fetchall() or []
         return rows
+
+    def purgar_sessoes_inativas(self, expiracao_segundos: int = SESSAO_EXPIRADA, lote: int = 500) -> int:
+        """Remove sessões sem heartbeat há mais de `expiracao_segundos` (estações que fecharam
+        sem passar pelo sair()). Retorna o número de sessões removidas."""
+        try:
+            cur = self.conn.cursor()
+            cur.execute(
+                """
+                DELETE FROM chat_sessoes
+                WHERE ultimo_heartbeat < NOW() - INTERVAL %s SECOND
+                LIMIT %s
+                """,
+                (int(expiracao_segundos), int(lote))
+            )
+            afetadas = cur.rowcount
+            self.conn.commit()
+            return afetadas
+        except Exception as e:
+            print(f"[ChatDB] Erro ao remover sessões inativas: {e}")
+            try:
+                self.conn.rollback()
+            except Exception:
+                pass
+            return 0
     
     def listar_interlocutores(self, me_id: Optional[int], me_nome: str, me_disp: Optional[str] = None) -> List[Dict[str, Any]]:
         """Retorna a lista de usuários com quem o usuário atual já teve conversa (remetente ou destinatário).
@@ -317,31 +299,207 @@ class ChatDB:
             return (f"{prefix}_nome = %s AND {prefix}_dispositivo = %s", (nome, disp))
         return (f"{prefix}_nome = %s", (nome,))
 
+    def _conversa_where(
+        self,
+        a_id: Optional[int], a_nome: str, a_disp: Optional[str],
+        b_id: Optional[int], b_nome: str, b_disp: Optional[str],
+    ) -> List[Tuple[str, tuple]]:
+        """Condições das duas direções da conversa (A->B e B->A), cada uma servida
+        pelo índice (remetente_id, destinatario_id, criado_em)."""
+        direcoes = []
+        for rem, dest in (((a_id, a_nome, a_disp), (b_id, b_nome, b_disp)),
+                          ((b_id, b_nome, b_disp), (a_id, a_nome, a_disp))):
+            rem_clause, rem_vals = self._match_clause(*rem, 'remetente')
+            dest_clause, dest_vals = self._match_clause(*dest, 'destinatario')
+            direcoes.append((f"({rem_clause}) AND ({dest_clause})", rem_vals + dest_vals))
+        return direcoes
+
+    def listar_conversa_pagina(
+        self,
+        a_id: Optional[int], a_nome: str, a_disp: Optional[str],
+        b_id: Optional[int], b_nome: str, b_disp: Optional[str],
+        limite: int = 50,
+        antes: Optional[Tuple[Any, int]] = None,
+        arquivo: bool = False
+    ) -> List[Dict[str, Any]]:
+        """Página mais recente da conversa (ou a anterior ao cursor `antes` = (criado_em, id)),
+        em ordem cronológica. Paginação por chave (criado_em, id), sem OFFSET.
+        `arquivo=True` lê de chat_mensagens_arquivo (histórico movido pela retenção)."""
+        tabela = 'chat_mensagens_arquivo' if arquivo else 'chat_mensagens'
+        partes = []
+        params: list = []
+        for where, vals in self._conversa_where(a_id, a_nome, a_disp, b_id, b_nome, b_disp):
+            keyset = ""
+            if antes is not None:
+                keyset = " AND (criado_em < %s OR (criado_em = %s AND id < %s))"
+            partes.append(
+                f"""
+                (SELECT id, remetente_nome, texto, criado_em
+                 FROM {tabela}
+                 WHERE {where}{keyset}
+                 ORDER BY criado_em DESC, id DESC
+                 LIMIT %s)
+                """
+            )
+            params += list(vals)
+            if antes is not None:
+                params += [antes[0], antes[0], int(antes[1])]
+            params.append(int(limite))
+        cur = self.conn.cursor(dictionary=True)
+        cur.execute(
+            f"""
+            SELECT id, remetente_nome, texto, criado_em
+            FROM ({' UNION ALL '.join(partes)}) AS conversa
+            ORDER BY criado_em DESC, id DESC
+            LIMIT %s
+            """,
+            (*params, int(limite))
+        )
+        rows = cur.fetchall() or []
+        rows.reverse()
+        return rows
+
+    def listar_conversa_desde(
+        self,
+        a_id: Optional[int], a_nome: str, a_disp: Optional[str],
+        b_id: Optional[int], b_nome: str, b_disp: Optional[str],
+        depois_id: int,
+        limite: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Mensagens da conversa com id > depois_id (para acrescentar ao fim da tela)."""
+        partes = []
+        params: list = []
+        for where, vals in self._conversa_where(a_id, a_nome, a_disp, b_id, b_nome, b_disp):
+            partes.append(
+                f"""
+                SELECT id, remetente_nome, texto, criado_em
+                FROM chat_mensagens
+                WHERE {where} AND id > %s
+                """
+            )
+            params += [*vals, int(depois_id or 0)]
+        cur = self.conn.cursor(dictionary=True)
+        cur.execute(
+            f"""
+            SELECT id, remetente_nome, texto, criado_em
+            FROM ({' UNION ALL '.join(partes)}) AS conversa
+            ORDER BY id ASC
+            LIMIT %s
+            """,
+            (*params, int(limite))
+        )
+        rows = cur.fetchall() or []
+        return rows
+
     def listar_conversa(
         self,
         a_id: Optional[int], a_nome: str, a_disp: Optional[str],
         b_id: Optional[int], b_nome: str, b_disp: Optional[str],
         limite: int = 200
     ) -> List[Dict[str, Any]]:
-        # Monta where: (A->B) OR (B->A)
-        a_to_b_clause, a_to_b_vals = self._match_clause(a_id, a_nome, a_disp, 'remetente')
-        a_to_b_dest_clause, a_to_b_dest_vals = self._match_clause(b_id, b_nome, b_disp, 'destinatario')
-        b_to_a_clause, b_to_a_vals = self._match_clause(b_id, b_nome, b_disp, 'remetente')
-        b_to_a_dest_clause, b_to_a_dest_vals = self._match_clause(a_id, a_nome, a_disp, 'destinatario')
+        """Últimas `limite` mensagens da conversa, em ordem cronológica."""
+        return self.listar_conversa_pagina(a_id, a_nome, a_disp, b_id, b_nome, b_disp, limite=limite)
 
-        where = f"(({a_to_b_clause}) AND ({a_to_b_dest_clause})) OR (({b_to_a_clause}) AND ({b_to_a_dest_clause}))"
-        params = a_to_b_vals + a_to_b_dest_vals + b_to_a_vals + b_to_a_dest_vals
+    # --- Retenção / arquivo ---
+    def arquivar_mensagens(self, dias: int = 90, lote: int = 500, max_lotes: Optional[int] = None,
+                           pausa: float = 0.05) -> int:
+        """Move para chat_mensagens_arquivo as mensagens lidas com mais de `dias` dias.
+        Cada lote é uma transação curta (INSERT ... SELECT + DELETE ... LIMIT sobre os mesmos ids),
+        para não segurar travas na tabela usada pelas estações. Retorna o total arquivado."""
+        import time
+        total = 0
+        lotes = 0
+        while max_lotes is None or lotes < max_lotes:
+            cur = self.conn.cursor()
+            try:
+                cur.execute(
+                    """
+                    SELECT id FROM chat_mensagens
+                    WHERE criado_em < NOW() - INTERVAL %s DAY AND lido_em IS NOT NULL
+                    ORDER BY id
+                    LIMIT %s
+                    """,
+                    (int(dias), int(lote))
+                )
+                ids = [int(r[0]) for r in cur.fetchall() or []]
+                if not ids:
+                    break
+                marcadores = ", ".join(["%s"] * len(ids))
+                self.conn.start_transaction()
+                cur.execute(
+                    f"""
+                    INSERT INTO chat_mensagens_arquivo (
+                        id, remetente_id, remetente_nome, remetente_dispositivo,
+                        destinatario_id, destinatario_nome, destinatario_dispositivo,
+                        texto, criado_em, lido_em, arquivado_em
+                    )
+                    SELECT id, remetente_id, remetente_nome, remetente_dispositivo,
+                           destinatario_id, destinatario_nome, destinatario_dispositivo,
+                           texto, criado_em, lido_em, NOW()
+                    FROM chat_mensagens
+                    WHERE id IN ({marcadores})
+                    """,
+                    tuple(ids)
+                )
+                cur.execute(
+                    f"DELETE FROM chat_mensagens WHERE id IN ({marcadores}) LIMIT %s",
+                    (*ids, len(ids))
+                )
+                self.conn.commit()
+                total += len(ids)
+                lotes += 1
+            except Exception as e:
+                print(f"[ChatDB] Erro ao arquivar mensagens: {e}")
+                try:
+                    self.conn.rollback()
+                except Exception:
+                    pass
+                break
+            finally:
+                cur.close()
+            if len(ids) < lote:
+                break
+            time.sleep(pausa)
+        return total
 
+    def buscar_mensagens_arquivadas(
+        self,
+        usuario_id: Optional[int], usuario_nome: str, dispositivo: Optional[str],
+        termo: Optional[str] = None,
+        data_inicio=None, data_fim=None,
+        limite: int = 200
+    ) -> List[Dict[str, Any]]:
+        """Busca sob demanda no arquivo: mensagens enviadas ou recebidas pelo usuário,
+        opcionalmente filtradas por trecho do texto e período (datas inclusivas)."""
+        rem_clause, rem_vals = self._match_clause(usuario_id, usuario_nome, dispositivo, 'remetente')
+        dest_clause, dest_vals = self._match_clause(usuario_id, usuario_nome, dispositivo, 'destinatario')
+        filtros = ""
+        filtro_vals: list = []
+        if termo:
+            filtros += " AND texto LIKE %s"
+            filtro_vals.append(f"%{termo}%")
+        if data_inicio:
+            filtros += " AND criado_em >= %s"
+            filtro_vals.append(data_inicio)
+        if data_fim:
+            filtros += " AND criado_em < %s + INTERVAL 1 DAY"
+            filtro_vals.append(data_fim)
         cur = self.conn.cursor(dictionary=True)
         cur.execute(
             f"""
-            SELECT id, remetente_nome, texto, criado_em
-            FROM chat_mensagens
-            WHERE {where}
-            ORDER BY criado_em ASC
+            SELECT * FROM (
+                (SELECT id, remetente_nome, destinatario_nome, texto, criado_em
+                 FROM chat_mensagens_arquivo WHERE ({rem_clause}){filtros}
+                 ORDER BY criado_em DESC LIMIT %s)
+                UNION ALL
+                (SELECT id, remetente_nome, destinatario_nome, texto, criado_em
+                 FROM chat_mensagens_arquivo WHERE ({dest_clause}){filtros}
+                 ORDER BY criado_em DESC LIMIT %s)
+            ) AS arquivo
+            ORDER BY criado_em DESC, id DESC
             LIMIT %s
             """,
-            (*params, limite)
+            (*rem_vals, *filtro_vals, int(limite), *dest_vals, *filtro_vals, int(limite), int(limite))
         )
         rows = cur.fetchall() or []
         return rows
@@ -361,6 +519,140 @@ class ChatDB:
         rows = cur.fetchall() or []
         return rows
 
+    def contar_nao_lidas(self, dest_id: Optional[int], dest_nome: str, dest_disp: Optional[str]) -> int:
+        """Quantidade de mensagens não lidas do destinatário (só o COUNT, sem trafegar textos)."""
+        dest_clause, dest_vals = self._match_clause(dest_id, dest_nome, dest_disp, 'destinatario')
+        cur = self.conn.cursor()
+        cur.execute(
+            f"SELECT COUNT(*) FROM chat_mensagens WHERE {dest_clause} AND lido_em IS NULL",
+            dest_vals
+        )
+        row = cur.fetchone()
+        return int(row[0] or 0) if row else 0
+
+    def ultimo_id_recebido(self, dest_id: Optional[int], dest_nome: str, dest_disp: Optional[str]) -> int:
+        """Maior id de mensagem recebida pelo destinatário (ponto de partida do cursor)."""
+        dest_clause, dest_vals = self._match_clause(dest_id, dest_nome, dest_disp, 'destinatario')
+        cur = self.conn.cursor()
+        cur.execute(
+            f"SELECT COALESCE(MAX(id), 0) FROM chat_mensagens WHERE {dest_clause}",
+            dest_vals
+        )
+        row = cur.fetchone()
+        return int(row[0] or 0) if row else 0
+
+    def novas_mensagens_desde(
+        self,
+        dest_id: Optional[int], dest_nome: str, dest_disp: Optional[str],
+        last_id: int = 0,
+        limite: int = 500
+    ) -> List[Dict[str, Any]]:
+        """Mensagens recebidas com id > last_id, em ordem de id.
+        O cliente guarda o maior id já visto: sem mensagens novas a consulta não retorna linhas."""
+        dest_clause, dest_vals = self._match_clause(dest_id, dest_nome, dest_disp, 'destinatario')
+        cur = self.conn.cursor(dictionary=True)
+        cur.execute(
+            f"""
+            SELECT id, remetente_id, remetente_nome, texto, criado_em, lido_em
+            FROM chat_mensagens
+            WHERE {dest_clause} AND id > %s
+            ORDER BY id ASC
+            LIMIT %s
+            """,
+            (*dest_vals, int(last_id or 0), limite)
+        )
+        rows = cur.fetchall() or []
+        return rows
+
+    def sincronizar(
+        self,
+        usuario_id: Optional[int], usuario_nome: str, dispositivo: Optional[str],
+        last_id: Optional[int] = None,
+        heartbeat: bool = True,
+        presenca: bool = False,
+        limite: int = 500,
+        presenca_ttl: int = PRESENCA_TTL
+    ) -> Dict[str, Any]:
+        """Ciclo do sincronizador do chat em uma única ida ao banco (multi-statement):
+        heartbeat (opcional), contagem de não lidas + maior id recebido, mensagens com
+        id > last_id (se informado) e lista de presença com heartbeat recente (opcional).
+        Retorna {'nao_lidas', 'ultimo_id', 'novas', 'online'} ('online' None se não pedida).
+        """
+        dest_clause, dest_vals = self._match_clause(usuario_id, usuario_nome, dispositivo, 'destinatario')
+        comandos = []
+        params: list = []
+        if heartbeat and usuario_id is not None:
+            comandos.append(
+                """
+                INSERT INTO chat_sessoes (usuario_id, usuario_nome, dispositivo, ultimo_heartbeat)
+                VALUES (%s, %s, %s, NOW()) AS new_vals
+                ON DUPLICATE KEY UPDATE
+                    ultimo_heartbeat = NOW(),
+                    usuario_nome = new_vals.usuario_nome
+                """
+            )
+            params += [usuario_id, str(usuario_nome), dispositivo or socket.gethostname()]
+        comandos.append(
+            f"""
+            SELECT
+                (SELECT COUNT(*) FROM chat_mensagens WHERE {dest_clause} AND lido_em IS NULL) AS nao_lidas,
+                (SELECT COALESCE(MAX(id), 0) FROM chat_mensagens WHERE {dest_clause}) AS ultimo_id
+            """
+        )
+        params += list(dest_vals) * 2
+        if last_id is not None:
+            comandos.append(
+                f"""
+                SELECT id, remetente_id, remetente_nome, texto, criado_em, lido_em
+                FROM chat_mensagens
+                WHERE {dest_clause} AND id > %s
+                ORDER BY id ASC
+                LIMIT %s
+                """
+            )
+            params += [*dest_vals, int(last_id), limite]
+        if presenca:
+            comandos.append(
+                """
+                SELECT usuario_id, COALESCE(usuario_nome,'Usuário') AS usuario_nome, dispositivo, ultimo_heartbeat
+                FROM chat_sessoes
+                WHERE ultimo_heartbeat >= NOW() - INTERVAL %s SECOND
+                ORDER BY usuario_nome ASC
+                """
+            )
+            params.append(int(presenca_ttl))
+
+        cur = self.conn.cursor(dictionary=True)
+        conjuntos = []
+        try:
+            for resultado in cur.execute(';'.join(comandos), tuple(params), multi=True):
+                if resultado.with_rows:
+                    conjuntos.append(resultado.fetchall() or [])
+            if heartbeat:
+                self.conn.commit()
+        except Exception:
+            try:
+                self.conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            cur.close()
+
+        contagem = (conjuntos[0][0] if conjuntos and conjuntos[0] else {}) or {}
+        pos = 1
+        novas = []
+        if last_id is not None:
+            novas = conjuntos[pos] if len(conjuntos) > pos else []
+            pos += 1
+        online = (conjuntos[pos] if len(conjuntos) > pos else []) if presenca else None
+        return {
+            'nao_lidas': int(contagem.get('nao_lidas') or 0),
+            'ultimo_id': int(contagem.get('ultimo_id') or 0),
+            'novas': novas,
+            'online': online,
+        }
+
     def marcar_lidas(self, ids: List[int]):
         if not ids:
             return
@@ -369,3 +661,18 @@ class ChatDB:
         sql = f"UPDATE chat_mensagens SET lido_em = NOW() WHERE id IN ({placeholders})"
         cur.execute(sql, tuple(ids))
         self.conn.commit()
+
+    def marcar_lidas_do_remetente(self, dest_id: Optional[int], dest_nome: str, dest_disp: Optional[str],
+                                  remetente_nome: str) -> int:
+        """Marca como lidas, num único UPDATE, as mensagens pendentes do remetente para o destinatário."""
+        dest_clause, dest_vals = self._match_clause(dest_id, dest_nome, dest_disp, 'destinatario')
+        cur = self.conn.cursor()
+        cur.execute(
+            f"""
+            UPDATE chat_mensagens SET lido_em = NOW()
+            WHERE {dest_clause} AND remetente_nome = %s AND lido_em IS NULL
+            """,
+            (*dest_vals, remetente_nome)
+        )
+        self.conn.commit()
+        return cur.rowcount
@@ -38,6 +38,39 @@ PROD_CONFIG = {
     'pool_size': 10
 }
 
+# Hub de notificações na rede local (src/utils/notificador.py).
+# A máquina servidora (IS_SERVER=True) roda o hub; as estações se conectam ao host do banco.
+# Sem hub acessível, as telas continuam atualizando por polling.
+# `token`: segredo compartilhado exigido pelo hub na conexão; None = derivado das credenciais
+# do banco (as estações que acessam o banco já o conhecem).
+# `buffer_max_kb`: estação que não lê os eventos e acumula mais que isso é desconectada.
+NOTIFICADOR_CONFIG = {
+    'ativo': True,
+    'porta': 47850,
+    'token': None,
+    'buffer_max_kb': 256,
+}
+
+# Retenção do chat: mensagens lidas há mais de `dias` vão para chat_mensagens_arquivo,
+# em lotes de `lote` linhas. Roda na máquina servidora a cada `intervalo_horas`.
+CHAT_RETENCAO_CONFIG = {
+    'ativo': True,
+    'dias': 90,
+    'lote': 500,
+    'intervalo_horas': 6,
+}
+
+# Instrumentação de desempenho (src/utils/instrumentacao.py), desligada por padrão.
+# Liga com 'ativo': True ou com a variável de ambiente INSTRUMENTACAO=True.
+# A cada `janela_s` segundos grava uma linha com os histogramas em `arquivo` (JSONL).
+INSTRUMENTACAO_CONFIG = {
+    'ativo': False,
+    'arquivo': str(Path.home() / '.clinicas' / 'instrumentacao.jsonl'),
+    'batimento_ms': 100,
+    'janela_s': 60,
+    'arquivo_max_mb': 5,
+}
+
 def _load_user_json_config():
     """Carrega o JSON de configuração do usuário se existir.
     Retorna um dicionário com possíveis chaves: host, port/porta, user/usuario, password/senha, database/nome_bd
@@ -3,23 +3,232 @@ Módulo de conexão com o banco de dados MySQL.
 
 Este módulo fornece uma classe para gerenciar conexões com o banco de dados MySQL
 usando MySQL Connector/Python em modo puro Python.
+
+Além da conexão compartilhada (get_connection), o DatabaseConnection expõe um
+pool de conexões thread-safe (checkout) para rotinas que rodam em paralelo
+(polls, jobs periódicos, workers), evitando que todas disputem o mesmo socket.
 """
+import threading
+import time
+from contextlib import contextmanager
+
 import mysql.connector
 from mysql.connector import Error
 from typing import Optional, Dict, Any, Union, List, Tuple
 
-from .config import get_db_config
+from .config import get_db_config, PROD_CONFIG
+
+# Chaves de configuração do pool nativo do conector que não devem ir para connect()
+_POOL_KEYS = ('pool_name', 'pool_size', 'pool_reset_session')
+
+
+# Observador das consultas (instrumentação): callback(sql, duracao_ms), ou None
+_observador_consultas = None
+_cursores_instrumentados = False
+# Consulta em andamento na thread: o executemany do conector chama execute por
+# dentro (uma vez no INSERT em lote, uma por linha nos demais), e só a chamada
+# externa deve ser contada
+_consulta_em_andamento = threading.local()
+
+
+def observar_consultas(callback):
+    """Registra `callback(sql, duracao_ms)` para cada execute/executemany de cursor
+    (um executemany conta uma vez, com a duração total).
+
+    O gancho fica nas classes de cursor do conector, então conta tanto as consultas
+    de execute_query/execute_many quanto as dos cursores abertos direto nos
+    controllers e módulos. Com callback=None o observador é removido (os cursores
+    seguem com o gancho, que não faz nada).
+    """
+    global _observador_consultas, _cursores_instrumentados
+    _observador_consultas = callback
+    if callback is None or _cursores_instrumentados:
+        return
+    _cursores_instrumentados = True
+    classes = []
+    try:
+        from mysql.connector import cursor as _cursor
+        classes += [c for c in vars(_cursor).values() if isinstance(c, type) and c.__name__.startswith('MySQLCursor')]
+    except Exception:
+        pass
+    try:
+        from mysql.connector import cursor_cext as _cursor_cext
+        classes += [c for c in vars(_cursor_cext).values() if isinstance(c, type) and c.__name__.startswith('CMySQLCursor')]
+    except Exception:
+        pass
+    for classe in classes:
+        for nome in ('execute', 'executemany'):
+            original = classe.__dict__.get(nome)
+            if original is not None:
+                setattr(classe, nome, _observado(original))
+
+
+def _observado(original):
+    def execute(cursor, operation, *args, **kwargs):
+        observador = _observador_consultas
+        if observador is None or getattr(_consulta_em_andamento, 'ativa', False):
+            return original(cursor, operation, *args, **kwargs)
+        _consulta_em_andamento.ativa = True
+        inicio = time.perf_counter()
+        try:
+            return original(cursor, operation, *args, **kwargs)
+        finally:
+            _consulta_em_andamento.ativa = False
+            try:
+                observador(operation, (time.perf_counter() - inicio) * 1000.0)
+            except Exception:
+                pass
+    execute.__name__ = original.__name__
+    execute.__doc__ = original.__doc__
+    return execute
+
+
+class PoolTimeoutError(Error):
+    """Nenhuma conexão do pool ficou livre dentro do tempo limite."""
+
+
+class ConnectionPool:
+    """Pool de conexões thread-safe com health-check por checkout e métricas.
+
+    As conexões são criadas sob demanda até `pool_size`. Cada checkout valida a
+    conexão (ping) antes de entregá-la; conexões quebradas são descartadas e
+    recriadas. Ao devolver, transações pendentes são desfeitas para que o
+    próximo usuário receba a conexão limpa.
+    """
+
+    def __init__(self, db_config: Dict[str, Any], pool_size: int = 5, timeout: float = 30.0):
+        self._config = {k: v for k, v in dict(db_config).items() if k not in _POOL_KEYS}
+        self.pool_size = max(1, int(pool_size or 1))
+        self.timeout = timeout
+        self._idle: List[Any] = []
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.pool_size)
+        self._metricas = {
+            'checkouts': 0,
+            'em_uso': 0,
+            'pico_em_uso': 0,
+            'criadas': 0,
+            'descartadas': 0,
+            'timeouts': 0,
+            'espera_total_s': 0.0,
+            'espera_max_s': 0.0,
+        }
+
+    def _nova_conexao(self):
+        conn = mysql.connector.connect(**self._config)
+        with self._lock:
+            self._metricas['criadas'] += 1
+        return conn
+
+    def _saudavel(self, conn) -> bool:
+        """Health-check da conexão (um ping ao servidor)."""
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Exception:
+            return False
+
+    def _descartar(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+        with self._lock:
+            self._metricas['descartadas'] += 1
+
+    def acquire(self, timeout: Optional[float] = None):
+        """Retira uma conexão do pool (bloqueia até `timeout` segundos)."""
+        limite = self.timeout if timeout is None else timeout
+        inicio = time.perf_counter()
+        if not self._slots.acquire(timeout=limite):
+            with self._lock:
+                self._metricas['timeouts'] += 1
+            raise PoolTimeoutError(msg=f"Pool de conexões esgotado ({self.pool_size}) após {limite}s")
+        espera = time.perf_counter() - inicio
+        try:
+            conn = None
+            while True:
+                with self._lock:
+                    conn = self._idle.pop() if self._idle else None
+                if conn is None:
+                    conn = self._nova_conexao()
+                    break
+                if self._saudavel(conn):
+                    break
+                self._descartar(conn)
+        except Exception:
+            self._slots.release()
+            raise
+        with self._lock:
+            m = self._metricas
+            m['checkouts'] += 1
+            m['em_uso'] += 1
+            m['pico_em_uso'] = max(m['pico_em_uso'], m['em_uso'])
+            m['espera_total_s'] += espera
+            m['espera_max_s'] = max(m['espera_max_s'], espera)
+        return conn
+
+    def release(self, conn):
+        """Devolve a conexão ao pool (desfazendo transação pendente)."""
+        reutilizar = conn is not None
+        if reutilizar:
+            try:
+                if conn.in_transaction:
+                    conn.rollback()
+                reutilizar = conn.is_connected()
+            except Exception:
+                reutilizar = False
+        with self._lock:
+            self._metricas['em_uso'] = max(0, self._metricas['em_uso'] - 1)
+            if reutilizar:
+                self._idle.append(conn)
+        if conn is not None and not reutilizar:
+            self._descartar(conn)
+        self._slots.release()
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None):
+        """Context manager: `with pool.connection() as conn: ...`"""
+        conn = self.acquire(timeout)
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def metricas(self) -> Dict[str, Any]:
+        """Retorna um snapshot das métricas do pool."""
+        with self._lock:
+            m = dict(self._metricas)
+            m['ociosas'] = len(self._idle)
+        m['tamanho'] = self.pool_size
+        m['espera_media_s'] = (m['espera_total_s'] / m['checkouts']) if m['checkouts'] else 0.0
+        return m
+
+    def close_all(self):
+        """Fecha as conexões ociosas (as em uso são fechadas ao serem devolvidas)."""
+        with self._lock:
+            ociosas, self._idle = self._idle, []
+        for conn in ociosas:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
 
 class DatabaseConnection:
     """Classe para gerenciar conexões com o banco de dados MySQL."""
     
     _instance = None
     _connection = None
+    _environment = None
+    _pool = None
+    _pool_lock = threading.Lock()
     
     def __new__(cls, environment: str = 'development'):
         """Implementa o padrão Singleton para garantir apenas uma instância da conexão."""
         if cls._instance is None:
             cls._instance = super(DatabaseConnection, cls).__new__(cls)
+            cls._environment = environment
             cls._initialize_connection(environment)
         return cls._instance
     
@@ -29,7 +238,7 @@ class DatabaseConnection:
         try:
             db_config = get_db_config(environment)
             # Remove configurações específicas do pool
-            for key in ['pool_name', 'pool_size', 'pool_reset_session']:
+            for key in _POOL_KEYS:
                 db_config.pop(key, None)
                 
             cls._connection = mysql.connector.connect(
@@ -52,12 +261,49 @@ class DatabaseConnection:
             
         db_config = get_db_config()
         # Remove configurações específicas do pool
-        for key in ['pool_name', 'pool_size', 'pool_reset_session']:
+        for key in _POOL_KEYS:
             db_config.pop(key, None)
             
         self._connection = mysql.connector.connect(
             **db_config
         )
+
+    # ------------------------- Pool de conexões -------------------------
+    def get_pool(self) -> ConnectionPool:
+        """Obtém (criando sob demanda) o pool de conexões do processo.
+        O tamanho vem de PROD_CONFIG['pool_size'].
+        """
+        cls = type(self)
+        if cls._pool is None:
+            with cls._pool_lock:
+                if cls._pool is None:
+                    db_config = get_db_config(cls._environment)
+                    cls._pool = ConnectionPool(db_config, pool_size=PROD_CONFIG.get('pool_size', 5))
+        return cls._pool
+
+    @contextmanager
+    def checkout(self, timeout: Optional[float] = None):
+        """Retira uma conexão exclusiva do pool e a devolve ao sair do bloco.
+
+        Uso:
+            with db.checkout() as conn:
+                cur = conn.cursor(dictionary=True)
+                ...
+        """
+        with self.get_pool().connection(timeout) as conn:
+            yield conn
+
+    def conexao_dedicada(self):
+        """Abre uma conexão fora do pool, para uso exclusivo de uma thread de longa duração
+        (ex.: sincronizador do chat). Quem abre é responsável por fechar."""
+        db_config = get_db_config(type(self)._environment)
+        for key in _POOL_KEYS:
+            db_config.pop(key, None)
+        return mysql.connector.connect(**db_config)
+
+    def pool_metrics(self) -> Dict[str, Any]:
+        """Métricas do pool: checkouts, em_uso, pico_em_uso, espera média/máxima etc."""
+        return self.get_pool().metricas()
     
     def execute_query(self, query: str, params: Optional[tuple] = None, 
                       fetch_all: bool = True) -> Union[List[Dict[str, Any]], Dict[str, Any], None]:
@@ -71,31 +317,30 @@ class DatabaseConnection:
         Returns:
             Lista de dicionários com os resultados ou um único dicionário se fetch_all=False
         """
-        cursor = None
-        
-        try:
-            connection = self.get_connection()
-            cursor = connection.cursor(dictionary=True)
-            
-            cursor.execute(query, params or ())
-            
-            if query.strip().upper().startswith(('SELECT', 'SHOW', 'DESCRIBE')):
-                result = cursor.fetchall() if fetch_all else cursor.fetchone()
-                return result
-            else:
-                connection.commit()
-                return {"rowcount": cursor.rowcount, "lastrowid": cursor.lastrowid}
+        with self.checkout() as connection:
+            cursor = None
+            try:
+                cursor = connection.cursor(dictionary=True)
                 
-        except Error as e:
-            if self._connection and self._connection.is_connected():
-                self._connection.rollback()
-            print(f"Erro ao executar consulta: {e}")
-            print(f"SQL: {query}")
-            print(f"Parâmetros: {params}")
-            raise
-        finally:
-            if cursor:
-                cursor.close()
+                cursor.execute(query, params or ())
+                
+                if query.strip().upper().startswith(('SELECT', 'SHOW', 'DESCRIBE')):
+                    result = cursor.fetchall() if fetch_all else cursor.fetchone()
+                    return result
+                else:
+                    connection.commit()
+                    return {"rowcount": cursor.rowcount, "lastrowid": cursor.lastrowid}
+                    
+            except Error as e:
+                if connection.is_connected():
+                    connection.rollback()
+                print(f"Erro ao executar consulta: {e}")
+                print(f"SQL: {query}")
+                print(f"Parâmetros: {params}")
+                raise
+            finally:
+                if cursor:
+                    cursor.close()
     
     def execute_many(self, query: str, params_list: List[tuple]) -> Dict[str, Any]:
         """Executa uma consulta SQL várias vezes com diferentes parâmetros.
@@ -107,29 +352,28 @@ class DatabaseConnection:
         Returns:
             Dicionário com informações sobre a execução
         """
-        cursor = None
-        
-        try:
-            connection = self.get_connection()
-            cursor = connection.cursor()
-            
-            cursor.executemany(query, params_list)
-            connection.commit()
-            
-            return {"rowcount": cursor.rowcount, "lastrowid": cursor.lastrowid}
+        with self.checkout() as connection:
+            cursor = None
+            try:
+                cursor = connection.cursor()
                 
-        except Error as e:
-            if self._connection and self._connection.is_connected():
-                self._connection.rollback()
-            print(f"Erro ao executar consulta em lote: {e}")
-            print(f"SQL: {query}")
-            print(f"Número de parâmetros: {len(params_list) if params_list else 0}")
-            if params_list and len(params_list) > 0:
-                print(f"Primeiro conjunto de parâmetros: {params_list[0]}")
-            raise
-        finally:
-            if cursor:
-                cursor.close()
+                cursor.executemany(query, params_list)
+                connection.commit()
+                
+                return {"rowcount": cursor.rowcount, "lastrowid": cursor.lastrowid}
+                    
+            except Error as e:
+                if connection.is_connected():
+                    connection.rollback()
+                print(f"Erro ao executar consulta em lote: {e}")
+                print(f"SQL: {query}")
+                print(f"Número de parâmetros: {len(params_list) if params_list else 0}")
+                if params_list and len(params_list) > 0:
+                    print(f"Primeiro conjunto de parâmetros: {params_list[0]}")
+                raise
+            finally:
+                if cursor:
+                    cursor.close()
 
 # Criar uma instância global para uso em todo o sistema
 db = DatabaseConnection()
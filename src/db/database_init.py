@@ -224,6 +224,14 @@ def verificar_e_criar_banco():
         
         # Cria as tabelas
         criar_tabelas(connection)
+
+        # Aplica as migrações versionadas (schema_version)
+        from .migrations import aplicar_migracoes, MigracoesEmAndamento
+        try:
+            aplicar_migracoes(connection)
+        except MigracoesEmAndamento as e:
+            # Outra estação está migrando; garantir_schema() confere de novo depois
+            print(f"[SCHEMA] {e}")
         
         return True
         
@@ -2,8 +2,126 @@
 Módulo para operações de banco de dados do módulo Financeiro.
 """
 from typing import Dict, List, Any, Optional
+import calendar
+import uuid
 import mysql.connector
-from datetime import datetime
+from datetime import date, datetime
+
+from src.db.migrations import garantir_schema, migracao_aplicada
+from src.utils.notificador import publicar
+
+# Colunas exibidas nas telas de contas a pagar/receber
+_COLUNAS_CONTAS = "id, descricao, categoria, dia_vencimento, valor_previsto, valor_atual, vencimento, status, serie_id"
+
+# Consultas frequentes em financeiro. Ficam aqui para o código e a regressão de
+# planos (src/db/verificar_planos.py) usarem o mesmo texto.
+SQL_MOVIMENTOS_SESSAO = """
+    SELECT id, tipo, valor, descricao, data AS data_hora, usuario_id, tipo_pagamento
+    FROM financeiro
+    WHERE sessao_id = %s AND tipo IN ('entrada','saida')
+    ORDER BY data ASC, id ASC
+"""
+
+# Parâmetros: (sessao_id, tipo)
+SQL_TOTAIS_SESSAO_POR_FORMA = """
+    SELECT tipo_pagamento, SUM(valor) AS total
+    FROM financeiro
+    WHERE sessao_id = %s AND tipo = %s
+    GROUP BY tipo_pagamento
+"""
+
+SQL_PAGAMENTO_DA_CONSULTA = """
+    SELECT data_pagamento, data
+    FROM financeiro
+    WHERE consulta_id = %s AND tipo = 'entrada' AND status = 'pago'
+    ORDER BY COALESCE(data_pagamento, data) DESC, id DESC
+    LIMIT 1
+"""
+
+# Intervalos [dia, dia + 1) em cada coluna, em vez de DATE(COALESCE(...)), para o
+# filtro usar o índice (paciente_id, tipo, status, data_pagamento, data).
+# Parâmetros: (paciente_id, dia, dia, dia, dia)
+SQL_PAGAMENTO_DO_PACIENTE_NO_DIA = """
+    SELECT data_pagamento, data
+    FROM financeiro
+    WHERE paciente_id = %s AND tipo = 'entrada' AND status = 'pago'
+      AND (
+            (data_pagamento >= %s AND data_pagamento < %s + INTERVAL 1 DAY)
+         OR (data_pagamento IS NULL AND data >= %s AND data < %s + INTERVAL 1 DAY)
+      )
+    ORDER BY COALESCE(data_pagamento, data) DESC, id DESC
+    LIMIT 1
+"""
+
+SQL_FINANCEIRO_PERIODO = """
+    SELECT id, data, descricao, tipo, tipo_pagamento, valor
+    FROM financeiro
+    WHERE data BETWEEN %s AND %s
+      AND tipo IN ('entrada','saida')
+    ORDER BY data ASC, id ASC
+"""
+
+# Parâmetros: (medico_id, inicio, fim)
+SQL_ENTRADAS_MEDICO_PERIODO = """
+    SELECT f.data, COALESCE(c.tipo_atendimento, f.descricao) AS descricao, f.tipo_pagamento, f.valor
+    FROM financeiro f
+    LEFT JOIN consultas c ON c.id = f.consulta_id
+    WHERE f.tipo = 'entrada'
+      AND c.medico_id = %s
+      AND f.data BETWEEN %s AND %s
+    ORDER BY f.data ASC
+"""
+
+
+class FiltroContas:
+    """Filtro das listagens de contas a pagar/receber, traduzido em SQL por FinanceiroDB.
+
+    - status: 'aberto' | 'pago' | 'recebido' | None (todos)
+    - mes/ano: mês de vencimento (1..12); com o ano vira intervalo de datas
+    - atrasadas: somente em aberto com vencimento anterior a hoje
+    - categoria: categoria exata
+    - texto: trecho da descrição ou da categoria
+    """
+
+    def __init__(self, status: Optional[str] = None, mes: Optional[int] = None, ano: Optional[int] = None,
+                 atrasadas: bool = False, categoria: Optional[str] = None, texto: Optional[str] = None):
+        status = (status or '').strip().lower()
+        self.status = None if status in ('', 'todos') else status
+        self.mes = int(mes) if mes else None
+        self.ano = int(ano) if ano else None
+        self.atrasadas = bool(atrasadas)
+        self.categoria = (categoria or '').strip() or None
+        self.texto = (texto or '').strip() or None
+
+    def where(self) -> tuple[str, list]:
+        """Retorna (cláusula WHERE sem a palavra-chave, parâmetros)."""
+        condicoes: list[str] = []
+        params: list = []
+        if self.atrasadas:
+            condicoes.append("status = 'aberto' AND vencimento < CURDATE()")
+        elif self.status:
+            condicoes.append("status = %s")
+            params.append(self.status)
+        if self.mes and self.ano:
+            inicio = datetime(self.ano, self.mes, 1).date()
+            fim = datetime(self.ano + (self.mes // 12), self.mes % 12 + 1, 1).date()
+            # Sem data específica a conta vale para qualquer mês (dia_vencimento fixo)
+            condicoes.append(
+                "((vencimento >= %s AND vencimento < %s) OR (vencimento IS NULL AND dia_vencimento > 0))"
+            )
+            params.extend([inicio, fim])
+        elif self.mes:
+            condicoes.append("(MONTH(vencimento) = %s OR (vencimento IS NULL AND dia_vencimento > 0))")
+            params.append(self.mes)
+        if self.categoria:
+            condicoes.append("categoria = %s")
+            params.append(self.categoria)
+        if self.texto:
+            condicoes.append("(descricao LIKE %s OR categoria LIKE %s)")
+            padrao = f"%{self.texto}%"
+            params.extend([padrao, padrao])
+        return (" AND ".join(condicoes) or "1=1"), params
+
 
 class FinanceiroDB:
     """Classe para operações de banco de dados do módulo Financeiro."""
@@ -11,182 +129,22 @@ class FinanceiroDB:
     def __init__(self, db_connection):
         """Inicializa com uma conexão de banco de dados."""
         self.db = db_connection
+        # O schema é verificado uma única vez por processo (src/db/migrations.py);
+        # após a primeira vez esta chamada não vai ao banco.
+        self.ensure_schema()
+
+    def ensure_schema(self):
+        """Garante o schema necessário (caixa_sessoes, estoque, contas e colunas extras em financeiro)
+        aplicando as migrações pendentes na primeira chamada do processo."""
         try:
-            self.ensure_schema()
+            garantir_schema(self.db)
         except Exception:
             # Evita travar inicialização caso não tenha permissão para DDL
             pass
 
-    def ensure_schema(self):
-        """Garante o schema necessário: caixa_sessoes e migrações na tabela financeiro (sessao_id/usuario_id)."""
-        cursor = self.db.cursor()
-        try:
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS caixa_sessoes (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    abertura_datahora DATETIME NOT NULL,
-                    abertura_valor_inicial DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    abertura_usuario_id INT NULL,
-                    fechamento_datahora DATETIME NULL,
-                    fechamento_usuario_id INT NULL,
-                    observacao VARCHAR(255) NULL
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
-            # Conferências de fechamento cego
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS caixa_conferencias (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    sessao_id INT NOT NULL,
-                    datahora DATETIME NOT NULL,
-                    usuario_id INT NULL,
-                    -- Contados (entradas)
-                    cont_entr_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_entr_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_entr_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_entr_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_entr_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    -- Contados (saídas)
-                    cont_sai_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_sai_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_sai_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_sai_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    cont_sai_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    -- Esperados (entradas)
-                    esp_entr_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_entr_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_entr_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_entr_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_entr_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    -- Esperados (saídas)
-                    esp_sai_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_sai_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_sai_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_sai_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    esp_sai_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    -- Totais e diferenças
-                    total_cont_entradas DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    total_cont_saidas DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    total_esp_entradas DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    total_esp_saidas DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    dif_entradas DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    dif_saidas DECIMAL(10,2) NOT NULL DEFAULT 0,
-                    observacao VARCHAR(255) NULL,
-                    INDEX (sessao_id)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
-            self.db.commit()
-            # Estoque (produtos)
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS estoque (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    nome VARCHAR(160) NOT NULL,
-                    qtd_atual INT NOT NULL DEFAULT 0,
-                    qtd_minima INT NOT NULL DEFAULT 0,
-                    valor_ultima_compra DECIMAL(10,2) NULL,
-                    forma_pagamento_ultima VARCHAR(30) NULL,
-                    data_ultima_compra DATE NULL,
-                    criado_em DATETIME NOT NULL,
-                    atualizado_em DATETIME NOT NULL,
-                    UNIQUE KEY uniq_estoque_nome (nome)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
-            self.db.commit()
-            # Contas a pagar (recorrentes e variáveis)
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS contas_pagar (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    descricao VARCHAR(120) NOT NULL,
-                    categoria VARCHAR(80) NULL,
-                    dia_vencimento TINYINT NOT NULL,
-                    valor_previsto DECIMAL(10,2) NULL,
-                    valor_atual DECIMAL(10,2) NULL,
-                    vencimento DATE NULL,
-                    status ENUM('aberto','pago') NOT NULL DEFAULT 'aberto',
-                    pago_em DATETIME NULL,
-                    criado_em DATETIME NOT NULL,
-                    atualizado_em DATETIME NOT NULL,
-                    INDEX (status),
-                    INDEX (vencimento),
-                    INDEX (dia_vencimento)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
-            self.db.commit()
-            # Contas a receber (estrutura espelhada de contas_pagar)
-            cursor.execute(
-                """
-                CREATE TABLE IF NOT EXISTS contas_receber (
-                    id INT AUTO_INCREMENT PRIMARY KEY,
-                    descricao VARCHAR(120) NOT NULL,
-                    categoria VARCHAR(80) NULL,
-                    dia_vencimento TINYINT NOT NULL,
-                    valor_previsto DECIMAL(10,2) NULL,
-                    valor_atual DECIMAL(10,2) NULL,
-                    vencimento DATE NULL,
-                    status ENUM('aberto','recebido') NOT NULL DEFAULT 'aberto',
-                    pago_em DATETIME NULL,
-                    criado_em DATETIME NOT NULL,
-                    atualizado_em DATETIME NOT NULL,
-                    INDEX (status),
-                    INDEX (vencimento),
-                    INDEX (dia_vencimento)
-                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4;
-                """
-            )
-            self.db.commit()
-            # Migrações na tabela 'financeiro' para colunas solicitadas (idempotentes)
-            try:
-                cursor.execute("SHOW TABLES LIKE 'financeiro';")
-                if cursor.fetchone():
-                    # fundo_caixa
-                    cursor.execute("SHOW COLUMNS FROM financeiro LIKE 'fundo_caixa';")
-                    if not cursor.fetchone():
-                        try:
-                            cursor.execute("ALTER TABLE financeiro ADD COLUMN fundo_caixa DECIMAL(10,2) NULL;")
-                        except Exception:
-                            pass
-                    # data_pagamento
-                    cursor.execute("SHOW COLUMNS FROM financeiro LIKE 'data_pagamento';")
-                    if not cursor.fetchone():
-                        try:
-                            cursor.execute("ALTER TABLE financeiro ADD COLUMN data_pagamento DATETIME NULL;")
-                        except Exception:
-                            pass
-                    # aberto_por
-                    cursor.execute("SHOW COLUMNS FROM financeiro LIKE 'aberto_por';")
-                    if not cursor.fetchone():
-                        try:
-                            cursor.execute("ALTER TABLE financeiro ADD COLUMN aberto_por VARCHAR(100) NULL;")
-                        except Exception:
-                            pass
-                    # sessao_id
-                    cursor.execute("SHOW COLUMNS FROM financeiro LIKE 'sessao_id';")
-                    if not cursor.fetchone():
-                        try:
-                            cursor.execute("ALTER TABLE financeiro ADD COLUMN sessao_id INT NULL;")
-                        except Exception:
-                            pass
-                    # usuario_id
-                    cursor.execute("SHOW COLUMNS FROM financeiro LIKE 'usuario_id';")
-                    if not cursor.fetchone():
-                        try:
-                            cursor.execute("ALTER TABLE financeiro ADD COLUMN usuario_id INT NULL;")
-                        except Exception:
-                            pass
-                    # tipo_pagamento já existe no schema padrão; manter
-                    self.db.commit()
-            except Exception:
-                # Ignora falhas de migração silenciosamente
-                pass
-        finally:
-            cursor.close()
+    def _totais_sessao_disponiveis(self) -> bool:
+        """caixa_sessoes_totais existe (migração 10), independente das demais migrações."""
+        return migracao_aplicada(10, self.db)
 
     # ---------------- Estoque ----------------
     def estoque_criar_ou_obter_produto(self, nome: str, qtd_minima: int = 0) -> int:
@@ -350,28 +308,14 @@ class FinanceiroDB:
         finally:
             cursor.close()
 
-    def listar_contas_pagar(self, status: str | None = None) -> list[dict]:
-        cursor = self.db.cursor(dictionary=True)
-        try:
-            if status and status.lower() != 'todos':
-                cursor.execute(
-                    """
-                    SELECT * FROM contas_pagar
-                    WHERE status = %s
-                    ORDER BY COALESCE(vencimento, DATE(CONCAT(YEAR(NOW()),'-',LPAD(dia_vencimento,2,'0'),'-01'))) ASC, id ASC
-                    """,
-                    (status,)
-                )
-            else:
-                cursor.execute(
-                    """
-                    SELECT * FROM contas_pagar
-                    ORDER BY COALESCE(vencimento, DATE(CONCAT(YEAR(NOW()),'-',LPAD(dia_vencimento,2,'0'),'-01'))) ASC, id ASC
-                    """
-                )
-            return cursor.fetchall() or []
-        finally:
-            cursor.close()
+    def listar_contas_pagar(self, status: str | None = None, filtro: Optional[FiltroContas] = None,
+                            limite: Optional[int] = None, apos: Optional[tuple] = None) -> list[dict]:
+        """Lista contas a pagar por vencimento e id.
+        Com `limite`, retorna uma página; `apos` = (vencimento, id) da última linha da página anterior."""
+        return self._listar_contas('contas_pagar', filtro or FiltroContas(status=status), limite, apos)
+
+    def contar_contas_pagar(self, filtro: Optional[FiltroContas] = None) -> int:
+        return self._contar_contas('contas_pagar', filtro or FiltroContas())
 
     def atualizar_conta_pagar_status(self, conta_id: int, status: str) -> None:
         cursor = self.db.cursor()
@@ -411,16 +355,10 @@ class FinanceiroDB:
         finally:
             cursor.close()
 
-    def excluir_conta_pagar(self, conta_id: int) -> None:
-        cursor = self.db.cursor()
-        try:
-            cursor.execute("DELETE FROM contas_pagar WHERE id=%s", (conta_id,))
-            self.db.commit()
-        except Exception:
-            self.db.rollback()
-            raise
-        finally:
-            cursor.close()
+    def excluir_conta_pagar(self, conta_id: int, serie_id: str | None = None) -> None:
+        """Exclui a conta; com `serie_id`, também as demais parcelas em aberto da série,
+        na mesma transação."""
+        self._excluir_conta('contas_pagar', conta_id, serie_id)
 
     def atualizar_conta_pagar_dados(
         self,
@@ -430,26 +368,211 @@ class FinanceiroDB:
         dia_vencimento: int,
         valor_previsto: float | None,
         vencimento: datetime | None,
+        serie_id: str | None = None,
     ) -> None:
-        """Atualiza campos editáveis da conta a pagar."""
+        """Atualiza campos editáveis da conta a pagar; com `serie_id`, aplica descrição,
+        categoria e valor previsto às parcelas em aberto da série na mesma transação."""
+        self._atualizar_conta_dados('contas_pagar', conta_id, descricao, categoria, dia_vencimento,
+                                    valor_previsto, vencimento, serie_id)
+
+    # ---------------- Séries de contas (pagar/receber) ----------------
+    @staticmethod
+    def gerar_vencimentos(primeiro: date, quantidade: int) -> list[date]:
+        """Vencimentos mensais a partir de `primeiro`, sempre no mesmo dia do mês; nos meses
+        mais curtos usa o último dia (31/01 -> 28/02 -> 31/03)."""
+        if isinstance(primeiro, datetime):
+            primeiro = primeiro.date()
+        datas = []
+        for i in range(max(int(quantidade), 1)):
+            ano = primeiro.year + (primeiro.month - 1 + i) // 12
+            mes = (primeiro.month - 1 + i) % 12 + 1
+            dia = min(primeiro.day, calendar.monthrange(ano, mes)[1])
+            datas.append(date(ano, mes, dia))
+        return datas
+
+    def _criar_serie_contas(self, tabela: str, descricao: str, categoria: str | None, valor_previsto: float | None,
+                            primeiro_vencimento: date, quantidade: int) -> tuple[str | None, int]:
+        """Cria todas as parcelas num único INSERT de várias linhas, dentro de uma transação.
+        Retorna (serie_id, parcelas criadas); parcela única fica sem serie_id."""
+        vencimentos = self.gerar_vencimentos(primeiro_vencimento, quantidade)
+        serie_id = uuid.uuid4().hex if len(vencimentos) > 1 else None
+        agora = datetime.now()
+        linhas = []
+        for venc in vencimentos:
+            linhas.extend([descricao, categoria, venc.day, valor_previsto, venc, serie_id, agora, agora])
+        marcadores = ", ".join(["(%s, %s, %s, %s, NULL, %s, 'aberto', NULL, %s, %s, %s)"] * len(vencimentos))
         cursor = self.db.cursor()
         try:
-            agora = datetime.now()
+            if not self.db.in_transaction:
+                self.db.start_transaction()
             cursor.execute(
-                """
-                UPDATE contas_pagar
-                SET descricao=%s, categoria=%s, dia_vencimento=%s, valor_previsto=%s, vencimento=%s, atualizado_em=%s
-                WHERE id=%s
+                f"""
+                INSERT INTO {tabela} (descricao, categoria, dia_vencimento, valor_previsto, valor_atual, vencimento,
+                                      status, pago_em, serie_id, criado_em, atualizado_em)
+                VALUES {marcadores}
                 """,
-                (descricao, categoria, int(dia_vencimento), valor_previsto, vencimento, agora, conta_id)
+                tuple(linhas)
             )
+            criadas = cursor.rowcount
+            self.db.commit()
+            return serie_id, criadas
+        except Exception:
+            self.db.rollback()
+            raise
+        finally:
+            cursor.close()
+
+    @staticmethod
+    def _sql_atualizar_serie(tabela: str, serie_id: str, descricao: str | None = None,
+                             categoria: str | None = None, valor_previsto: float | None = None,
+                             alterar_valor: bool = False, a_partir_de: date | None = None) -> tuple[str, tuple] | None:
+        """(sql, parâmetros) do UPDATE das parcelas em aberto da série; None se não há o que alterar."""
+        campos, params = [], []
+        if descricao is not None:
+            campos.append("descricao=%s")
+            params.append(descricao)
+        if categoria is not None:
+            campos.append("categoria=%s")
+            params.append(categoria or None)
+        if alterar_valor:
+            campos.append("valor_previsto=%s")
+            params.append(valor_previsto)
+        if not campos or not serie_id:
+            return None
+        campos.append("atualizado_em=%s")
+        params.append(datetime.now())
+        where = "serie_id=%s AND status='aberto'"
+        params.append(serie_id)
+        if a_partir_de is not None:
+            where += " AND vencimento >= %s"
+            params.append(a_partir_de)
+        return f"UPDATE {tabela} SET {', '.join(campos)} WHERE {where}", tuple(params)
+
+    @staticmethod
+    def _sql_excluir_serie(tabela: str, serie_id: str, a_partir_de: date | None = None) -> tuple[str, tuple]:
+        """(sql, parâmetros) do DELETE das parcelas em aberto da série."""
+        where = "serie_id=%s AND status='aberto'"
+        params: list = [serie_id]
+        if a_partir_de is not None:
+            where += " AND vencimento >= %s"
+            params.append(a_partir_de)
+        return f"DELETE FROM {tabela} WHERE {where}", tuple(params)
+
+    def _executar_em_transacao(self, comandos: list[tuple[str, tuple]]) -> int:
+        """Executa os comandos numa única transação; retorna o rowcount do último."""
+        cursor = self.db.cursor()
+        try:
+            if not self.db.in_transaction:
+                self.db.start_transaction()
+            for sql, params in comandos:
+                cursor.execute(sql, params)
+            afetadas = cursor.rowcount
             self.db.commit()
+            return afetadas
         except Exception:
             self.db.rollback()
             raise
         finally:
             cursor.close()
 
+    def _atualizar_serie_contas(self, tabela: str, serie_id: str, **campos) -> int:
+        """Atualiza, num único UPDATE, as parcelas em aberto da série (opcionalmente só as
+        com vencimento a partir de `a_partir_de`). Retorna o número de parcelas alteradas."""
+        comando = self._sql_atualizar_serie(tabela, serie_id, **campos)
+        if comando is None:
+            return 0
+        return self._executar_em_transacao([comando])
+
+    def _excluir_serie_contas(self, tabela: str, serie_id: str, a_partir_de: date | None = None) -> int:
+        """Cancela a série: remove as parcelas em aberto (as já pagas/recebidas ficam)."""
+        if not serie_id:
+            return 0
+        return self._executar_em_transacao([self._sql_excluir_serie(tabela, serie_id, a_partir_de)])
+
+    def _atualizar_conta_dados(self, tabela: str, conta_id: int, descricao: str, categoria: str | None,
+                               dia_vencimento: int, valor_previsto: float | None, vencimento: datetime | None,
+                               serie_id: str | None = None) -> None:
+        """UPDATE da conta e, com `serie_id`, das demais parcelas em aberto da série
+        (datas de cada parcela são mantidas), numa única transação."""
+        comandos = [(
+            f"""
+            UPDATE {tabela}
+            SET descricao=%s, categoria=%s, dia_vencimento=%s, valor_previsto=%s, vencimento=%s, atualizado_em=%s
+            WHERE id=%s
+            """,
+            (descricao, categoria, int(dia_vencimento), valor_previsto, vencimento, datetime.now(), conta_id)
+        )]
+        if serie_id:
+            serie = self._sql_atualizar_serie(tabela, serie_id, descricao=descricao, categoria=categoria or '',
+                                              valor_previsto=valor_previsto, alterar_valor=True)
+            if serie is not None:
+                comandos.append(serie)
+        self._executar_em_transacao(comandos)
+
+    def _excluir_conta(self, tabela: str, conta_id: int, serie_id: str | None = None) -> None:
+        """DELETE da conta e, com `serie_id`, das demais parcelas em aberto, numa única transação."""
+        comandos = [(f"DELETE FROM {tabela} WHERE id=%s", (conta_id,))]
+        if serie_id:
+            comandos.append(self._sql_excluir_serie(tabela, serie_id))
+        self._executar_em_transacao(comandos)
+
+    def criar_serie_contas_pagar(self, descricao: str, categoria: str | None, valor_previsto: float | None,
+                                 primeiro_vencimento: date, quantidade: int = 12) -> tuple[str | None, int]:
+        return self._criar_serie_contas('contas_pagar', descricao, categoria, valor_previsto,
+                                        primeiro_vencimento, quantidade)
+
+    def atualizar_serie_contas_pagar(self, serie_id: str, **campos) -> int:
+        return self._atualizar_serie_contas('contas_pagar', serie_id, **campos)
+
+    def excluir_serie_contas_pagar(self, serie_id: str, a_partir_de: date | None = None) -> int:
+        return self._excluir_serie_contas('contas_pagar', serie_id, a_partir_de)
+
+    def criar_serie_contas_receber(self, descricao: str, categoria: str | None, valor_previsto: float | None,
+                                   primeiro_vencimento: date, quantidade: int = 12) -> tuple[str | None, int]:
+        return self._criar_serie_contas('contas_receber', descricao, categoria, valor_previsto,
+                                        primeiro_vencimento, quantidade)
+
+    def atualizar_serie_contas_receber(self, serie_id: str, **campos) -> int:
+        return self._atualizar_serie_contas('contas_receber', serie_id, **campos)
+
+    def excluir_serie_contas_receber(self, serie_id: str, a_partir_de: date | None = None) -> int:
+        return self._excluir_serie_contas('contas_receber', serie_id, a_partir_de)
+
+    # ---------------- Listagem paginada (pagar/receber) ----------------
+    def _listar_contas(self, tabela: str, filtro: FiltroContas, limite: Optional[int] = None,
+                       apos: Optional[tuple] = None) -> list[dict]:
+        """Paginação por chave (vencimento, id), na ordem do índice (status, vencimento, id).
+        Contas sem vencimento vêm primeiro (NULL ordena antes no MySQL)."""
+        where, params = filtro.where()
+        if apos is not None:
+            venc, ultimo_id = apos
+            if venc is None:
+                where += " AND ((vencimento IS NULL AND id > %s) OR vencimento IS NOT NULL)"
+                params.append(ultimo_id)
+            else:
+                where += " AND (vencimento > %s OR (vencimento = %s AND id > %s))"
+                params.extend([venc, venc, ultimo_id])
+        sql = f"SELECT {_COLUNAS_CONTAS} FROM {tabela} WHERE {where} ORDER BY vencimento ASC, id ASC"
+        if limite:
+            sql += " LIMIT %s"
+            params.append(int(limite))
+        cursor = self.db.cursor(dictionary=True)
+        try:
+            cursor.execute(sql, tuple(params))
+            return cursor.fetchall() or []
+        finally:
+            cursor.close()
+
+    def _contar_contas(self, tabela: str, filtro: FiltroContas) -> int:
+        where, params = filtro.where()
+        cursor = self.db.cursor()
+        try:
+            cursor.execute(f"SELECT COUNT(*) FROM {tabela} WHERE {where}", tuple(params))
+            row = cursor.fetchone()
+            return int(row[0] or 0) if row else 0
+        finally:
+            cursor.close()
+
     # ---------------- Contas a Receber ----------------
     def criar_conta_receber(self, descricao: str, categoria: str | None, dia_vencimento: int, valor_previsto: float | None,
                              valor_atual: float | None, vencimento: datetime | None, status: str = 'aberto') -> int:
@@ -471,28 +594,14 @@ class FinanceiroDB:
         finally:
             cursor.close()
 
-    def listar_contas_receber(self, status: str | None = None) -> list[dict]:
-        cursor = self.db.cursor(dictionary=True)
-        try:
-            if status and status.lower() != 'todos':
-                cursor.execute(
-                    """
-                    SELECT * FROM contas_receber
-                    WHERE status = %s
-                    ORDER BY COALESCE(vencimento, DATE(CONCAT(YEAR(NOW()),'-',LPAD(dia_vencimento,2,'0'),'-01'))) ASC, id ASC
-                    """,
-                    (status,)
-                )
-            else:
-                cursor.execute(
-                    """
-                    SELECT * FROM contas_receber
-                    ORDER BY COALESCE(vencimento, DATE(CONCAT(YEAR(NOW()),'-',LPAD(dia_vencimento,2,'0'),'-01'))) ASC, id ASC
-                    """
-                )
-            return cursor.fetchall() or []
-        finally:
-            cursor.close()
+    def listar_contas_receber(self, status: str | None = None, filtro: Optional[FiltroContas] = None,
+                            limite: Optional[int] = None, apos: Optional[tuple] = None) -> list[dict]:
+        """Lista contas a receber por vencimento e id.
+        Com `limite`, retorna uma página; `apos` = (vencimento, id) da última linha da página anterior."""
+        return self._listar_contas('contas_receber', filtro or FiltroContas(status=status), limite, apos)
+
+    def contar_contas_receber(self, filtro: Optional[FiltroContas] = None) -> int:
+        return self._contar_contas('contas_receber', filtro or FiltroContas())
 
     def atualizar_conta_receber_status(self, conta_id: int, status: str) -> None:
         cursor = self.db.cursor()
@@ -540,36 +649,17 @@ class FinanceiroDB:
         dia_vencimento: int,
         valor_previsto: float | None,
         vencimento: datetime | None,
+        serie_id: str | None = None,
     ) -> None:
-        """Atualiza campos editáveis da conta a receber."""
-        cursor = self.db.cursor()
-        try:
-            agora = datetime.now()
-            cursor.execute(
-                """
-                UPDATE contas_receber
-                SET descricao=%s, categoria=%s, dia_vencimento=%s, valor_previsto=%s, vencimento=%s, atualizado_em=%s
-                WHERE id=%s
-                """,
-                (descricao, categoria, int(dia_vencimento), valor_previsto, vencimento, agora, conta_id)
-            )
-            self.db.commit()
-        except Exception:
-            self.db.rollback()
-            raise
-        finally:
-            cursor.close()
+        """Atualiza campos editáveis da conta a receber; com `serie_id`, aplica descrição,
+        categoria e valor previsto às parcelas em aberto da série na mesma transação."""
+        self._atualizar_conta_dados('contas_receber', conta_id, descricao, categoria, dia_vencimento,
+                                    valor_previsto, vencimento, serie_id)
 
-    def excluir_conta_receber(self, conta_id: int) -> None:
-        cursor = self.db.cursor()
-        try:
-            cursor.execute("DELETE FROM contas_receber WHERE id=%s", (conta_id,))
-            self.db.commit()
-        except Exception:
-            self.db.rollback()
-            raise
-        finally:
-            cursor.close()
+    def excluir_conta_receber(self, conta_id: int, serie_id: str | None = None) -> None:
+        """Exclui a conta; com `serie_id`, também as demais parcelas em aberto da série,
+        na mesma transação."""
+        self._excluir_conta('contas_receber', conta_id, serie_id)
 
     def atualizar_observacao_fechamento(self, sessao_id: int, observacao: Optional[str]) -> None:
         """Atualiza a observação em caixa_fechamentos_resumo para a sessão informada."""
@@ -685,7 +775,7 @@ class FinanceiroDB:
                     LEFT JOIN exames_consultas ec
                            ON ec.medico_id = c.medico_id
                           AND ec.nome = c.tipo_atendimento
-                    WHERE DATE(c.data) = %s
+                    WHERE c.data = %s
                       AND COALESCE(c.status_pagameto, 0) = 0
                     ORDER BY c.hora ASC, c.id ASC
                     """,
@@ -703,7 +793,7 @@ class FinanceiroDB:
                     LEFT JOIN exames_consultas ec
                            ON ec.medico_id = c.medico_id
                           AND ec.nome = c.tipo_atendimento
-                    WHERE DATE(c.data) = CURDATE()
+                    WHERE c.data = CURDATE()
                       AND COALESCE(c.status_pagameto, 0) = 0
                     ORDER BY c.hora ASC, c.id ASC
                     """
@@ -742,6 +832,7 @@ class FinanceiroDB:
                 (datetime.now(), float(valor_inicial or 0), usuario_id, observacao)
             )
             self.db.commit()
+            publicar('caixa', {'evento': 'abertura'})
             return cursor.lastrowid
         except Exception:
             self.db.rollback()
@@ -762,8 +853,15 @@ class FinanceiroDB:
         - fundo_caixa: valor do fundo quando aplicável (abertura)
         - aberto_por: nome do usuário que abriu (quando aplicável)
         """
+        # Entradas/saídas de uma sessão também atualizam caixa_sessoes_totais na mesma transação.
+        # Enquanto a migração 10 não é vista aqui, a atualização é tentada assim mesmo: se
+        # outra estação já criou a tabela, os totais não podem ficar para trás.
+        acumular = bool(sessao_id) and tipo in ('entrada', 'saida')
+        tabela_confirmada = acumular and self._totais_sessao_disponiveis()
         cursor = self.db.cursor()
         try:
+            if acumular and not self.db.in_transaction:
+                self.db.start_transaction()
             cursor.execute(
                 """
                 INSERT INTO financeiro (consulta_id, paciente_id, data, valor, tipo, descricao, status, medico_id, tipo_pagamento, data_pagamento, fundo_caixa, aberto_por, sessao_id, usuario_id)
@@ -775,8 +873,26 @@ class FinanceiroDB:
                     fundo_caixa, aberto_por, sessao_id, usuario_id
                 )
             )
+            mov_id = cursor.lastrowid
+            if acumular:
+                try:
+                    cursor.execute(
+                        """
+                        INSERT INTO caixa_sessoes_totais (sessao_id, tipo, tipo_pagamento, total, quantidade)
+                        VALUES (%s, %s, %s, %s, 1)
+                        ON DUPLICATE KEY UPDATE
+                            total = total + %s,
+                            quantidade = quantidade + 1
+                        """,
+                        (sessao_id, tipo, tipo_pagamento or 'outro', float(valor or 0.0), float(valor or 0.0))
+                    )
+                except mysql.connector.Error as e:
+                    # Tabela inexistente (1146) só é aceitável antes da migração 10
+                    if tabela_confirmada or getattr(e, 'errno', None) != 1146:
+                        raise
             self.db.commit()
-            return cursor.lastrowid
+            publicar('caixa', {'evento': 'movimento', 'tipo': tipo})
+            return mov_id
         except Exception:
             self.db.rollback()
             raise
@@ -787,15 +903,7 @@ class FinanceiroDB:
         """Lista movimentos da sessão a partir da tabela financeiro."""
         cursor = self.db.cursor(dictionary=True)
         try:
-            cursor.execute(
-                """
-                SELECT id, tipo, valor, descricao, data AS data_hora, usuario_id, tipo_pagamento
-                FROM financeiro
-                WHERE sessao_id = %s AND tipo IN ('entrada','saida')
-                ORDER BY data ASC, id ASC
-                """,
-                (sessao_id,)
-            )
+            cursor.execute(SQL_MOVIMENTOS_SESSAO, (sessao_id,))
             return cursor.fetchall()
         finally:
             cursor.close()
@@ -812,6 +920,7 @@ class FinanceiroDB:
                 (datetime.now(), usuario_id, sessao_id)
             )
             self.db.commit()
+            publicar('caixa', {'evento': 'fechamento'})
         except Exception:
             self.db.rollback()
             raise
@@ -819,34 +928,68 @@ class FinanceiroDB:
             cursor.close()
 
     def resumo_sessao(self, sessao_id: int) -> dict:
-        """Calcula totais de entradas/saídas por forma e saldo."""
+        """Totais de entradas/saídas por forma e saldo, lidos de caixa_sessoes_totais
+        (uma leitura pela chave primária da sessão)."""
+        if not self._totais_sessao_disponiveis():
+            return self._resumo_sessao_financeiro(sessao_id)
         cursor = self.db.cursor(dictionary=True)
         try:
-            cursor.execute("SELECT abertura_valor_inicial FROM caixa_sessoes WHERE id=%s", (sessao_id,))
-            row = cursor.fetchone()
-            valor_inicial = float(row['abertura_valor_inicial'] if row and row.get('abertura_valor_inicial') is not None else 0)
-
-            # Somatórios a partir da tabela financeiro por tipo_pagamento
             cursor.execute(
                 """
-                SELECT tipo_pagamento, SUM(valor) AS total
-                FROM financeiro
-                WHERE sessao_id = %s AND tipo = 'entrada'
-                GROUP BY tipo_pagamento
+                SELECT s.abertura_valor_inicial, t.tipo, t.tipo_pagamento, t.total
+                FROM caixa_sessoes s
+                LEFT JOIN caixa_sessoes_totais t ON t.sessao_id = s.id
+                WHERE s.id = %s
                 """,
                 (sessao_id,)
             )
+            rows = cursor.fetchall() or []
+        finally:
+            cursor.close()
+
+        valor_inicial = 0.0
+        entradas = {}
+        saidas = {}
+        total_entradas = 0.0
+        total_saidas = 0.0
+        for r in rows:
+            if r.get('abertura_valor_inicial') is not None:
+                valor_inicial = float(r['abertura_valor_inicial'])
+            if not r.get('tipo'):
+                continue
+            forma = r['tipo_pagamento'] or 'outro'
+            total = float(r['total'] or 0)
+            if r['tipo'] == 'entrada':
+                entradas[forma] = entradas.get(forma, 0.0) + total
+                total_entradas += total
+            elif r['tipo'] == 'saida':
+                saidas[forma] = saidas.get(forma, 0.0) + total
+                total_saidas += total
+
+        saldo_final = valor_inicial + total_entradas - total_saidas
+        return {
+            'valor_inicial': valor_inicial,
+            'entradas_por_forma': entradas,
+            'saidas_por_forma': saidas,
+            'total_entradas': total_entradas,
+            'total_saidas': total_saidas,
+            'saldo_final': saldo_final,
+        }
+
+    def _resumo_sessao_financeiro(self, sessao_id: int) -> dict:
+        """Calcula os totais de entradas/saídas por forma direto da tabela financeiro
+        (fallback sem caixa_sessoes_totais e referência da verificação de consistência)."""
+        cursor = self.db.cursor(dictionary=True)
+        try:
+            cursor.execute("SELECT abertura_valor_inicial FROM caixa_sessoes WHERE id=%s", (sessao_id,))
+            row = cursor.fetchone()
+            valor_inicial = float(row['abertura_valor_inicial'] if row and row.get('abertura_valor_inicial') is not None else 0)
+
+            # Somatórios a partir da tabela financeiro por tipo_pagamento
+            cursor.execute(SQL_TOTAIS_SESSAO_POR_FORMA, (sessao_id, 'entrada'))
             ent_rows = cursor.fetchall() or []
 
-            cursor.execute(
-                """
-                SELECT tipo_pagamento, SUM(valor) AS total
-                FROM financeiro
-                WHERE sessao_id = %s AND tipo = 'saida'
-                GROUP BY tipo_pagamento
-                """,
-                (sessao_id,)
-            )
+            cursor.execute(SQL_TOTAIS_SESSAO_POR_FORMA, (sessao_id, 'saida'))
             sai_rows = cursor.fetchall() or []
 
             entradas = {}
@@ -876,6 +1019,71 @@ class FinanceiroDB:
         finally:
             cursor.close()
 
+    def verificar_totais_caixa(self, sessao_id: Optional[int] = None, corrigir: bool = False) -> List[Dict]:
+        """Recalcula os totais a partir de financeiro e compara com caixa_sessoes_totais.
+        Retorna as divergências [{sessao_id, tipo, tipo_pagamento, acumulado, recalculado, diferenca}].
+        Com `corrigir=True`, regrava os totais das sessões divergentes."""
+        filtro = "AND sessao_id = %s" if sessao_id is not None else ""
+        filtro_t = "WHERE sessao_id = %s" if sessao_id is not None else ""
+        params = (sessao_id,) if sessao_id is not None else ()
+        cursor = self.db.cursor(dictionary=True)
+        try:
+            cursor.execute(
+                f"""
+                SELECT sessao_id, tipo, COALESCE(tipo_pagamento, 'outro') AS tipo_pagamento,
+                       SUM(valor) AS total
+                FROM financeiro
+                WHERE sessao_id IS NOT NULL AND tipo IN ('entrada', 'saida') {filtro}
+                GROUP BY sessao_id, tipo, COALESCE(tipo_pagamento, 'outro')
+                """,
+                params
+            )
+            recalculado = {(r['sessao_id'], r['tipo'], r['tipo_pagamento']): float(r['total'] or 0)
+                           for r in cursor.fetchall() or []}
+            cursor.execute(
+                f"SELECT sessao_id, tipo, tipo_pagamento, total FROM caixa_sessoes_totais {filtro_t}",
+                params
+            )
+            acumulado = {(r['sessao_id'], r['tipo'], r['tipo_pagamento']): float(r['total'] or 0)
+                         for r in cursor.fetchall() or []}
+        finally:
+            cursor.close()
+
+        divergencias = []
+        for chave in sorted(set(recalculado) | set(acumulado), key=lambda k: (k[0], k[1], k[2])):
+            esperado = round(recalculado.get(chave, 0.0), 2)
+            atual = round(acumulado.get(chave, 0.0), 2)
+            if abs(esperado - atual) >= 0.005:
+                divergencias.append({
+                    'sessao_id': chave[0], 'tipo': chave[1], 'tipo_pagamento': chave[2],
+                    'acumulado': atual, 'recalculado': esperado, 'diferenca': round(atual - esperado, 2),
+                })
+
+        if corrigir and divergencias:
+            sessoes = sorted({d['sessao_id'] for d in divergencias})
+            marcadores = ", ".join(["%s"] * len(sessoes))
+            cursor = self.db.cursor()
+            try:
+                self.db.start_transaction()
+                cursor.execute(f"DELETE FROM caixa_sessoes_totais WHERE sessao_id IN ({marcadores})", tuple(sessoes))
+                cursor.execute(
+                    f"""
+                    INSERT INTO caixa_sessoes_totais (sessao_id, tipo, tipo_pagamento, total, quantidade)
+                    SELECT sessao_id, tipo, COALESCE(tipo_pagamento, 'outro'), SUM(valor), COUNT(*)
+                    FROM financeiro
+                    WHERE sessao_id IN ({marcadores}) AND tipo IN ('entrada', 'saida')
+                    GROUP BY sessao_id, tipo, COALESCE(tipo_pagamento, 'outro')
+                    """,
+                    tuple(sessoes)
+                )
+                self.db.commit()
+            except Exception:
+                self.db.rollback()
+                raise
+            finally:
+                cursor.close()
+        return divergencias
+
     def registrar_conferencia(
         self,
         sessao_id: int,
@@ -0,0 +1,582 @@
+"""
+Registro versionado de migrações do schema.
+
+As migrações são aplicadas em ordem e registradas na tabela `schema_version`.
+`garantir_schema()` roda uma única vez por processo (na abertura do sistema);
+depois disso as classes de acesso (FinanceiroDB, ChatDB) não fazem mais DDL
+nem consultas ao information_schema na construção.
+
+Para adicionar uma migração, crie uma função `_mNNNN_descricao(cur)` e inclua
+em MIGRACOES com o próximo número de versão. Nunca altere uma migração já
+publicada: crie uma nova.
+"""
+import threading
+import time
+from typing import Callable, List, Optional, Tuple
+
+from src.utils.busca import normalizar_texto, somente_digitos, tokens_nome
+
+# Trava do MySQL usada para serializar estações abrindo o sistema ao mesmo tempo
+_LOCK_NOME = 'clinica_schema_migracoes'
+# Espera pela trava na primeira tentativa (segundos); nas seguintes só tenta pegá-la
+_LOCK_ESPERA_S = 30
+# Intervalo entre novas tentativas enquanto outra estação segura a trava
+_REPETIR_APOS_S = 10.0
+
+_lock = threading.Lock()
+_schema_verificado = False
+_ultimo_erro: Optional[str] = None
+_proxima_tentativa = 0.0
+# Versões vistas em schema_version (ou aplicadas) por este processo
+_versoes_aplicadas: set = set()
+_versoes_lidas_em = 0.0
+
+
+class MigracoesEmAndamento(Exception):
+    """A trava de migrações está com outra estação (ex.: rodando um backfill)."""
+
+
+# ------------------------- Helpers idempotentes -------------------------
+def _tabela_existe(cur, tabela: str) -> bool:
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.tables
+        WHERE table_schema = DATABASE() AND table_name = %s
+        """,
+        (tabela,)
+    )
+    return cur.fetchone()[0] > 0
+
+
+def _coluna_existe(cur, tabela: str, coluna: str) -> bool:
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.columns
+        WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s
+        """,
+        (tabela, coluna)
+    )
+    return cur.fetchone()[0] > 0
+
+
+def _indice_existe(cur, tabela: str, indice: str) -> bool:
+    cur.execute(
+        """
+        SELECT COUNT(*) FROM information_schema.statistics
+        WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s
+        """,
+        (tabela, indice)
+    )
+    return cur.fetchone()[0] > 0
+
+
+def _criar_tabela(cur, tabela: str, ddl: str):
+    """Executa o CREATE TABLE apenas se a tabela ainda não existir
+    (evita o warning 'already exists', que vira erro com raise_on_warnings)."""
+    if not _tabela_existe(cur, tabela):
+        cur.execute(ddl)
+
+
+def _adicionar_coluna(cur, tabela: str, coluna: str, definicao: str):
+    if _tabela_existe(cur, tabela) and not _coluna_existe(cur, tabela, coluna):
+        cur.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+
+
+def _criar_indice(cur, tabela: str, indice: str, colunas: str):
+    if _tabela_existe(cur, tabela) and not _indice_existe(cur, tabela, indice):
+        cur.execute(f"CREATE INDEX {indice} ON {tabela} ({colunas})")
+
+
+def _remover_indice(cur, tabela: str, indice: str):
+    if _tabela_existe(cur, tabela) and _indice_existe(cur, tabela, indice):
+        cur.execute(f"DROP INDEX {indice} ON {tabela}")
+
+
+# ------------------------- Migrações -------------------------
+def _m0001_financeiro_caixa(cur):
+    """Caixa (sessões/conferências), estoque, contas a pagar/receber e colunas extras em financeiro."""
+    _criar_tabela(cur, 'caixa_sessoes', """
+        CREATE TABLE caixa_sessoes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            abertura_datahora DATETIME NOT NULL,
+            abertura_valor_inicial DECIMAL(10,2) NOT NULL DEFAULT 0,
+            abertura_usuario_id INT NULL,
+            fechamento_datahora DATETIME NULL,
+            fechamento_usuario_id INT NULL,
+            observacao VARCHAR(255) NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _criar_tabela(cur, 'caixa_conferencias', """
+        CREATE TABLE caixa_conferencias (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            sessao_id INT NOT NULL,
+            datahora DATETIME NOT NULL,
+            usuario_id INT NULL,
+            cont_entr_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_entr_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_entr_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_entr_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_entr_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_sai_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_sai_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_sai_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_sai_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
+            cont_sai_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_entr_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_entr_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_entr_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_entr_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_entr_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_sai_dinheiro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_sai_cartao_credito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_sai_cartao_debito DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_sai_pix DECIMAL(10,2) NOT NULL DEFAULT 0,
+            esp_sai_outro DECIMAL(10,2) NOT NULL DEFAULT 0,
+            total_cont_entradas DECIMAL(10,2) NOT NULL DEFAULT 0,
+            total_cont_saidas DECIMAL(10,2) NOT NULL DEFAULT 0,
+            total_esp_entradas DECIMAL(10,2) NOT NULL DEFAULT 0,
+            total_esp_saidas DECIMAL(10,2) NOT NULL DEFAULT 0,
+            dif_entradas DECIMAL(10,2) NOT NULL DEFAULT 0,
+            dif_saidas DECIMAL(10,2) NOT NULL DEFAULT 0,
+            observacao VARCHAR(255) NULL,
+            INDEX (sessao_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _criar_tabela(cur, 'estoque', """
+        CREATE TABLE estoque (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            nome VARCHAR(160) NOT NULL,
+            qtd_atual INT NOT NULL DEFAULT 0,
+            qtd_minima INT NOT NULL DEFAULT 0,
+            valor_ultima_compra DECIMAL(10,2) NULL,
+            forma_pagamento_ultima VARCHAR(30) NULL,
+            data_ultima_compra DATE NULL,
+            criado_em DATETIME NOT NULL,
+            atualizado_em DATETIME NOT NULL,
+            UNIQUE KEY uniq_estoque_nome (nome)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _criar_tabela(cur, 'contas_pagar', """
+        CREATE TABLE contas_pagar (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            descricao VARCHAR(120) NOT NULL,
+            categoria VARCHAR(80) NULL,
+            dia_vencimento TINYINT NOT NULL,
+            valor_previsto DECIMAL(10,2) NULL,
+            valor_atual DECIMAL(10,2) NULL,
+            vencimento DATE NULL,
+            status ENUM('aberto','pago') NOT NULL DEFAULT 'aberto',
+            pago_em DATETIME NULL,
+            criado_em DATETIME NOT NULL,
+            atualizado_em DATETIME NOT NULL,
+            INDEX (status),
+            INDEX (vencimento),
+            INDEX (dia_vencimento)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _criar_tabela(cur, 'contas_receber', """
+        CREATE TABLE contas_receber (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            descricao VARCHAR(120) NOT NULL,
+            categoria VARCHAR(80) NULL,
+            dia_vencimento TINYINT NOT NULL,
+            valor_previsto DECIMAL(10,2) NULL,
+            valor_atual DECIMAL(10,2) NULL,
+            vencimento DATE NULL,
+            status ENUM('aberto','recebido') NOT NULL DEFAULT 'aberto',
+            pago_em DATETIME NULL,
+            criado_em DATETIME NOT NULL,
+            atualizado_em DATETIME NOT NULL,
+            INDEX (status),
+            INDEX (vencimento),
+            INDEX (dia_vencimento)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    # Colunas adicionais na tabela 'financeiro'
+    _adicionar_coluna(cur, 'financeiro', 'fundo_caixa', 'DECIMAL(10,2) NULL')
+    _adicionar_coluna(cur, 'financeiro', 'data_pagamento', 'DATETIME NULL')
+    _adicionar_coluna(cur, 'financeiro', 'aberto_por', 'VARCHAR(100) NULL')
+    _adicionar_coluna(cur, 'financeiro', 'sessao_id', 'INT NULL')
+    _adicionar_coluna(cur, 'financeiro', 'usuario_id', 'INT NULL')
+
+
+def _m0002_chat(cur):
+    """Tabelas do chat: presença (heartbeat) e mensagens."""
+    _criar_tabela(cur, 'chat_sessoes', """
+        CREATE TABLE chat_sessoes (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            usuario_id INT,
+            usuario_nome VARCHAR(255),
+            dispositivo VARCHAR(255),
+            ultimo_heartbeat DATETIME,
+            UNIQUE(usuario_id, dispositivo)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _criar_tabela(cur, 'chat_mensagens', """
+        CREATE TABLE chat_mensagens (
+            id INT AUTO_INCREMENT PRIMARY KEY,
+            remetente_id INT,
+            remetente_nome VARCHAR(255),
+            remetente_dispositivo VARCHAR(255),
+            destinatario_id INT,
+            destinatario_nome VARCHAR(255),
+            destinatario_dispositivo VARCHAR(255),
+            texto TEXT,
+            criado_em DATETIME,
+            lido_em DATETIME
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+
+def _m0003_agenda_reservas(cur):
+    """Linha de trava por médico/dia usada por AgendaController.reservar_horario."""
+    _criar_tabela(cur, 'agenda_reservas_dia', """
+        CREATE TABLE agenda_reservas_dia (
+            medico_id INT NOT NULL,
+            data DATE NOT NULL,
+            atualizado_em DATETIME,
+            PRIMARY KEY (medico_id, data)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _criar_indice(cur, 'consultas', 'idx_consulta_medico_data', 'medico_id, data, hora')
+
+
+def _m0004_pacientes_busca(cur):
+    """Colunas normalizadas de busca de pacientes (nome sem acento, tokens e
+    telefones só com dígitos), com índices e preenchimento dos registros existentes."""
+    _adicionar_coluna(cur, 'pacientes', 'nome_busca', 'VARCHAR(255) NULL')
+    _adicionar_coluna(cur, 'pacientes', 'telefone_busca', 'VARCHAR(20) NULL')
+    _adicionar_coluna(cur, 'pacientes', 'telefone2_busca', 'VARCHAR(20) NULL')
+    _criar_indice(cur, 'pacientes', 'idx_paciente_nome_busca', 'nome_busca')
+    _criar_indice(cur, 'pacientes', 'idx_paciente_telefone_busca', 'telefone_busca')
+    _criar_indice(cur, 'pacientes', 'idx_paciente_telefone2_busca', 'telefone2_busca')
+    _criar_tabela(cur, 'pacientes_tokens', """
+        CREATE TABLE pacientes_tokens (
+            token VARCHAR(60) NOT NULL,
+            paciente_id INT NOT NULL,
+            PRIMARY KEY (token, paciente_id),
+            INDEX idx_pacientes_tokens_paciente (paciente_id)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+
+    # Backfill em lotes por id
+    ultimo_id = 0
+    while True:
+        cur.execute(
+            "SELECT id, nome, telefone, telefone2 FROM pacientes WHERE id > %s ORDER BY id LIMIT 1000",
+            (ultimo_id,)
+        )
+        lote = cur.fetchall() or []
+        if not lote:
+            break
+        ultimo_id = int(lote[-1][0])
+        cur.executemany(
+            "UPDATE pacientes SET nome_busca = %s, telefone_busca = %s, telefone2_busca = %s WHERE id = %s",
+            [
+                (normalizar_texto(nome)[:255], somente_digitos(tel)[:20] or None,
+                 somente_digitos(tel2)[:20] or None, pid)
+                for pid, nome, tel, tel2 in lote
+            ]
+        )
+        ids = [int(r[0]) for r in lote]
+        cur.execute(
+            f"DELETE FROM pacientes_tokens WHERE paciente_id IN ({', '.join(['%s'] * len(ids))})",
+            tuple(ids)
+        )
+        tokens = [(token, pid) for pid, nome, _t, _t2 in lote for token in tokens_nome(nome)]
+        if tokens:
+            cur.executemany("INSERT INTO pacientes_tokens (token, paciente_id) VALUES (%s, %s)", tokens)
+
+
+def _m0005_pacientes_atualizado_em(cur):
+    """Coluna de controle de alteração usada pela sincronização incremental do índice de pacientes."""
+    _adicionar_coluna(
+        cur, 'pacientes', 'atualizado_em',
+        'TIMESTAMP NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP'
+    )
+    _criar_indice(cur, 'pacientes', 'idx_paciente_atualizado_em', 'atualizado_em')
+
+
+def _m0006_prontuarios_paciente_data(cur):
+    """Índice da listagem paginada de prontuários (paciente, data desc, id desc)."""
+    _criar_indice(cur, 'prontuarios', 'idx_prontuario_paciente_data', 'paciente_id, data, id')
+
+
+def _m0007_chat_mensagens_destinatario(cur):
+    """Índices das consultas incrementais do chat (novas mensagens por id e contagem de não lidas)."""
+    _criar_indice(cur, 'chat_mensagens', 'idx_chat_msg_dest_id', 'destinatario_id, id')
+    _criar_indice(cur, 'chat_mensagens', 'idx_chat_msg_dest_lido', 'destinatario_id, lido_em')
+
+
+def _m0008_chat_indices(cur):
+    """Índices compostos do chat (não lidas, conversa, interlocutores) e do corte de presença
+    por ultimo_heartbeat. O índice (destinatario_id, lido_em) da 0007 fica coberto pelo novo."""
+    _criar_indice(cur, 'chat_mensagens', 'idx_chat_msg_dest_lido_id', 'destinatario_id, lido_em, id')
+    _remover_indice(cur, 'chat_mensagens', 'idx_chat_msg_dest_lido')
+    _criar_indice(cur, 'chat_mensagens', 'idx_chat_msg_conversa', 'remetente_id, destinatario_id, criado_em')
+    _criar_indice(cur, 'chat_mensagens', 'idx_chat_msg_dest_remetente', 'destinatario_id, remetente_id')
+    _criar_indice(cur, 'chat_sessoes', 'idx_chat_sessoes_heartbeat', 'ultimo_heartbeat')
+
+
+def _m0009_chat_arquivo(cur):
+    """Arquivo do chat (mensagens lidas antigas movidas pela retenção) e índice por data
+    usado para selecionar os lotes a arquivar."""
+    _criar_tabela(cur, 'chat_mensagens_arquivo', """
+        CREATE TABLE chat_mensagens_arquivo (
+            id INT PRIMARY KEY,
+            remetente_id INT,
+            remetente_nome VARCHAR(255),
+            remetente_dispositivo VARCHAR(255),
+            destinatario_id INT,
+            destinatario_nome VARCHAR(255),
+            destinatario_dispositivo VARCHAR(255),
+            texto TEXT,
+            criado_em DATETIME,
+            lido_em DATETIME,
+            arquivado_em DATETIME,
+            INDEX idx_chat_arq_conversa (remetente_id, destinatario_id, criado_em),
+            INDEX idx_chat_arq_dest_data (destinatario_id, criado_em)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    _criar_indice(cur, 'chat_mensagens', 'idx_chat_msg_criado', 'criado_em')
+
+
+def _m0010_caixa_sessoes_totais(cur):
+    """Totais acumulados por sessão de caixa, tipo (entrada/saída) e forma de pagamento,
+    mantidos por FinanceiroDB.registrar_movimento_financeiro. Preenche as sessões existentes."""
+    if _tabela_existe(cur, 'caixa_sessoes_totais'):
+        return
+    cur.execute("""
+        CREATE TABLE caixa_sessoes_totais (
+            sessao_id INT NOT NULL,
+            tipo VARCHAR(20) NOT NULL,
+            tipo_pagamento VARCHAR(30) NOT NULL,
+            total DECIMAL(14,2) NOT NULL DEFAULT 0,
+            quantidade INT NOT NULL DEFAULT 0,
+            PRIMARY KEY (sessao_id, tipo, tipo_pagamento)
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    if _tabela_existe(cur, 'financeiro') and _coluna_existe(cur, 'financeiro', 'sessao_id'):
+        cur.execute("""
+            INSERT INTO caixa_sessoes_totais (sessao_id, tipo, tipo_pagamento, total, quantidade)
+            SELECT sessao_id, tipo, COALESCE(tipo_pagamento, 'outro'), SUM(valor), COUNT(*)
+            FROM financeiro
+            WHERE sessao_id IS NOT NULL AND tipo IN ('entrada', 'saida')
+            GROUP BY sessao_id, tipo, COALESCE(tipo_pagamento, 'outro')
+        """)
+
+
+def _m0011_financeiro_indices(cur):
+    """Índices compostos de financeiro para os acessos frequentes: sessão do caixa
+    (cobre o resumo por forma), pagamento da consulta e do paciente (cobre a data do
+    pagamento) e relatórios por tipo/período. Os índices simples de paciente e
+    consulta ficam cobertos pelos novos e são removidos."""
+    _criar_indice(cur, 'financeiro', 'idx_financeiro_sessao_tipo',
+                  'sessao_id, tipo, tipo_pagamento, valor')
+    _criar_indice(cur, 'financeiro', 'idx_financeiro_consulta_pago',
+                  'consulta_id, tipo, status, data_pagamento, data')
+    _criar_indice(cur, 'financeiro', 'idx_financeiro_paciente_pago',
+                  'paciente_id, tipo, status, data_pagamento, data')
+    _criar_indice(cur, 'financeiro', 'idx_financeiro_tipo_data', 'tipo, data')
+    _remover_indice(cur, 'financeiro', 'idx_financeiro_consulta')
+    _remover_indice(cur, 'financeiro', 'idx_financeiro_paciente')
+
+
+def _m0012_contas_indices(cur):
+    """Índices da listagem paginada de contas a pagar/receber: filtro por status ou
+    categoria com ordenação/paginação por (vencimento, id)."""
+    for tabela in ('contas_pagar', 'contas_receber'):
+        _criar_indice(cur, tabela, f'idx_{tabela}_status_venc', 'status, vencimento, id')
+        _criar_indice(cur, tabela, f'idx_{tabela}_categoria_venc', 'categoria, vencimento, id')
+
+
+def _m0013_contas_serie(cur):
+    """Identificador da série nas contas recorrentes (parcelas mensais criadas juntas)."""
+    for tabela in ('contas_pagar', 'contas_receber'):
+        _adicionar_coluna(cur, tabela, 'serie_id', 'CHAR(32) NULL')
+        _criar_indice(cur, tabela, f'idx_{tabela}_serie', 'serie_id, status, vencimento')
+
+
+def _m0014_permissoes_versao(cur):
+    """Versão das permissões: incrementada ao salvar a tela de segurança, invalida as
+    matrizes de permissão compiladas no login de cada estação."""
+    if _tabela_existe(cur, 'permissoes_versao'):
+        return
+    cur.execute("""
+        CREATE TABLE permissoes_versao (
+            id TINYINT PRIMARY KEY,
+            versao INT NOT NULL DEFAULT 1,
+            atualizado_em DATETIME NULL
+        ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+    """)
+    cur.execute("INSERT INTO permissoes_versao (id, versao, atualizado_em) VALUES (1, 1, NOW())")
+
+
+# Lista ordenada: (versão, nome, função)
+MIGRACOES: List[Tuple[int, str, Callable]] = [
+    (1, 'financeiro_caixa', _m0001_financeiro_caixa),
+    (2, 'chat', _m0002_chat),
+    (3, 'agenda_reservas', _m0003_agenda_reservas),
+    (4, 'pacientes_busca', _m0004_pacientes_busca),
+    (5, 'pacientes_atualizado_em', _m0005_pacientes_atualizado_em),
+    (6, 'prontuarios_paciente_data', _m0006_prontuarios_paciente_data),
+    (7, 'chat_mensagens_destinatario', _m0007_chat_mensagens_destinatario),
+    (8, 'chat_indices', _m0008_chat_indices),
+    (9, 'chat_arquivo', _m0009_chat_arquivo),
+    (10, 'caixa_sessoes_totais', _m0010_caixa_sessoes_totais),
+    (11, 'financeiro_indices', _m0011_financeiro_indices),
+    (12, 'contas_indices', _m0012_contas_indices),
+    (13, 'contas_serie', _m0013_contas_serie),
+    (14, 'permissoes_versao', _m0014_permissoes_versao),
+]
+
+
+# ------------------------- Execução -------------------------
+def versao_atual(conn) -> int:
+    """Retorna a maior versão registrada em schema_version (0 se vazia)."""
+    cur = conn.cursor()
+    try:
+        if not _tabela_existe(cur, 'schema_version'):
+            return 0
+        cur.execute("SELECT COALESCE(MAX(versao), 0) FROM schema_version")
+        return int(cur.fetchone()[0] or 0)
+    finally:
+        cur.close()
+
+
+def _versoes_registradas(cur) -> set:
+    global _versoes_lidas_em
+    _versoes_lidas_em = time.monotonic()
+    if not _tabela_existe(cur, 'schema_version'):
+        return set()
+    cur.execute("SELECT versao FROM schema_version")
+    return {int(r[0]) for r in cur.fetchall() or []}
+
+
+def aplicar_migracoes(conn, espera_lock: int = _LOCK_ESPERA_S) -> List[int]:
+    """Aplica, em ordem, as migrações ainda não registradas. Retorna as versões aplicadas.
+
+    Sem pendências não pega a trava. Se a trava não vier em `espera_lock` segundos
+    (outra estação migrando), levanta MigracoesEmAndamento sem executar DDL.
+    """
+    aplicadas: List[int] = []
+    cur = conn.cursor()
+    try:
+        ja_aplicadas = _versoes_registradas(cur)
+        _versoes_aplicadas.update(ja_aplicadas)
+        if all(versao in ja_aplicadas for versao, _nome, _func in MIGRACOES):
+            return aplicadas
+        cur.execute("SELECT GET_LOCK(%s, %s)", (_LOCK_NOME, int(espera_lock)))
+        obtida = cur.fetchone()
+        if not obtida or obtida[0] != 1:
+            raise MigracoesEmAndamento(f"Trava '{_LOCK_NOME}' ocupada por outra estação")
+        try:
+            _criar_tabela(cur, 'schema_version', """
+                CREATE TABLE schema_version (
+                    versao INT PRIMARY KEY,
+                    nome VARCHAR(120) NOT NULL,
+                    aplicado_em DATETIME NOT NULL
+                ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4
+            """)
+            # Relê sob a trava: outra estação pode ter terminado enquanto esperávamos
+            ja_aplicadas = _versoes_registradas(cur)
+            _versoes_aplicadas.update(ja_aplicadas)
+            for versao, nome, func in sorted(MIGRACOES, key=lambda m: m[0]):
+                if versao in ja_aplicadas:
+                    continue
+                func(cur)
+                cur.execute(
+                    "INSERT INTO schema_version (versao, nome, aplicado_em) VALUES (%s, %s, NOW())",
+                    (versao, nome)
+                )
+                conn.commit()
+                _versoes_aplicadas.add(versao)
+                aplicadas.append(versao)
+                print(f"[SCHEMA] Migração {versao:04d} ({nome}) aplicada.")
+        finally:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NOME,))
+            cur.fetchone()
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        cur.close()
+    return aplicadas
+
+
+def garantir_schema(conn=None) -> bool:
+    """Aplica as migrações pendentes uma única vez por processo.
+
+    Chamadas seguintes retornam imediatamente, sem ir ao banco. Se a aplicação
+    falhar (ex.: usuário sem permissão de DDL), o erro é registrado e o processo
+    segue sem tentar de novo a cada construção. Com a trava de migrações em outra
+    estação o processo não é marcado como verificado: a cada _REPETIR_APOS_S
+    segundos uma chamada relê schema_version e tenta a trava sem esperar.
+    """
+    global _schema_verificado, _ultimo_erro, _proxima_tentativa
+    if _schema_verificado:
+        return _ultimo_erro is None
+    with _lock:
+        if _schema_verificado:
+            return _ultimo_erro is None
+        if time.monotonic() < _proxima_tentativa:
+            return False
+        espera = _LOCK_ESPERA_S if _proxima_tentativa == 0.0 else 0
+        try:
+            if conn is None:
+                from src.db.database import db
+                with db.checkout() as pooled:
+                    aplicar_migracoes(pooled, espera)
+            else:
+                aplicar_migracoes(conn, espera)
+            _ultimo_erro = None
+            _schema_verificado = True
+        except MigracoesEmAndamento as e:
+            _ultimo_erro = str(e)
+            _proxima_tentativa = time.monotonic() + _REPETIR_APOS_S
+            print(f"[SCHEMA] {e}; nova verificação em {_REPETIR_APOS_S:.0f}s.")
+        except Exception as e:
+            _ultimo_erro = str(e)
+            _schema_verificado = True
+            print(f"[SCHEMA] Falha ao aplicar migrações: {e}")
+    return _ultimo_erro is None
+
+
+def _reler_versoes(conn):
+    cur = conn.cursor()
+    try:
+        _versoes_aplicadas.update(_versoes_registradas(cur))
+    finally:
+        cur.close()
+
+
+def migracao_aplicada(versao: int, conn=None) -> bool:
+    """Indica se a migração `versao` está registrada em schema_version.
+
+    Independe das demais: uma falha em outra migração não desliga os recursos
+    desta. Versão ainda não vista é relida do banco no máximo a cada
+    _REPETIR_APOS_S segundos (pode ter sido aplicada por outra estação).
+    """
+    if versao in _versoes_aplicadas:
+        return True
+    garantir_schema(conn)
+    if versao in _versoes_aplicadas or time.monotonic() - _versoes_lidas_em < _REPETIR_APOS_S:
+        return versao in _versoes_aplicadas
+    try:
+        if conn is None:
+            from src.db.database import db
+            with db.checkout() as pooled:
+                _reler_versoes(pooled)
+        else:
+            _reler_versoes(conn)
+    except Exception as e:
+        print(f"[SCHEMA] Falha ao ler schema_version: {e}")
+    return versao in _versoes_aplicadas
+
+
+def schema_verificado() -> bool:
+    """Indica se o schema já foi verificado neste processo."""
+    return _schema_verificado
@@ -0,0 +1,174 @@
+"""
+Benchmark da busca de pacientes pelas colunas normalizadas (nome sem acento,
+tokens e telefones só com dígitos).
+
+Com --popular N insere N pacientes sintéticos (marcados no e-mail) antes de
+medir; --limpar os remove. A medição roda EXPLAIN nas consultas de token e de
+prefixo de telefone (acusa quando não é range/ref em índice) e cronometra as
+buscas do ClienteController contra o LIKE '%termo%' antigo. Uso:
+
+    python -m src.db.verificar_busca_pacientes --popular 100000
+    python -m src.db.verificar_busca_pacientes [amostras]
+    python -m src.db.verificar_busca_pacientes --limpar
+"""
+import random
+import sys
+import time
+from typing import Callable, List
+
+from src.controllers.cliente_controller import ClienteController
+from src.db.database import db
+from src.db.migrations import garantir_schema
+from src.utils.busca import normalizar_texto, somente_digitos, tokens_nome
+
+MARCADOR = 'verificar_busca_pacientes@local'
+LOTE = 1000
+
+_NOMES = ['Ana', 'João', 'José', 'Maria', 'Luís', 'Márcia', 'Antônio', 'Cecília', 'Débora',
+          'Fábio', 'Gisele', 'Hélio', 'Iara', 'Júlia', 'Lúcia', 'Mônica', 'Otávio', 'Rogério']
+_SOBRENOMES = ['Silva', 'Souza', 'Conceição', 'Araújo', 'Gonçalves', 'Magalhães', 'Simões',
+               'Câmara', 'Lopes', 'Brandão', 'Falcão', 'Assunção', 'Ribeiro', 'Peçanha']
+
+
+def _nome_aleatorio(rnd: random.Random) -> str:
+    return f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)} {rnd.choice(_SOBRENOMES)} {rnd.randint(1, 99999)}"
+
+
+def _telefone_aleatorio(rnd: random.Random) -> str:
+    return f"(21) 9{rnd.randint(1000, 9999)}-{rnd.randint(1000, 9999)}"
+
+
+def popular(total: int, semente: int = 42):
+    rnd = random.Random(semente)
+    with db.checkout() as conn:
+        cur = conn.cursor()
+        try:
+            inseridos = 0
+            while inseridos < total:
+                n = min(LOTE, total - inseridos)
+                linhas = [(_nome_aleatorio(rnd), _telefone_aleatorio(rnd)) for _ in range(n)]
+                conn.start_transaction()
+                cur.execute(
+                    "INSERT INTO pacientes (nome, telefone, email, nome_busca, telefone_busca) VALUES "
+                    + ', '.join(['(%s, %s, %s, %s, %s)'] * n),
+                    tuple(v for nome, tel in linhas
+                          for v in (nome, tel, MARCADOR, normalizar_texto(nome)[:255], somente_digitos(tel)[:20]))
+                )
+                # Um INSERT de várias linhas devolve o id da primeira (ids consecutivos no InnoDB)
+                primeiro_id = cur.lastrowid
+                tokens = [(token, primeiro_id + i) for i, (nome, _t) in enumerate(linhas) for token in tokens_nome(nome)]
+                cur.execute(
+                    "INSERT INTO pacientes_tokens (token, paciente_id) VALUES " + ', '.join(['(%s, %s)'] * len(tokens)),
+                    tuple(v for par in tokens for v in par)
+                )
+                conn.commit()
+                inseridos += n
+                print(f"\r{inseridos}/{total} pacientes inseridos", end='', flush=True)
+            print()
+        finally:
+            cur.close()
+
+
+def limpar():
+    with db.checkout() as conn:
+        cur = conn.cursor()
+        try:
+            while True:
+                cur.execute("SELECT id FROM pacientes WHERE email = %s LIMIT %s", (MARCADOR, LOTE))
+                ids = [int(r[0]) for r in cur.fetchall() or []]
+                if not ids:
+                    break
+                marcadores = ', '.join(['%s'] * len(ids))
+                conn.start_transaction()
+                cur.execute(f"DELETE FROM pacientes_tokens WHERE paciente_id IN ({marcadores})", tuple(ids))
+                cur.execute(f"DELETE FROM pacientes WHERE id IN ({marcadores})", tuple(ids))
+                conn.commit()
+        finally:
+            cur.close()
+
+
+def _planos(conn) -> List[str]:
+    """Problemas de plano nas consultas de token e de prefixo de telefone."""
+    consultas = [
+        ('token', "SELECT DISTINCT paciente_id FROM pacientes_tokens WHERE token LIKE %s", ('silv%',)),
+        ('telefone', "SELECT id FROM pacientes WHERE telefone_busca LIKE %s", ('219%',)),
+        ('telefone2', "SELECT id FROM pacientes WHERE telefone2_busca LIKE %s", ('219%',)),
+    ]
+    problemas = []
+    cur = conn.cursor(dictionary=True)
+    try:
+        for nome, sql, params in consultas:
+            cur.execute("EXPLAIN " + sql, params)
+            for linha in cur.fetchall() or []:
+                if str(linha.get('type')) not in ('range', 'ref', 'eq_ref', 'const') or not linha.get('key'):
+                    problemas.append(f"{nome}: type={linha.get('type')}, key={linha.get('key')}")
+    finally:
+        cur.close()
+    return problemas
+
+
+def _cronometrar(rotulo: str, fn: Callable, termos: List[str]):
+    tempos = []
+    for termo in termos:
+        inicio = time.perf_counter()
+        fn(termo)
+        tempos.append((time.perf_counter() - inicio) * 1000.0)
+    tempos.sort()
+    p50 = tempos[len(tempos) // 2]
+    p95 = tempos[min(int(len(tempos) * 0.95), len(tempos) - 1)]
+    print(f"{rotulo:<28} n={len(tempos):<5} p50={p50:8.2f} ms  p95={p95:8.2f} ms  máx={tempos[-1]:8.2f} ms")
+
+
+def _like_antigo(termo: str):
+    db.execute_query("SELECT * FROM pacientes WHERE nome LIKE %s ORDER BY nome LIMIT 10", (f"%{termo}%",))
+
+
+def medir(amostras: int = 200) -> int:
+    garantir_schema()
+    with db.checkout() as conn:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT COUNT(*) FROM pacientes")
+            total = cur.fetchone()[0]
+        finally:
+            cur.close()
+        problemas = _planos(conn)
+    print(f"{total} pacientes na base")
+
+    rnd = random.Random(7)
+    nomes = [rnd.choice(_SOBRENOMES)[:rnd.randint(3, 6)] for _ in range(amostras)]
+    nomes_compostos = [f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)[:4]}" for _ in range(amostras)]
+    telefones = [f"219{rnd.randint(1000, 9999)}" for _ in range(amostras)]
+
+    controller = ClienteController()
+    _cronometrar('nome (tokens)', controller.buscar_cliente_por_nome, nomes)
+    _cronometrar('nome composto (tokens)', controller.buscar_cliente_por_nome, nomes_compostos)
+    _cronometrar('telefone (prefixo)', controller.buscar_cliente_por_telefone, telefones)
+    _cronometrar("nome LIKE '%termo%' (antigo)", _like_antigo, nomes)
+
+    if problemas:
+        for p in problemas:
+            print(f"[PLANO] {p}")
+        return 1
+    print("Buscas de token e telefone usam índice.")
+    return 0
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if '--limpar' in args:
+        limpar()
+        print("Pacientes sintéticos removidos.")
+        return 0
+    if '--popular' in args:
+        i = args.index('--popular')
+        total = int(args[i + 1]) if i + 1 < len(args) else 100000
+        del args[i:i + 2]
+        garantir_schema()
+        popular(total)
+    amostras = int(args[0]) if args else 200
+    return medir(amostras)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
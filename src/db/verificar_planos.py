@@ -0,0 +1,78 @@
+"""
+Regressão de planos de execução das consultas frequentes de financeiro.
+
+Roda EXPLAIN nas consultas de caixa, sincronização de pagamentos e relatórios
+(constantes SQL_* de src/db/financeiro_db.py, as mesmas usadas pelo código) e
+acusa varredura completa (type=ALL) ou ausência de índice na tabela financeiro:
+
+    python -m src.db.verificar_planos
+"""
+import sys
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Tuple
+
+from src.db.database import db
+from src.db.financeiro_db import (
+    SQL_ENTRADAS_MEDICO_PERIODO,
+    SQL_FINANCEIRO_PERIODO,
+    SQL_MOVIMENTOS_SESSAO,
+    SQL_PAGAMENTO_DA_CONSULTA,
+    SQL_PAGAMENTO_DO_PACIENTE_NO_DIA,
+    SQL_TOTAIS_SESSAO_POR_FORMA,
+)
+
+_HOJE = date.today()
+_INICIO = datetime.combine(_HOJE - timedelta(days=30), datetime.min.time())
+_FIM = datetime.combine(_HOJE, datetime.max.time())
+
+# (nome, sql, parâmetros) — o SQL é o mesmo importado pelo código de produção
+CONSULTAS: List[Tuple[str, str, tuple]] = [
+    ('FinanceiroDB.listar_movimentos', SQL_MOVIMENTOS_SESSAO, (1,)),
+    ('FinanceiroDB._resumo_sessao_financeiro (entradas)', SQL_TOTAIS_SESSAO_POR_FORMA, (1, 'entrada')),
+    ('FinanceiroDB._resumo_sessao_financeiro (saídas)', SQL_TOTAIS_SESSAO_POR_FORMA, (1, 'saida')),
+    ('AgendaController.sincronizar_status_pagamento (consulta)', SQL_PAGAMENTO_DA_CONSULTA, (1,)),
+    (
+        'AgendaController.sincronizar_status_pagamento (paciente no dia)',
+        SQL_PAGAMENTO_DO_PACIENTE_NO_DIA,
+        (1, _HOJE, _HOJE, _HOJE, _HOJE),
+    ),
+    ('RelatoriosModule (entradas/saídas do período)', SQL_FINANCEIRO_PERIODO, (_INICIO, _FIM)),
+    ('RelatoriosModule (entradas por médico)', SQL_ENTRADAS_MEDICO_PERIODO, (1, _INICIO, _FIM)),
+]
+
+
+def verificar(conn) -> List[Dict]:
+    """Retorna os problemas encontrados: [{consulta, tabela, type, key, motivo}]."""
+    problemas: List[Dict] = []
+    cur = conn.cursor(dictionary=True)
+    try:
+        for nome, sql, params in CONSULTAS:
+            cur.execute("EXPLAIN " + sql, params)
+            for linha in cur.fetchall() or []:
+                tabela = str(linha.get('table') or '')
+                if tabela not in ('financeiro', 'f'):
+                    continue
+                tipo_acesso = str(linha.get('type') or '')
+                chave = linha.get('key')
+                if tipo_acesso == 'ALL' or not chave:
+                    problemas.append({
+                        'consulta': nome, 'tabela': tabela, 'type': tipo_acesso, 'key': chave,
+                        'motivo': 'varredura completa' if tipo_acesso == 'ALL' else 'sem índice',
+                    })
+    finally:
+        cur.close()
+    return problemas
+
+
+def main() -> int:
+    problemas = verificar(db.get_connection())
+    if not problemas:
+        print(f"{len(CONSULTAS)} consultas verificadas: todas usam índice em financeiro.")
+        return 0
+    for p in problemas:
+        print(f"[PLANO] {p['consulta']}: {p['motivo']} em {p['tabela']} (type={p['type']}, key={p['key']})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+"""
+Regressão de planos de execução das consultas do chat (índices da migração 0008/0009).
+
+As consultas não são copiadas aqui: os métodos do ChatDB rodam contra uma conexão
+que só grava o SQL e os parâmetros, e cada comando gravado (SELECT, UPDATE,
+DELETE) passa por EXPLAIN na conexão real. Acusa varredura completa (type=ALL)
+ou ausência de índice nas tabelas do chat. Uso:
+
+    python -m src.db.verificar_planos_chat
+"""
+import sys
+from datetime import datetime
+from typing import Callable, Dict, List, Tuple
+
+from src.db.chat_db import ChatDB
+from src.db.database import db
+
+TABELAS = ('chat_mensagens', 'chat_mensagens_arquivo', 'chat_sessoes')
+
+# Usuário logado (por id, como nas estações) e contato da conversa
+_EU = (1, 'Usuário', None)
+_CONTATO = (2, 'Contato', None)
+
+
+class _CursorGravador:
+    rowcount = 0
+    lastrowid = None
+
+    def __init__(self, gravador):
+        self._gravador = gravador
+
+    def execute(self, sql, params=(), multi=False):
+        self._gravador.comandos.append((sql, tuple(params or ())))
+        if multi:
+            return iter(())
+        return None
+
+    def fetchall(self):
+        return []
+
+    def fetchone(self):
+        return None
+
+    def close(self):
+        pass
+
+
+class _ConexaoGravadora:
+    """Conexão falsa: guarda (sql, params) de cada execute e devolve resultados vazios."""
+
+    def __init__(self):
+        self.comandos: List[Tuple[str, tuple]] = []
+
+    def cursor(self, *args, **kwargs):
+        return _CursorGravador(self)
+
+    def start_transaction(self):
+        pass
+
+    def commit(self):
+        pass
+
+    def rollback(self):
+        pass
+
+
+# (nome, chamada) — cada chamada usa os métodos reais do ChatDB
+CHAMADAS: List[Tuple[str, Callable[[ChatDB], object]]] = [
+    ('sincronizar', lambda c: c.sincronizar(*_EU, last_id=0, heartbeat=False, presenca=True)),
+    ('contar_nao_lidas', lambda c: c.contar_nao_lidas(*_EU)),
+    ('ultimo_id_recebido', lambda c: c.ultimo_id_recebido(*_EU)),
+    ('novas_mensagens_desde', lambda c: c.novas_mensagens_desde(*_EU, last_id=0)),
+    ('listar_conversa_pagina', lambda c: c.listar_conversa_pagina(*_EU, *_CONTATO)),
+    ('listar_conversa_pagina (anteriores)',
+     lambda c: c.listar_conversa_pagina(*_EU, *_CONTATO, antes=(datetime.now(), 10 ** 9))),
+    ('listar_conversa_pagina (arquivo)', lambda c: c.listar_conversa_pagina(*_EU, *_CONTATO, arquivo=True)),
+    ('listar_conversa_desde', lambda c: c.listar_conversa_desde(*_EU, *_CONTATO, depois_id=0)),
+    ('listar_interlocutores', lambda c: c.listar_interlocutores(*_EU)),
+    ('listar_online', lambda c: c.listar_online()),
+    ('marcar_lidas_do_remetente', lambda c: c.marcar_lidas_do_remetente(*_EU, _CONTATO[1])),
+    ('purgar_sessoes_inativas', lambda c: c.purgar_sessoes_inativas()),
+    ('arquivar_mensagens (seleção do lote)', lambda c: c.arquivar_mensagens(max_lotes=1)),
+    ('buscar_mensagens_arquivadas', lambda c: c.buscar_mensagens_arquivadas(*_EU)),
+]
+
+
+def _separar(sql: str, params: tuple) -> List[Tuple[str, tuple]]:
+    """Divide um multi-statement (sincronizar) distribuindo os parâmetros por comando."""
+    comandos = []
+    pos = 0
+    for parte in sql.split(';'):
+        n = parte.count('%s')
+        comandos.append((parte, params[pos:pos + n]))
+        pos += n
+    return comandos
+
+
+def capturar() -> List[Tuple[str, str, tuple]]:
+    """(nome, sql, params) dos comandos explicáveis emitidos por cada chamada."""
+    chatdb = ChatDB(db.get_connection())
+    gravador = _ConexaoGravadora()
+    chatdb.conn = gravador
+    capturados = []
+    for nome, chamada in CHAMADAS:
+        gravador.comandos.clear()
+        chamada(chatdb)
+        for sql, params in gravador.comandos:
+            for parte, vals in _separar(sql, params):
+                if parte.strip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE', '('):
+                    capturados.append((nome, parte, vals))
+    return capturados
+
+
+def verificar(conn) -> List[Dict]:
+    """Retorna os problemas encontrados: [{consulta, tabela, type, key, motivo}]."""
+    problemas: List[Dict] = []
+    cur = conn.cursor(dictionary=True)
+    try:
+        for nome, sql, params in capturar():
+            cur.execute("EXPLAIN " + sql, params)
+            for linha in cur.fetchall() or []:
+                tabela = str(linha.get('table') or '')
+                if tabela not in TABELAS:
+                    continue
+                tipo_acesso = str(linha.get('type') or '')
+                chave = linha.get('key')
+                if tipo_acesso == 'ALL' or not chave:
+                    problemas.append({
+                        'consulta': nome, 'tabela': tabela, 'type': tipo_acesso, 'key': chave,
+                        'motivo': 'varredura completa' if tipo_acesso == 'ALL' else 'sem índice',
+                    })
+    finally:
+        cur.close()
+    return problemas
+
+
+def main() -> int:
+    problemas = verificar(db.get_connection())
+    if not problemas:
+        print(f"{len(CHAMADAS)} consultas do chat verificadas: todas usam índice.")
+        return 0
+    for p in problemas:
+        print(f"[PLANO] {p['consulta']}: {p['motivo']} em {p['tabela']} (type={p['type']}, key={p['key']})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,110 @@
+"""
+Reserva concorrente: N terminais disputando o mesmo horário.
+
+Cada thread abre a sua conexão (como uma estação) e chama
+AgendaController.reservar_horario no mesmo médico/dia/hora, liberadas juntas por
+uma barreira. Cada rodada começa sem a linha de trava do médico/dia em
+agenda_reservas_dia (como a primeira reserva do dia), o caso em que o InnoDB
+pode abortar por deadlock (1213) ou espera de trava (1205) e a reserva repete a
+transação. Em cada rodada exatamente uma reserva deve ter sucesso; a consulta
+criada é apagada antes da rodada seguinte. Ao final mostra as tentativas e
+reservas por segundo e as transações repetidas. Uso (médico e paciente
+existentes, horário dentro do atendimento do médico):
+
+    python -m src.db.verificar_reserva_concorrente medico_id paciente_id AAAA-MM-DD HH:MM [threads] [rodadas]
+"""
+import sys
+import threading
+import time
+from typing import List, Tuple
+
+from src.db.database import db
+from src.controllers.agenda_controller import AgendaController, metricas_reserva
+
+
+def _rodada(conexoes: list, dados: dict) -> List[Tuple[bool, str, dict]]:
+    barreira = threading.Barrier(len(conexoes))
+    resultados: List[Tuple[bool, str, dict]] = [None] * len(conexoes)
+
+    def _reservar(i, conn):
+        try:
+            barreira.wait()
+            resultados[i] = AgendaController(conn).reservar_horario(dict(dados))
+        except Exception as e:
+            resultados[i] = (False, f"Erro: {e}", {})
+
+    threads = [threading.Thread(target=_reservar, args=(i, c)) for i, c in enumerate(conexoes)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return resultados
+
+
+def _apagar(consulta_ids: List[int], medico_id: int, data: str):
+    """Remove as consultas criadas e a linha de trava do médico/dia."""
+    with db.checkout() as conn:
+        cur = conn.cursor()
+        try:
+            if consulta_ids:
+                marcadores = ', '.join(['%s'] * len(consulta_ids))
+                cur.execute(f"DELETE FROM consultas WHERE id IN ({marcadores})", tuple(consulta_ids))
+            cur.execute("DELETE FROM agenda_reservas_dia WHERE medico_id = %s AND data = %s", (medico_id, data))
+            conn.commit()
+        finally:
+            cur.close()
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    if len(args) < 4:
+        print(__doc__)
+        return 2
+    medico_id, paciente_id, data, hora = int(args[0]), int(args[1]), args[2], args[3]
+    n_threads = int(args[4]) if len(args) > 4 else 8
+    rodadas = int(args[5]) if len(args) > 5 else 10
+    dados = {
+        'paciente_id': paciente_id, 'medico_id': medico_id, 'data': data, 'hora': hora,
+        'status': 'Agendado', 'observacoes': 'verificar_reserva_concorrente', 'tipo_atendimento': None,
+    }
+
+    _apagar([], medico_id, data)
+    conexoes = [db.conexao_dedicada() for _ in range(n_threads)]
+    falhas = 0
+    tentativas = 0
+    reservas = 0
+    tempo_total = 0.0
+    try:
+        for rodada in range(1, rodadas + 1):
+            inicio = time.perf_counter()
+            resultados = _rodada(conexoes, dados)
+            tempo_total += time.perf_counter() - inicio
+            criadas = [r[2]['consulta_id'] for r in resultados if r[0]]
+            tentativas += len(resultados)
+            reservas += len(criadas)
+            if len(criadas) != 1:
+                falhas += 1
+                motivos = sorted({r[1] for r in resultados if not r[0]})
+                print(f"[RESERVA] Rodada {rodada}: {len(criadas)} sucesso(s) (esperado 1). Recusas: {motivos}")
+            _apagar(criadas, medico_id, data)
+    finally:
+        for conn in conexoes:
+            try:
+                conn.close()
+            except Exception:
+                pass
+
+    if tempo_total > 0:
+        print(f"{rodadas} rodada(s) x {n_threads} thread(s): {tentativas / tempo_total:.1f} tentativas/s, "
+              f"{reservas / tempo_total:.1f} reservas/s")
+    print(f"Transações repetidas por deadlock/espera de trava: {metricas_reserva['repeticoes']}, "
+          f"esgotadas: {metricas_reserva['esgotadas']}")
+    if falhas:
+        print(f"{falhas} rodada(s) sem exatamente uma reserva.")
+        return 1
+    print("Exatamente uma reserva por rodada.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,40 @@
+"""
+Verificação de consistência dos totais pré-agregados do caixa.
+
+Recalcula os totais por sessão/tipo/forma a partir da tabela financeiro e compara
+com caixa_sessoes_totais. Uso:
+
+    python -m src.db.verificar_totais_caixa [--corrigir] [sessao_id]
+"""
+import sys
+
+from src.db.database import db
+from src.db.financeiro_db import FinanceiroDB
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    corrigir = '--corrigir' in args
+    args = [a for a in args if a != '--corrigir']
+    sessao_id = int(args[0]) if args else None
+
+    financeiro = FinanceiroDB(db.get_connection())
+    divergencias = financeiro.verificar_totais_caixa(sessao_id=sessao_id, corrigir=corrigir)
+    if not divergencias:
+        print("Totais do caixa consistentes.")
+        return 0
+    for d in divergencias:
+        print(
+            f"Sessão {d['sessao_id']} | {d['tipo']} | {d['tipo_pagamento']}: "
+            f"acumulado {d['acumulado']:.2f} x recalculado {d['recalculado']:.2f} "
+            f"(diferença {d['diferenca']:.2f})"
+        )
+    if corrigir:
+        print(f"{len(divergencias)} divergência(s) corrigida(s).")
+        return 0
+    print(f"{len(divergencias)} divergência(s). Rode com --corrigir para regravar os totais.")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,262 @@
+"""
+Agendador central dos jobs periódicos da interface (thread do Tk).
+
+Substitui os loops de `after()` espalhados pelas telas (relógio, alerta de estoque,
+piscar do Chat, atualização da agenda). Cada job tem nome único, intervalo (ms ou
+função que o retorna), jitter, dono e a opção "só visível":
+
+- registrar de novo com o mesmo nome substitui o job anterior, então reabrir uma
+  tela não empilha timers;
+- sem o dono (widget destruído) o job é removido; com so_visivel=True ele fica
+  pausado enquanto o dono não estiver mapeado (ex.: módulo oculto com pack_forget);
+- coalescência: um job não roda de novo enquanto a execução anterior não terminou,
+  inclusive quando ela devolve uma Tarefa do executor (src.utils.tarefas) ainda
+  em andamento.
+
+`agendador.tabela()` expõe o estado ao vivo (duração, estouros, pausas, erros).
+"""
+import random
+import time
+from typing import Callable, Dict, List, Optional, Union
+
+from src.utils.instrumentacao import medir
+
+Intervalo = Union[int, float, Callable[[], Union[int, float]]]
+
+# Menor intervalo aceito (ms), para um job mal configurado não travar a interface
+INTERVALO_MINIMO_MS = 50
+
+
+class Job:
+    """Estado de um job periódico registrado no agendador."""
+
+    def __init__(self, nome: str, funcao: Callable, intervalo: Intervalo, jitter: float,
+                 dono=None, so_visivel: bool = False):
+        self.nome = nome
+        self.funcao = funcao
+        self.intervalo = intervalo
+        self.jitter = max(float(jitter or 0.0), 0.0)
+        self.dono = dono
+        self.so_visivel = so_visivel
+        self.ativo = True
+        self.executando = False
+        self.pausado = False
+        self.execucoes = 0
+        self.erros = 0
+        self.estouros = 0
+        self.coalescidos = 0
+        self.pausas = 0
+        self.ultima_duracao_ms = 0.0
+        self.max_duracao_ms = 0.0
+        self.segundo_plano_ms: Optional[float] = None
+        self.ultima_execucao: Optional[float] = None
+        self.proxima: Optional[float] = None
+        self._after = None
+        self._tarefa = None
+
+    def intervalo_ms(self) -> float:
+        try:
+            valor = self.intervalo() if callable(self.intervalo) else self.intervalo
+            return max(float(valor), INTERVALO_MINIMO_MS)
+        except Exception:
+            return 1000.0
+
+    def em_andamento(self) -> bool:
+        """Execução anterior ainda não terminou (na thread do Tk ou no executor)."""
+        if self.executando:
+            return True
+        tarefa = self._tarefa
+        if tarefa is None:
+            return False
+        if getattr(tarefa, 'concluida', True):
+            self.segundo_plano_ms = getattr(tarefa, 'duracao_ms', None)
+            self._tarefa = None
+            return False
+        return True
+
+
+class AgendadorJobs:
+    """Registra os jobs e os dispara por `after()` na raiz do Tk."""
+
+    def __init__(self):
+        self._jobs: Dict[str, Job] = {}
+        self._root = None
+        self._donos_vinculados = set()
+
+    def iniciar(self, root):
+        if self._root is None:
+            self._root = root
+
+    # ------------------------- API -------------------------
+    def registrar(self, nome: str, funcao: Callable, intervalo: Intervalo, jitter: float = 0.1,
+                  dono=None, so_visivel: bool = False, atraso_inicial_ms: Optional[float] = None) -> Job:
+        """Registra (ou substitui) o job `nome`: chama `funcao()` a cada `intervalo` ms.
+
+        - jitter: fração do intervalo sorteada para mais ou para menos a cada ciclo,
+          para os jobs de várias telas/estações não dispararem juntos;
+        - dono: widget; destruído, o job sai do agendador;
+        - so_visivel: pausa enquanto o dono não estiver visível;
+        - atraso_inicial_ms: primeira execução (padrão: um intervalo).
+        """
+        if self._root is None and dono is not None:
+            try:
+                self.iniciar(dono._root())
+            except Exception:
+                pass
+        self.cancelar(nome)
+        job = Job(nome, funcao, intervalo, jitter, dono, so_visivel)
+        self._jobs[nome] = job
+        if dono is not None:
+            self._vincular_dono(dono)
+        self._agendar(job, atraso_inicial_ms)
+        return job
+
+    def cancelar(self, nome: str):
+        job = self._jobs.pop(nome, None)
+        if job is None:
+            return
+        job.ativo = False
+        self._desagendar(job)
+
+    def cancelar_do_dono(self, dono):
+        for job in list(self._jobs.values()):
+            if job.dono is dono:
+                self.cancelar(job.nome)
+
+    def executar_agora(self, nome: str):
+        """Antecipa o job (respeitando a coalescência) e reinicia a contagem do intervalo."""
+        job = self._jobs.get(nome)
+        if job is not None:
+            self._desagendar(job)
+            self._disparar(job)
+
+    def existe(self, nome: str) -> bool:
+        return nome in self._jobs
+
+    def tabela(self) -> List[Dict]:
+        """Estado atual dos jobs, ordenado por nome."""
+        agora = time.monotonic()
+        linhas = []
+        for job in sorted(self._jobs.values(), key=lambda j: j.nome):
+            if job.executando or job._tarefa is not None:
+                estado = 'executando'
+            elif job.pausado:
+                estado = 'pausado'
+            else:
+                estado = 'ativo'
+            linhas.append({
+                'nome': job.nome,
+                'estado': estado,
+                'intervalo_ms': round(job.intervalo_ms()),
+                'execucoes': job.execucoes,
+                'ultima_duracao_ms': round(job.ultima_duracao_ms, 1),
+                'max_duracao_ms': round(job.max_duracao_ms, 1),
+                'segundo_plano_ms': None if job.segundo_plano_ms is None else round(job.segundo_plano_ms, 1),
+                'estouros': job.estouros,
+                'coalescidos': job.coalescidos,
+                'pausas': job.pausas,
+                'erros': job.erros,
+                'proxima_em_ms': None if job.proxima is None else max(round((job.proxima - agora) * 1000), 0),
+            })
+        return linhas
+
+    # ------------------------- Internos -------------------------
+    def _vincular_dono(self, dono):
+        chave = str(dono)
+        if chave in self._donos_vinculados:
+            return
+        self._donos_vinculados.add(chave)
+
+        def _ao_destruir(event, w=dono, k=chave):
+            if event.widget is w:
+                self._donos_vinculados.discard(k)
+                self.cancelar_do_dono(w)
+        try:
+            dono.bind('<Destroy>', _ao_destruir, add=True)
+        except Exception:
+            self._donos_vinculados.discard(chave)
+
+    def _agendar(self, job: Job, atraso_ms: Optional[float] = None):
+        if not job.ativo or self._root is None:
+            return
+        if atraso_ms is None:
+            base = job.intervalo_ms()
+            atraso_ms = base * (1 + random.uniform(-job.jitter, job.jitter)) if job.jitter else base
+        atraso_ms = max(int(atraso_ms), 0)
+        job.proxima = time.monotonic() + atraso_ms / 1000.0
+        try:
+            job._after = self._root.after(atraso_ms, lambda j=job: self._disparar(j))
+        except Exception:
+            job._after = None
+
+    def _desagendar(self, job: Job):
+        if job._after is not None and self._root is not None:
+            try:
+                self._root.after_cancel(job._after)
+            except Exception:
+                pass
+        job._after = None
+        job.proxima = None
+
+    @staticmethod
+    def _dono_existe(dono) -> bool:
+        try:
+            return bool(dono.winfo_exists())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _dono_visivel(dono) -> bool:
+        try:
+            return bool(dono.winfo_viewable())
+        except Exception:
+            return False
+
+    def _disparar(self, job: Job):
+        job._after = None
+        if not job.ativo or self._jobs.get(job.nome) is not job:
+            return
+        if job.dono is not None:
+            if not self._dono_existe(job.dono):
+                self.cancelar(job.nome)
+                return
+            if job.so_visivel and not self._dono_visivel(job.dono):
+                if not job.pausado:
+                    job.pausas += 1
+                job.pausado = True
+                self._agendar(job)
+                return
+        job.pausado = False
+        if job.em_andamento():
+            # A execução anterior ainda não terminou: não empilha outra
+            job.coalescidos += 1
+            job.estouros += 1
+            self._agendar(job)
+            return
+
+        inicio = time.perf_counter()
+        job.executando = True
+        resultado = None
+        try:
+            with medir(f'job:{job.nome}'):
+                resultado = job.funcao()
+        except Exception as e:
+            job.erros += 1
+            print(f"[AGENDADOR] Erro no job '{job.nome}': {e}")
+        finally:
+            job.executando = False
+        duracao = (time.perf_counter() - inicio) * 1000.0
+        job.execucoes += 1
+        job.ultima_execucao = time.time()
+        job.ultima_duracao_ms = duracao
+        job.max_duracao_ms = max(job.max_duracao_ms, duracao)
+        if duracao > job.intervalo_ms():
+            job.estouros += 1
+        # Job que delegou o trabalho ao executor de tarefas: coalesce até a tarefa acabar
+        if resultado is not None and hasattr(resultado, 'concluida') and hasattr(resultado, 'cancelar'):
+            job._tarefa = resultado
+        self._agendar(job)
+
+
+# Instância do processo
+agendador = AgendadorJobs()
@@ -0,0 +1,37 @@
+"""
+Normalização de texto para as colunas de busca de pacientes.
+Nomes: sem acento, minúsculos e separados em tokens. Telefones: só dígitos.
+"""
+import re
+import unicodedata
+
+# Tamanho máximo de um token (coluna pacientes_tokens.token)
+TOKEN_MAX = 60
+
+_NAO_ALFANUM = re.compile(r'[^a-z0-9]+')
+
+
+def normalizar_texto(texto) -> str:
+    """Remove acentos, converte para minúsculas e troca pontuação por espaço."""
+    if not texto:
+        return ''
+    decomposto = unicodedata.normalize('NFKD', str(texto))
+    sem_acento = ''.join(c for c in decomposto if not unicodedata.combining(c))
+    return ' '.join(_NAO_ALFANUM.sub(' ', sem_acento.lower()).split())
+
+
+def tokens_nome(texto) -> list:
+    """Tokens distintos do nome normalizado, na ordem em que aparecem."""
+    vistos = []
+    for token in normalizar_texto(texto).split():
+        token = token[:TOKEN_MAX]
+        if token not in vistos:
+            vistos.append(token)
+    return vistos
+
+
+def somente_digitos(texto) -> str:
+    """Mantém apenas os dígitos (telefone, CPF...)."""
+    if not texto:
+        return ''
+    return ''.join(c for c in str(texto) if c.isdigit())
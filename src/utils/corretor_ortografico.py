@@ -0,0 +1,161 @@
+"""
+Verificação ortográfica incremental para widgets Text.
+
+A cada pausa na digitação compara as linhas atuais com as da última verificação,
+reanalisa só o trecho alterado (prefixo/sufixo comuns ficam de fora, e as tags do
+Tk acompanham o texto nas linhas deslocadas) e faz a consulta ao dicionário numa
+thread separada. O resultado volta para a thread do Tk por `after()` e só troca
+as marcações das linhas alteradas. Os veredictos palavra -> desconhecida ficam num
+cache limitado compartilhado por todos os editores.
+"""
+import re
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+TAG = 'misspelled'
+_PALAVRA = re.compile(r"\b[\wÀ-ÖØ-öø-ÿ]+\b", flags=re.UNICODE)
+
+# Cache de veredictos (palavra minúscula -> True se desconhecida)
+CACHE_MAX = 20000
+_veredictos: "OrderedDict[str, bool]" = OrderedDict()
+_veredictos_lock = threading.Lock()
+
+# Uma thread basta: as consultas são rápidas e assim não concorrem entre si
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='corretor')
+
+
+def _desconhecida(sc, palavra: str) -> bool:
+    with _veredictos_lock:
+        if palavra in _veredictos:
+            _veredictos.move_to_end(palavra)
+            return _veredictos[palavra]
+    try:
+        resultado = palavra not in sc and palavra in sc.unknown([palavra])
+    except Exception:
+        resultado = False
+    with _veredictos_lock:
+        _veredictos[palavra] = resultado
+        while len(_veredictos) > CACHE_MAX:
+            _veredictos.popitem(last=False)
+    return resultado
+
+
+def _analisar(sc, linhas: List[Tuple[int, str]]) -> List[Tuple[int, int, int]]:
+    """(roda na thread do corretor) Retorna (linha, col_ini, col_fim) das palavras desconhecidas."""
+    marcas = []
+    for num, texto in linhas:
+        for m in _PALAVRA.finditer(texto):
+            palavra = m.group(0)
+            if palavra.isdigit() or len(palavra) <= 2:
+                continue
+            if _desconhecida(sc, palavra.lower()):
+                marcas.append((num, m.start(), m.end()))
+    return marcas
+
+
+def limpar_cache():
+    with _veredictos_lock:
+        _veredictos.clear()
+
+
+class CorretorIncremental:
+    """Mantém as marcações de ortografia de um widget Text."""
+
+    ESPERA_MS = 250
+    POLL_MS = 15
+
+    def __init__(self, text_widget, spellchecker, limit_chars: int = 30000):
+        self.txt = text_widget
+        self.sc = spellchecker
+        self.limit_chars = limit_chars
+        self._linhas: List[str] = []     # linhas na última verificação aplicada
+        self._geracao = 0
+        self._job = None
+        self._future = None
+        self._pendente = False
+        try:
+            self.txt.tag_configure(TAG, underline=True, foreground='#c82333')
+        except Exception:
+            pass
+
+    # ------------------------- Agendamento -------------------------
+    def agendar(self, event=None):
+        """Debounce: verifica após ESPERA_MS sem digitação."""
+        self._geracao += 1
+        try:
+            if self._job:
+                self.txt.after_cancel(self._job)
+        except Exception:
+            pass
+        try:
+            self._job = self.txt.after(self.ESPERA_MS, self.verificar)
+        except Exception:
+            self._job = None
+
+    def verificar_tudo(self):
+        """Descarta o estado e verifica todo o texto (ex.: após inserir conteúdo por código)."""
+        self._linhas = []
+        self._geracao += 1
+        self.verificar()
+
+    def verificar(self):
+        self._job = None
+        if self._future is not None and not self._future.done():
+            # Já há análise em andamento: refaz quando ela terminar
+            self._pendente = True
+            return
+        try:
+            if not self.txt.winfo_exists():
+                return
+            conteudo = self.txt.get('1.0', 'end-1c')[:self.limit_chars]
+        except Exception:
+            return
+        novas = conteudo.split('\n')
+        antigas = self._linhas
+        # Trecho alterado: ignora prefixo e sufixo de linhas iguais
+        ini = 0
+        limite = min(len(novas), len(antigas))
+        while ini < limite and novas[ini] == antigas[ini]:
+            ini += 1
+        fim_novas, fim_antigas = len(novas), len(antigas)
+        while fim_novas > ini and fim_antigas > ini and novas[fim_novas - 1] == antigas[fim_antigas - 1]:
+            fim_novas -= 1
+            fim_antigas -= 1
+        if ini >= fim_novas and ini >= fim_antigas:
+            return
+        alteradas = [(i, novas[i]) for i in range(ini, fim_novas)]
+        geracao = self._geracao
+        self._future = _executor.submit(_analisar, self.sc, alteradas)
+        self._acompanhar(geracao, novas, ini, fim_novas)
+
+    def _acompanhar(self, geracao, novas, ini, fim):
+        try:
+            if not self._future.done():
+                self.txt.after(self.POLL_MS, lambda: self._acompanhar(geracao, novas, ini, fim))
+                return
+            marcas = self._future.result()
+        except Exception:
+            return
+        if geracao != self._geracao:
+            # Texto mudou durante a análise: o próximo ciclo recalcula a partir do estado aplicado
+            if self._pendente:
+                self._pendente = False
+                self.verificar()
+            return
+        self._aplicar(marcas, ini, fim)
+        self._linhas = novas
+        if self._pendente:
+            self._pendente = False
+            self.verificar()
+
+    def _aplicar(self, marcas, ini, fim):
+        """Troca as marcações apenas nas linhas [ini, fim)."""
+        try:
+            if fim > ini:
+                self.txt.tag_remove(TAG, f"{ini + 1}.0", f"{fim}.end")
+            for num, c_ini, c_fim in marcas:
+                self.txt.tag_add(TAG, f"{num + 1}.{c_ini}", f"{num + 1}.{c_fim}")
+        except Exception:
+            pass
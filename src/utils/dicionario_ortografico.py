@@ -0,0 +1,163 @@
+"""
+Dicionário ortográfico compartilhado pelo processo.
+
+O dicionário de frequências do pyspellchecker (português) é pesado para carregar.
+Aqui ele é carregado uma única vez, numa thread iniciada logo após o login, e todos
+os editores (prontuário, receitas, modelos, observações) usam a mesma instância.
+Depois da carga o SpellChecker é descartado e só fica a forma compacta: um
+frozenset para a verificação de palavras e, para as sugestões do menu de contexto,
+as palavras ordenadas com as frequências num array paralelo.
+"""
+import sys
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    # Corretor ortográfico opcional
+    from spellchecker import SpellChecker
+except Exception:
+    SpellChecker = None
+
+
+class DicionarioCompartilhado:
+    """Interface usada pelos editores (a mesma do SpellChecker): pertinência/unknown
+    pelo frozenset; correction/candidates por edições de distância 1 e 2, ordenadas
+    pela frequência da palavra."""
+
+    def __init__(self, palavras: frozenset, ordenadas: Tuple[str, ...] = (), frequencias: Optional[array] = None):
+        self.palavras = palavras
+        self._ordenadas = ordenadas or tuple(sorted(palavras))
+        self._frequencias = frequencias if frequencias is not None else array('q', [1]) * len(self._ordenadas)
+        self._letras = ''.join(sorted({c for p in self._ordenadas for c in p}))
+
+    @classmethod
+    def de_frequencias(cls, frequencias: Dict[str, int]) -> 'DicionarioCompartilhado':
+        """Forma compacta a partir de {palavra: frequência} (o dicionário pode ser descartado depois)."""
+        itens = sorted(frequencias.items())
+        ordenadas = tuple(p for p, _f in itens)
+        return cls(frozenset(ordenadas), ordenadas, array('q', (int(f) for _p, f in itens)))
+
+    def frequencia(self, palavra: str) -> int:
+        pos = bisect_left(self._ordenadas, palavra)
+        if pos < len(self._ordenadas) and self._ordenadas[pos] == palavra:
+            return self._frequencias[pos]
+        return 0
+
+    def memoria_bytes(self) -> int:
+        """Memória retida: frozenset, tupla ordenada, array de frequências e as strings."""
+        return (sys.getsizeof(self.palavras) + sys.getsizeof(self._ordenadas)
+                + self._frequencias.buffer_info()[1] * self._frequencias.itemsize
+                + sum(sys.getsizeof(p) for p in self._ordenadas))
+
+    def _edicoes1(self, palavra: str) -> set:
+        partes = [(palavra[:i], palavra[i:]) for i in range(len(palavra) + 1)]
+        remocoes = [a + b[1:] for a, b in partes if b]
+        trocas = [a + b[1] + b[0] + b[2:] for a, b in partes if len(b) > 1]
+        substituicoes = [a + c + b[1:] for a, b in partes if b for c in self._letras]
+        insercoes = [a + c + b for a, b in partes for c in self._letras]
+        return set(remocoes + trocas + substituicoes + insercoes)
+
+    def __contains__(self, palavra) -> bool:
+        return str(palavra).lower() in self.palavras
+
+    def unknown(self, palavras: Iterable[str]) -> set:
+        return {p.lower() for p in palavras if p and p.lower() not in self.palavras}
+
+    def known(self, palavras: Iterable[str]) -> set:
+        return {p.lower() for p in palavras if p and p.lower() in self.palavras}
+
+    def correction(self, palavra):
+        candidatas = self.candidates(palavra)
+        return max(candidatas, key=self.frequencia) if candidatas else None
+
+    def candidates(self, palavra):
+        palavra = str(palavra).lower()
+        if palavra in self.palavras:
+            return {palavra}
+        distancia1 = self._edicoes1(palavra)
+        conhecidas = {p for p in distancia1 if p in self.palavras}
+        if conhecidas:
+            return conhecidas
+        return {p2 for p1 in distancia1 for p2 in self._edicoes1(p1) if p2 in self.palavras}
+
+
+class DicionarioOrtografico:
+    """Carga única (em segundo plano) do dicionário e métricas de carga/memória."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pronto = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._dicionario: Optional[DicionarioCompartilhado] = None
+        self._language = 'pt'
+        self._tempo_carga = None
+        self._memoria_bytes = None
+        self._erro = None
+
+    @property
+    def disponivel(self) -> bool:
+        """Indica se a dependência pyspellchecker está instalada."""
+        return SpellChecker is not None
+
+    @property
+    def carregando(self) -> bool:
+        return self._thread is not None and not self._pronto.is_set()
+
+    def iniciar_carga(self, language: str = 'pt'):
+        """Inicia a carga em segundo plano (chamadas seguintes não fazem nada)."""
+        if SpellChecker is None:
+            return
+        with self._lock:
+            if self._thread is not None:
+                return
+            self._language = language
+            self._thread = threading.Thread(target=self._carregar, name='dicionario-ortografico', daemon=True)
+            self._thread.start()
+
+    def _carregar(self):
+        inicio = time.perf_counter()
+        try:
+            sc = SpellChecker(language=self._language)
+            # As chaves já vêm em minúsculas; a forma compacta reaproveita as strings e
+            # o SpellChecker (e sua tabela de frequências) é liberado ao sair daqui
+            dicionario = DicionarioCompartilhado.de_frequencias(sc.word_frequency.dictionary)
+            del sc
+            self._memoria_bytes = dicionario.memoria_bytes()
+            self._dicionario = dicionario
+        except Exception as e:
+            self._erro = str(e)
+            print(f"[dicionario] Falha ao carregar dicionário '{self._language}': {e}")
+        finally:
+            self._tempo_carga = time.perf_counter() - inicio
+            self._pronto.set()
+
+    def obter(self, espera: Optional[float] = 0) -> Optional[DicionarioCompartilhado]:
+        """Retorna o dicionário se já carregado. Inicia a carga se ainda não começou.
+        `espera`: segundos a aguardar (0 = não bloqueia; None = aguarda até terminar)."""
+        if self._dicionario is not None:
+            return self._dicionario
+        self.iniciar_carga(self._language)
+        if self._thread is None:
+            return None
+        if espera is None or espera > 0:
+            self._pronto.wait(espera)
+        return self._dicionario
+
+    def metricas(self) -> Dict[str, object]:
+        """Tempo de carga e memória retida pelo dicionário (estruturas + strings)."""
+        return {
+            'idioma': self._language,
+            'carregado': self._dicionario is not None,
+            'carregando': self.carregando,
+            'palavras': len(self._dicionario.palavras) if self._dicionario else 0,
+            'tempo_carga_s': round(self._tempo_carga, 3) if self._tempo_carga is not None else None,
+            'memoria_palavras_bytes': self._memoria_bytes,
+            'erro': self._erro,
+        }
+
+
+# Instância única do processo
+dicionario_ortografico = DicionarioOrtografico()
@@ -1,10 +1,89 @@
 """
 Gerenciador de permissões baseado em banco de dados
 """
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Iterable, List, Tuple
 from src.db.database import get_db
+import time
 import traceback
 
+# Mapeamento de módulos para suas chaves no banco
+MODULOS_MAP = {
+    'cadastro': 'cadastro',
+    'atendimento': 'atendimento',
+    'financeiro': 'financeiro',
+    'configuracao': 'configuracao'
+}
+
+# Mapeamento de ações para suas chaves no banco
+ACOES_MAP = {
+    # Módulo Cadastro (ID 1)
+    'empresa': 'empresa',
+    'usuarios': 'usuarios',
+    'medicos': 'medicos',
+    'pacientes': 'pacientes',  
+    'modelo': 'modelo',  
+    'receita': 'receita',  
+    'exames_consultas': 'exames_consultas',
+    # Módulo Atendimento (ID 2)
+    'agenda': 'agenda',
+    'area_medica': 'area_medica',
+    'exames': 'exames', 
+    # Módulo Financeiro (ID 3)
+    'caixa': 'caixa',
+    'contas_pagar': 'contas_pagar',
+    'contas_receber': 'contas_receber',
+    'relatorios': 'relatorios',
+    'estoque': 'estoque',
+    # Módulo Configuração (ID 4)
+    'nfe': 'nfe',
+    'backup': 'backup',
+    'impressoras': 'impressoras',
+    'banco_dados': 'banco_dados',
+    # Botão no banco utiliza chave 'integracoes' (plural)
+    'integracao': 'integracoes',   # alias singular
+    'integracoes': 'integracoes',  # chave real no DB
+    'seguranca': 'seguranca'
+}
+
+
+class PermissoesCompiladas:
+    """Matriz de permissões (módulo × botão) de um usuário, compilada no login.
+
+    Cada par (módulo, botão) recebe um bit de um inteiro; a verificação é uma
+    consulta de dicionário e um teste de bit, sem acesso ao banco. O objeto é
+    imutável: quando a versão das permissões muda, um novo é compilado.
+    """
+    __slots__ = ('usuario_id', 'versao', 'compilado_em', '_bits', '_mascara', '_modulos')
+
+    def __init__(self, usuario_id: int, versao: int, linhas: Iterable[Tuple[str, Optional[str], Any]]):
+        bits: Dict[Tuple[str, str], int] = {}
+        mascara = 0
+        modulos = set()
+        for modulo, botao, permitido in linhas:
+            if botao is not None:
+                bit = bits.setdefault((modulo, botao), len(bits))
+                if permitido:
+                    mascara |= 1 << bit
+            if permitido:
+                modulos.add(modulo)
+        object.__setattr__(self, 'usuario_id', usuario_id)
+        object.__setattr__(self, 'versao', int(versao or 0))
+        object.__setattr__(self, 'compilado_em', time.monotonic())
+        object.__setattr__(self, '_bits', bits)
+        object.__setattr__(self, '_mascara', mascara)
+        object.__setattr__(self, '_modulos', frozenset(modulos))
+
+    def __setattr__(self, nome, valor):
+        raise AttributeError("PermissoesCompiladas é imutável")
+
+    def permitido(self, modulo: str, acao: Optional[str] = None) -> bool:
+        modulo_chave = MODULOS_MAP.get(modulo, modulo)
+        if not acao:
+            return modulo_chave in self._modulos
+        bit = self._bits.get((modulo_chave, ACOES_MAP.get(acao, acao)))
+        return bit is not None and bool((self._mascara >> bit) & 1)
+
+
 class GerenciadorPermissoesDB:
     """Gerencia permissões no banco de dados"""
     
@@ -14,48 +93,9 @@ class GerenciadorPermissoesDB:
     def verificar_permissao(self, usuario_id: int, modulo: str, acao: Optional[str] = None) -> bool:
 
         try:
-            # Mapeamento de módulos para suas chaves no banco
-            modulos_map = {
-                'cadastro': 'cadastro',
-                'atendimento': 'atendimento',
-                'financeiro': 'financeiro',
-                'configuracao': 'configuracao'
-            }
-            
-            # Mapeamento de ações para suas chaves no banco
-            acoes_map = {
-                # Módulo Cadastro (ID 1)
-                'empresa': 'empresa',
-                'usuarios': 'usuarios',
-                'medicos': 'medicos',
-                'pacientes': 'pacientes',  
-                'modelo': 'modelo',  
-                'receita': 'receita',  
-                'exames_consultas': 'exames_consultas',
-                # Módulo Atendimento (ID 2)
-                'agenda': 'agenda',
-                'area_medica': 'area_medica',
-                'exames': 'exames', 
-                # Módulo Financeiro (ID 3)
-                'caixa': 'caixa',
-                'contas_pagar': 'contas_pagar',
-                'contas_receber': 'contas_receber',
-                'relatorios': 'relatorios',
-                'estoque': 'estoque',
-                # Módulo Configuração (ID 4)
-                'nfe': 'nfe',
-                'backup': 'backup',
-                'impressoras': 'impressoras',
-                'banco_dados': 'banco_dados',
-                # Botão no banco utiliza chave 'integracoes' (plural)
-                'integracao': 'integracoes',   # alias singular
-                'integracoes': 'integracoes',  # chave real no DB
-                'seguranca': 'seguranca'
-            }
-
             # Obtém as chaves normalizadas
-            modulo_chave = modulos_map.get(modulo, modulo)
-            acao_chave = acoes_map.get(acao, acao) if acao else None
+            modulo_chave = MODULOS_MAP.get(modulo, modulo)
+            acao_chave = ACOES_MAP.get(acao, acao) if acao else None
             
             # Consulta o perfil do usuário
             query_perfil = """
@@ -89,6 +129,45 @@ class GerenciadorPermissoesDB:
                 pass
             return False
 
+    def compilar_permissoes(self, usuario_id: int) -> Optional[PermissoesCompiladas]:
+        """Carrega numa única consulta toda a matriz de permissões do perfil do usuário."""
+        try:
+            versao = self.versao_permissoes()
+            linhas = self.db.execute_query("""
+                SELECT m.chave AS modulo, b.chave AS botao, pp.permitido
+                FROM usuarios u
+                JOIN perfil p ON u.nivel = p.nome
+                JOIN perfil_permissao pp ON pp.perfil_id = p.id
+                JOIN modulos m ON pp.modulo_id = m.id
+                LEFT JOIN botoes b ON pp.botao_id = b.id
+                WHERE u.id = %s
+            """, (usuario_id,), fetch_all=True) or []
+            return PermissoesCompiladas(
+                usuario_id, versao,
+                ((l['modulo'], l.get('botao'), l.get('permitido') == 1) for l in linhas)
+            )
+        except Exception as e:
+            print(f"[ERRO] Erro ao compilar permissões do usuário {usuario_id}: {e}")
+            return None
+
+    def versao_permissoes(self) -> int:
+        """Versão atual das permissões (incrementada a cada gravação na tela de segurança)."""
+        try:
+            resultado = self.db.execute_query(
+                "SELECT versao FROM permissoes_versao WHERE id = 1", fetch_all=False
+            )
+            return int(resultado['versao']) if resultado else 0
+        except Exception:
+            return 0
+
+    def incrementar_versao(self) -> None:
+        try:
+            self.db.execute_query(
+                "UPDATE permissoes_versao SET versao = versao + 1, atualizado_em = NOW() WHERE id = 1"
+            )
+        except Exception as e:
+            print(f"[ERRO] Erro ao atualizar versão das permissões: {e}")
+
     def _verificar_permissao_modulo(self, perfil_id: int, modulo: str) -> bool:
         """Verifica permissão para o módulo"""
         try:
@@ -0,0 +1,266 @@
+"""
+Índice de pacientes em memória para busca enquanto digita (agenda e prontuário).
+
+Carrega os pacientes uma vez por sessão em colunas (arrays/listas paralelas) e mantém
+listas ordenadas de (token, linha) e (telefone/CPF, linha) para busca por prefixo com
+bisect, sem ida ao banco a cada tecla. As atualizações são incrementais: só linhas com
+id > último id carregado ou com pacientes.atualizado_em posterior à última sincronização.
+Exclusões são detectadas contando os pacientes com id <= último id carregado (uma
+inclusão na mesma janela tem id maior e não compensa a contagem) e recarregam tudo.
+"""
+import heapq
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, insort
+from typing import Any, Dict, List, Optional
+
+from src.utils.busca import normalizar_texto, somente_digitos, tokens_nome
+
+# Intervalo mínimo entre sincronizações incrementais disparadas por buscas
+INTERVALO_SYNC = 30
+
+_SO_NUMERO = re.compile(r'[\d\s().-]+')
+
+
+class IndicePacientes:
+    """Armazena os pacientes em colunas e indexa tokens do nome, telefones e CPF."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._limpar()
+
+    def _limpar(self):
+        self._ids = array('l')
+        self._nomes: List[str] = []
+        self._nomes_busca: List[str] = []
+        self._cpfs: List[Any] = []
+        self._nascimentos: List[Any] = []
+        self._telefones: List[Any] = []
+        self._emails: List[Any] = []
+        self._linha_por_id: Dict[int, int] = {}
+        self._tokens_linha: List[List[str]] = []
+        self._numeros_linha: List[List[str]] = []
+        self._tokens: List[tuple] = []   # (token, linha) ordenado
+        self._numeros: List[tuple] = []  # (dígitos de telefone/CPF, linha) ordenado
+        self._ultimo_id = 0
+        self._ultima_sync = None         # NOW() do servidor na última sincronização
+        self._sincronizado_em = 0.0
+        self._desatualizado = False
+        self.carregado = False
+
+    # ------------------------- Carga / sincronização -------------------------
+    def _consultar(self, sql: str, params=(), ate_id: Optional[int] = None):
+        """Retorna (NOW() do servidor, total de pacientes com id <= ate_id (ou de todos), linhas)."""
+        from src.db.database import db
+        with db.checkout() as conn:
+            cur = conn.cursor(dictionary=True)
+            try:
+                if ate_id is None:
+                    cur.execute("SELECT NOW() AS agora, (SELECT COUNT(*) FROM pacientes) AS total")
+                else:
+                    cur.execute(
+                        "SELECT NOW() AS agora, (SELECT COUNT(*) FROM pacientes WHERE id <= %s) AS total",
+                        (ate_id,)
+                    )
+                info = cur.fetchone() or {}
+                cur.execute(sql, params)
+                return info.get('agora'), int(info.get('total') or 0), cur.fetchall() or []
+            finally:
+                cur.close()
+
+    def _usa_atualizado_em(self) -> bool:
+        try:
+            from src.db.migrations import migracao_aplicada
+            return migracao_aplicada(5)
+        except Exception:
+            return False
+
+    def carregar(self):
+        """Carga completa (uma vez por sessão ou após exclusões)."""
+        agora, _total, linhas = self._consultar(
+            """
+            SELECT id, nome, cpf, data_nascimento, telefone, telefone2, email
+            FROM pacientes ORDER BY id
+            """
+        )
+        with self._lock:
+            self._limpar()
+            for linha in linhas:
+                self._gravar(linha, ordenar=False)
+            # Na carga completa ordena uma vez só, em vez de insort por chave
+            self._tokens.sort()
+            self._numeros.sort()
+            self._ultima_sync = agora
+            self._sincronizado_em = time.monotonic()
+            self.carregado = True
+
+    def atualizar(self):
+        """Sincronização incremental: novos ids e registros alterados desde a última carga."""
+        if not self.carregado:
+            self.carregar()
+            return
+        if self._usa_atualizado_em() and self._ultima_sync is not None:
+            sql = """
+                SELECT id, nome, cpf, data_nascimento, telefone, telefone2, email
+                FROM pacientes
+                WHERE id > %s OR atualizado_em >= %s
+                ORDER BY id
+            """
+            params = (self._ultimo_id, self._ultima_sync)
+        else:
+            sql = """
+                SELECT id, nome, cpf, data_nascimento, telefone, telefone2, email
+                FROM pacientes
+                WHERE id > %s
+                ORDER BY id
+            """
+            params = (self._ultimo_id,)
+        # Todos os ids carregados são <= _ultimo_id: menos linhas no banco até ele = exclusão
+        with self._lock:
+            ultimo_id, carregados = self._ultimo_id, len(self._ids)
+        agora, existentes, linhas = self._consultar(sql, params, ate_id=ultimo_id)
+        with self._lock:
+            for linha in linhas:
+                self._gravar(linha)
+            self._ultima_sync = agora
+            self._sincronizado_em = time.monotonic()
+            self._desatualizado = False
+        if existentes < carregados:
+            # Houve exclusão: a sincronização incremental não traz a linha removida, recarrega tudo
+            self.carregar()
+
+    def garantir_atualizado(self, intervalo: float = INTERVALO_SYNC):
+        """Carrega na primeira chamada; depois sincroniza no máximo a cada `intervalo` s
+        (ou imediatamente após marcar_desatualizado)."""
+        try:
+            if not self.carregado:
+                self.carregar()
+            elif self._desatualizado or (time.monotonic() - self._sincronizado_em) >= intervalo:
+                self.atualizar()
+        except Exception as e:
+            print(f"[indice_pacientes] Falha ao sincronizar: {e}")
+
+    def marcar_desatualizado(self):
+        """Força a próxima garantir_atualizado() a sincronizar (ex.: após cadastro)."""
+        self._desatualizado = True
+
+    # ------------------------- Estrutura interna -------------------------
+    def _gravar(self, linha: Dict[str, Any], ordenar: bool = True):
+        pid = int(linha['id'])
+        nome = linha.get('nome') or ''
+        tokens = tokens_nome(nome)
+        numeros = []
+        for campo in ('telefone', 'telefone2', 'cpf'):
+            digitos = somente_digitos(linha.get(campo))
+            if digitos and digitos not in numeros:
+                numeros.append(digitos)
+        idx = self._linha_por_id.get(pid)
+        if idx is None:
+            idx = len(self._ids)
+            self._ids.append(pid)
+            self._nomes.append(nome)
+            self._nomes_busca.append(normalizar_texto(nome))
+            self._cpfs.append(linha.get('cpf'))
+            self._nascimentos.append(linha.get('data_nascimento'))
+            self._telefones.append(linha.get('telefone'))
+            self._emails.append(linha.get('email'))
+            self._tokens_linha.append([])
+            self._numeros_linha.append([])
+            self._linha_por_id[pid] = idx
+        else:
+            self._nomes[idx] = nome
+            self._nomes_busca[idx] = normalizar_texto(nome)
+            self._cpfs[idx] = linha.get('cpf')
+            self._nascimentos[idx] = linha.get('data_nascimento')
+            self._telefones[idx] = linha.get('telefone')
+            self._emails[idx] = linha.get('email')
+        if ordenar:
+            self._reindexar(self._tokens, self._tokens_linha, idx, tokens)
+            self._reindexar(self._numeros, self._numeros_linha, idx, numeros)
+        else:
+            self._tokens.extend((t, idx) for t in tokens)
+            self._numeros.extend((n, idx) for n in numeros)
+            self._tokens_linha[idx] = tokens
+            self._numeros_linha[idx] = numeros
+        if pid > self._ultimo_id:
+            self._ultimo_id = pid
+
+    @staticmethod
+    def _reindexar(indice: List[tuple], por_linha: List[List[str]], idx: int, chaves: List[str]):
+        antigas = por_linha[idx]
+        if antigas == chaves:
+            return
+        for chave in antigas:
+            pos = bisect_left(indice, (chave, idx))
+            if pos < len(indice) and indice[pos] == (chave, idx):
+                del indice[pos]
+        for chave in chaves:
+            insort(indice, (chave, idx))
+        por_linha[idx] = list(chaves)
+
+    @staticmethod
+    def _prefixo(indice: List[tuple], prefixo: str) -> set:
+        linhas = set()
+        pos = bisect_left(indice, (prefixo, -1))
+        while pos < len(indice) and indice[pos][0].startswith(prefixo):
+            linhas.add(indice[pos][1])
+            pos += 1
+        return linhas
+
+    def _registro(self, idx: int) -> Dict[str, Any]:
+        return {
+            'id': self._ids[idx],
+            'nome': self._nomes[idx],
+            'cpf': self._cpfs[idx],
+            'data_nascimento': self._nascimentos[idx],
+            'telefone': self._telefones[idx],
+            'email': self._emails[idx],
+        }
+
+    # ------------------------- Consultas -------------------------
+    def buscar(self, termo: str, limite: Optional[int] = 10) -> List[Dict[str, Any]]:
+        """Pacientes cujo nome tem tokens começando com cada termo digitado.
+        Termos só com dígitos também casam com id exato, prefixo de telefone e de CPF."""
+        termo = (termo or '').strip()
+        if not termo:
+            return []
+        with self._lock:
+            digitos = somente_digitos(termo)
+            if digitos and _SO_NUMERO.fullmatch(termo):
+                linhas = self._prefixo(self._numeros, digitos)
+                idx = self._linha_por_id.get(int(digitos))
+                if idx is not None:
+                    linhas.add(idx)
+            else:
+                linhas = None
+                for t in sorted(tokens_nome(termo), key=len, reverse=True):
+                    encontrados = self._prefixo(self._tokens, t)
+                    linhas = encontrados if linhas is None else (linhas & encontrados)
+                    if not linhas:
+                        break
+                linhas = linhas or set()
+            if limite:
+                ordenadas = heapq.nsmallest(limite, linhas, key=lambda i: self._nomes_busca[i])
+            else:
+                ordenadas = sorted(linhas, key=lambda i: self._nomes_busca[i])
+            return [self._registro(i) for i in ordenadas]
+
+    def obter(self, paciente_id) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            idx = self._linha_por_id.get(int(paciente_id))
+            return self._registro(idx) if idx is not None else None
+
+    def todos(self) -> List[Dict[str, Any]]:
+        """Todos os pacientes ordenados por nome."""
+        with self._lock:
+            ordem = sorted(range(len(self._ids)), key=lambda i: self._nomes_busca[i])
+            return [self._registro(i) for i in ordem]
+
+    def __len__(self):
+        return len(self._ids)
+
+
+# Instância compartilhada pelas telas
+indice_pacientes = IndicePacientes()
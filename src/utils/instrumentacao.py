@@ -0,0 +1,315 @@
+"""
+Instrumentação de desempenho da interface (opcional, desligada por padrão).
+
+Liga com INSTRUMENTACAO_CONFIG['ativo'] = True ou com a variável de ambiente
+INSTRUMENTACAO=True. Quando ligada:
+
+- batimento: um `after()` a cada `batimento_ms` mede o atraso do loop do Tk
+  (quanto o callback chegou depois do previsto) — é o "travou" da recepção;
+- handlers: cada callback do Tk (cliques, binds, after) é cronometrado pelo nome
+  da função; `@medido(nome)` / `with medir(nome)` nomeiam os pontos de interesse,
+  inclusive as funções que rodam nos workers do executor;
+- consultas: cada execute de cursor (db.observar_consultas) é somado a todos os
+  handlers em andamento na mesma thread (quantidade e tempo de banco);
+- a cada `janela_s` segundos os histogramas da janela vão para uma linha do
+  arquivo JSONL e a janela recomeça.
+
+Desligada, `@medido` e `medir` só chamam a função, sem custo de medição.
+
+Uso:
+    from src.utils.instrumentacao import medido, medir
+
+    @medido('agenda.refresh')
+    def _refresh_consultas_periodico(self): ...
+
+    with medir('relatorios.financeiro'):
+        ...
+"""
+import functools
+import json
+import os
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from src.db.config import INSTRUMENTACAO_CONFIG
+
+# Limites superiores das faixas do histograma (ms); a última faixa é "acima de 5 s"
+FAIXAS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+# Nome do histograma do atraso do loop do Tk
+LAG_TK = 'tk.lag'
+
+
+def instrumentacao_habilitada() -> bool:
+    return bool(INSTRUMENTACAO_CONFIG.get('ativo')) or os.environ.get('INSTRUMENTACAO') == 'True'
+
+
+class Histograma:
+    """Contagens por faixa de duração, com totais de consultas ao banco."""
+
+    def __init__(self):
+        self.contagens = [0] * (len(FAIXAS_MS) + 1)
+        self.n = 0
+        self.soma_ms = 0.0
+        self.max_ms = 0.0
+        self.consultas = 0
+        self.banco_ms = 0.0
+
+    def adicionar(self, duracao_ms: float, consultas: int = 0, banco_ms: float = 0.0):
+        i = 0
+        while i < len(FAIXAS_MS) and duracao_ms > FAIXAS_MS[i]:
+            i += 1
+        self.contagens[i] += 1
+        self.n += 1
+        self.soma_ms += duracao_ms
+        self.max_ms = max(self.max_ms, duracao_ms)
+        self.consultas += consultas
+        self.banco_ms += banco_ms
+
+    def percentil(self, p: float) -> float:
+        """Limite superior da faixa que contém o percentil `p` (0-100)."""
+        if not self.n:
+            return 0.0
+        alvo = self.n * p / 100.0
+        acumulado = 0
+        for i, c in enumerate(self.contagens):
+            acumulado += c
+            if acumulado >= alvo:
+                return float(FAIXAS_MS[i]) if i < len(FAIXAS_MS) else self.max_ms
+        return self.max_ms
+
+    def como_dict(self) -> Dict:
+        return {
+            'n': self.n,
+            'media_ms': round(self.soma_ms / self.n, 2) if self.n else 0.0,
+            'p50_ms': self.percentil(50),
+            'p95_ms': self.percentil(95),
+            'max_ms': round(self.max_ms, 2),
+            'consultas': self.consultas,
+            'banco_ms': round(self.banco_ms, 2),
+            'faixas_ms': list(FAIXAS_MS),
+            'contagens': list(self.contagens),
+        }
+
+
+class _Medicao:
+    """Handler em andamento numa thread (acumula as consultas feitas durante ele)."""
+    __slots__ = ('nome', 'inicio', 'consultas', 'banco_ms')
+
+    def __init__(self, nome: str):
+        self.nome = nome
+        self.inicio = time.perf_counter()
+        self.consultas = 0
+        self.banco_ms = 0.0
+
+
+def _callback_agendado(func):
+    """O after() do tkinter registra no Tk um closure `callit` que chama a função
+    agendada; devolve essa função (ou `func`, se não for um callit)."""
+    if getattr(func, '__qualname__', '').endswith('.<locals>.callit') and getattr(func, '__closure__', None):
+        livres = dict(zip(func.__code__.co_freevars, func.__closure__))
+        celula = livres.get('func')
+        if celula is not None:
+            try:
+                return celula.cell_contents
+            except ValueError:
+                pass
+    return func
+
+
+class Instrumentacao:
+    """Coleta o atraso do loop do Tk e a duração/consultas por handler."""
+
+    def __init__(self):
+        self.ativo = False
+        self._root = None
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._janela: Dict[str, Histograma] = {}
+        self._janela_inicio = time.time()
+        self._batimento_job = None
+        self._batimento_previsto: Optional[float] = None
+        self.batimento_ms = int(INSTRUMENTACAO_CONFIG.get('batimento_ms', 100))
+        self.janela_s = int(INSTRUMENTACAO_CONFIG.get('janela_s', 60))
+        self.arquivo = Path(INSTRUMENTACAO_CONFIG.get('arquivo') or Path.home() / '.clinicas' / 'instrumentacao.jsonl')
+        self.arquivo_max_bytes = int(float(INSTRUMENTACAO_CONFIG.get('arquivo_max_mb', 5)) * 1024 * 1024)
+        self.lag_atual_ms = 0.0
+        self._callwrapper_original = None
+
+    # ------------------------- Ciclo de vida -------------------------
+    def iniciar(self, root) -> bool:
+        """Liga a coleta se estiver habilitada na configuração. Retorna se ficou ativa."""
+        if self.ativo or not instrumentacao_habilitada():
+            return self.ativo
+        self._root = root
+        self.ativo = True
+        self._janela_inicio = time.time()
+        try:
+            from src.db.database import observar_consultas
+            observar_consultas(self._registrar_consulta)
+        except Exception as e:
+            print(f"[INSTRUMENTACAO] Consultas ao banco não serão contadas: {e}")
+        self._instrumentar_callbacks_tk()
+        self._agendar_batimento()
+        try:
+            from src.utils.agendador import agendador
+            agendador.registrar('instrumentacao_gravar', self.gravar, self.janela_s * 1000, jitter=0)
+        except Exception as e:
+            print(f"[INSTRUMENTACAO] Erro ao agendar gravação: {e}")
+        print(f"[INSTRUMENTACAO] Ativa; histogramas em {self.arquivo}")
+        return True
+
+    def parar(self):
+        if not self.ativo:
+            return
+        self.gravar()
+        self.ativo = False
+        try:
+            if self._batimento_job is not None:
+                self._root.after_cancel(self._batimento_job)
+        except Exception:
+            pass
+        self._batimento_job = None
+        try:
+            from src.db.database import observar_consultas
+            observar_consultas(None)
+        except Exception:
+            pass
+        try:
+            from src.utils.agendador import agendador
+            agendador.cancelar('instrumentacao_gravar')
+        except Exception:
+            pass
+        if self._callwrapper_original is not None:
+            import tkinter
+            tkinter.CallWrapper.__call__ = self._callwrapper_original
+            self._callwrapper_original = None
+
+    # ------------------------- Medição -------------------------
+    def _pilha(self) -> List[_Medicao]:
+        pilha = getattr(self._local, 'pilha', None)
+        if pilha is None:
+            pilha = self._local.pilha = []
+        return pilha
+
+    @contextmanager
+    def medir(self, nome: str):
+        """Cronometra o bloco como handler `nome` (aninhável)."""
+        if not self.ativo:
+            yield
+            return
+        medicao = _Medicao(nome)
+        pilha = self._pilha()
+        pilha.append(medicao)
+        try:
+            yield
+        finally:
+            pilha.pop()
+            self.registrar(nome, (time.perf_counter() - medicao.inicio) * 1000.0,
+                           medicao.consultas, medicao.banco_ms)
+
+    def registrar(self, nome: str, duracao_ms: float, consultas: int = 0, banco_ms: float = 0.0):
+        with self._lock:
+            hist = self._janela.get(nome)
+            if hist is None:
+                hist = self._janela[nome] = Histograma()
+            hist.adicionar(duracao_ms, consultas, banco_ms)
+
+    def _registrar_consulta(self, sql, duracao_ms: float):
+        """Observador do banco: soma a consulta a todos os handlers abertos na thread."""
+        for medicao in getattr(self._local, 'pilha', None) or ():
+            medicao.consultas += 1
+            medicao.banco_ms += duracao_ms
+
+    def _instrumentar_callbacks_tk(self):
+        """Cronometra todo callback do Tk pelo nome qualificado da função (a agendada,
+        no caso de after/after_idle). O batimento não é medido."""
+        import tkinter
+        if self._callwrapper_original is not None:
+            return
+        original = tkinter.CallWrapper.__call__
+        self._callwrapper_original = original
+        instrumentacao = self
+
+        def __call__(wrapper, *args):
+            func = _callback_agendado(wrapper.func)
+            if not instrumentacao.ativo or getattr(func, '__func__', None) is Instrumentacao._batimento:
+                return original(wrapper, *args)
+            nome = 'tk:' + (getattr(func, '__qualname__', None) or getattr(func, '__name__', 'callback'))
+            with instrumentacao.medir(nome):
+                return original(wrapper, *args)
+
+        tkinter.CallWrapper.__call__ = __call__
+
+    # ------------------------- Batimento do loop do Tk -------------------------
+    def _agendar_batimento(self):
+        self._batimento_previsto = time.perf_counter() + self.batimento_ms / 1000.0
+        try:
+            self._batimento_job = self._root.after(self.batimento_ms, self._batimento)
+        except Exception:
+            self._batimento_job = None
+
+    def _batimento(self):
+        if not self.ativo:
+            return
+        atraso = max((time.perf_counter() - self._batimento_previsto) * 1000.0, 0.0)
+        self.lag_atual_ms = atraso
+        self.registrar(LAG_TK, atraso)
+        self._agendar_batimento()
+
+    # ------------------------- Saída -------------------------
+    def resumo(self) -> Dict[str, Dict]:
+        """Histogramas da janela corrente (nome -> dict)."""
+        with self._lock:
+            return {nome: h.como_dict() for nome, h in self._janela.items()}
+
+    def gravar(self):
+        """Grava a janela corrente como uma linha JSON e começa uma nova janela."""
+        with self._lock:
+            janela, self._janela = self._janela, {}
+            inicio, self._janela_inicio = self._janela_inicio, time.time()
+        if not janela:
+            return
+        linha = {
+            'inicio': datetime.fromtimestamp(inicio).isoformat(timespec='seconds'),
+            'fim': datetime.now().isoformat(timespec='seconds'),
+            'estacao': socket.gethostname(),
+            'handlers': {nome: h.como_dict() for nome, h in sorted(janela.items())},
+        }
+        try:
+            self.arquivo.parent.mkdir(parents=True, exist_ok=True)
+            if self.arquivo.exists() and self.arquivo.stat().st_size > self.arquivo_max_bytes:
+                self.arquivo.replace(self.arquivo.with_name(self.arquivo.name + '.1'))
+            with open(self.arquivo, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(linha, ensure_ascii=False) + '\n')
+        except Exception as e:
+            print(f"[INSTRUMENTACAO] Erro ao gravar {self.arquivo}: {e}")
+
+
+# Instância do processo
+instrumentacao = Instrumentacao()
+
+
+def medir(nome: str):
+    """Context manager: `with medir('relatorios.contas'): ...`"""
+    return instrumentacao.medir(nome)
+
+
+def medido(nome: Optional[str] = None) -> Callable:
+    """Decorador: cronometra cada chamada da função como handler `nome`
+    (padrão: nome qualificado da função)."""
+    def decorador(fn):
+        rotulo = nome or fn.__qualname__
+
+        @functools.wraps(fn)
+        def envoltorio(*args, **kwargs):
+            if not instrumentacao.ativo:
+                return fn(*args, **kwargs)
+            with instrumentacao.medir(rotulo):
+                return fn(*args, **kwargs)
+        return envoltorio
+    return decorador
@@ -0,0 +1,358 @@
+"""
+Notificações de alteração na rede local (chat, agenda, caixa).
+
+A máquina servidora (IS_SERVER=True) roda um hub asyncio TCP. Cada estação mantém
+uma conexão com o hub, assina tópicos (`chat:<usuario_id>`, `agenda:<AAAA-MM-DD>`,
+`agenda`, `caixa`) e publica eventos depois do commit. Ao receber um evento a tela
+recarrega na hora; sem hub acessível, as telas seguem no polling normal.
+
+Protocolo: uma linha JSON por mensagem. A primeira linha da estação autentica com o
+segredo compartilhado (NOTIFICADOR_CONFIG['token']); o hub confirma com "ok" e só
+então a estação se considera conectada. Sem autenticação, ou com token errado, o hub
+responde "erro" (quando possível) e fecha a conexão.
+    {"op": "auth", "token": "..."}     autentica
+    {"op": "ok"} / {"op": "erro", "motivo": "autenticacao"}   (hub -> estação)
+    {"op": "sub", "topicos": [...]}     assina
+    {"op": "unsub", "topicos": [...]}   cancela
+    {"op": "pub", "topico": "...", "dados": {...}}   publica
+    {"op": "evento", "topico": "...", "dados": {...}}   (hub -> estação)
+"""
+import asyncio
+import hashlib
+import hmac
+import json
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+from src.db.config import NOTIFICADOR_CONFIG, get_db_config, is_server_machine
+
+# Drenagem dos eventos na thread do Tk (ms)
+DRENAGEM_MS = 200
+# Espera máxima entre tentativas de reconexão ao hub (s)
+RECONEXAO_MAX = 60
+# Prazo para a estação se autenticar depois de conectar (s)
+AUTENTICACAO_TIMEOUT = 5
+# Conexão que durou ao menos isto (s) volta a espera de reconexão ao mínimo
+CONEXAO_ESTAVEL = 30
+
+
+def token_notificacoes() -> str:
+    """Segredo do hub: o configurado ou um derivado das credenciais do banco."""
+    token = NOTIFICADOR_CONFIG.get('token')
+    if token:
+        return str(token)
+    cfg = get_db_config()
+    base = f"{cfg.get('database')}|{cfg.get('user')}|{cfg.get('password')}|notificacoes"
+    return hashlib.sha256(base.encode('utf-8')).hexdigest()
+
+
+def _linha(msg: dict) -> bytes:
+    return (json.dumps(msg, default=str) + '\n').encode('utf-8')
+
+
+def _mensagem(linha: bytes) -> dict:
+    try:
+        msg = json.loads(linha)
+    except ValueError:
+        return {}
+    return msg if isinstance(msg, dict) else {}
+
+
+class HubNotificacoes:
+    """Hub TCP: repassa cada publicação às conexões que assinaram o tópico."""
+
+    def __init__(self, host: str = '0.0.0.0', porta: Optional[int] = None, token: Optional[str] = None,
+                 buffer_max: Optional[int] = None):
+        self.host = host
+        self.porta = int(porta or NOTIFICADOR_CONFIG.get('porta', 47850))
+        self.token = token or token_notificacoes()
+        self.buffer_max = int(buffer_max or NOTIFICADOR_CONFIG.get('buffer_max_kb', 256) * 1024)
+        self.descartados = 0
+        self.conexoes = 0
+        self.recusadas = 0
+        self._clientes: Dict[asyncio.StreamWriter, set] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+        self._pronto = threading.Event()
+
+    def iniciar(self):
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._executar, name='hub-notificacoes', daemon=True)
+        self._thread.start()
+        self._pronto.wait(5)
+
+    def parar(self):
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            self._thread.join(2)
+
+    def _executar(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._atender, self.host, self.porta)
+            )
+            print(f"[NOTIFICADOR] Hub escutando em {self.host}:{self.porta}")
+        except Exception as e:
+            print(f"[NOTIFICADOR] Falha ao iniciar hub: {e}")
+            self._pronto.set()
+            return
+        self._pronto.set()
+        try:
+            self._loop.run_forever()
+        finally:
+            self._server.close()
+            for writer in list(self._clientes):
+                writer.close()
+            # Conexões fechadas: as tarefas das estações terminam pela leitura de EOF
+            pendentes = asyncio.all_tasks(self._loop)
+            if pendentes:
+                self._loop.run_until_complete(asyncio.wait(pendentes, timeout=2))
+            self._loop.close()
+
+    def _autenticado(self, linha: bytes) -> bool:
+        try:
+            msg = json.loads(linha)
+        except ValueError:
+            return False
+        if not isinstance(msg, dict) or msg.get('op') != 'auth':
+            return False
+        return hmac.compare_digest(str(msg.get('token') or ''), self.token)
+
+    def _desconectar(self, writer: asyncio.StreamWriter):
+        self._clientes.pop(writer, None)
+        try:
+            writer.close()
+        except Exception:
+            pass
+
+    async def _atender(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.conexoes += 1
+        try:
+            linha = await asyncio.wait_for(reader.readline(), timeout=AUTENTICACAO_TIMEOUT)
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            linha = b''
+        if not self._autenticado(linha):
+            self.recusadas += 1
+            try:
+                writer.write(_linha({'op': 'erro', 'motivo': 'autenticacao'}))
+            except Exception:
+                pass
+            self._desconectar(writer)
+            return
+        topicos: set = set()
+        self._clientes[writer] = topicos
+        writer.write(_linha({'op': 'ok'}))
+        try:
+            while writer in self._clientes:
+                linha = await reader.readline()
+                if not linha:
+                    break
+                try:
+                    msg = json.loads(linha)
+                except ValueError:
+                    continue
+                op = msg.get('op')
+                if op == 'sub':
+                    topicos.update(str(t) for t in msg.get('topicos') or [])
+                elif op == 'unsub':
+                    topicos.difference_update(str(t) for t in msg.get('topicos') or [])
+                elif op == 'pub':
+                    topico = str(msg.get('topico') or '')
+                    evento = _linha({'op': 'evento', 'topico': topico, 'dados': msg.get('dados') or {}})
+                    for outro, assinados in list(self._clientes.items()):
+                        if outro is not writer and topico in assinados:
+                            self._repassar(outro, evento)
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self._desconectar(writer)
+
+    def _repassar(self, writer: asyncio.StreamWriter, evento: bytes):
+        """Escreve sem esperar a estação; quem acumula mais que buffer_max sem ler é desconectado."""
+        try:
+            writer.write(evento)
+            if writer.transport.get_write_buffer_size() > self.buffer_max:
+                self.descartados += 1
+                print("[NOTIFICADOR] Estação não está lendo os eventos; conexão encerrada")
+                self._desconectar(writer)
+        except Exception:
+            self._desconectar(writer)
+
+
+class ClienteNotificacoes:
+    """Conexão da estação com o hub. Callbacks são chamados na thread do Tk."""
+
+    def __init__(self):
+        self.conectado = False
+        self._assinaturas: Dict[str, List[Callable[[str, dict], None]]] = {}
+        self._fila: "queue.Queue" = queue.Queue()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._thread: Optional[threading.Thread] = None
+        self._root = None
+        self._host = None
+        self._porta = None
+        self._token = None
+
+    # ------------------------- Ciclo de vida -------------------------
+    def iniciar(self, root, host: Optional[str] = None, porta: Optional[int] = None, token: Optional[str] = None):
+        """Conecta ao hub (em segundo plano) e drena os eventos na thread do Tk (`root`)."""
+        if not NOTIFICADOR_CONFIG.get('ativo', True) or self._thread is not None:
+            return
+        self._root = root
+        self._host = host or (get_db_config().get('host') or '127.0.0.1')
+        self._porta = int(porta or NOTIFICADOR_CONFIG.get('porta', 47850))
+        self._token = token or token_notificacoes()
+        self._thread = threading.Thread(target=self._executar, name='cliente-notificacoes', daemon=True)
+        self._thread.start()
+        self._agendar_drenagem()
+
+    def _executar(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        try:
+            self._loop.run_until_complete(self._manter_conexao())
+        except Exception as e:
+            print(f"[NOTIFICADOR] Cliente encerrado: {e}")
+
+    async def _manter_conexao(self):
+        """Conecta, autentica e lê os eventos. Toda desconexão (falha ao conectar,
+        token recusado ou queda) espera antes de tentar de novo, dobrando até
+        RECONEXAO_MAX; a espera só volta ao mínimo após uma conexão estável."""
+        espera = 1
+        while True:
+            writer = None
+            autenticado_em = None
+            try:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self._host, self._porta), timeout=3
+                )
+                writer.write(_linha({'op': 'auth', 'token': self._token}))
+                await writer.drain()
+                resposta = _mensagem(await asyncio.wait_for(reader.readline(), timeout=AUTENTICACAO_TIMEOUT))
+                if resposta.get('op') != 'ok':
+                    if resposta.get('op') == 'erro':
+                        print(f"[NOTIFICADOR] Hub recusou a autenticação (token diferente do servidor?); "
+                              f"nova tentativa em {espera}s")
+                else:
+                    autenticado_em = time.monotonic()
+                    self._writer = writer
+                    self.conectado = True
+                    topicos = list(self._assinaturas)
+                    if topicos:
+                        writer.write(_linha({'op': 'sub', 'topicos': topicos}))
+                    while True:
+                        linha = await reader.readline()
+                        if not linha:
+                            break
+                        msg = _mensagem(linha)
+                        if msg.get('op') == 'evento':
+                            self._fila.put((str(msg.get('topico') or ''), msg.get('dados') or {}))
+            except Exception:
+                pass
+            finally:
+                self.conectado = False
+                self._writer = None
+                if writer is not None:
+                    try:
+                        writer.close()
+                    except Exception:
+                        pass
+            if autenticado_em is not None and time.monotonic() - autenticado_em >= CONEXAO_ESTAVEL:
+                espera = 1
+            await asyncio.sleep(espera)
+            espera = min(espera * 2, RECONEXAO_MAX)
+
+    def _enviar(self, msg: dict):
+        """Envia uma mensagem ao hub (qualquer thread). Sem conexão, descarta."""
+        if self._loop is None or not self.conectado:
+            return
+
+        def _escrever():
+            try:
+                if self._writer is not None:
+                    self._writer.write(_linha(msg))
+            except Exception:
+                pass
+        try:
+            self._loop.call_soon_threadsafe(_escrever)
+        except RuntimeError:
+            pass
+
+    # ------------------------- API -------------------------
+    def assinar(self, topico: str, callback: Callable[[str, dict], None]):
+        """Chama `callback(topico, dados)` na thread do Tk a cada evento do tópico."""
+        ouvintes = self._assinaturas.setdefault(topico, [])
+        if callback not in ouvintes:
+            ouvintes.append(callback)
+        if len(ouvintes) == 1:
+            self._enviar({'op': 'sub', 'topicos': [topico]})
+
+    def cancelar(self, topico: str, callback: Callable[[str, dict], None]):
+        ouvintes = self._assinaturas.get(topico)
+        if not ouvintes:
+            return
+        try:
+            ouvintes.remove(callback)
+        except ValueError:
+            pass
+        if not ouvintes:
+            self._assinaturas.pop(topico, None)
+            self._enviar({'op': 'unsub', 'topicos': [topico]})
+
+    def publicar(self, topico: str, dados: Optional[dict] = None):
+        """Publica um evento (chamar depois do commit). Sem hub, não faz nada."""
+        self._enviar({'op': 'pub', 'topico': topico, 'dados': dados or {}})
+
+    # ------------------------- Thread do Tk -------------------------
+    def _agendar_drenagem(self):
+        try:
+            self._root.after(DRENAGEM_MS, self._drenar)
+        except Exception:
+            pass
+
+    def _drenar(self):
+        while True:
+            try:
+                topico, dados = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            for callback in list(self._assinaturas.get(topico, [])):
+                try:
+                    callback(topico, dados)
+                except Exception as e:
+                    print(f"[NOTIFICADOR] Erro ao tratar evento '{topico}': {e}")
+        self._agendar_drenagem()
+
+
+# Instâncias do processo
+hub_notificacoes: Optional[HubNotificacoes] = None
+notificador = ClienteNotificacoes()
+
+
+def iniciar_notificacoes(root):
+    """Sobe o hub na máquina servidora e conecta o cliente desta estação."""
+    global hub_notificacoes
+    if not NOTIFICADOR_CONFIG.get('ativo', True):
+        return
+    if is_server_machine() and hub_notificacoes is None:
+        hub_notificacoes = HubNotificacoes()
+        hub_notificacoes.iniciar()
+        notificador.iniciar(root, host='127.0.0.1')
+    else:
+        notificador.iniciar(root)
+
+
+def publicar(topico: str, dados: Optional[dict] = None):
+    """Atalho para publicar pelo cliente do processo (no-op sem hub)."""
+    try:
+        notificador.publicar(topico, dados)
+    except Exception:
+        pass
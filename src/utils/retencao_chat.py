@@ -0,0 +1,78 @@
+"""
+Retenção do chat: move periodicamente as mensagens lidas antigas para o arquivo.
+
+Roda só na máquina servidora (IS_SERVER=True), numa thread com conexão própria.
+Uma trava do MySQL (GET_LOCK) garante uma execução por vez mesmo que mais de uma
+máquina esteja marcada como servidora.
+"""
+import threading
+from typing import Optional
+
+from src.db.config import CHAT_RETENCAO_CONFIG, is_server_machine
+
+_LOCK_NOME = 'clinica_chat_retencao'
+
+_thread: Optional[threading.Thread] = None
+_parar = threading.Event()
+
+
+def executar_retencao(conn) -> int:
+    """Uma rodada de arquivamento com a conexão informada. Retorna o total arquivado."""
+    from src.db.chat_db import ChatDB
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT GET_LOCK(%s, 0)", (_LOCK_NOME,))
+        obtida = (cur.fetchone() or [0])[0] == 1
+    finally:
+        cur.close()
+    if not obtida:
+        return 0
+    try:
+        total = ChatDB(conn).arquivar_mensagens(
+            dias=int(CHAT_RETENCAO_CONFIG.get('dias', 90)),
+            lote=int(CHAT_RETENCAO_CONFIG.get('lote', 500)),
+        )
+        if total:
+            print(f"[CHAT] Retenção: {total} mensagens movidas para o arquivo.")
+        return total
+    finally:
+        cur = conn.cursor()
+        try:
+            cur.execute("SELECT RELEASE_LOCK(%s)", (_LOCK_NOME,))
+            cur.fetchone()
+        finally:
+            cur.close()
+
+
+def _executar():
+    from src.db.database import db
+    intervalo = max(float(CHAT_RETENCAO_CONFIG.get('intervalo_horas', 6)), 0.1) * 3600
+    # Primeira rodada logo após a abertura, sem disputar com a carga das telas
+    _parar.wait(60)
+    while not _parar.is_set():
+        conn = None
+        try:
+            conn = db.conexao_dedicada()
+            executar_retencao(conn)
+        except Exception as e:
+            print(f"[CHAT] Erro na retenção do chat: {e}")
+        finally:
+            try:
+                if conn is not None:
+                    conn.close()
+            except Exception:
+                pass
+        _parar.wait(intervalo)
+
+
+def iniciar_retencao_chat():
+    """Inicia o job de retenção (só na máquina servidora e se ativo na configuração)."""
+    global _thread
+    if _thread is not None or not CHAT_RETENCAO_CONFIG.get('ativo', True) or not is_server_machine():
+        return
+    _thread = threading.Thread(target=_executar, name='chat-retencao', daemon=True)
+    _thread.start()
+
+
+def parar_retencao_chat():
+    _parar.set()
@@ -0,0 +1,234 @@
+"""
+Sincronizador do chat: uma thread por estação com conexão própria.
+
+Substitui os loops de `after()` que rodavam na thread do Tk (heartbeat global,
+poll global de não lidas e heartbeat/poll/presença do ChatModule). A cada ciclo
+faz uma única ida ao banco (ChatDB.sincronizar) e publica as mudanças numa fila
+thread-safe, drenada na thread do Tk por `after()`. O intervalo é curto com a tela
+do chat aberta e longo no resto do tempo.
+"""
+import queue
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+# Intervalos (s) entre ciclos: tela do chat aberta / fechada
+INTERVALO_RAPIDO = 1.0
+INTERVALO_LENTO = 3.0
+# Com o hub de notificações conectado, mensagens novas acordam o worker por evento;
+# com a tela aberta o ciclo segue só para a presença
+INTERVALO_COM_HUB = 15.0
+INTERVALO_PRESENCA_COM_HUB = 5.0
+# Intervalo mínimo entre heartbeats de presença
+INTERVALO_HEARTBEAT = 10.0
+# Intervalo entre limpezas de sessões expiradas (ChatDB.purgar_sessoes_inativas)
+INTERVALO_PURGA = 300.0
+# Drenagem da fila na thread do Tk (ms)
+DRENAGEM_MS = 200
+
+
+class SincronizadorChat:
+    """Worker de sincronização do chat do usuário logado nesta estação."""
+
+    def __init__(self, usuario_id: int, usuario_nome: str, dispositivo: Optional[str] = None):
+        self.usuario_id = usuario_id
+        self.usuario_nome = str(usuario_nome or 'Usuário')
+        self.dispositivo = dispositivo
+        self.tela_aberta = False          # True com o ChatModule visível (modo rápido + presença)
+        self._fila: "queue.Queue[Dict]" = queue.Queue()
+        self._ouvintes: List[Callable[[Dict], None]] = []
+        self._acordar = threading.Event()
+        self._parar = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._root = None
+        self._drenagem_job = None
+        self._lock = threading.Lock()
+        self._marcar_pendentes: List[int] = []
+        self._remetentes_pendentes: set = set()
+        # Estado do worker
+        self._conn = None
+        self._chatdb = None
+        self._ultimo_id: Optional[int] = None
+        self._nao_lidas: Optional[int] = None
+        self._online_chave = None
+        self._ultimo_heartbeat = 0.0
+        self._ultima_purga = 0.0
+
+    # ------------------------- Ciclo de vida -------------------------
+    def iniciar(self, root):
+        """Inicia a thread e a drenagem da fila na thread do Tk (`root`)."""
+        self._root = root
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._executar, name='chat-sync', daemon=True)
+            self._thread.start()
+        self._agendar_drenagem()
+
+    def parar(self, espera: float = 2.0):
+        self._parar.set()
+        self._acordar.set()
+        try:
+            if self._drenagem_job and self._root is not None:
+                self._root.after_cancel(self._drenagem_job)
+        except Exception:
+            pass
+        self._drenagem_job = None
+        if self._thread is not None:
+            self._thread.join(espera)
+
+    def acordar(self):
+        """Antecipa o próximo ciclo (ex.: ao abrir a tela do chat)."""
+        self._acordar.set()
+
+    def definir_tela_aberta(self, aberta: bool):
+        self.tela_aberta = bool(aberta)
+        if aberta:
+            # Reenvia presença no próximo ciclo para quem acabou de assinar
+            self._online_chave = None
+            self.acordar()
+
+    # ------------------------- Assinaturas (thread do Tk) -------------------------
+    def assinar(self, ouvinte: Callable[[Dict], None]):
+        """Registra um callback chamado na thread do Tk com cada evento publicado:
+        dict com 'nao_lidas' (int), 'novas' (lista) e/ou 'online' (lista), conforme mudou."""
+        if ouvinte not in self._ouvintes:
+            self._ouvintes.append(ouvinte)
+
+    def cancelar_assinatura(self, ouvinte: Callable[[Dict], None]):
+        try:
+            self._ouvintes.remove(ouvinte)
+        except ValueError:
+            pass
+
+    def marcar_lidas(self, ids: List[int]):
+        """Enfileira a marcação de mensagens como lidas (executada pelo worker)."""
+        ids = [int(i) for i in ids if i is not None]
+        if not ids:
+            return
+        with self._lock:
+            self._marcar_pendentes.extend(ids)
+        self.acordar()
+
+    def marcar_lidas_do_remetente(self, remetente_nome: str):
+        """Enfileira a marcação de todas as mensagens pendentes do remetente (um UPDATE no worker)."""
+        if not remetente_nome:
+            return
+        with self._lock:
+            self._remetentes_pendentes.add(str(remetente_nome))
+        self.acordar()
+
+    def _agendar_drenagem(self):
+        try:
+            self._drenagem_job = self._root.after(DRENAGEM_MS, self._drenar)
+        except Exception:
+            self._drenagem_job = None
+
+    def _drenar(self):
+        while True:
+            try:
+                evento = self._fila.get_nowait()
+            except queue.Empty:
+                break
+            for ouvinte in list(self._ouvintes):
+                try:
+                    ouvinte(evento)
+                except Exception as e:
+                    print(f"[CHAT] Erro ao processar evento do sincronizador: {e}")
+        if not self._parar.is_set():
+            self._agendar_drenagem()
+
+    # ------------------------- Worker -------------------------
+    def _conectar(self):
+        from src.db.database import db
+        from src.db.chat_db import ChatDB
+        self._conn = db.conexao_dedicada()
+        self._chatdb = ChatDB(self._conn)
+
+    def _desconectar(self):
+        try:
+            if self._conn is not None:
+                self._conn.close()
+        except Exception:
+            pass
+        self._conn = None
+        self._chatdb = None
+
+    @staticmethod
+    def _hub_conectado() -> bool:
+        try:
+            from src.utils.notificador import notificador
+            return notificador.conectado
+        except Exception:
+            return False
+
+    def _executar(self):
+        while not self._parar.is_set():
+            try:
+                if self._chatdb is None:
+                    self._conectar()
+                self._ciclo()
+            except Exception as e:
+                print(f"[CHAT] Erro no sincronizador: {e}")
+                self._desconectar()
+            intervalo = INTERVALO_RAPIDO if self.tela_aberta else INTERVALO_LENTO
+            if self._hub_conectado():
+                intervalo = INTERVALO_PRESENCA_COM_HUB if self.tela_aberta else INTERVALO_COM_HUB
+            self._acordar.wait(intervalo)
+            self._acordar.clear()
+        self._desconectar()
+
+    def _ciclo(self):
+        with self._lock:
+            pendentes, self._marcar_pendentes = self._marcar_pendentes, []
+        if pendentes:
+            try:
+                self._chatdb.marcar_lidas(pendentes)
+            except Exception:
+                with self._lock:
+                    self._marcar_pendentes = pendentes + self._marcar_pendentes
+                raise
+        with self._lock:
+            remetentes, self._remetentes_pendentes = self._remetentes_pendentes, set()
+        for i, remetente in enumerate(sorted(remetentes)):
+            try:
+                self._chatdb.marcar_lidas_do_remetente(
+                    self.usuario_id, self.usuario_nome, self.dispositivo, remetente
+                )
+            except Exception:
+                with self._lock:
+                    self._remetentes_pendentes.update(sorted(remetentes)[i:])
+                raise
+
+        agora = time.monotonic()
+        heartbeat = (agora - self._ultimo_heartbeat) >= INTERVALO_HEARTBEAT
+        presenca = self.tela_aberta
+        r = self._chatdb.sincronizar(
+            self.usuario_id, self.usuario_nome, self.dispositivo,
+            last_id=self._ultimo_id, heartbeat=heartbeat, presenca=presenca
+        )
+        if heartbeat:
+            self._ultimo_heartbeat = agora
+        if (agora - self._ultima_purga) >= INTERVALO_PURGA:
+            self._ultima_purga = agora
+            self._chatdb.purgar_sessoes_inativas()
+
+        evento: Dict = {}
+        if r['nao_lidas'] != self._nao_lidas:
+            self._nao_lidas = r['nao_lidas']
+            evento['nao_lidas'] = r['nao_lidas']
+        novas = r['novas']
+        if novas:
+            self._ultimo_id = max(int(m.get('id') or 0) for m in novas)
+            evento['novas'] = novas
+        elif self._ultimo_id is None:
+            # Primeiro ciclo: o cursor parte do maior id já recebido
+            self._ultimo_id = r['ultimo_id']
+        if r['online'] is not None:
+            chave = sorted(
+                (str(u.get('usuario_id')), str(u.get('usuario_nome')), str(u.get('dispositivo')))
+                for u in r['online']
+            )
+            if chave != self._online_chave:
+                self._online_chave = chave
+                evento['online'] = r['online']
+        if evento:
+            self._fila.put(evento)
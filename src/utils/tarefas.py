@@ -0,0 +1,314 @@
+"""
+Tarefas em segundo plano com retorno seguro para a thread do Tk.
+
+Consultas lentas disparadas pelas telas (agenda, relatórios, busca do prontuário)
+rodam num pool pequeno de threads. Cada worker abre sob demanda a sua conexão
+dedicada com o banco (db.conexao_dedicada) e a reabre se cair; a função recebe essa
+conexão como primeiro argumento. O resultado ou o erro volta por uma fila drenada
+na thread do Tk com `after()`. Callbacks de tarefa cancelada, substituída (mesma
+`chave`) ou cujo widget já foi destruído são descartados.
+
+Uso:
+    from src.utils.tarefas import executor
+
+    def _consultar(conn, data):
+        return AgendaController(conn).buscar_consultas(data_inicio=data, data_fim=data)
+
+    executor.submeter(_consultar, data, ao_concluir=self._preencher,
+                      widget=self.tabela, chave=('agenda', id(self)), ocupado=self.frame)
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+# Threads do pool (cada uma com uma conexão própria com o banco)
+MAX_WORKERS = 3
+# Tarefas aguardando um worker; acima disso a submissão falha na hora
+MAX_FILA = 100
+# Drenagem dos resultados na thread do Tk (ms)
+DRENAGEM_MS = 50
+
+
+class Tarefa:
+    """Resultado futuro de uma função submetida ao executor."""
+
+    def __init__(self, fn: Callable, args: tuple, kwargs: dict, ao_concluir=None, ao_falhar=None,
+                 widget=None, chave: Optional[Hashable] = None, ocupado=None, com_conexao: bool = True):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.ao_concluir = ao_concluir
+        self.ao_falhar = ao_falhar
+        self.widget = widget
+        self.chave = chave
+        self.ocupado = ocupado
+        self.com_conexao = com_conexao
+        self.resultado: Any = None
+        self.erro: Optional[BaseException] = None
+        self.cancelada = False
+        self.iniciada = False
+        # Tempo de execução no worker (ms), preenchido ao terminar
+        self.duracao_ms: Optional[float] = None
+        self._concluida = threading.Event()
+
+    @property
+    def concluida(self) -> bool:
+        return self._concluida.is_set()
+
+    def cancelar(self) -> bool:
+        """Cancela a tarefa. Se ainda não começou, não roda; se já está rodando,
+        o resultado é descartado. Retorna True se ela não chegou a rodar."""
+        self.cancelada = True
+        return not self.iniciada
+
+    def aguardar(self, timeout: Optional[float] = None):
+        """Bloqueia até o fim (não usar na thread do Tk). Relança o erro da função."""
+        if not self._concluida.wait(timeout):
+            raise TimeoutError("Tarefa não concluída no tempo informado")
+        if self.erro is not None:
+            raise self.erro
+        return self.resultado
+
+
+# ------------------------- Indicador de ocupado -------------------------
+def marcar_ocupado(widget):
+    """Cursor de espera na janela do widget (aninhável: conta as marcações)."""
+    try:
+        janela = widget.winfo_toplevel()
+        contagem = getattr(janela, '_tarefas_ocupado', 0)
+        if contagem == 0:
+            janela._tarefas_cursor = janela.cget('cursor')
+            janela.config(cursor='watch')
+        janela._tarefas_ocupado = contagem + 1
+    except Exception:
+        pass
+
+
+def desmarcar_ocupado(widget):
+    """Desfaz uma marcação; restaura o cursor quando não houver mais nenhuma."""
+    try:
+        janela = widget.winfo_toplevel()
+        contagem = max(getattr(janela, '_tarefas_ocupado', 0) - 1, 0)
+        janela._tarefas_ocupado = contagem
+        if contagem == 0 and janela.winfo_exists():
+            janela.config(cursor=getattr(janela, '_tarefas_cursor', ''))
+    except Exception:
+        pass
+
+
+def _widget_existe(widget) -> bool:
+    if widget is None:
+        return True
+    try:
+        return bool(widget.winfo_exists())
+    except Exception:
+        return False
+
+
+class ExecutorTarefas:
+    """Pool de threads com conexão por worker e entrega dos resultados na thread do Tk."""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_fila: int = MAX_FILA):
+        self.max_workers = max(int(max_workers), 1)
+        self._pendentes: "queue.Queue[Optional[Tarefa]]" = queue.Queue(max_fila)
+        self._prontas: "queue.Queue[Tarefa]" = queue.Queue()
+        self._workers: List[threading.Thread] = []
+        self._por_chave: Dict[Hashable, Tarefa] = {}
+        self._lock = threading.Lock()
+        self._ocupados = 0
+        self._root = None
+        self._drenagem_job = None
+        self._parar = threading.Event()
+
+    # ------------------------- Ciclo de vida -------------------------
+    def iniciar(self, root):
+        """Define a raiz do Tk usada para drenar os resultados."""
+        if self._root is not None:
+            return
+        self._root = root
+        self._agendar_drenagem()
+
+    def parar(self, espera: float = 2.0):
+        self._parar.set()
+        for _ in self._workers:
+            try:
+                self._pendentes.put_nowait(None)
+            except queue.Full:
+                break
+        try:
+            if self._drenagem_job and self._root is not None:
+                self._root.after_cancel(self._drenagem_job)
+        except Exception:
+            pass
+        self._drenagem_job = None
+        for t in self._workers:
+            t.join(espera)
+
+    # ------------------------- API (thread do Tk) -------------------------
+    def submeter(self, fn: Callable, *args, ao_concluir: Optional[Callable[[Any], None]] = None,
+                 ao_falhar: Optional[Callable[[BaseException], None]] = None, widget=None,
+                 chave: Optional[Hashable] = None, ocupado=None, com_conexao: bool = True, **kwargs) -> Tarefa:
+        """Agenda `fn(conn, *args, **kwargs)` (ou `fn(*args, **kwargs)` com com_conexao=False).
+
+        - ao_concluir(resultado) / ao_falhar(erro): chamados na thread do Tk;
+          sem ao_falhar o erro é só registrado no console.
+        - widget: se destruído até o fim, os callbacks são descartados.
+        - chave: cancela a tarefa anterior com a mesma chave (vale a última).
+        - ocupado: widget cuja janela mostra o cursor de espera até o fim.
+        """
+        if self._root is None:
+            referencia = widget if widget is not None else ocupado
+            if referencia is not None:
+                try:
+                    self.iniciar(referencia._root())
+                except Exception:
+                    pass
+        tarefa = Tarefa(fn, args, kwargs, ao_concluir, ao_falhar, widget, chave, ocupado, com_conexao)
+        if chave is not None:
+            with self._lock:
+                anterior = self._por_chave.get(chave)
+                self._por_chave[chave] = tarefa
+            if anterior is not None:
+                anterior.cancelar()
+        if ocupado is not None:
+            marcar_ocupado(ocupado)
+        self._garantir_workers()
+        try:
+            self._pendentes.put_nowait(tarefa)
+        except queue.Full:
+            tarefa.erro = RuntimeError("Fila de tarefas cheia; tente novamente")
+            self._finalizar(tarefa)
+        return tarefa
+
+    def cancelar(self, chave: Hashable):
+        """Cancela a tarefa corrente da chave, se houver."""
+        with self._lock:
+            tarefa = self._por_chave.pop(chave, None)
+        if tarefa is not None:
+            tarefa.cancelar()
+
+    def metricas(self) -> Dict[str, int]:
+        return {
+            'workers': len(self._workers),
+            'pendentes': self._pendentes.qsize(),
+            'em_execucao': self._ocupados,
+        }
+
+    # ------------------------- Workers -------------------------
+    def _garantir_workers(self):
+        """Sobe mais uma thread enquanto houver fila e o pool não estiver cheio."""
+        with self._lock:
+            ociosos = len(self._workers) - self._ocupados - self._pendentes.qsize()
+            if ociosos > 0 or len(self._workers) >= self.max_workers:
+                return
+            t = threading.Thread(target=self._executar, name=f'tarefa-{len(self._workers) + 1}', daemon=True)
+            self._workers.append(t)
+        t.start()
+
+    @staticmethod
+    def _conectar(conn):
+        """Conexão do worker: reaproveita enquanto estiver viva."""
+        try:
+            if conn is not None and conn.is_connected():
+                return conn
+        except Exception:
+            pass
+        ExecutorTarefas._desconectar(conn)
+        from src.db.database import db
+        return db.conexao_dedicada()
+
+    @staticmethod
+    def _desconectar(conn):
+        try:
+            if conn is not None:
+                conn.close()
+        except Exception:
+            pass
+
+    def _executar(self):
+        conn = None
+        while not self._parar.is_set():
+            tarefa = self._pendentes.get()
+            if tarefa is None:
+                break
+            if tarefa.cancelada:
+                self._finalizar(tarefa)
+                continue
+            with self._lock:
+                self._ocupados += 1
+            tarefa.iniciada = True
+            inicio = time.perf_counter()
+            try:
+                if tarefa.com_conexao:
+                    conn = self._conectar(conn)
+                    tarefa.resultado = tarefa.fn(conn, *tarefa.args, **tarefa.kwargs)
+                else:
+                    tarefa.resultado = tarefa.fn(*tarefa.args, **tarefa.kwargs)
+            except Exception as e:
+                tarefa.erro = e
+                # Conexão caída durante a tarefa: a próxima reabre
+                try:
+                    if conn is not None and not conn.is_connected():
+                        self._desconectar(conn)
+                        conn = None
+                except Exception:
+                    conn = None
+            finally:
+                if conn is not None and getattr(conn, 'in_transaction', False):
+                    # Tarefa deixou transação aberta: não vaza para a próxima
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                tarefa.duracao_ms = (time.perf_counter() - inicio) * 1000.0
+                with self._lock:
+                    self._ocupados -= 1
+            self._finalizar(tarefa)
+        self._desconectar(conn)
+
+    def _finalizar(self, tarefa: Tarefa):
+        tarefa._concluida.set()
+        self._prontas.put(tarefa)
+
+    # ------------------------- Thread do Tk -------------------------
+    def _agendar_drenagem(self):
+        try:
+            self._drenagem_job = self._root.after(DRENAGEM_MS, self._drenar)
+        except Exception:
+            self._drenagem_job = None
+
+    def _drenar(self):
+        while True:
+            try:
+                tarefa = self._prontas.get_nowait()
+            except queue.Empty:
+                break
+            self._entregar(tarefa)
+        if not self._parar.is_set():
+            self._agendar_drenagem()
+
+    def _entregar(self, tarefa: Tarefa):
+        if tarefa.chave is not None:
+            with self._lock:
+                if self._por_chave.get(tarefa.chave) is tarefa:
+                    self._por_chave.pop(tarefa.chave, None)
+        if tarefa.ocupado is not None:
+            desmarcar_ocupado(tarefa.ocupado)
+        if tarefa.cancelada or not _widget_existe(tarefa.widget):
+            return
+        try:
+            if tarefa.erro is None:
+                if tarefa.ao_concluir is not None:
+                    tarefa.ao_concluir(tarefa.resultado)
+            elif tarefa.ao_falhar is not None:
+                tarefa.ao_falhar(tarefa.erro)
+            else:
+                nome = getattr(tarefa.fn, '__name__', 'tarefa')
+                print(f"[TAREFAS] Erro em {nome}: {tarefa.erro}")
+        except Exception as e:
+            print(f"[TAREFAS] Erro ao entregar resultado: {e}")
+
+
+# Instância do processo
+executor = ExecutorTarefas()
@@ -0,0 +1,166 @@
+"""
+Benchmark do corretor ortográfico incremental: latência da tecla até ficar ocioso
+numa nota de 30 mil caracteres.
+
+Abre uma janela Tk oculta com um Text e carrega uma nota gerada com alguns erros.
+Depois da verificação inicial, simula rajadas de digitação: uma palavra por
+rajada, no fim de uma linha sorteada, com uma tecla a cada TECLA_MS (abaixo da
+espera do debounce). Para cada rajada mede:
+
+- tecla→ocioso: da última tecla até as marcações refletirem o texto (inclui os
+  ESPERA_MS do debounce);
+- processamento: o mesmo, descontada a espera;
+- bloqueio do Tk: o callback mais longo do corretor na thread do Tk.
+
+Sem o pyspellchecker instalado, o dicionário são as palavras corretas da nota. Uso:
+
+    python -m src.utils.verificar_corretor_ortografico [rajadas] [caracteres]
+"""
+import random
+import sys
+import time
+import tkinter as tk
+from typing import List
+
+from src.utils.corretor_ortografico import CorretorIncremental, limpar_cache
+from src.utils.dicionario_ortografico import DicionarioCompartilhado, dicionario_ortografico
+
+TECLA_MS = 60
+TIMEOUT_S = 10.0
+
+_VOCABULARIO = (
+    'paciente refere dor abdominal difusa intensidade moderada inicio ontem nega febre vomitos '
+    'diarreia apresenta bom estado geral corado hidratado afebril exame fisico abdome flacido '
+    'doloroso palpacao profunda sem sinais peritonite ausculta pulmonar murmurio vesicular '
+    'presente bilateralmente ruidos adventicios conduta solicitado hemograma completo urina '
+    'ultrassonografia retorno resultados orientado procurar pronto atendimento caso piora '
+    'pressao arterial frequencia cardiaca saturacao oxigenio medicacao prescrita analgesico '
+    'antiespasmodico dieta leve hidratacao oral repouso relativo historico familiar hipertensao'
+).split()
+
+
+def _com_erro(rnd: random.Random, palavra: str) -> str:
+    i = rnd.randrange(len(palavra))
+    return palavra[:i] + rnd.choice('xzkwy') + palavra[i + 1:]
+
+
+def gerar_nota(caracteres: int, semente: int = 1) -> str:
+    """Linhas de ~80 caracteres com 5% das palavras erradas."""
+    rnd = random.Random(semente)
+    linhas: List[str] = []
+    total = 0
+    while total < caracteres:
+        palavras = []
+        while sum(len(p) + 1 for p in palavras) < 80:
+            p = rnd.choice(_VOCABULARIO)
+            palavras.append(_com_erro(rnd, p) if rnd.random() < 0.05 else p)
+        linha = ' '.join(palavras)
+        linhas.append(linha)
+        total += len(linha) + 1
+    return '\n'.join(linhas)[:caracteres]
+
+
+def _dicionario():
+    dic = dicionario_ortografico.obter(espera=None)
+    if dic is not None:
+        return dic, 'pyspellchecker'
+    return DicionarioCompartilhado(frozenset(_VOCABULARIO)), 'vocabulário da nota'
+
+
+def _ocioso(corretor: CorretorIncremental) -> bool:
+    if corretor._job is not None or corretor._pendente:
+        return False
+    if corretor._future is not None and not corretor._future.done():
+        return False
+    atual = corretor.txt.get('1.0', 'end-1c')[:corretor.limit_chars].split('\n')
+    return corretor._linhas == atual
+
+
+def _esperar_ocioso(root, corretor) -> float:
+    """Processa eventos até o corretor ficar ocioso; retorna o instante em que ficou."""
+    limite = time.perf_counter() + TIMEOUT_S
+    while not _ocioso(corretor):
+        if time.perf_counter() > limite:
+            raise TimeoutError("Corretor não ficou ocioso no tempo limite")
+        root.update()
+        time.sleep(0.001)
+    return time.perf_counter()
+
+
+def _bombear(root, segundos: float):
+    fim = time.perf_counter() + segundos
+    while time.perf_counter() < fim:
+        root.update()
+        time.sleep(0.001)
+
+
+def _cronometrar_callbacks(corretor: CorretorIncremental, bloqueios: List[float]):
+    """Mede cada callback do corretor na thread do Tk (verificar e o acompanhamento)."""
+    for nome in ('verificar', '_acompanhar'):
+        original = getattr(corretor, nome)
+
+        def medido(*args, _original=original, **kwargs):
+            inicio = time.perf_counter()
+            try:
+                return _original(*args, **kwargs)
+            finally:
+                bloqueios.append((time.perf_counter() - inicio) * 1000.0)
+        setattr(corretor, nome, medido)
+
+
+def _percentis(valores: List[float]) -> str:
+    v = sorted(valores)
+    p50 = v[len(v) // 2]
+    p95 = v[min(int(len(v) * 0.95), len(v) - 1)]
+    return f"p50={p50:7.1f} ms  p95={p95:7.1f} ms  máx={v[-1]:7.1f} ms"
+
+
+def main(argv=None) -> int:
+    args = list(sys.argv[1:] if argv is None else argv)
+    rajadas = int(args[0]) if args else 50
+    caracteres = int(args[1]) if len(args) > 1 else 30000
+
+    dic, origem = _dicionario()
+    limpar_cache()
+    root = tk.Tk()
+    root.withdraw()
+    txt = tk.Text(root)
+    txt.pack()
+    corretor = CorretorIncremental(txt, dic, caracteres)
+    bloqueios: List[float] = []
+    _cronometrar_callbacks(corretor, bloqueios)
+
+    txt.insert('1.0', gerar_nota(caracteres))
+    inicio = time.perf_counter()
+    corretor.verificar_tudo()
+    fim = _esperar_ocioso(root, corretor)
+    print(f"Dicionário: {origem}. Nota de {len(txt.get('1.0', 'end-1c'))} caracteres, "
+          f"{int(txt.index('end-1c').split('.')[0])} linhas")
+    print(f"Verificação inicial: {(fim - inicio) * 1000:.1f} ms, "
+          f"{len(txt.tag_ranges('misspelled')) // 2} palavras marcadas")
+
+    rnd = random.Random(2)
+    latencias: List[float] = []
+    bloqueios.clear()
+    for _ in range(rajadas):
+        linha = rnd.randint(1, int(txt.index('end-1c').split('.')[0]))
+        palavra = ' ' + (rnd.choice(_VOCABULARIO) if rnd.random() < 0.5 else _com_erro(rnd, rnd.choice(_VOCABULARIO)))
+        for i, ch in enumerate(palavra):
+            txt.insert(f"{linha}.end", ch)
+            corretor.agendar()
+            ultima = time.perf_counter()
+            if i < len(palavra) - 1:
+                _bombear(root, TECLA_MS / 1000.0)
+        latencias.append((_esperar_ocioso(root, corretor) - ultima) * 1000.0)
+
+    espera = CorretorIncremental.ESPERA_MS
+    print(f"{rajadas} rajadas de digitação (tecla a cada {TECLA_MS} ms, debounce {espera} ms):")
+    print(f"  tecla→ocioso   {_percentis(latencias)}")
+    print(f"  processamento  {_percentis([max(l - espera, 0.0) for l in latencias])}")
+    print(f"  bloqueio do Tk {_percentis(bloqueios)}")
+    root.destroy()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,154 @@
+"""
+Verificação do hub de notificações inteiramente em localhost (sem banco e sem Tk).
+
+Sobe um HubNotificacoes em 127.0.0.1 numa porta livre e confere:
+- entrega: evento publicado por uma estação chega a quem assinou o tópico, e não
+  a quem publicou nem a quem cancelou a assinatura;
+- autenticação: conexão sem o token, ou com token errado, é fechada e não publica;
+  a estação com token errado nunca se dá por conectada e reconecta com espera
+  crescente, em vez de martelar o hub;
+- estação lenta: quem assina e não lê é desconectado ao passar do buffer máximo,
+  sem travar a entrega para as demais.
+
+    python -m src.utils.verificar_notificador
+"""
+import queue
+import socket
+import sys
+import time
+from typing import List
+
+from src.utils.notificador import ClienteNotificacoes, HubNotificacoes, _linha
+
+TOKEN = 'verificar-notificador'
+BUFFER_MAX = 64 * 1024
+ESPERA = 3.0
+
+
+def _porta_livre() -> int:
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def _cliente(porta: int, token: str = TOKEN) -> ClienteNotificacoes:
+    """Cliente real; sem Tk, os eventos ficam na fila e são lidos direto dela."""
+    cliente = ClienteNotificacoes()
+    cliente.iniciar(None, host='127.0.0.1', porta=porta, token=token)
+    return cliente
+
+
+def _esperar(condicao, espera: float = ESPERA) -> bool:
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        if condicao():
+            return True
+        time.sleep(0.02)
+    return condicao()
+
+
+def _eventos(cliente: ClienteNotificacoes, espera: float = 0.5) -> List[tuple]:
+    eventos = []
+    limite = time.monotonic() + espera
+    while time.monotonic() < limite:
+        try:
+            eventos.append(cliente._fila.get(timeout=0.05))
+        except queue.Empty:
+            pass
+    return eventos
+
+
+def _bruto(porta: int, *mensagens: dict) -> socket.socket:
+    s = socket.create_connection(('127.0.0.1', porta), timeout=ESPERA)
+    for msg in mensagens:
+        s.sendall(_linha(msg))
+    return s
+
+
+def _fechado_pelo_hub(s: socket.socket) -> bool:
+    try:
+        while True:
+            dados = s.recv(65536)
+            if not dados:
+                return True
+    except socket.timeout:
+        return False
+    except OSError:
+        return True
+
+
+def main() -> int:
+    porta = _porta_livre()
+    hub = HubNotificacoes(host='127.0.0.1', porta=porta, token=TOKEN, buffer_max=BUFFER_MAX)
+    hub.iniciar()
+    falhas: List[str] = []
+
+    def conferir(ok: bool, descricao: str):
+        print(f"[{'OK' if ok else 'FALHA'}] {descricao}")
+        if not ok:
+            falhas.append(descricao)
+
+    a, b, c = _cliente(porta), _cliente(porta), _cliente(porta)
+    conferir(_esperar(lambda: a.conectado and b.conectado and c.conectado and len(hub._clientes) == 3),
+             "três estações autenticadas e conectadas")
+
+    topico = 'agenda:2026-01-01'
+    b.assinar(topico, lambda *_: None)
+    c.assinar(topico, lambda *_: None)
+    a.assinar(topico, lambda *_: None)
+    c.cancelar(topico, c._assinaturas[topico][0])
+    time.sleep(0.2)
+    a.publicar(topico, {'medico_id': 1})
+    recebidos_b = _eventos(b)
+    conferir(recebidos_b == [(topico, {'medico_id': 1})], "assinante recebe o evento publicado")
+    conferir(not _eventos(a, 0.2), "quem publicou não recebe o próprio evento")
+    conferir(not _eventos(c, 0.2), "quem cancelou a assinatura não recebe")
+
+    sem_token = _bruto(porta, {'op': 'sub', 'topicos': [topico]}, {'op': 'pub', 'topico': topico, 'dados': {}})
+    token_errado = _bruto(porta, {'op': 'auth', 'token': 'errado'}, {'op': 'pub', 'topico': topico, 'dados': {}})
+    conferir(_fechado_pelo_hub(sem_token), "conexão sem autenticação é fechada")
+    conferir(_fechado_pelo_hub(token_errado), "conexão com token errado é fechada")
+    conferir(not _eventos(b, 0.3), "publicações não autenticadas não chegam às estações")
+    sem_token.close()
+    token_errado.close()
+
+    conexoes_antes = hub.conexoes
+    recusado = _cliente(porta, token='errado')
+    chegou_a_conectar = False
+    limite = time.monotonic() + 2.5
+    while time.monotonic() < limite:
+        chegou_a_conectar = chegou_a_conectar or recusado.conectado
+        time.sleep(0.01)
+    tentativas = hub.conexoes - conexoes_antes
+    conferir(not chegou_a_conectar, "estação com token errado nunca fica como conectada")
+    conferir(1 <= tentativas <= 3, f"token recusado reconecta com espera crescente ({tentativas} conexões em 2,5 s)")
+
+    lento = _bruto(porta, {'op': 'auth', 'token': TOKEN}, {'op': 'sub', 'topicos': [topico]})
+    lento.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    conferir(_esperar(lambda: len(hub._clientes) == 4), "estação lenta conectada")
+    carga = {'texto': 'x' * 8192}
+    for _ in range(2000):
+        a.publicar(topico, carga)
+    conferir(_esperar(lambda: hub.descartados >= 1 and len(hub._clientes) == 3, 10.0),
+             f"estação que não lê é desconectada acima de {BUFFER_MAX // 1024} KB")
+    recebidos = 0
+    limite = time.monotonic() + 10.0
+    while recebidos < 2000 and time.monotonic() < limite:
+        try:
+            b._fila.get(timeout=0.1)
+            recebidos += 1
+        except queue.Empty:
+            pass
+    conferir(recebidos == 2000, f"as demais estações continuam recebendo ({recebidos}/2000)")
+    lento.close()
+
+    hub.parar()
+    if falhas:
+        print(f"{len(falhas)} verificação(ões) falharam.")
+        return 1
+    print("Hub de notificações verificado em localhost.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
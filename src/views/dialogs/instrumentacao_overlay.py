@@ -0,0 +1,73 @@
+"""
+Painel de depuração sobreposto com a instrumentação ao vivo (atraso do Tk, handlers,
+executor, pool de conexões e módulos).
+"""
+import tkinter as tk
+
+from src.utils.agendador import agendador
+from src.utils.instrumentacao import LAG_TK, instrumentacao
+from src.utils.tarefas import executor
+
+# Handlers listados no painel (os de maior p95 na janela corrente)
+MAX_HANDLERS = 10
+
+
+class InstrumentacaoOverlay(tk.Toplevel):
+    """Janela sem borda, sempre no topo, atualizada a cada meio segundo."""
+
+    def __init__(self, parent, obter_metricas_modulos=None):
+        super().__init__(parent)
+        self.obter_metricas_modulos = obter_metricas_modulos
+        self.overrideredirect(True)
+        self.attributes('-topmost', True)
+        self.configure(bg="#2c3e50")
+
+        self.texto = tk.Label(self, bg="#2c3e50", fg="#ecf0f1", font=("Consolas", 9),
+                              justify='left', anchor='nw')
+        self.texto.pack(fill='both', expand=True, padx=8, pady=6)
+
+        largura = 560
+        x = parent.winfo_rootx() + max(parent.winfo_width() - largura - 20, 0)
+        y = parent.winfo_rooty() + 60
+        self.geometry(f"+{x}+{y}")
+
+        self._atualizar()
+        agendador.registrar('instrumentacao_overlay', self._atualizar, 500, jitter=0, dono=self.texto)
+
+    def _atualizar(self):
+        resumo = instrumentacao.resumo()
+        linhas = []
+        lag = resumo.pop(LAG_TK, None)
+        if lag:
+            linhas.append(f"Loop do Tk: atual {instrumentacao.lag_atual_ms:6.1f} ms | "
+                          f"p95 {lag['p95_ms']:.0f} ms | máx {lag['max_ms']:.1f} ms")
+        else:
+            linhas.append("Loop do Tk: sem amostras")
+
+        linhas.append("")
+        linhas.append(f"{'Handler':<44}{'n':>5}{'p50':>7}{'p95':>7}{'máx':>8}{'cons':>6}")
+        ordenados = sorted(resumo.items(), key=lambda item: (item[1]['p95_ms'], item[1]['max_ms']), reverse=True)
+        for nome, h in ordenados[:MAX_HANDLERS]:
+            linhas.append(f"{nome[-44:]:<44}{h['n']:>5}{h['p50_ms']:>7.0f}{h['p95_ms']:>7.0f}"
+                          f"{h['max_ms']:>8.1f}{h['consultas']:>6}")
+
+        linhas.append("")
+        ex = executor.metricas()
+        linhas.append(f"Executor: {ex['em_execucao']}/{ex['workers']} ocupados, {ex['pendentes']} na fila")
+        try:
+            from src.db.database import db
+            pool = db.pool_metrics()
+            linhas.append(f"Pool: {pool['em_uso']}/{pool['tamanho']} em uso (pico {pool['pico_em_uso']}), "
+                          f"espera máx {pool['espera_max_s'] * 1000:.0f} ms, timeouts {pool['timeouts']}")
+        except Exception:
+            pass
+        if self.obter_metricas_modulos is not None:
+            m = self.obter_metricas_modulos()
+            if m:
+                linhas.append(f"Módulos: troca {m['ultima_troca_ms']:.0f} ms, criações {m['criacoes']}, "
+                              f"reexibições {m['reexibicoes']}, despejos {m['despejos']}")
+        jobs = agendador.tabela()
+        estouros = sum(j['estouros'] for j in jobs)
+        linhas.append(f"Jobs: {len(jobs)} registrados, {estouros} estouros")
+
+        self.texto.config(text="\n".join(linhas))
@@ -0,0 +1,47 @@
+"""
+Diálogo com a tabela ao vivo dos jobs do agendador central.
+"""
+import tkinter as tk
+from tkinter import ttk
+
+from src.utils.agendador import agendador
+
+
+class JobsDialog(tk.Toplevel):
+    """Lista os jobs periódicos (estado, duração, estouros, pausas) atualizada a cada segundo."""
+
+    COLUNAS = (
+        ('nome', 'Job', 200),
+        ('estado', 'Estado', 90),
+        ('intervalo_ms', 'Intervalo (ms)', 100),
+        ('execucoes', 'Execuções', 80),
+        ('ultima_duracao_ms', 'Última (ms)', 90),
+        ('max_duracao_ms', 'Máx. (ms)', 80),
+        ('segundo_plano_ms', '2º plano (ms)', 100),
+        ('estouros', 'Estouros', 80),
+        ('coalescidos', 'Coalescidos', 90),
+        ('pausas', 'Pausas', 70),
+        ('erros', 'Erros', 60),
+        ('proxima_em_ms', 'Próxima em (ms)', 110),
+    )
+
+    def __init__(self, parent):
+        super().__init__(parent)
+        self.title("Jobs periódicos")
+        self.configure(bg="#f0f2f5")
+        self.transient(parent)
+
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in self.COLUNAS], show='headings', height=14)
+        for chave, titulo, largura in self.COLUNAS:
+            self.tree.heading(chave, text=titulo)
+            self.tree.column(chave, width=largura, anchor='w' if chave == 'nome' else 'e')
+        self.tree.pack(fill='both', expand=True, padx=10, pady=10)
+
+        self._atualizar()
+        agendador.registrar('tabela_jobs', self._atualizar, 1000, jitter=0, dono=self.tree)
+
+    def _atualizar(self):
+        self.tree.delete(*self.tree.get_children())
+        for linha in agendador.tabela():
+            valores = ['-' if linha[c[0]] is None else linha[c[0]] for c in self.COLUNAS]
+            self.tree.insert('', 'end', values=valores)
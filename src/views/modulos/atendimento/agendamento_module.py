@@ -20,6 +20,36 @@ LOCALE_ATTEMPTS = (
 from datetime import datetime, timedelta
 
 from src.controllers.horario_controller import HorarioController
+from src.controllers.disponibilidade_controller import DisponibilidadeController, DURACAO_PADRAO
+from src.utils.indice_pacientes import indice_pacientes
+from src.utils.notificador import notificador
+from src.utils.tarefas import executor
+from src.utils.agendador import agendador
+from src.utils.instrumentacao import medido
+
+
+@medido('agenda.consultas_do_dia')
+def _consultas_do_dia(conn, data_fmt, medico_id=None, sincronizar=False):
+    """(roda no executor de tarefas) Consultas do dia com a conexão do worker,
+    opcionalmente sincronizando antes o status de pagamento."""
+    from src.controllers.agenda_controller import AgendaController
+    agenda = AgendaController(conn)
+    if sincronizar:
+        # Sincroniza em lote o status de pagamento das consultas do dia (quantidade fixa de queries)
+        try:
+            agenda.sincronizar_pagamentos_periodo(data_fmt, data_fmt, medico_id=medico_id)
+        except Exception:
+            pass
+    if medico_id:
+        return agenda.buscar_consultas_por_medico(medico_id, data_fmt, data_fmt)
+    return agenda.buscar_consultas(data_inicio=data_fmt, data_fim=data_fmt)
+
+
+def _medicos(conn):
+    """(roda no executor de tarefas) Lista de médicos para o filtro da agenda."""
+    from src.controllers.agenda_controller import AgendaController
+    return AgendaController(conn).buscar_medicos()
+
 
 class MedicoCalendar(Calendar):
     """Calendário personalizado que desabilita os dias em que o médico não atende"""
@@ -187,6 +217,8 @@ class AgendamentoModule:
         self.tipos_atendimento_map = {}
         self.exames_medico = {}  
         self.tempo_exame = 0    
+        # Nome do job de atualização periódica no agendador central (ver _agendar_refresh)
+        self._refresh_job = f'agenda_refresh:{id(self)}'
 
         self.carregar_tipos_atendimento()
         self._carregar_dados_iniciais()
@@ -498,10 +530,10 @@ class AgendamentoModule:
         # Carregar dados iniciais
         self._carregar_dados_iniciais()
         # Atualização periódica para refletir pagamentos/chegadas
-        try:
-            self.parent.after(30000, self._refresh_consultas_periodico)
-        except Exception:
-            pass
+        self._agendar_refresh()
+        # Eventos do hub de notificações (agenda do dia e caixa) recarregam na hora
+        self._assinar_notificacoes_agenda()
+        self.tabela_agendamentos.bind('<Destroy>', lambda e: self._pausar(), add=True)
 
 
     
@@ -510,12 +542,9 @@ class AgendamentoModule:
         data_selecionada = self.calendario.selection_get()
         data_formatada = data_selecionada.strftime('%Y-%m-%d')
         
-        # Atualizar a tabela com os agendamentos da data selecionada
-        self.consultas = self._buscar_agendamentos(
-            data_inicio=data_formatada,
-            data_fim=data_formatada
-        )
-        self._atualizar_tabela_agendamentos()
+        # Atualizar a tabela com os agendamentos da data selecionada (em segundo plano)
+        self._carregar_consultas_async(data_formatada, mostrar_ocupado=True)
+        self._assinar_notificacoes_agenda()
         
         # Reaplica o destaque no calendário após o ciclo atual de eventos (garante selection_get() atualizado)
         try:
@@ -573,8 +602,14 @@ class AgendamentoModule:
 
     # Removido método _marcar_chegada (lógica de chegada será tratada no fluxo de pagamento)
 
-    def _refresh_consultas_periodico(self):
-        """Atualiza periodicamente a lista do dia para refletir pagamentos/chegadas."""
+    def _intervalo_refresh_ms(self) -> int:
+        """Com o hub de notificações conectado as mudanças chegam por evento; o polling
+        vira só uma verificação de segurança."""
+        return 120000 if notificador.conectado else 30000
+
+    def _recarregar_consultas_dia(self):
+        """Recarrega a lista do dia selecionado, refletindo pagamentos/chegadas.
+        A sincronização e a consulta rodam no executor de tarefas."""
         try:
             try:
                 data_sel = self.calendario.selection_get()
@@ -583,37 +618,115 @@ class AgendamentoModule:
                 data_fmt = datetime.now().strftime('%Y-%m-%d')
 
             medico_nome = self.filtro_medico.get() if hasattr(self, 'filtro_medico') else 'Todos'
+            mid = None
             if medico_nome and medico_nome != 'Todos':
                 mid = self._obter_id_medico_por_nome(medico_nome)
-                if mid:
-                    self.consultas = self.agenda_controller.buscar_consultas_por_medico(mid, data_fmt, data_fmt)
-            else:
-                self.consultas = self._buscar_agendamentos(data_inicio=data_fmt, data_fim=data_fmt)
-            # Sincroniza status de pagamento das consultas visíveis (se necessário)
-            try:
-                for c in (self.consultas or []):
-                    pago_flag = c.get('status_pagameto')
-                    if not (str(pago_flag) == '1' or pago_flag == 1 or pago_flag is True):
-                        try:
-                            self.agenda_controller.sincronizar_status_pagamento(int(c['id']))
-                        except Exception:
-                            pass
-                # Recarrega após sincronização para refletir alterações
-                if medico_nome and medico_nome != 'Todos' and 'mid' in locals() and mid:
-                    self.consultas = self.agenda_controller.buscar_consultas_por_medico(mid, data_fmt, data_fmt)
-                else:
-                    self.consultas = self._buscar_agendamentos(data_inicio=data_fmt, data_fim=data_fmt)
-            except Exception:
-                pass
-            if hasattr(self, 'tabela_agendamentos'):
-                self._atualizar_tabela_agendamentos()
+                if not mid:
+                    return
+            return self._carregar_consultas_async(data_fmt, mid, sincronizar=True)
         except Exception:
-            pass
-        finally:
-            try:
-                self.parent.after(30000, self._refresh_consultas_periodico)
-            except Exception:
-                pass
+            return None
+
+    def _carregar_consultas_async(self, data_fmt, medico_id=None, sincronizar=False, mostrar_ocupado=False):
+        """Busca as consultas do dia fora da thread do Tk; só o pedido mais recente
+        atualiza a tabela. O cursor de espera fica para as ações do usuário."""
+        if not hasattr(self, 'tabela_agendamentos'):
+            return None
+        return executor.submeter(
+            _consultas_do_dia, data_fmt, medico_id, sincronizar,
+            ao_concluir=self._aplicar_consultas,
+            ao_falhar=lambda e: print(f"Erro ao carregar consultas da agenda: {e}"),
+            widget=self.tabela_agendamentos,
+            chave=('agenda', id(self)),
+            ocupado=self.tabela_agendamentos if mostrar_ocupado else None,
+        )
+
+    def _aplicar_medicos(self, medicos):
+        self.medicos = medicos or []
+        if hasattr(self, 'filtro_medico'):
+            self.filtro_medico['values'] = ["Todos"] + [m["nome"] for m in self.medicos]
+
+    def _aplicar_consultas(self, consultas):
+        self.consultas = consultas or []
+        self._atualizar_tabela_agendamentos()
+
+    @medido('agenda.refresh_periodico')
+    def _refresh_consultas_periodico(self):
+        """Atualiza periodicamente a lista do dia para refletir pagamentos/chegadas.
+        Devolve a tarefa do executor para o agendador não sobrepor execuções."""
+        return self._recarregar_consultas_dia()
+
+    def _agendar_refresh(self):
+        """(Re)registra a atualização periódica no agendador central: um único job por
+        instância, mesmo quando a interface é recriada, pausado com a agenda oculta."""
+        agendador.registrar(
+            self._refresh_job, self._refresh_consultas_periodico, self._intervalo_refresh_ms,
+            dono=self.tabela_agendamentos, so_visivel=True,
+        )
+
+    def _cancelar_refresh(self):
+        agendador.cancelar(self._refresh_job)
+
+    def _pausar(self):
+        """Para o timer de atualização e as assinaturas do hub."""
+        self._cancelar_refresh()
+        self._cancelar_notificacoes_agenda()
+
+    # ------------------------- Ciclo de vida (SistemaPDV) -------------------------
+    def on_hide(self):
+        """Módulo oculto: o agendador pausa o refresh sozinho; os eventos do hub
+        deixam de ser assinados."""
+        self._cancelar_notificacoes_agenda()
+
+    def on_show(self):
+        """Módulo reexibido: atualiza médicos/pacientes e o dia selecionado e retoma
+        o timer e as assinaturas."""
+        if not hasattr(self, 'tabela_agendamentos') or not self.tabela_agendamentos.winfo_exists():
+            return
+        executor.submeter(
+            _medicos,
+            ao_concluir=self._aplicar_medicos,
+            widget=self.tabela_agendamentos,
+            chave=('agenda_medicos', id(self)),
+        )
+        self.pacientes = self._buscar_pacientes()
+        self._recarregar_consultas_dia()
+        self._agendar_refresh()
+        self._assinar_notificacoes_agenda()
+
+    def _topicos_notificacao_agenda(self) -> set:
+        try:
+            data_fmt = self.calendario.selection_get().strftime('%Y-%m-%d')
+        except Exception:
+            data_fmt = datetime.now().strftime('%Y-%m-%d')
+        return {'agenda', f'agenda:{data_fmt}', 'caixa'}
+
+    def _assinar_notificacoes_agenda(self):
+        """Assina os tópicos da data selecionada (troca a assinatura ao mudar a data)."""
+        atuais = getattr(self, '_topicos_agenda', set())
+        novos = self._topicos_notificacao_agenda()
+        for topico in atuais - novos:
+            notificador.cancelar(topico, self._on_notificacao_agenda)
+        for topico in novos - atuais:
+            notificador.assinar(topico, self._on_notificacao_agenda)
+        self._topicos_agenda = novos
+
+    def _cancelar_notificacoes_agenda(self):
+        for topico in getattr(self, '_topicos_agenda', set()):
+            notificador.cancelar(topico, self._on_notificacao_agenda)
+        self._topicos_agenda = set()
+
+    def _on_notificacao_agenda(self, topico, dados):
+        """Evento de outra estação: agrupa rajadas e recarrega a lista uma vez."""
+        if getattr(self, '_notificacao_job', None):
+            return
+        def _executar():
+            self._notificacao_job = None
+            self._recarregar_consultas_dia()
+        try:
+            self._notificacao_job = self.parent.after(300, _executar)
+        except Exception:
+            self._notificacao_job = None
 
     def _obter_consulta_selecionada(self):
         """Retorna o dicionário da consulta selecionada na tabela, ou None."""
@@ -708,25 +821,26 @@ class AgendamentoModule:
                 cursor.close()
 
     def _buscar_pacientes(self):
-        """Busca todos os pacientes no banco de dados"""
+        """Lista de pacientes a partir do índice em memória (sincronização incremental)"""
         try:
-            if not self.db_connection:
-                raise Exception("Conexão com o banco de dados não disponível")
-                
-            cursor = self.db_connection.cursor()
-            cursor.execute("""
-                SELECT id, nome, cpf, data_nascimento, telefone, email
-                FROM pacientes 
-                ORDER BY nome
-            """)
-            return [dict(zip([column[0] for column in cursor.description], row)) 
-                   for row in cursor.fetchall()]
+            indice_pacientes.garantir_atualizado()
+            if not indice_pacientes.carregado:
+                raise Exception("Índice de pacientes indisponível")
+            return indice_pacientes.todos()
         except Exception as e:
             messagebox.showerror("Erro", f"Erro ao buscar pacientes: {str(e)}")
             return []
-        finally:
-            if 'cursor' in locals():
-                cursor.close()
+
+    def _filtrar_pacientes_combo(self, combo, texto):
+        """Typeahead do campo Paciente: filtra a lista pelo índice em memória."""
+        try:
+            texto = (texto or '').strip()
+            if not texto:
+                combo['values'] = [p['nome'] for p in self.pacientes]
+                return
+            combo['values'] = [p['nome'] for p in indice_pacientes.buscar(texto, limite=50)]
+        except Exception:
+            pass
 
     def _buscar_agendamentos(self, filtro_medico=None, data_inicio=None, data_fim=None):
         """Busca agendamentos usando o controlador"""
@@ -1233,6 +1347,13 @@ class AgendamentoModule:
                 values=[p['nome'] for p in self.pacientes]
             )
             campos['paciente'] = campo_paciente
+            # Editável para permitir digitar parte do nome (a validação no salvar exige nome existente)
+            campo_paciente.configure(state='normal')
+            campo_paciente.bind(
+                '<KeyRelease>',
+                lambda e: self._filtrar_pacientes_combo(campo_paciente, var_paciente.get())
+                if e.keysym not in ('Up', 'Down', 'Return', 'Escape', 'Tab') else None
+            )
             
             # Botão para novo paciente
             def abrir_cadastro_paciente():
@@ -1298,6 +1419,9 @@ class AgendamentoModule:
                     if tipo_selecionado in self.tipos_atendimento_map:
                         duracao = self.tipos_atendimento_map[tipo_selecionado]['tempo']
                         lbl_duracao.config(text=f"Duração: {duracao} minutos")
+                        # Recalcula os horários livres para a nova duração
+                        if hasattr(self, 'campo_hora') and self.entry_data.get():
+                            self._atualizar_horarios_disponiveis()
                     else:
                         lbl_duracao.config(text="Duração: -")
                 except Exception as e:
@@ -1422,6 +1546,7 @@ class AgendamentoModule:
 
             # 3. Agora que campo_hora existe, podemos atribuí-lo a self.campo_hora
             self.campo_hora = campo_hora
+            self.campo_tipo = campo_tipo
 
             
             # Status
@@ -1499,15 +1624,29 @@ class AgendamentoModule:
                         messagebox.showerror("Erro", f"Data inválida: {str(e)}")
                         return
                         
-                    # Validar tipo de atendimento
-                    disponivel, mensagem = self.validar_horario_disponivel(
-                        medico_id,
-                        data_consulta,
-                        hora,
+                    # Montar dicionário com os dados
+                    dados_consulta = {
+                        'paciente_id': paciente_id,
+                        'medico_id': medico_id,
+                        'tipo_atendimento': tipo_selecionado,
+                        'data': data_consulta,
+                        'hora': hora,
+                        'status': var_status.get(),
+                        'observacoes': var_obs.get('1.0', tk.END).strip()
+                    }
+                    
+                    # Reserva atômica: valida disponibilidade/conflito e insere na mesma transação
+                    sucesso, mensagem, detalhe = self.agenda_controller.reservar_horario(
+                        dados_consulta,
                         self.tipos_atendimento_map[tipo_selecionado]['tempo']
                     )
-                    if not disponivel:  
+                    if not sucesso and detalhe.get('motivo') in ('conflito', 'fora_do_horario'):
                         messagebox.showwarning("Horário Indisponível", mensagem)
+                        try:
+                            # Atualiza a lista de horários livres após o conflito
+                            self._atualizar_horarios_disponiveis()
+                        except Exception:
+                            pass
                         try:
                             if hasattr(self, 'janela_agendamento') and self.janela_agendamento.winfo_exists():
                                 self.janela_agendamento.lift()
@@ -1518,21 +1657,6 @@ class AgendamentoModule:
                         except Exception:
                             pass
                         return
-
-                                            
-                    # Montar dicionário com os dados
-                    dados_consulta = {
-                        'paciente_id': paciente_id,
-                        'medico_id': medico_id,
-                        'tipo_atendimento': tipo_selecionado,
-                        'data': data_consulta,
-                        'hora': hora,
-                        'status': var_status.get(),
-                        'observacoes': var_obs.get('1.0', tk.END).strip()
-                    }
-                    
-                    # Salvar no banco de dados
-                    sucesso, mensagem = self.agenda_controller.salvar_consulta(dados_consulta)
                     
                     if sucesso:
                         messagebox.showinfo("Sucesso", mensagem)
@@ -2284,65 +2408,27 @@ class AgendamentoModule:
                 messagebox.showwarning("Aviso", "Data inválida")
                 return
                 
-            # Obtém o dia da semana (0=segunda, 1=terça, ..., 6=domingo)
-            dia_semana = data.weekday()
-                
-            # Obtém os horários disponíveis para o médico neste dia da semana
-            horario_controller = HorarioController(self.db_connection)
-            horarios_disponiveis = horario_controller.obter_horarios_disponiveis(medico_id, dia_semana)
-            
-            if not horarios_disponiveis:
+            # Duração do tipo de atendimento selecionado (se houver)
+            duracao = DURACAO_PADRAO
+            try:
+                tipo = self.campo_tipo.get() if hasattr(self, 'campo_tipo') else ''
+                if tipo in self.tipos_atendimento_map:
+                    duracao = int(self.tipos_atendimento_map[tipo]['tempo'] or DURACAO_PADRAO)
+            except Exception:
+                duracao = DURACAO_PADRAO
+
+            # Horários livres: faixas do médico menos as consultas já marcadas
+            horarios_formatados = DisponibilidadeController(self.db_connection).horarios_livres(
+                medico_id, data, duracao
+            )
+
+            if not horarios_formatados:
                 messagebox.showwarning("Aviso", "Não há horários disponíveis para este médico nesta data")
                 # Limpa o combobox de horários
                 self.campo_hora['values'] = []
                 self.campo_hora.set("")
                 return
-                
-            # Formata os horários para exibição (HH:MM)
-            horarios_formatados = []
-            def to_datetime_hm(value):
-                """Converte value (time | timedelta | str HH:MM[:SS]) em datetime base 1900-01-01 com hora/min."""
-                base = datetime(1900, 1, 1)
-                try:
-                    # time
-                    return datetime.combine(base.date(), value)
-                except Exception:
-                    pass
-                try:
-                    # timedelta
-                    total = int(value.total_seconds())
-                    horas = total // 3600
-                    minutos = (total % 3600) // 60
-                    return base.replace(hour=horas, minute=minutos, second=0, microsecond=0)
-                except Exception:
-                    pass
-                try:
-                    # string
-                    txt = str(value)
-                    if len(txt) == 8:  # HH:MM:SS
-                        return datetime.strptime(txt, '%H:%M:%S')
-                    return datetime.strptime(txt[:5], '%H:%M')
-                except Exception:
-                    return None
 
-            for intervalo in horarios_disponiveis:
-                try:
-                    h_ini = to_datetime_hm(intervalo.get('hora_inicio'))
-                    h_fim = to_datetime_hm(intervalo.get('hora_fim'))
-                    if not h_ini or not h_fim:
-                        continue
-                    # Gera de 10 em 10 minutos, incluindo o limite final
-                    t = h_ini
-                    while t <= h_fim:
-                        horarios_formatados.append(t.strftime('%H:%M'))
-                        t += timedelta(minutes=10)
-                except Exception as e:
-                    print(f"Erro ao processar intervalo: {e}")
-                    continue
-            
-            # Remove duplicados e ordena
-            horarios_formatados = sorted(set(horarios_formatados))
-            
             # Atualiza o combobox de horários
             self.campo_hora['values'] = horarios_formatados
             if horarios_formatados:
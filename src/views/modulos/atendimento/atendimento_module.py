@@ -140,6 +140,29 @@ class AtendimentoModule(BaseModule):
         except Exception:
             pass
     
+    def _agenda_ativa(self):
+        """Retorna o módulo de agendamento se a agenda estiver na tela."""
+        agenda = self.agendamento_module
+        if agenda is not None and hasattr(agenda, 'tabela_agendamentos'):
+            try:
+                if agenda.tabela_agendamentos.winfo_exists():
+                    return agenda
+            except Exception:
+                pass
+        return None
+
+    def on_show(self):
+        """Retoma a atualização da agenda, se for a tela atual."""
+        agenda = self._agenda_ativa()
+        if agenda is not None:
+            agenda.on_show()
+
+    def on_hide(self):
+        """Pausa a atualização da agenda enquanto o módulo estiver oculto."""
+        agenda = self._agenda_ativa()
+        if agenda is not None:
+            agenda.on_hide()
+    
     def limpar_conteudo(self):
         """Limpa o conteúdo do frame"""
         for widget in self.conteudo_frame.winfo_children():
@@ -15,11 +15,6 @@ try:
     from docx.shared import Pt
 except Exception:
     Document = None  # tratado em runtime com mensagem amigável
-try:
-    # Corretor ortográfico (pt)
-    from spellchecker import SpellChecker
-except Exception:
-    SpellChecker = None
 try:
     # Automação do Word (COM)
     import win32com.client as win32  # type: ignore
@@ -34,6 +29,11 @@ from src.controllers.config_controller import ConfigController
 from src.controllers.cadastro_controller import CadastroController
 from src.controllers.agenda_controller import AgendaController
 from src.utils.impressao import GerenciadorImpressao
+from src.utils.indice_pacientes import indice_pacientes
+from src.utils.corretor_ortografico import CorretorIncremental
+from src.utils.dicionario_ortografico import dicionario_ortografico
+from src.utils.tarefas import executor
+from src.utils.instrumentacao import medido
 
 # Filtra prints de debug específicos deste módulo, sem afetar outros prints úteis
 try:
@@ -50,7 +50,42 @@ try:
 except Exception:
     pass
 
+@medido('prontuario.buscar_pacientes_termo')
+def _buscar_pacientes_termo(conn, termo_busca):
+    """(roda no executor de tarefas) Retorna [(id, nome)] dos pacientes do termo."""
+    # Busca no índice em memória (nome, ID, telefone ou CPF) sem ida ao banco por tecla
+    indice_pacientes.garantir_atualizado()
+    if indice_pacientes.carregado:
+        limite = 50 if termo_busca.isdigit() else 10
+        return [(p["id"], p["nome"]) for p in indice_pacientes.buscar(termo_busca, limite=limite)]
+
+    # Sem índice: consulta direta com a conexão do worker
+    cliente_controller = ClienteController()
+    cliente_controller.set_db_connection(conn)
+    resultados = []
+    # Verifica se o termo é numérico (possível ID ou telefone)
+    if termo_busca.isdigit():
+        # Busca por ID
+        sucesso, paciente = cliente_controller.buscar_cliente_por_id(int(termo_busca))
+        if sucesso and paciente:
+            resultados.append((paciente["id"], paciente["nome"]))
+        
+        # Busca por telefone
+        for paciente in cliente_controller.buscar_cliente_por_telefone(termo_busca):
+            # Evita duplicatas se já encontrou por ID
+            if not sucesso or paciente["id"] != int(termo_busca):
+                resultados.append((paciente["id"], paciente["nome"]))
+    else:
+        # Busca por nome
+        for paciente in cliente_controller.buscar_cliente_por_nome(termo_busca):
+            resultados.append((paciente["id"], paciente["nome"]))
+    return resultados
+
+
 class ProntuarioModule(BaseModule):
+    # Tamanho da página do histórico (carrossel)
+    PRONTUARIOS_POR_PAGINA = 30
+
     def __init__(self, parent, controller, db_connection=None):
         """
         Inicializa o módulo de prontuários.
@@ -102,7 +137,7 @@ class ProntuarioModule(BaseModule):
         self.modo_edicao = False
         # Estado do corretor ortográfico
         self._spell = None
-        self._spell_after_id = None
+        self._corretor = None
         
         # Configura o frame principal
         self.frame.pack_propagate(False)
@@ -433,6 +468,7 @@ class ProntuarioModule(BaseModule):
         # Carrega os prontuários do paciente no carrossel
         self._carregar_prontuarios()
     
+    @medido('prontuario.buscar_paciente')
     def _buscar_paciente(self, event=None):
         """Busca pacientes com base no texto inserido. Pode ser chamada por botão ou tecla Enter."""
         termo_busca = self.busca_var.get().strip()
@@ -441,44 +477,31 @@ class ProntuarioModule(BaseModule):
             messagebox.showinfo("Aviso", "Digite um termo para busca")
             return
         
+        # Busca fora da thread do Tk; só o termo mais recente preenche a lista
+        executor.submeter(
+            _buscar_pacientes_termo, termo_busca,
+            ao_concluir=self._exibir_resultados_busca,
+            ao_falhar=lambda e: print(f"Erro ao buscar pacientes: {e}"),
+            widget=self.resultados_tree,
+            chave=('prontuario_busca', id(self)),
+            ocupado=self.resultados_tree,
+        )
+        
+        # Se foi chamado via evento de teclado, evita propagação
+        return "break"
+
+    def _exibir_resultados_busca(self, pacientes):
+        """Preenche a lista de resultados (thread do Tk)."""
         # Limpa a lista de resultados
         for item in self.resultados_tree.get_children():
             self.resultados_tree.delete(item)
         
-        # Verifica se o termo é numérico (possível ID ou telefone)
-        if termo_busca.isdigit():
-            # Busca por ID
-            sucesso, paciente = self.cliente_controller.buscar_cliente_por_id(int(termo_busca))
-            if sucesso and paciente:
-                self.resultados_tree.insert("", "end", values=(
-                    paciente["id"],
-                    paciente["nome"]
-                ))
-            
-            # Busca por telefone
-            pacientes = self.cliente_controller.buscar_cliente_por_telefone(termo_busca)
-            for paciente in pacientes:
-                # Evita duplicatas se já encontrou por ID
-                if not sucesso or paciente["id"] != int(termo_busca):
-                    self.resultados_tree.insert("", "end", values=(
-                        paciente["id"],
-                        paciente["nome"]
-                    ))
-        else:
-            # Busca por nome
-            pacientes = self.cliente_controller.buscar_cliente_por_nome(termo_busca)
-            for paciente in pacientes:
-                self.resultados_tree.insert("", "end", values=(
-                    paciente["id"],
-                    paciente["nome"]
-                ))
+        for paciente_id, nome in pacientes:
+            self.resultados_tree.insert("", "end", values=(paciente_id, nome))
         
         # Verifica se encontrou resultados
         if not self.resultados_tree.get_children():
             messagebox.showinfo("Resultado", "Nenhum paciente encontrado")
-        
-        # Se foi chamado via evento de teclado, evita propagação
-        return "break"
     
     def _selecionar_paciente(self, event):
         """Seleciona um paciente da lista de resultados."""
@@ -500,24 +523,47 @@ class ProntuarioModule(BaseModule):
             messagebox.showerror("Erro", "Não foi possível carregar os dados do paciente")
     
     def _carregar_prontuarios(self):
-        """Carrega os prontuários do paciente selecionado no carrossel."""
+        """Carrega a primeira página (só metadados) dos prontuários do paciente no carrossel."""
         if not self.paciente_selecionado:
             return
-        prontuarios = self.prontuario_controller.buscar_prontuarios_paciente(self.paciente_selecionado["id"])
-        # Ordena localmente: mais recentes primeiro (data desc, depois id desc)
-        try:
-            lista = list(prontuarios or [])
-            lista.sort(key=lambda p: (
-                (p.get('data') or ''),
-                (p.get('id') or 0)
-            ), reverse=True)
-            self.prontuarios_lista = lista
-        except Exception:
-            # Fallback sem ordenação caso algo falhe
-            self.prontuarios_lista = prontuarios or []
+        # Já vem ordenado do banco: mais recentes primeiro (data desc, depois id desc)
+        self.prontuarios_lista = self.prontuario_controller.listar_prontuarios_paciente(
+            self.paciente_selecionado["id"], limite=self.PRONTUARIOS_POR_PAGINA
+        )
+        self._prontuarios_tem_mais = len(self.prontuarios_lista) >= self.PRONTUARIOS_POR_PAGINA
         self.carousel_index = 0 if self.prontuarios_lista else -1
         self._atualizar_carrossel()
 
+    def _carregar_mais_prontuarios(self):
+        """Busca a próxima página (paginação por data/id do último item carregado)."""
+        if not getattr(self, '_prontuarios_tem_mais', False) or not self.prontuarios_lista:
+            return
+        ultimo = self.prontuarios_lista[-1]
+        pagina = self.prontuario_controller.listar_prontuarios_paciente(
+            self.paciente_selecionado["id"],
+            limite=self.PRONTUARIOS_POR_PAGINA,
+            apos=(ultimo.get('data'), ultimo.get('id'))
+        )
+        self.prontuarios_lista.extend(pagina)
+        self._prontuarios_tem_mais = len(pagina) >= self.PRONTUARIOS_POR_PAGINA
+
+    def _conteudo_item_carrossel(self, item):
+        """Conteúdo do item do carrossel: carregado sob demanda (cache LRU no controller)."""
+        if 'conteudo' in item:
+            return item.get('conteudo') or ''
+        return self.prontuario_controller.obter_conteudo_prontuario(item.get('id'))
+
+    def _prefetch_vizinhos_carrossel(self):
+        """Pré-carrega o conteúdo dos itens anterior/seguinte ao atual."""
+        try:
+            idx = getattr(self, 'carousel_index', -1)
+            lista = getattr(self, 'prontuarios_lista', []) or []
+            ids = [lista[i].get('id') for i in (idx + 1, idx - 1) if 0 <= i < len(lista)]
+            if ids:
+                self.prontuario_controller.carregar_conteudos(ids)
+        except Exception:
+            pass
+
     def _render_carrossel_prontuarios(self, parent):
         """Monta a UI do carrossel do histórico do paciente."""
         # Título
@@ -578,10 +624,14 @@ class ProntuarioModule(BaseModule):
 
     def _atualizar_carrossel(self):
         """Atualiza o preview e estado dos botões do carrossel."""
-        total = len(getattr(self, 'prontuarios_lista', []) or [])
         idx = getattr(self, 'carousel_index', -1)
+        # Chegando ao fim da página carregada: busca a próxima
+        if getattr(self, '_prontuarios_tem_mais', False) and idx >= len(self.prontuarios_lista) - 2:
+            self._carregar_mais_prontuarios()
+        total = len(getattr(self, 'prontuarios_lista', []) or [])
+        mais = '+' if getattr(self, '_prontuarios_tem_mais', False) else ''
         # Atualiza label de posição
-        self.carousel_pos_label.config(text=f"{(idx+1) if total and idx>=0 else 0}/{total}")
+        self.carousel_pos_label.config(text=f"{(idx+1) if total and idx>=0 else 0}/{total}{mais}")
         # Habilita/desabilita botões
         state_prev = tk.NORMAL if idx > 0 else tk.DISABLED
         state_next = tk.NORMAL if (total and idx < total - 1) else tk.DISABLED
@@ -594,7 +644,12 @@ class ProntuarioModule(BaseModule):
         if total and 0 <= idx < total:
             item = self.prontuarios_lista[idx]
             # Mostra apenas o conteúdo salvo, sem inserir título ou cabeçalhos extras
-            self.carousel_preview.insert(tk.END, item.get('conteudo', ''))
+            self.carousel_preview.insert(tk.END, self._conteudo_item_carrossel(item))
+            # Vizinhos carregados após o preview ser desenhado
+            try:
+                self.frame.after_idle(self._prefetch_vizinhos_carrossel)
+            except Exception:
+                pass
         else:
             self.carousel_preview.insert(tk.END, 'Nenhum prontuário encontrado.')
         self.carousel_preview.config(state=tk.DISABLED)
@@ -618,7 +673,7 @@ class ProntuarioModule(BaseModule):
             if not (total and 0 <= idx < total):
                 return
             item = self.prontuarios_lista[idx]
-            conteudo = item.get('conteudo') or ''
+            conteudo = self._conteudo_item_carrossel(item)
             if win32 is None:
                 messagebox.showwarning('Aviso', 'Automação do Word não está disponível nesta máquina.')
                 return
@@ -1263,39 +1318,23 @@ class ProntuarioModule(BaseModule):
             txt = getattr(self, 'editor_texto', None)
             if not txt:
                 return
-            if SpellChecker is None:
-                # Dependência ausente: não ativa
-                return
-            # Inicializa dicionário em português
+            # Dicionário em português compartilhado pelo processo
             if self._spell is None:
-                try:
-                    self._spell = SpellChecker(language='pt')
-                except Exception:
-                    self._spell = None
+                self._spell = dicionario_ortografico.obter()
+                if self._spell is None:
+                    # Ainda carregando em segundo plano (ou dependência ausente)
+                    if dicionario_ortografico.carregando:
+                        self.frame.after(300, self._habilitar_corretor_ortografico)
                     return
-            # Configura a tag visual das palavras incorretas
+            # Verificação incremental (só linhas alteradas, dicionário fora da thread do Tk)
+            self._corretor = CorretorIncremental(txt, self._spell, 30000)
             try:
-                txt.tag_configure('misspelled', underline=True, foreground='#c82333')
+                txt._corretor = self._corretor
             except Exception:
                 pass
-
-            # Bind com debounce para não pesar a digitação
-            def _on_key_release(event=None):
-                # cancela análise pendente
-                if self._spell_after_id:
-                    try:
-                        self.frame.after_cancel(self._spell_after_id)
-                    except Exception:
-                        pass
-                    self._spell_after_id = None
-                # agenda nova verificação
-                def _run():
-                    self._verificar_ortografia()
-                self._spell_after_id = self.frame.after(250, _run)
-
-            txt.bind('<KeyRelease>', _on_key_release, add=True)
+            txt.bind('<KeyRelease>', self._corretor.agendar, add=True)
             # Primeira verificação do conteúdo inicial (após prefill)
-            self._verificar_ortografia()
+            self._corretor.verificar_tudo()
             # Menu de contexto com sugestões (usa utilitário do BaseModule)
             try:
                 self._bind_spell_menu(txt, language='pt', limit_chars=30000)
@@ -1305,44 +1344,11 @@ class ProntuarioModule(BaseModule):
             pass
 
     def _verificar_ortografia(self):
-        """Varre o texto e marca palavras desconhecidas pelo dicionário PT."""
-        if not self._spell or not getattr(self, 'editor_texto', None):
+        """Reverifica todo o texto do editor (ex.: após inserir conteúdo por código)."""
+        corretor = getattr(self, '_corretor', None)
+        if not self._spell or corretor is None or corretor.txt is not getattr(self, 'editor_texto', None):
             return
-        txt = self.editor_texto
-        try:
-            # Limita análise para não travar em textos muito grandes
-            conteudo = txt.get('1.0', 'end-1c')
-            limite = 30000
-            analisado = conteudo[:limite]
-
-            # Limpa marcações anteriores
-            txt.tag_remove('misspelled', '1.0', tk.END)
-
-            # Encontra palavras (inclui letras acentuadas)
-            for m in re.finditer(r"\b[\wÀ-ÖØ-öø-ÿ]+\b", analisado, flags=re.UNICODE):
-                palavra = m.group(0)
-                # Ignora números puros e tokens muito curtos
-                if palavra.isdigit() or len(palavra) <= 2:
-                    continue
-                # Checa no dicionário
-                try:
-                    if palavra.lower() in self._spell:  # acesso rápido ao dicionário
-                        continue
-                except Exception:
-                    pass
-                # Método padrão da lib
-                try:
-                    if palavra.lower() not in self._spell:  # redundância segura
-                        # Confere probabilidade: unknown retorna conjunto de não reconhecidas
-                        if palavra.lower() in self._spell.unknown([palavra.lower()]):
-                            start = f"1.0+{m.start()}c"
-                            end = f"1.0+{m.end()}c"
-                            txt.tag_add('misspelled', start, end)
-                except Exception:
-                    # Em caso de erro, não marca
-                    continue
-        except Exception:
-            pass
+        corretor.verificar_tudo()
 
     def _preencher_cabecalho_novo_prontuario(self):
         """Insere cabeçalho com nome do paciente e data atual no editor, se estiver vazio."""
@@ -4,13 +4,9 @@ Fornece funcionalidades comuns e estilos padronizados.
 """
 import tkinter as tk
 from tkinter import ttk
-import re
 import sys
-try:
-    # Corretor ortográfico opcional
-    from spellchecker import SpellChecker
-except Exception:
-    SpellChecker = None
+from src.utils.corretor_ortografico import CorretorIncremental
+from src.utils.dicionario_ortografico import dicionario_ortografico
 
 class BaseModule:
     def __init__(self, parent, controller):
@@ -25,9 +21,6 @@ class BaseModule:
         self.controller = controller
         self.frame = ttk.Frame(parent)
         self.current_view = None
-        # Estado compartilhado do corretor (por módulo)
-        self._spellchecker = None
-        self._spell_jobs = {}
         
         # Configura os estilos padrão
         self.configurar_estilos()
@@ -39,69 +32,42 @@ class BaseModule:
 
     # ------------------------- Utilitário: Corretor ortográfico -------------------------
     def _get_spellchecker(self, language: str = 'pt'):
-        """Obtém (cache) uma instância do SpellChecker para o idioma informado."""
-        if SpellChecker is None:
+        """Dicionário compartilhado do processo (None enquanto estiver carregando ou sem a dependência)."""
+        return dicionario_ortografico.obter()
+
+    def _get_corretor(self, text_widget: tk.Text, language: str = 'pt', limit_chars: int = 30000):
+        """Obtém (cria na primeira vez) o corretor incremental associado ao widget."""
+        corretor = getattr(text_widget, '_corretor', None)
+        if corretor is not None:
+            return corretor
+        sc = self._get_spellchecker(language)
+        if sc is None:
             return None
+        corretor = CorretorIncremental(text_widget, sc, limit_chars)
         try:
-            if not self._spellchecker:
-                self._spellchecker = SpellChecker(language=language)
+            text_widget._corretor = corretor
         except Exception:
-            self._spellchecker = None
-        return self._spellchecker
+            pass
+        return corretor
 
     def _enable_spellcheck(self, text_widget: tk.Text, language: str = 'pt', limit_chars: int = 30000):
         """Ativa verificação ortográfica em um widget Text/ScrolledText.
         - Sublinha em vermelho palavras desconhecidas (tag 'misspelled').
-        - Debounce para não pesar a digitação.
+        - Debounce e verificação incremental (só linhas alteradas, dicionário fora da thread do Tk).
         Se a dependência não existir, não faz nada.
         """
         try:
             if text_widget is None or not hasattr(text_widget, 'winfo_exists'):
                 return
-            sc = self._get_spellchecker(language)
-            if sc is None:
+            corretor = self._get_corretor(text_widget, language, limit_chars)
+            if corretor is None:
+                # Dicionário ainda carregando em segundo plano: tenta de novo em instantes
+                if dicionario_ortografico.carregando:
+                    self.frame.after(300, lambda: self._enable_spellcheck(text_widget, language, limit_chars))
                 return
-            # Configuração de tag
-            try:
-                text_widget.tag_configure('misspelled', underline=True, foreground='#c82333')
-            except Exception:
-                pass
-
-            # Função de verificação
-            def _run_check():
-                try:
-                    conteudo = text_widget.get('1.0', 'end-1c')
-                    analisado = conteudo[:limit_chars]
-                    text_widget.tag_remove('misspelled', '1.0', tk.END)
-                    for m in re.finditer(r"\b[\wÀ-ÖØ-öø-ÿ]+\b", analisado, flags=re.UNICODE):
-                        palavra = m.group(0)
-                        if palavra.isdigit() or len(palavra) <= 2:
-                            continue
-                        low = palavra.lower()
-                        try:
-                            # unknown é mais confiável que 'in'
-                            if low in sc.unknown([low]):
-                                start = f"1.0+{m.start()}c"
-                                end = f"1.0+{m.end()}c"
-                                text_widget.tag_add('misspelled', start, end)
-                        except Exception:
-                            continue
-                except Exception:
-                    pass
-
-            # Debounce por widget
-            def _on_key_release(event=None):
-                try:
-                    job = self._spell_jobs.get(text_widget)
-                    if job:
-                        self.frame.after_cancel(job)
-                except Exception:
-                    pass
-                self._spell_jobs[text_widget] = self.frame.after(250, _run_check)
-
-            text_widget.bind('<KeyRelease>', _on_key_release, add=True)
-            # Primeira checagem imediata
-            _run_check()
+            text_widget.bind('<KeyRelease>', corretor.agendar, add=True)
+            # Primeira checagem (em segundo plano)
+            corretor.verificar_tudo()
             # Context menu (botão direito) para correções
             try:
                 self._bind_spell_menu(text_widget, language, limit_chars)
@@ -116,28 +82,9 @@ class BaseModule:
         try:
             if text_widget is None or not hasattr(text_widget, 'winfo_exists'):
                 return
-            sc = self._get_spellchecker(language)
-            if sc is None:
-                return
-            try:
-                text_widget.tag_configure('misspelled', underline=True, foreground='#c82333')
-            except Exception:
-                pass
-            conteudo = text_widget.get('1.0', 'end-1c')
-            analisado = conteudo[:limit_chars]
-            text_widget.tag_remove('misspelled', '1.0', tk.END)
-            for m in re.finditer(r"\b[\wÀ-ÖØ-öø-ÿ]+\b", analisado, flags=re.UNICODE):
-                palavra = m.group(0)
-                if palavra.isdigit() or len(palavra) <= 2:
-                    continue
-                low = palavra.lower()
-                try:
-                    if low in sc.unknown([low]):
-                        start = f"1.0+{m.start()}c"
-                        end = f"1.0+{m.end()}c"
-                        text_widget.tag_add('misspelled', start, end)
-                except Exception:
-                    continue
+            corretor = self._get_corretor(text_widget, language, limit_chars)
+            if corretor is not None:
+                corretor.verificar_tudo()
         except Exception:
             pass
 
@@ -426,6 +373,22 @@ class BaseModule:
         """
         pass
     
+    def on_show(self):
+        """
+        Chamado pelo SistemaPDV ao reexibir o módulo (instância mantida viva).
+        
+        Módulos com jobs periódicos devem sobrescrever para retomá-los.
+        """
+        pass
+    
+    def on_hide(self):
+        """
+        Chamado pelo SistemaPDV ao ocultar o módulo.
+        
+        Módulos com jobs periódicos devem sobrescrever para pausá-los.
+        """
+        pass
+    
     def _limpar_view(self):
         """Limpa a view atual"""
         if hasattr(self, 'current_view') and self.current_view:
@@ -1,5 +1,5 @@
 import tkinter as tk
-from tkinter import scrolledtext
+from tkinter import scrolledtext, messagebox
 from datetime import datetime
 import os
 import sys
@@ -10,6 +10,16 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(
 from ..base_module import BaseModule
 from src.db.chat_db import ChatDB
 from src.db.database import db
+from src.utils.notificador import publicar
+from src.utils.tarefas import executor
+
+
+def _buscar_mensagens_arquivadas(conn, usuario_id, usuario_nome, dispositivo, termo, data_inicio, data_fim, limite):
+    """(roda no executor de tarefas) Mensagens arquivadas do usuário, mais recentes primeiro."""
+    return ChatDB(conn).buscar_mensagens_arquivadas(
+        usuario_id, usuario_nome, dispositivo,
+        termo=termo, data_inicio=data_inicio, data_fim=data_fim, limite=limite
+    )
 
 
 class ChatModule(BaseModule):
@@ -17,12 +27,18 @@ class ChatModule(BaseModule):
     Módulo de Chat na rede local usando o banco compartilhado.
 
     Recursos:
-    - Presença: heartbeat no banco a cada ~10s.
+    - Presença: heartbeat no banco a cada ~10s (sincronizador do chat).
     - Lista de usuários online (à esquerda).
     - Conversas 1:1 (mensagens persistidas no banco).
-    - Polling de novas mensagens (~1.5s) e notificação (piscar botão Chat).
+    - Mensagens novas e notificação (piscar botão Chat) via SincronizadorChat,
+      que roda numa thread própria e publica os eventos para a interface.
     """
 
+    # Mensagens por página da conversa (as anteriores carregam ao rolar até o topo)
+    MENSAGENS_POR_PAGINA = 50
+    # Máximo de resultados da busca no arquivo
+    LIMITE_BUSCA_ARQUIVO = 200
+
     def __init__(self, parent, controller):
         # Inicializa BaseModule (estilos, frame, helpers)
         super().__init__(parent, controller)
@@ -34,8 +50,16 @@ class ChatModule(BaseModule):
 
         # Estado de conversa/seleção
         self._contato_sel = None  # dict: {usuario_id, usuario_nome, dispositivo}
-        self._poll_job = None
-        self._hb_job = None
+        # Presença e histórico de interlocutores (atualizados pelo sincronizador do chat)
+        self._online = None
+        self._historico = None
+        # Conversa exibida: contato, cursor da mensagem mais antiga (criado_em, id) e maior id
+        self._conversa_chave = None
+        self._conversa_antes = None
+        self._conversa_ultimo_id = 0
+        self._conversa_tem_mais = False
+        self._conversa_no_arquivo = False
+        self._carregando_antigas = False
 
         # DB
         self.conn = db.get_connection()
@@ -77,6 +101,20 @@ class ChatModule(BaseModule):
 
         return self.frame
 
+    def on_hide(self):
+        """Oculto: sai do modo rápido e não marca mensagens como lidas."""
+        self._stop_polling_and_heartbeat()
+
+    def on_show(self):
+        """Reexibido: volta a assinar o sincronizador e atualiza lista e conversa."""
+        if not hasattr(self, 'lista_contatos') or not self.lista_contatos.winfo_exists():
+            return
+        self._start_polling()
+        self._refresh_online()
+        if self._contato_sel is not None:
+            self._carregar_conversa(self._contato_sel)
+            self._marcar_lidas_do_contato(self._contato_sel)
+
     # ------------------------- Tela inicial padrão -------------------------
     def _show_default(self):
         self.current_view = tk.Frame(self.conteudo_frame, bg='#f0f2f5')
@@ -115,6 +153,20 @@ class ChatModule(BaseModule):
         )
         titulo.pack(side='left')
 
+        btn_arquivo = tk.Button(
+            header,
+            text='Buscar no arquivo',
+            font=("Arial", 10, 'bold'),
+            bg='#4a6fa5',
+            fg='#ffffff',
+            activebackground='#3d5d8a',
+            activeforeground='#ffffff',
+            relief='flat',
+            padx=12, pady=4,
+            command=self._abrir_busca_arquivo
+        )
+        btn_arquivo.pack(side='right')
+
         # Corpo com 2 colunas: contatos | conversa
         corpo = tk.Frame(self.current_view, bg='#f0f2f5')
         corpo.pack(fill='both', expand=True, padx=10, pady=10)
@@ -148,6 +200,11 @@ class ChatModule(BaseModule):
             height=18
         )
         self.txt_mensagens.pack(fill='both', expand=True, side='top')
+        # Tag única para todas as mensagens (preto no branco, alinhado à esquerda)
+        self.txt_mensagens.tag_configure('linha_msg', foreground='#000000', background='#ffffff', justify='left', lmargin1=4, lmargin2=4, spacing1=2, spacing3=2)
+        # Ao chegar no topo da rolagem, carrega as mensagens anteriores
+        self.txt_mensagens.configure(yscrollcommand=self._on_scroll_conversa)
+        self._conversa_chave = None
 
         # Base cinza; input branco
         entrada_frame = tk.Frame(right, bg='#f0f2f5')
@@ -171,10 +228,10 @@ class ChatModule(BaseModule):
         )
         btn_enviar.pack(side='right')
 
-        # Inicializações: carregar contatos e iniciar presença/polling
+        # Inicializações: carregar contatos e assinar o sincronizador do chat
         self._refresh_online()
-        self._start_heartbeat()
         self._start_polling()
+        self.current_view.bind('<Destroy>', lambda e: self._stop_polling_and_heartbeat(), add=True)
 
         # Foco no campo ao abrir
         try:
@@ -183,176 +240,64 @@ class ChatModule(BaseModule):
             pass
 
     # ------------------------- Polling / Presença -------------------------
-    def _start_heartbeat(self):
-        self._do_heartbeat()
-
-    def _do_heartbeat(self):
-        try:
-            # Tenta obter o ID e nome do usuário do controller.usuario
-            if hasattr(self.controller, 'usuario'):
-                usuario_id = getattr(self.controller.usuario, 'id', None)
-                usuario_nome = getattr(self.controller.usuario, 'nome', 'Usuário')
-                
-                # Atualiza os atributos da instância
-                if usuario_id is not None:
-                    self.me_id = usuario_id
-                    self.me_nome = str(usuario_nome) if usuario_nome else 'Usuário'
-                    
-                    # Dispositivo padrão se não estiver definido
-                    if not hasattr(self, 'me_disp') or not self.me_disp:
-                        import socket
-                        self.me_disp = socket.gethostname()
-                    
-                    # Faz o heartbeat (silencioso)
-                    self.chatdb.heartbeat(self.me_id, self.me_nome, self.me_disp)
-                    self.conn.commit()
-                    return  # Sucesso, sai da função
-            
-            # Se chegou aqui, não conseguiu obter o usuário
-            print("Aguardando login do usuário...")
-            
-        except Exception as e:
-            print(f"Erro no heartbeat: {e}")
-            # Tenta reconectar
-            try:
-                self.conn = db.get_connection()
-                self.chatdb = ChatDB(self.conn)
-            except Exception as e2:
-                print(f"Falha ao reconectar: {e2}")
-        
-        # Agenda próximo heartbeat (5s)
-        try:
-            if hasattr(self, '_hb_job') and self._hb_job:
-                self.frame.after_cancel(self._hb_job)
-            self._hb_job = self.frame.after(5000, self._do_heartbeat)
-        except Exception as e:
-            print(f"Erro ao agendar heartbeat: {e}")
-            self._hb_job = None
-
+    def _chat_sync(self):
+        """Sincronizador do chat da estação (criado no login pelo SistemaPDV)."""
+        return getattr(self.controller, 'chat_sync', None)
 
     def _start_polling(self):
-        self._poll_messages()
-        self._poll_online()
+        """Assina o sincronizador: heartbeat, presença e mensagens novas chegam por eventos,
+        sem consultas ao banco na thread da interface."""
+        sync = self._chat_sync()
+        if sync is None:
+            print("[CHAT] Sincronizador do chat indisponível; lista sem atualização automática.")
+            return
+        sync.assinar(self._on_chat_sync)
+        sync.definir_tela_aberta(True)
 
-    def _poll_messages(self):
+    def _stop_polling_and_heartbeat(self):
+        sync = self._chat_sync()
+        if sync is None:
+            return
         try:
-            # Verifica se o usuário está logado
-            if not hasattr(self, 'me_id') or self.me_id is None:
-                # Tenta obter do controller.usuario
-                if hasattr(self.controller, 'usuario'):
-                    self.me_id = getattr(self.controller.usuario, 'id', None)
-                    self.me_nome = getattr(self.controller.usuario, 'nome', 'Usuário')
-                
-                # Se ainda não tem ID, aguarda
-                if self.me_id is None:
-                    print("Poll: Usuário não logado, aguardando...")
-                    # Agenda próxima verificação (1 segundo)
-                    if self._poll_job:
-                        self.frame.after_cancel(self._poll_job)
-                    self._poll_job = self.frame.after(1000, self._poll_messages)
-                    return
-            
-            # Garante que temos valores válidos
-            if not isinstance(self.me_id, int):
-                print(f"Poll: ID do usuário inválido: {type(self.me_id)}")
-                # Agenda próxima verificação (1 segundo)
-                if self._poll_job:
-                    self.frame.after_cancel(self._poll_job)
-                self._poll_job = self.frame.after(1000, self._poll_messages)
-                return
-                
-            # Busca mensagens não lidas
-            nao_lidas = self.chatdb.listar_nao_lidas_para(self.me_id, self.me_nome, self.me_disp)
-            total = len(nao_lidas)
-            
-            # Notifica app principal
-            if hasattr(self.controller, 'notify_chat_unread'):
-                self.controller.notify_chat_unread(total)
-
-            # Atualiza a conversa atual se houver mensagens novas
-            if total and self._contato_sel is not None:
-                self._carregar_conversa(self._contato_sel)
+            sync.cancelar_assinatura(self._on_chat_sync)
+            sync.definir_tela_aberta(False)
+        except Exception:
+            pass
+
+    def _on_chat_sync(self, evento: dict):
+        """Eventos do sincronizador (thread do Tk): presença e mensagens novas."""
+        if not hasattr(self, 'lista_contatos') or not self.lista_contatos.winfo_exists():
+            return
+        atualizar_lista = False
+        if 'online' in evento:
+            self._online = evento['online']
+            atualizar_lista = True
+
+        novas = evento.get('novas') or []
+        if novas:
+            # Remetente novo (sem conversa anterior): recarrega o histórico de interlocutores
+            conhecidos = {(h.get('usuario_id'), h.get('usuario_nome')) for h in (self._historico or [])}
+            if any((m.get('remetente_id'), m.get('remetente_nome')) not in conhecidos for m in novas):
+                self._historico = None
+                atualizar_lista = True
+
+            # Atualiza a conversa atual se houver mensagens novas do contato
+            if self._contato_sel is not None:
                 try:
                     contato_nome = self._contato_sel.get('usuario_nome') if isinstance(self._contato_sel, dict) else None
-                    ids_para_marcar = [
-                        m.get('id') for m in nao_lidas
-                        if m and isinstance(m, dict)
-                        and m.get('id') is not None
-                        and (contato_nome is None or m.get('remetente_nome') == contato_nome)
+                    do_contato = [
+                        m for m in novas
+                        if contato_nome is None or m.get('remetente_nome') == contato_nome
                     ]
-                    if ids_para_marcar:
-                        self.chatdb.marcar_lidas(ids_para_marcar)
-                        if hasattr(self.controller, 'notify_chat_unread'):
-                            restante = max(0, total - len(ids_para_marcar))
-                            self.controller.notify_chat_unread(restante)
+                    if do_contato:
+                        self._carregar_conversa(self._contato_sel)
+                        ids_para_marcar = [m.get('id') for m in do_contato if m.get('lido_em') is None]
+                        self._chat_sync().marcar_lidas(ids_para_marcar)
                 except Exception as e:
                     print(f"Erro ao marcar mensagens como lidas: {e}")
-        except Exception as e:
-            print(f"Erro ao verificar mensagens: {e}")
-            # Tenta reconectar
-            try:
-                self.conn = db.get_connection()
-                self.chatdb = ChatDB(self.conn)
-            except Exception as e2:
-                print(f"Falha ao reconectar ao banco: {e2}")
-        
-        # Agenda próxima verificação (1 segundo)
-        try:
-            if self._poll_job:
-                self.frame.after_cancel(self._poll_job)
-            self._poll_job = self.frame.after(1000, self._poll_messages)
-        except Exception as e:
-            print(f"Erro ao agendar verificação de mensagens: {e}")
-            self._poll_job = None
 
-    def _poll_online(self):
-        try:
-            # Verifica se o usuário está logado
-            if not hasattr(self, 'me_id') or self.me_id is None:
-                # Tenta obter do controller.usuario
-                if hasattr(self.controller, 'usuario'):
-                    self.me_id = getattr(self.controller.usuario, 'id', None)
-                    self.me_nome = getattr(self.controller.usuario, 'nome', 'Usuário')
-                
-                # Se ainda não tem ID, aguarda
-                if self.me_id is None:
-                    print("Poll online: Usuário não logado, aguardando...")
-                    # Agenda próxima verificação
-                    self.frame.after(3000, self._poll_online)
-                    return
-            
-            # Atualiza a lista de usuários online
+        if atualizar_lista:
             self._refresh_online()
-        except Exception as e:
-            print(f"Erro ao atualizar lista de online: {e}")
-            # Tenta reconectar
-            try:
-                self.conn = db.get_connection()
-                self.chatdb = ChatDB(self.conn)
-            except Exception as e2:
-                print(f"Falha ao reconectar ao banco: {e2}")
-        
-        # Agenda próxima verificação (1s)
-        try:
-            self.frame.after(1000, self._poll_online)
-        except Exception as e:
-            print(f"Erro ao agendar verificação de online: {e}")
-
-    def _stop_polling_and_heartbeat(self):
-        # Para o polling de mensagens
-        if self._poll_job:
-            try:
-                self.frame.after_cancel(self._poll_job)
-                self._poll_job = None
-            except Exception:
-                pass
-        # Para o heartbeat
-        if self._hb_job:
-            try:
-                self.frame.after_cancel(self._hb_job)
-                self._hb_job = None
-            except Exception:
-                pass
 
     # ------------------------- UI Actions -------------------------
     def _refresh_online(self):
@@ -361,27 +306,23 @@ class ChatModule(BaseModule):
             for w in list(self.lista_contatos.winfo_children()):
                 w.destroy()
         # Monta a lista unificada: interlocutores (histórico) + online (status)
-        try:
-            # Busca online
-            online = self.chatdb.listar_online()
-        except Exception as e:
-            print(f"Erro ao listar usuários online: {e}")
-            online = []
-        # Reconnect fallback
-        if len(online) == 0:
+        # Presença vem do sincronizador; consulta direta só na abertura (antes do primeiro evento)
+        online = self._online
+        if online is None:
             try:
-                self.conn = db.get_connection()
-                self.chatdb = ChatDB(self.conn)
                 online = self.chatdb.listar_online()
             except Exception as e:
-                print(f"Erro ao reconectar para buscar usuários online: {e}")
+                print(f"Erro ao listar usuários online: {e}")
+                online = []
 
-        # Busca interlocutores (histórico)
-        try:
-            historico = self.chatdb.listar_interlocutores(self.me_id, self.me_nome, self.me_disp)
-        except Exception as e:
-            print(f"Erro ao listar interlocutores: {e}")
-            historico = []
+        # Busca interlocutores (histórico), mantidos até chegar mensagem de remetente novo
+        if self._historico is None:
+            try:
+                self._historico = self.chatdb.listar_interlocutores(self.me_id, self.me_nome, self.me_disp)
+            except Exception as e:
+                print(f"Erro ao listar interlocutores: {e}")
+                self._historico = []
+        historico = self._historico
 
         # Índice de online por id/nome
         online_index = {}
@@ -457,8 +398,57 @@ class ChatModule(BaseModule):
     def _selecionar_contato(self, contato: dict):
         self._contato_sel = contato
         self._carregar_conversa(contato)
+        self._marcar_lidas_do_contato(contato)
+
+    def _marcar_lidas_do_contato(self, contato: dict):
+        """Marca como lidas as mensagens pendentes do contato aberto: um UPDATE feito pelo
+        sincronizador, que atualiza o contador no mesmo ciclo."""
+        try:
+            contato_nome = contato.get('usuario_nome')
+            if not contato_nome:
+                return
+            sync = self._chat_sync()
+            if sync is not None:
+                sync.marcar_lidas_do_remetente(contato_nome)
+            else:
+                self.chatdb.marcar_lidas_do_remetente(self.me_id, self.me_nome, self.me_disp, contato_nome)
+        except Exception as e:
+            print(f"Erro ao marcar mensagens como lidas: {e}")
+
+    @staticmethod
+    def _chave_contato(contato: dict):
+        return (contato.get('usuario_id'), contato.get('usuario_nome'), contato.get('dispositivo'))
+
+    def _args_conversa(self, contato: dict):
+        return (
+            self.me_id, self.me_nome, self.me_disp,
+            contato.get('usuario_id'), contato.get('usuario_nome'), contato.get('dispositivo')
+        )
+
+    @staticmethod
+    def _formatar_linhas(msgs) -> str:
+        linhas = []
+        for msg in msgs:
+            try:
+                remetente_nome = msg.get('remetente_nome', 'Usuário')
+                texto = msg.get('texto', '')
+                criado_em = msg.get('criado_em')
+                hora = criado_em.strftime('%H:%M') if criado_em else ''
+                # Linha única, tudo alinhado à esquerda, fundo branco e texto preto
+                linhas.append(f"{remetente_nome} {hora}: {texto}\n")
+            except Exception:
+                continue
+        return ''.join(linhas)
 
     def _carregar_conversa(self, contato: dict):
+        """Abre a conversa (página mais recente) ou, se já estiver aberta,
+        acrescenta ao final só as mensagens novas."""
+        if not hasattr(self, 'txt_mensagens') or not self.txt_mensagens:
+            return
+        if self._chave_contato(contato) == self._conversa_chave:
+            self._acrescentar_novas(contato)
+            return
+
         # Atualiza label de conversa
         try:
             nome = contato.get('usuario_nome', 'Usuário')
@@ -467,38 +457,190 @@ class ChatModule(BaseModule):
         except Exception:
             pass
 
-        # Busca mensagens
+        # Busca a página mais recente
         try:
-            msgs = self.chatdb.listar_conversa(
-                self.me_id, self.me_nome, self.me_disp,
-                contato.get('usuario_id'), contato.get('usuario_nome'), contato.get('dispositivo')
-            )
+            msgs = self.chatdb.listar_conversa_pagina(*self._args_conversa(contato), limite=self.MENSAGENS_POR_PAGINA)
         except Exception:
             msgs = []
 
-        # Atualiza área de texto
-        if hasattr(self, 'txt_mensagens') and self.txt_mensagens:
-            self.txt_mensagens.config(state='normal')
-            self.txt_mensagens.delete(1.0, 'end')
+        self._conversa_chave = self._chave_contato(contato)
+        # Mesmo com a página incompleta pode haver histórico arquivado (consultado ao rolar ao topo)
+        self._conversa_tem_mais = True
+        self._conversa_no_arquivo = False
+        self._conversa_antes = (msgs[0].get('criado_em'), msgs[0].get('id')) if msgs else None
+        self._conversa_ultimo_id = max((int(m.get('id') or 0) for m in msgs), default=0)
+
+        self.txt_mensagens.config(state='normal')
+        self.txt_mensagens.delete(1.0, 'end')
+        self.txt_mensagens.insert('end', self._formatar_linhas(msgs), 'linha_msg')
+        # Rola para o final
+        self.txt_mensagens.config(state='disabled')
+        self.txt_mensagens.see('end')
+
+    def _acrescentar_novas(self, contato: dict):
+        """Insere no fim do widget apenas as mensagens com id acima do último exibido."""
+        try:
+            msgs = self.chatdb.listar_conversa_desde(*self._args_conversa(contato), self._conversa_ultimo_id)
+        except Exception:
+            msgs = []
+        if not msgs:
+            return
+        self._conversa_ultimo_id = max(int(m.get('id') or 0) for m in msgs)
+        if self._conversa_antes is None:
+            self._conversa_antes = (msgs[0].get('criado_em'), msgs[0].get('id'))
+        # Só acompanha o fim se o usuário já estava no fim (não tira a leitura do histórico)
+        no_fim = self.txt_mensagens.yview()[1] >= 0.999
+        self.txt_mensagens.config(state='normal')
+        self.txt_mensagens.insert('end', self._formatar_linhas(msgs), 'linha_msg')
+        self.txt_mensagens.config(state='disabled')
+        if no_fim:
+            self.txt_mensagens.see('end')
 
-            for msg in msgs:
-                try:
-                    remetente_nome = msg.get('remetente_nome', 'Usuário')
-                    texto = msg.get('texto', '')
-                    criado_em = msg.get('criado_em')
-                    hora = criado_em.strftime('%H:%M') if criado_em else ''
-                    # Linha única, tudo alinhado à esquerda, fundo branco e texto preto
-                    linha = f"{remetente_nome} {hora}: {texto}\n"
-                    self.txt_mensagens.insert('end', linha, 'linha_msg')
-                except Exception:
-                    continue
-
-            # Configura tag única para todas as mensagens (preto no branco, alinhado à esquerda)
-            self.txt_mensagens.tag_configure('linha_msg', foreground='#000000', background='#ffffff', justify='left', lmargin1=4, lmargin2=4, spacing1=2, spacing3=2)
-
-            # Rola para o final
+    def _on_scroll_conversa(self, first, last):
+        try:
+            self.txt_mensagens.vbar.set(first, last)
+        except Exception:
+            pass
+        if float(first) <= 0.0 and self._conversa_tem_mais and not self._carregando_antigas:
+            self._carregando_antigas = True
+            self.frame.after_idle(self._carregar_antigas)
+
+    def _carregar_antigas(self):
+        """Carrega a página anterior (cursor criado_em, id) e insere no topo mantendo a posição."""
+        try:
+            if self._contato_sel is None:
+                self._conversa_tem_mais = False
+                return
+            pagina = self.MENSAGENS_POR_PAGINA
+            args = self._args_conversa(self._contato_sel)
+            try:
+                msgs = []
+                if not self._conversa_no_arquivo and self._conversa_antes is not None:
+                    msgs = self.chatdb.listar_conversa_pagina(*args, limite=pagina, antes=self._conversa_antes)
+                if len(msgs) < pagina and not self._conversa_no_arquivo:
+                    # Fim do histórico recente: continua pelas mensagens arquivadas
+                    self._conversa_no_arquivo = True
+                    antes = (msgs[0].get('criado_em'), msgs[0].get('id')) if msgs else self._conversa_antes
+                    msgs = self.chatdb.listar_conversa_pagina(
+                        *args, limite=pagina - len(msgs), antes=antes, arquivo=True
+                    ) + msgs
+                    self._conversa_tem_mais = len(msgs) >= pagina
+                elif self._conversa_no_arquivo:
+                    msgs = self.chatdb.listar_conversa_pagina(
+                        *args, limite=pagina, antes=self._conversa_antes, arquivo=True
+                    )
+                    self._conversa_tem_mais = len(msgs) >= pagina
+            except Exception as e:
+                print(f"Erro ao carregar mensagens anteriores: {e}")
+                self._conversa_tem_mais = False
+                return
+            if not msgs:
+                return
+            self._conversa_antes = (msgs[0].get('criado_em'), msgs[0].get('id'))
+            texto = self._formatar_linhas(msgs)
+            self.txt_mensagens.config(state='normal')
+            self.txt_mensagens.insert('1.0', texto, 'linha_msg')
             self.txt_mensagens.config(state='disabled')
-            self.txt_mensagens.see('end')
+            # Mantém na tela a mensagem que estava no topo antes da inserção
+            self.txt_mensagens.yview(f"{texto.count(chr(10)) + 1}.0")
+        finally:
+            self._carregando_antigas = False
+
+    # ------------------------- Busca no arquivo -------------------------
+    def _abrir_busca_arquivo(self):
+        """Janela de busca nas mensagens arquivadas (enviadas ou recebidas pelo usuário)."""
+        dlg = tk.Toplevel(self.frame)
+        dlg.title("Buscar mensagens arquivadas")
+        dlg.geometry("700x500")
+        dlg.transient(self.frame)
+        body = tk.Frame(dlg, bg='#f0f2f5', padx=10, pady=10)
+        body.pack(fill=tk.BOTH, expand=True)
+
+        filtros = tk.Frame(body, bg='#f0f2f5')
+        filtros.pack(fill='x', pady=(0, 8))
+        tk.Label(filtros, text='Texto:', bg='#f0f2f5', fg='#333333', font=("Arial", 10)).pack(side='left')
+        entry_termo = tk.Entry(filtros, font=("Arial", 11), bg='#ffffff', fg='#000000', width=24)
+        entry_termo.pack(side='left', padx=(4, 12))
+        tk.Label(filtros, text='De:', bg='#f0f2f5', fg='#333333', font=("Arial", 10)).pack(side='left')
+        entry_inicio = tk.Entry(filtros, font=("Arial", 11), bg='#ffffff', fg='#000000', width=11)
+        entry_inicio.pack(side='left', padx=(4, 12))
+        tk.Label(filtros, text='Até:', bg='#f0f2f5', fg='#333333', font=("Arial", 10)).pack(side='left')
+        entry_fim = tk.Entry(filtros, font=("Arial", 11), bg='#ffffff', fg='#000000', width=11)
+        entry_fim.pack(side='left', padx=(4, 12))
+
+        lbl_status = tk.Label(body, text='Datas no formato DD/MM/AAAA (opcionais).', bg='#f0f2f5', fg='#555555', font=("Arial", 10, 'italic'))
+        lbl_status.pack(anchor='w', pady=(0, 6))
+
+        txt = scrolledtext.ScrolledText(body, wrap='word', state='disabled', font=("Arial", 11), bg='#ffffff', fg='#333333')
+        txt.pack(fill=tk.BOTH, expand=True)
+        txt.tag_configure('linha_msg', foreground='#000000', background='#ffffff', justify='left', lmargin1=4, lmargin2=4, spacing1=2, spacing3=2)
+
+        def buscar(event=None):
+            self._buscar_arquivo(entry_termo.get().strip(), entry_inicio.get().strip(), entry_fim.get().strip(), txt, lbl_status)
+            return "break"
+
+        tk.Button(
+            filtros,
+            text='Buscar',
+            font=("Arial", 10, 'bold'),
+            bg='#4CAF50',
+            fg='#ffffff',
+            activebackground='#43A047',
+            activeforeground='#ffffff',
+            relief='flat',
+            padx=12, pady=4,
+            command=buscar
+        ).pack(side='right')
+        for entry in (entry_termo, entry_inicio, entry_fim):
+            entry.bind('<Return>', buscar)
+
+        tk.Button(body, text="Fechar", command=dlg.destroy).pack(pady=(8, 0))
+        entry_termo.focus_set()
+
+    def _buscar_arquivo(self, termo: str, inicio_txt: str, fim_txt: str, txt, lbl_status):
+        datas = []
+        for valor in (inicio_txt, fim_txt):
+            try:
+                datas.append(datetime.strptime(valor, '%d/%m/%Y').date() if valor else None)
+            except ValueError:
+                messagebox.showwarning("Aviso", f"Data inválida: {valor}. Use o formato DD/MM/AAAA.", parent=txt)
+                return
+        if not termo and not any(datas):
+            messagebox.showinfo("Aviso", "Informe um texto ou um período para a busca.", parent=txt)
+            return
+        lbl_status.config(text='Buscando...')
+        # Consulta no executor; uma busca nova substitui a anterior ainda em andamento
+        executor.submeter(
+            _buscar_mensagens_arquivadas,
+            self.me_id, self.me_nome, self.me_disp, termo or None, datas[0], datas[1], self.LIMITE_BUSCA_ARQUIVO,
+            ao_concluir=lambda msgs: self._exibir_busca_arquivo(msgs, txt, lbl_status),
+            ao_falhar=lambda e: lbl_status.config(text=f'Erro ao buscar no arquivo: {e}'),
+            widget=txt,
+            chave=('chat_busca_arquivo', id(self)),
+            ocupado=txt,
+        )
+
+    def _exibir_busca_arquivo(self, msgs, txt, lbl_status):
+        """Lista os resultados da busca no arquivo (thread do Tk)."""
+        linhas = []
+        for msg in msgs:
+            criado_em = msg.get('criado_em')
+            quando = criado_em.strftime('%d/%m/%Y %H:%M') if criado_em else ''
+            linhas.append(
+                f"{quando} {msg.get('remetente_nome') or 'Usuário'} → {msg.get('destinatario_nome') or 'Usuário'}: "
+                f"{msg.get('texto', '')}\n"
+            )
+        txt.config(state='normal')
+        txt.delete(1.0, 'end')
+        txt.insert('end', ''.join(linhas), 'linha_msg')
+        txt.config(state='disabled')
+        txt.see('1.0')
+        if not msgs:
+            lbl_status.config(text='Nenhuma mensagem encontrada no arquivo.')
+        elif len(msgs) >= self.LIMITE_BUSCA_ARQUIVO:
+            lbl_status.config(text=f'Mostrando as {len(msgs)} mensagens mais recentes; refine a busca para ver outras.')
+        else:
+            lbl_status.config(text=f'{len(msgs)} mensagem(ns) encontrada(s).')
 
     def _on_enter(self, event):
         self._enviar()
@@ -523,7 +665,11 @@ class ChatModule(BaseModule):
                 self._contato_sel.get('usuario_id'), self._contato_sel.get('usuario_nome'), self._contato_sel.get('dispositivo'),
                 texto
             )
-            # Recarrega conversa
+            # Avisa a estação do destinatário pelo hub de notificações (se houver)
+            if self._contato_sel.get('usuario_id') is not None:
+                publicar(f"chat:{self._contato_sel.get('usuario_id')}")
+            # Acrescenta a mensagem enviada ao fim da conversa
             self._carregar_conversa(self._contato_sel)
+            self.txt_mensagens.see('end')
         except Exception:
             pass
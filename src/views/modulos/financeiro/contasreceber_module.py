@@ -2,7 +2,8 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from datetime import datetime
 from src.config.estilos import CORES, FONTES
-from src.db.financeiro_db import FinanceiroDB
+from src.db.financeiro_db import FinanceiroDB, FiltroContas
+from src.utils.instrumentacao import medido
 
 class ContasReceberModule:
     """
@@ -11,6 +12,9 @@ class ContasReceberModule:
     - Receber pagamento (entrada no caixa) e cancelar recebimento (estorno)
     - Filtros por mês/status
     """
+    # Linhas por página da lista (filtros e paginação são feitos no banco)
+    CONTAS_POR_PAGINA = 100
+
     def __init__(self, parent, controller):
         self.parent = parent
         self.controller = controller
@@ -67,6 +71,12 @@ class ContasReceberModule:
             'Janeiro','Fevereiro','Março','Abril','Maio','Junho','Julho','Agosto','Setembro','Outubro','Novembro','Dezembro'], width=18)
         self.cmb_mes.pack(side='left', padx=(0, 15))
 
+        ano_atual = datetime.now().year
+        tk.Label(filtros, text="Ano:", font=('Arial', 10), bg=bg_base, fg=CORES.get('texto', '#000')).pack(side='left', padx=(0, 5))
+        self.cmb_ano = ttk.Combobox(filtros, values=['Todos'] + [str(a) for a in range(ano_atual - 2, ano_atual + 3)], width=8)
+        self.cmb_ano.set(str(ano_atual))
+        self.cmb_ano.pack(side='left', padx=(0, 15))
+
         tk.Label(filtros, text="Status:", font=('Arial', 10), bg=bg_base, fg=CORES.get('texto', '#000')).pack(side='left', padx=(0, 5))
         self.cmb_status = ttk.Combobox(filtros, values=['Todos','Aberto','Recebido','Atrasado'], width=12)
         # Padrão: mostrar somente contas em aberto (oculta recebidos da lista por padrão)
@@ -77,7 +87,12 @@ class ContasReceberModule:
                 self.cmb_status.current(1)
             except Exception:
                 self.cmb_status.current(0)
-        self.cmb_status.pack(side='left')
+        self.cmb_status.pack(side='left', padx=(0, 15))
+
+        tk.Label(filtros, text="Buscar:", font=('Arial', 10), bg=bg_base, fg=CORES.get('texto', '#000')).pack(side='left', padx=(0, 5))
+        self.ent_busca = tk.Entry(filtros, font=('Arial', 10), width=18)
+        self.ent_busca.pack(side='left')
+        self.ent_busca.bind('<Return>', lambda e: self._aplicar_filtro())
 
         btn_style_filtro = {
             'font': ('Arial', 10, 'bold'),
@@ -128,6 +143,21 @@ class ContasReceberModule:
             self.tree.heading(c, text=headers[c])
             self.tree.column(c, width=widths[c], anchor='w')
 
+        # Paginação
+        nav = tk.Frame(right, bg=bg_base)
+        nav.pack(fill='x', pady=(6, 0))
+        self.btn_proxima = tk.Button(nav, text='Próxima ▶', command=self._proxima_pagina, **btn_style_filtro)
+        self.btn_proxima.pack(side='right')
+        self.btn_anterior = tk.Button(nav, text='◀ Anterior', command=self._pagina_anterior, **btn_style_filtro)
+        self.btn_anterior.pack(side='right', padx=(0, 8))
+        self.lbl_pagina = tk.Label(nav, text='', font=('Arial', 10), bg=bg_base, fg=CORES.get('texto', '#000'))
+        self.lbl_pagina.pack(side='left')
+        self._filtro = FiltroContas()
+        self._cursores = [None]      # cursor (vencimento, id) do início de cada página visitada
+        self._proximo_cursor = None
+        self._total = 0
+        self._series = {}            # iid -> serie_id das linhas da página
+
         # Menu de contexto: somente Cancelar Recebimento
         self._ctx_menu = tk.Menu(self.tree, tearoff=0)
         self._ctx_menu.add_command(label="Cancelar Recebimento", command=self._cancelar_recebimento)
@@ -151,45 +181,41 @@ class ContasReceberModule:
             pass
         self.tree.bind('<Button-3>', _on_right_click)
 
-        # Carregar dados
-        self._carregar_dados_db()
-
     # ---------- Dados ----------
-    def _carregar_dados_db(self, status_filtro: str | None = None, mes_filtro: int | None = None, atrasados: bool = False):
+    @medido('contas_receber.carregar_dados_db')
+    def _carregar_dados_db(self, status_filtro: str | None = None, mes_filtro: int | None = None, atrasados: bool = False,
+                           ano_filtro: int | None = None, texto_filtro: str | None = None):
+        """Aplica os filtros (no banco) e carrega a primeira página da Treeview."""
+        self._filtro = FiltroContas(
+            status=status_filtro, mes=mes_filtro, ano=ano_filtro,
+            atrasadas=atrasados, texto=texto_filtro,
+        )
+        self._cursores = [None]
+        db_conn = getattr(self.controller, 'db_connection', None)
+        try:
+            self._total = FinanceiroDB(db_conn).contar_contas_receber(self._filtro) if db_conn else 0
+        except Exception:
+            self._total = 0
+        self._carregar_pagina()
+
+    def _carregar_pagina(self):
+        """Busca no banco somente a página atual (uma linha a mais indica que há próxima)."""
         for i in self.tree.get_children():
             self.tree.delete(i)
+        self._proximo_cursor = None
+        self._series = {}
         db_conn = getattr(self.controller, 'db_connection', None)
         if not db_conn:
+            self._atualizar_paginacao()
             return
         db = FinanceiroDB(db_conn)
-        linhas = db.listar_contas_receber(status_filtro) or []
-        hoje = datetime.now().date()
+        linhas = db.listar_contas_receber(
+            filtro=self._filtro, limite=self.CONTAS_POR_PAGINA + 1, apos=self._cursores[-1]
+        ) or []
+        if len(linhas) > self.CONTAS_POR_PAGINA:
+            linhas = linhas[:self.CONTAS_POR_PAGINA]
+            self._proximo_cursor = (linhas[-1].get('vencimento'), linhas[-1].get('id'))
         for row in linhas:
-            if mes_filtro:
-                venc = row.get('vencimento')
-                try:
-                    if venc:
-                        vmonth = venc.month if hasattr(venc, 'month') else int(str(venc)[5:7])
-                        if vmonth != mes_filtro:
-                            continue
-                    else:
-                        if int(row.get('dia_vencimento') or 0) <= 0:
-                            continue
-                except Exception:
-                    pass
-            if atrasados:
-                if (row.get('status') != 'aberto'):
-                    continue
-                venc = row.get('vencimento')
-                try:
-                    if venc:
-                        vdate = venc if hasattr(venc, 'toordinal') else datetime.strptime(str(venc), '%Y-%m-%d').date()
-                        if vdate >= hoje:
-                            continue
-                    else:
-                        continue
-                except Exception:
-                    continue
             valores = (
                 row.get('descricao') or '',
                 row.get('categoria') or '', 
@@ -201,6 +227,30 @@ class ContasReceberModule:
             )
             iid = str(row.get('id')) if row.get('id') is not None else ''
             self.tree.insert('', 'end', iid=iid, values=valores)
+            if row.get('serie_id'):
+                self._series[iid] = row.get('serie_id')
+        self._atualizar_paginacao()
+
+    def _atualizar_paginacao(self):
+        try:
+            paginas = max(1, -(-self._total // self.CONTAS_POR_PAGINA))
+            self.lbl_pagina.config(text=f"Página {len(self._cursores)} de {paginas} · {self._total} conta(s)")
+            self.btn_anterior.config(state='normal' if len(self._cursores) > 1 else 'disabled')
+            self.btn_proxima.config(state='normal' if self._proximo_cursor is not None else 'disabled')
+        except Exception:
+            pass
+
+    def _proxima_pagina(self):
+        if self._proximo_cursor is None:
+            return
+        self._cursores.append(self._proximo_cursor)
+        self._carregar_pagina()
+
+    def _pagina_anterior(self):
+        if len(self._cursores) <= 1:
+            return
+        self._cursores.pop()
+        self._carregar_pagina()
 
     def _calc_dias_atraso(self, vencimento):
         try:
@@ -280,6 +330,13 @@ class ContasReceberModule:
         self._edr_dia.insert(0, str(dia_venc_atual or 1))
         add("Dia de vencimento:", self._edr_dia)
 
+        # Conta recorrente: permite aplicar descrição/categoria/valor às parcelas em aberto da série
+        self._edr_serie = tk.IntVar(value=0)
+        if self._series.get(str(conta_id)):
+            tk.Checkbutton(body, text="Aplicar às parcelas em aberto da série", variable=self._edr_serie,
+                           anchor='w').grid(row=row, column=1, sticky='w', pady=(6, 4))
+            row += 1
+
         btn_bar = tk.Frame(win)
         btn_bar.pack(fill='x', padx=16, pady=(0, 14))
         dialog_btn_style = {
@@ -333,6 +390,8 @@ class ContasReceberModule:
             return
         db = FinanceiroDB(db_conn)
         try:
+            serie_id = self._series.get(str(conta_id))
+            # Com a série marcada, as demais parcelas em aberto mudam na mesma transação
             db.atualizar_conta_receber_dados(
                 conta_id=conta_id,
                 descricao=desc,
@@ -340,6 +399,7 @@ class ContasReceberModule:
                 dia_vencimento=dia_venc,
                 valor_previsto=valor_prev,
                 vencimento=venc_date,
+                serie_id=serie_id if serie_id and self._edr_serie.get() == 1 else None,
             )
         except Exception as e:
             messagebox.showerror("Editar", f"Falha ao salvar alterações: {e}")
@@ -363,8 +423,12 @@ class ContasReceberModule:
             messagebox.showerror("Contas a Receber", "Sem conexão com o banco de dados.")
             return
         db = FinanceiroDB(db_conn)
+        serie_id = self._series.get(str(item_id))
+        excluir_serie = bool(serie_id) and messagebox.askyesno(
+            "Excluir", "Esta conta faz parte de uma série. Excluir também as demais parcelas em aberto?"
+        )
         try:
-            db.excluir_conta_receber(int(item_id))
+            db.excluir_conta_receber(int(item_id), serie_id if excluir_serie else None)
         except Exception as e:
             messagebox.showerror("Contas a Receber", f"Falha ao excluir: {e}")
             return
@@ -460,7 +524,17 @@ class ContasReceberModule:
                 status_val = None
         except Exception:
             status_val = None
-        self._carregar_dados_db(status_filtro=status_val, mes_filtro=mes_val, atrasados=atrasados)
+        try:
+            ano_sel = (self.cmb_ano.get() or '').strip()
+            ano_val = int(ano_sel) if ano_sel.isdigit() else None
+        except Exception:
+            ano_val = None
+        try:
+            texto_val = (self.ent_busca.get() or '').strip() or None
+        except Exception:
+            texto_val = None
+        self._carregar_dados_db(status_filtro=status_val, mes_filtro=mes_val, atrasados=atrasados,
+                                ano_filtro=ano_val, texto_filtro=texto_val)
 
     # ---------- Diálogo Nova Conta ----------
     def _abrir_dialog_nova_conta(self):
@@ -545,24 +619,19 @@ class ContasReceberModule:
             messagebox.showerror("Nova Conta", "Sem conexão com o banco de dados.")
             return
         db = FinanceiroDB(db_conn)
+        # Gera lançamentos (1 ou 12) numa única transação: ou cria a série inteira ou nenhuma parcela
         total = 12 if repetir else 1
-        criados = 0
-        for i in range(total):
-            try:
-                vdate = self._add_months(base_date, i)
-                db.criar_conta_receber(
-                    descricao=desc,
-                    categoria=categoria,
-                    dia_vencimento=int(vdate.day),
-                    valor_previsto=(None if valor_prev is None else float(valor_prev)),
-                    valor_atual=None,
-                    vencimento=vdate,
-                    status='aberto'
-                )
-                criados += 1
-            except Exception as e:
-                messagebox.showerror("Nova Conta", f"Falha ao criar lançamento: {e}")
-                break
+        try:
+            _serie_id, criados = db.criar_serie_contas_receber(
+                descricao=desc,
+                categoria=categoria,
+                valor_previsto=(None if valor_prev is None else float(valor_prev)),
+                primeiro_vencimento=base_date,
+                quantidade=total,
+            )
+        except Exception as e:
+            messagebox.showerror("Nova Conta", f"Falha ao criar lançamento: {e}")
+            return
         if criados > 0:
             messagebox.showinfo("Nova Conta", f"{criados} lançamento(s) criado(s) com sucesso.")
             try:
@@ -684,22 +753,6 @@ class ContasReceberModule:
         except Exception:
             return False
 
-    def _add_months(self, dt, months):
-        year = dt.year + (dt.month - 1 + months) // 12
-        month = (dt.month - 1 + months) % 12 + 1
-        day = dt.day
-        # Ajuste para fim do mês
-        last_day = self._last_day_of_month(year, month)
-        if day > last_day:
-            day = last_day
-        return datetime(year, month, day).date()
-
-    def _last_day_of_month(self, year, month):
-        if month == 12:
-            return 31
-        import calendar
-        return (datetime(year, month + 1, 1) - datetime(year, month, 1)).days
-
     def _center_window(self, win: tk.Toplevel):
         try:
             win.update_idletasks()
@@ -53,6 +53,19 @@ class FinanceiroModule:
         self.frame.pack(fill='both', expand=True)
         return self.frame
     
+    def on_show(self):
+        """Reexibido pelo SistemaPDV: o caixa pode ter sido aberto/fechado em outra estação."""
+        badge = getattr(self, 'status_badge', None)
+        try:
+            if badge is not None and badge.winfo_exists():
+                self._refresh_caixa_state()
+        except Exception:
+            pass
+
+    def on_hide(self):
+        """Sem jobs periódicos para pausar."""
+        pass
+
     def _show_default(self):
         # Tela inicial do módulo financeiro
         label = ttk.Label(
@@ -2,7 +2,40 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from src.config.estilos import CORES, FONTES
 from datetime import datetime, date
-from src.db.financeiro_db import FinanceiroDB
+from src.db.financeiro_db import FinanceiroDB, SQL_FINANCEIRO_PERIODO, SQL_ENTRADAS_MEDICO_PERIODO
+from src.utils.tarefas import executor
+from src.utils.instrumentacao import medido
+
+
+# ----------------- Consultas (rodam no executor de tarefas, com a conexão do worker) -----------------
+@medido('relatorios.consultar_financeiro_periodo')
+def _consultar_financeiro_periodo(conn, inicio, fim):
+    """Entradas/saídas da tabela financeiro no período."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(SQL_FINANCEIRO_PERIODO, (inicio, fim))
+        return cursor.fetchall() or []
+    finally:
+        cursor.close()
+
+
+@medido('relatorios.consultar_medicos_periodo')
+def _consultar_medicos_periodo(conn, medico_id, inicio, fim):
+    """Entradas das consultas do médico no período."""
+    cursor = conn.cursor(dictionary=True)
+    try:
+        cursor.execute(SQL_ENTRADAS_MEDICO_PERIODO, (medico_id, inicio, fim))
+        return cursor.fetchall() or []
+    finally:
+        cursor.close()
+
+
+@medido('relatorios.consultar_contas')
+def _consultar_contas(conn, dt_ini, dt_fim, tipo, situacao):
+    """(rows, quantidade, total) do relatório de contas via RelatoriosController."""
+    from src.controllers.relatorios_controller import RelatoriosController
+    return RelatoriosController(conn).listar_contas(dt_ini, dt_fim, tipo, situacao)
+
 
 class RelatoriosModule:
     def __init__(self, parent, controller):
@@ -190,6 +223,7 @@ class RelatoriosModule:
         except Exception:
             pass
 
+    @medido('relatorios.carregar_contas')
     def _carregar_contas_para_tree(self, tree, lbl_qtd, lbl_tot, dt_ini, dt_fim, tipo: str, situacao: str):
         # Formatter local para valores em BRL
         def brl(x: float) -> str:
@@ -198,36 +232,22 @@ class RelatoriosModule:
             except Exception:
                 return str(x)
 
-        # Obtém controller de relatórios
-        try:
-            from src.controllers.relatorios_controller import RelatoriosController
-        except Exception:
-            try:
-                from controllers.relatorios_controller import RelatoriosController
-            except Exception:
-                RelatoriosController = None  # will raise below if not found
-
-        if not RelatoriosController:
-            from tkinter import messagebox
-            messagebox.showerror("Relatório de Contas", "RelatoriosController não encontrado.")
-            return
+        def _falhou(e):
+            messagebox.showerror("Relatório de Contas", f"Falha ao consultar dados: {e}")
+            _preencher(([], 0, 0.0))
 
-        rc = getattr(self, "_relatorios_controller", None)
-        if rc is None:
-            db_conn = getattr(self.controller, 'db_connection', None)
-            if not db_conn:
-                return
-            rc = RelatoriosController(db_conn)
-            setattr(self, "_relatorios_controller", rc)
+        def _preencher(dados):
+            rows, qtd, total = dados
+            self._preencher_contas(tree, lbl_qtd, lbl_tot, rows, qtd, total, tipo, situacao, brl)
 
-        # Busca dados via controller
-        try:
-            rows, qtd, total = rc.listar_contas(dt_ini, dt_fim, tipo, situacao)
-        except Exception as e:
-            from tkinter import messagebox
-            messagebox.showerror("Relatório de Contas", f"Falha ao consultar dados: {e}")
-            rows, qtd, total = [], 0, 0.0
+        # Busca dados via controller, fora da thread do Tk
+        executor.submeter(
+            _consultar_contas, dt_ini, dt_fim, tipo, situacao,
+            ao_concluir=_preencher, ao_falhar=_falhou,
+            widget=tree, chave=('relatorio_contas', str(tree)), ocupado=tree,
+        )
 
+    def _preencher_contas(self, tree, lbl_qtd, lbl_tot, rows, qtd, total, tipo: str, situacao: str, brl):
         for i in tree.get_children():
             tree.delete(i)
         for r in rows:
@@ -558,6 +578,7 @@ class RelatoriosModule:
             sessoes.append({'id': aid, 'abertura': ab_txt, 'fechamento': fe_txt})
         return sessoes
 
+    @medido('relatorios.carregar_conferencias')
     def _carregar_conferencias_para_tree(self, tree: ttk.Treeview, lbl_tot_e: tk.Label, lbl_tot_s: tk.Label,
                                          dt_ini_str: str, dt_fim_str: str, usuarios: list,
                                          usuario_exib: str, sessao_exib: str):
@@ -837,6 +858,7 @@ class RelatoriosModule:
         except Exception:
             return None
 
+    @medido('relatorios.carregar_financeiro_periodo')
     def _carregar_financeiro_periodo(self, win: tk.Toplevel, tree: ttk.Treeview,
                                      lbl_tot_e: tk.Label, lbl_tot_s: tk.Label,
                                      dt_ini_str: str, dt_fim_str: str):
@@ -853,42 +875,18 @@ class RelatoriosModule:
         for iid in tree.get_children():
             tree.delete(iid)
 
-        # Conexão DB
-        db_conn = getattr(self.controller, 'db_connection', None)
-        if not db_conn:
-            messagebox.showerror("Relatório", "Sem conexão com o banco de dados.")
-            return
-
-        # Busca no banco: tabela 'financeiro' somente entradas/saídas por período
+        # Busca no banco: tabela 'financeiro' somente entradas/saídas por período (em segundo plano)
         inicio = datetime.combine(dt_ini, datetime.min.time())
         fim = datetime.combine(dt_fim, datetime.max.time())
 
-        cursor = db_conn.cursor(dictionary=True)
-        try:
-            cursor.execute(
-                """
-                SELECT id, data, descricao, tipo, tipo_pagamento, valor
-                FROM financeiro
-                WHERE data BETWEEN %s AND %s
-                  AND tipo IN ('entrada','saida')
-                ORDER BY data ASC, id ASC
-                """,
-                (inicio, fim)
-            )
-            rows = cursor.fetchall() or []
-        except Exception as e:
-            messagebox.showerror("Relatório", f"Falha ao consultar: {e}")
-            try:
-                cursor.close()
-            except Exception:
-                pass
-            return
-        finally:
-            try:
-                cursor.close()
-            except Exception:
-                pass
+        executor.submeter(
+            _consultar_financeiro_periodo, inicio, fim,
+            ao_concluir=lambda rows: self._preencher_financeiro_periodo(tree, lbl_tot_e, lbl_tot_s, rows),
+            ao_falhar=lambda e: messagebox.showerror("Relatório", f"Falha ao consultar: {e}", parent=win),
+            widget=tree, chave=('relatorio_financeiro', str(tree)), ocupado=win,
+        )
 
+    def _preencher_financeiro_periodo(self, tree: ttk.Treeview, lbl_tot_e: tk.Label, lbl_tot_s: tk.Label, rows: list):
         total_e = 0.0
         total_s = 0.0
         for r in rows:
@@ -1048,6 +1046,7 @@ class RelatoriosModule:
             except Exception:
                 pass
 
+    @medido('relatorios.carregar_medicos_periodo')
     def _carregar_medicos_periodo(self, tree: ttk.Treeview, lbl_total: tk.Label,
                                   dt_ini_str: str, dt_fim_str: str,
                                   medicos: list, medico_exibicao: str):
@@ -1077,49 +1076,27 @@ class RelatoriosModule:
         for iid in tree.get_children():
             tree.delete(iid)
 
-        db_conn = getattr(self.controller, 'db_connection', None)
-        if not db_conn:
-            messagebox.showerror("Relatório", "Sem conexão com o banco de dados.")
-            return
-
         inicio = datetime.combine(dt_ini, datetime.min.time())
         fim = datetime.combine(dt_fim, datetime.max.time())
 
-        total = 0.0
-        cursor = db_conn.cursor(dictionary=True)
-        try:
-            # Tenta um cenário comum: coluna medico_id dentro de financeiro para entradas de consultas/exames
-            cursor.execute(
-                """
-                SELECT f.data, COALESCE(c.tipo_atendimento, f.descricao) AS descricao, f.tipo_pagamento, f.valor
-                FROM financeiro f
-                LEFT JOIN consultas c ON c.id = f.consulta_id
-                WHERE f.tipo = 'entrada'
-                  AND c.medico_id = %s
-                  AND f.data BETWEEN %s AND %s
-                ORDER BY f.data ASC
-                """,
-                (medico_id, inicio, fim)
-            )
-            rows = cursor.fetchall() or []
-        except Exception as e1:
+        def _falhou(e):
             # Caso a coluna não exista, informa o usuário e não quebra a app
-            try:
-                cursor.close()
-            except Exception:
-                pass
             messagebox.showinfo(
                 "Relatórios médicos",
                 "Não encontrei a coluna medico_id na tabela financeiro.\n"
                 "Posso ajustar a consulta quando você me indicar onde fica a relação entre pagamento e médico (ex.: tabela de consultas/exames)."
             )
-            return
-        finally:
-            try:
-                cursor.close()
-            except Exception:
-                pass
 
+        # Tenta um cenário comum: coluna medico_id dentro de financeiro para entradas de consultas/exames
+        executor.submeter(
+            _consultar_medicos_periodo, medico_id, inicio, fim,
+            ao_concluir=lambda rows: self._preencher_medicos_periodo(tree, lbl_total, rows),
+            ao_falhar=_falhou,
+            widget=tree, chave=('relatorio_medicos', str(tree)), ocupado=tree,
+        )
+
+    def _preencher_medicos_periodo(self, tree: ttk.Treeview, lbl_total: tk.Label, rows: list):
+        total = 0.0
         for r in rows:
             d = r.get('data')
             if hasattr(d, 'strftime'):
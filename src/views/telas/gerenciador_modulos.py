@@ -0,0 +1,193 @@
+"""
+Ciclo de vida dos módulos da área de conteúdo do SistemaPDV.
+
+Cada módulo (atendimento, cadastro, financeiro, configuração, chat) é construído
+uma vez e mantido vivo: trocar de módulo só faz `pack_forget` no atual e `pack` no
+escolhido, chamando `on_hide`/`on_show` para pausar e retomar os jobs periódicos.
+Quando os módulos vivos passam do orçamento (quantidade ou total de widgets, usado
+como medida de memória), os menos usados recentemente são destruídos. Os widgets
+de cada módulo são contados na criação e recontados só depois de uma ação, que
+recria a tela; a troca simples entre módulos vivos não percorre nenhuma árvore.
+"""
+import time
+import tkinter as tk
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+# Quantidade máxima de módulos vivos ao mesmo tempo
+MAX_MODULOS_VIVOS = 5
+# Orçamento total de widgets dos módulos vivos (o módulo exibido nunca é despejado)
+ORCAMENTO_WIDGETS = 8000
+# Ação padrão do clique no módulo: com a instância viva vira só reexibição
+ACAO_INICIO = 'mostrar_inicio'
+
+
+def contar_widgets(widget) -> int:
+    """Total de widgets da árvore (inclui o próprio)."""
+    total = 0
+    pendentes = [widget]
+    while pendentes:
+        w = pendentes.pop()
+        total += 1
+        try:
+            pendentes.extend(w.winfo_children())
+        except Exception:
+            pass
+    return total
+
+
+class GerenciadorModulos:
+    """Mantém as instâncias dos módulos e alterna entre elas na área de conteúdo."""
+
+    def __init__(self, area, max_modulos: int = MAX_MODULOS_VIVOS, orcamento_widgets: int = ORCAMENTO_WIDGETS):
+        self.area = area
+        self.max_modulos = max(int(max_modulos), 1)
+        self.orcamento_widgets = int(orcamento_widgets)
+        # modulo_id -> {'frame', 'modulo', 'widgets'}; ordem = uso mais recente no fim.
+        # 'widgets' None = contagem desatualizada, refeita no próximo orçamento
+        self._vivos: "OrderedDict[str, Dict]" = OrderedDict()
+        self.atual: Optional[str] = None
+        self.metricas = {
+            'criacoes': 0,
+            'reexibicoes': 0,
+            'acoes': 0,
+            'despejos': 0,
+            'ultima_troca_ms': 0.0,
+        }
+
+    def exibir(self, modulo_id: str, criar: Callable, executar: Callable, acao: str = ACAO_INICIO):
+        """Exibe o módulo, criando-o na primeira vez.
+
+        `criar(modulo_id, frame)` constrói o módulo dentro de `frame` e o retorna;
+        `executar(modulo_id, modulo, acao)` abre a tela da ação. Na criação a ação é
+        sempre executada; com a instância viva, só quando for diferente de ACAO_INICIO.
+        Um módulo vivo que estava oculto recebe `on_show` antes da ação.
+        """
+        inicio = time.perf_counter()
+        self._limpar_area()
+        entrada = self._vivos.get(modulo_id)
+        if entrada is not None and not self._existe(entrada['frame']):
+            self._vivos.pop(modulo_id, None)
+            entrada = None
+            if self.atual == modulo_id:
+                self.atual = None
+
+        if self.atual is not None and self.atual != modulo_id:
+            self._ocultar(self.atual)
+
+        mudou = entrada is None
+        if entrada is None:
+            frame = tk.Frame(self.area, bg='#f0f2f5')
+            frame.pack(fill='both', expand=True)
+            self.atual = modulo_id
+            try:
+                modulo = criar(modulo_id, frame)
+                entrada = {'frame': frame, 'modulo': modulo, 'widgets': None}
+                self._vivos[modulo_id] = entrada
+                executar(modulo_id, modulo, acao)
+                entrada['widgets'] = contar_widgets(frame)
+            except Exception:
+                self._vivos.pop(modulo_id, None)
+                self.atual = None
+                try:
+                    frame.destroy()
+                except Exception:
+                    pass
+                raise
+            self.metricas['criacoes'] += 1
+        else:
+            self._vivos.move_to_end(modulo_id)
+            reexibir = self.atual != modulo_id
+            if reexibir:
+                entrada['frame'].pack(fill='both', expand=True)
+                self.atual = modulo_id
+                # Retoma os jobs pausados em on_hide antes de abrir a ação
+                self._chamar(entrada['modulo'], 'on_show')
+                self.metricas['reexibicoes'] += 1
+            if acao and acao != ACAO_INICIO:
+                # A tela da ação é recriada pelo próprio módulo
+                executar(modulo_id, entrada['modulo'], acao)
+                entrada['widgets'] = None
+                mudou = True
+                self.metricas['acoes'] += 1
+
+        if mudou:
+            self._aplicar_orcamento()
+        self.metricas['ultima_troca_ms'] = (time.perf_counter() - inicio) * 1000.0
+        return entrada['modulo']
+
+    def descartar(self, modulo_id: str):
+        """Destroi a instância do módulo (recriada no próximo acesso)."""
+        entrada = self._vivos.pop(modulo_id, None)
+        if entrada is None:
+            return
+        if self.atual == modulo_id:
+            self.atual = None
+        # Timers e assinaturas restantes são cancelados pelos <Destroy> dos módulos
+        try:
+            entrada['frame'].destroy()
+        except Exception:
+            pass
+
+    def descartar_todos(self):
+        for modulo_id in list(self._vivos):
+            self.descartar(modulo_id)
+
+    def modulos_vivos(self):
+        return list(self._vivos)
+
+    # ------------------------- Internos -------------------------
+    @staticmethod
+    def _existe(widget) -> bool:
+        try:
+            return bool(widget.winfo_exists())
+        except Exception:
+            return False
+
+    @staticmethod
+    def _chamar(modulo, gancho: str):
+        metodo = getattr(modulo, gancho, None)
+        if metodo is None:
+            return
+        try:
+            metodo()
+        except Exception as e:
+            print(f"Erro em {type(modulo).__name__}.{gancho}: {e}")
+
+    def _limpar_area(self):
+        """Remove da área o que não pertence a um módulo (boas-vindas, mensagens de erro)."""
+        frames = {str(e['frame']) for e in self._vivos.values()}
+        for widget in self.area.winfo_children():
+            if str(widget) not in frames:
+                widget.destroy()
+
+    def _ocultar(self, modulo_id: str):
+        entrada = self._vivos.get(modulo_id)
+        self.atual = None
+        if entrada is None:
+            return
+        self._chamar(entrada['modulo'], 'on_hide')
+        try:
+            entrada['frame'].pack_forget()
+        except Exception:
+            pass
+
+    @staticmethod
+    def _widgets(entrada: Dict) -> int:
+        if entrada.get('widgets') is None:
+            entrada['widgets'] = contar_widgets(entrada['frame'])
+        return entrada['widgets']
+
+    def _aplicar_orcamento(self):
+        """Despeja os módulos ocultos menos usados enquanto passar do orçamento."""
+        ocultos = [m for m in self._vivos if m != self.atual]
+        if not ocultos:
+            return
+        widgets = {m: self._widgets(e) for m, e in self._vivos.items()}
+        total = sum(widgets.values())
+        for modulo_id in ocultos:
+            if len(self._vivos) <= self.max_modulos and total <= self.orcamento_widgets:
+                break
+            total -= widgets[modulo_id]
+            self.descartar(modulo_id)
+            self.metricas['despejos'] += 1
@@ -20,6 +20,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 from views.modulos.cadastro.cadastro_module import CadastroModule
 from src.controllers.permission_controller import PermissionController
+from src.views.telas.gerenciador_modulos import GerenciadorModulos
+from src.utils.agendador import agendador
 
 
 class SistemaPDV:
@@ -43,7 +45,7 @@ class SistemaPDV:
         # Inicialização das variáveis de controle do chat
         self._chat_unread_count = 0
         self._chat_blink_job = None
-        self._chat_poll_job = None
+        self.chat_sync = None
         self._chat_blink_on = False
         self._modulo_labels = {}
         
@@ -66,12 +68,69 @@ class SistemaPDV:
         
         # Variável para armazenar o módulo atual
         self.modulo_atual = None
+
+        # Aplica migrações pendentes do schema uma única vez por processo
+        try:
+            from src.db.migrations import garantir_schema
+            garantir_schema()
+        except Exception as e:
+            print(f"Erro ao verificar schema do banco: {e}")
+
+        # Carrega o dicionário ortográfico em segundo plano (compartilhado pelos editores)
+        try:
+            from src.utils.dicionario_ortografico import dicionario_ortografico
+            dicionario_ortografico.iniciar_carga('pt')
+        except Exception as e:
+            print(f"Erro ao iniciar carga do dicionário ortográfico: {e}")
+
+        # Hub de notificações na rede local (opcional; sem hub as telas seguem no polling)
+        try:
+            from src.utils.notificador import iniciar_notificacoes
+            iniciar_notificacoes(self.root)
+        except Exception as e:
+            print(f"Erro ao iniciar notificações: {e}")
+
+        # Executor de tarefas em segundo plano (consultas lentas fora da thread do Tk)
+        try:
+            from src.utils.tarefas import executor
+            executor.iniciar(self.root)
+        except Exception as e:
+            print(f"Erro ao iniciar executor de tarefas: {e}")
+
+        # Agendador central dos jobs periódicos da interface
+        agendador.iniciar(self.root)
+
+        # Instrumentação de desempenho (opcional: INSTRUMENTACAO_CONFIG / INSTRUMENTACAO=True)
+        try:
+            from src.utils.instrumentacao import instrumentacao
+            instrumentacao.iniciar(self.root)
+        except Exception as e:
+            print(f"Erro ao iniciar instrumentação: {e}")
+
+        # Retenção do chat (só na máquina servidora): arquiva mensagens lidas antigas
+        try:
+            from src.utils.retencao_chat import iniciar_retencao_chat
+            iniciar_retencao_chat()
+        except Exception as e:
+            print(f"Erro ao iniciar retenção do chat: {e}")
         
         # Criar layout principal
         self.criar_layout()
 
-        # Inicializa o controlador de permissões
+        # Tabela ao vivo dos jobs periódicos (diagnóstico)
+        self.root.bind('<Control-Shift-J>', lambda e: self._abrir_tabela_jobs())
+        # Painel da instrumentação (só com ela ligada)
+        self.root.bind('<Control-Shift-D>', lambda e: self._alternar_painel_instrumentacao())
+
+        # Inicializa o controlador de permissões e compila as permissões do usuário
+        # (a barra lateral passa a verificar em memória, sem ir ao banco a cada clique)
         self.permission_controller = PermissionController()
+        try:
+            self.permission_controller.carregar_permissoes_sessao(self.usuario)
+            from src.utils.notificador import notificador
+            notificador.assinar('permissoes', self._on_permissoes_alteradas)
+        except Exception as e:
+            print(f"Erro ao carregar permissões do usuário: {e}")
         
         # Inicializa o controlador de configurações
         try:
@@ -95,10 +154,11 @@ class SistemaPDV:
         except Exception:
             pass
         
-        # Verifica alerta de estoque baixo na abertura da tela principal
+        # Verifica alerta de estoque baixo na abertura da tela principal e a cada 60s
         try:
             # Aguarda alguns ms para garantir que os widgets foram renderizados
-            self.root.after(300, self._verificar_alerta_estoque)
+            agendador.registrar('alerta_estoque', self._verificar_alerta_estoque, 60000,
+                                dono=self.root, atraso_inicial_ms=300)
         except Exception:
             pass
         
@@ -112,7 +172,8 @@ class SistemaPDV:
                 from src.db.database import db
                 import socket
                 self._chat_dispositivo = socket.gethostname()
-                with db.get_connection() as conn:
+                # Conexão exclusiva do pool (não fecha a conexão compartilhada ao sair do bloco)
+                with db.checkout() as conn:
                     chat_db = ChatDB(conn)
                     chat_db.heartbeat(self.usuario.id, getattr(self.usuario, 'nome', 'Usuário'), self._chat_dispositivo)
                     # Busca e guarda o id da sessão para remoção precisa no sair()
@@ -121,14 +182,11 @@ class SistemaPDV:
                         usuario_nome=getattr(self.usuario, 'nome', None),
                         dispositivo=self._chat_dispositivo,
                     )
-                    # Inicia heartbeat global periódico (mesmo fora da tela de chat)
+                    # Inicia o sincronizador do chat (heartbeat, não lidas e presença numa thread própria)
                     try:
-                        self._chat_hb_job = None
-                        self._start_global_chat_heartbeat()
-                        # Inicia polling global de não lidas (fora da tela de chat)
-                        self._start_global_chat_unread_poll()
+                        self._iniciar_chat_sync()
                     except Exception as e_hb:
-                        print(f"[CHAT] Falha ao iniciar heartbeat global: {e_hb}")
+                        print(f"[CHAT] Falha ao iniciar sincronizador do chat: {e_hb}")
         except Exception as e:
             print(f"Erro ao registrar sessão de chat no login: {e}")
     
@@ -286,8 +344,9 @@ class SistemaPDV:
         )
         self.data_label.pack(side="right", padx=15, pady=3)
         
-        # Iniciar a atualização do relógio
+        # Iniciar a atualização do relógio (job de 1s do agendador)
         self._atualizar_relogio()
+        agendador.registrar('relogio', self._atualizar_relogio, 1000, jitter=0, dono=self.data_label)
 
     def _verificar_alerta_estoque(self):
         """Verifica itens com estoque baixo e mostra um painel fixo no canto da tela
@@ -324,11 +383,6 @@ class SistemaPDV:
                     except Exception:
                         pass
                     self.estoque_badge = None
-                # Agenda próxima verificação
-                try:
-                    self.root.after(60000, self._verificar_alerta_estoque)
-                except Exception:
-                    pass
                 return
 
             # Monta linhas detalhadas para exibição
@@ -406,12 +460,6 @@ class SistemaPDV:
 
             except Exception:
                 pass
-            
-            # Agenda próxima verificação periódica (60s)
-            try:
-                self.root.after(60000, self._verificar_alerta_estoque)
-            except Exception:
-                pass
         except Exception:
             # Silencia erros para não bloquear a abertura do sistema
             pass
@@ -450,15 +498,42 @@ class SistemaPDV:
         except Exception:
             pass
     
+    def _abrir_tabela_jobs(self):
+        """Abre (ou traz para frente) a tabela dos jobs do agendador."""
+        janela = getattr(self, '_janela_jobs', None)
+        try:
+            if janela is not None and janela.winfo_exists():
+                janela.lift()
+                return
+        except Exception:
+            pass
+        from src.views.dialogs.jobs_dialog import JobsDialog
+        self._janela_jobs = JobsDialog(self.root)
+
+    def _alternar_painel_instrumentacao(self):
+        """Mostra/oculta o painel sobreposto da instrumentação."""
+        from src.utils.instrumentacao import instrumentacao
+        painel = getattr(self, '_painel_instrumentacao', None)
+        try:
+            if painel is not None and painel.winfo_exists():
+                painel.destroy()
+                self._painel_instrumentacao = None
+                return
+        except Exception:
+            pass
+        if not instrumentacao.ativo:
+            return
+        from src.views.dialogs.instrumentacao_overlay import InstrumentacaoOverlay
+        self._painel_instrumentacao = InstrumentacaoOverlay(
+            self.root,
+            lambda: self.modulo_manager.metricas if getattr(self, 'modulo_manager', None) else None,
+        )
+
     def _atualizar_relogio(self):
-        """Atualiza o relógio a cada segundo"""
+        """Atualiza o relógio (chamado a cada segundo pelo agendador)"""
         # Atualizar a data e hora atual
         data_atual = datetime.now().strftime("%d/%m/%Y %H:%M:%S")
         self.data_label.config(text=data_atual)
-        
-        
-        # Agendar a próxima atualização em 1000ms (1 segundo)
-        self.root.after(1000, self._atualizar_relogio)
     
     def _get_opcoes_cadastro(self):
         """Retorna as opções do módulo de cadastro"""
@@ -606,6 +681,13 @@ class SistemaPDV:
             lbl.pack(side="left", padx=5)
             self._modulo_labels[modulo_id] = lbl
         
+    def _on_permissoes_alteradas(self, topico, dados):
+        """Outra estação salvou as permissões: recompila as deste usuário."""
+        try:
+            self.permission_controller.carregar_permissoes_sessao(self.usuario)
+        except Exception as e:
+            print(f"Erro ao recarregar permissões: {e}")
+
     def selecionar_modulo(self, modulo_id):
         """Seleciona um módulo para exibição"""
         # Limpa opções anteriores
@@ -657,146 +739,12 @@ class SistemaPDV:
         self.mostrar_conteudo_modulo(modulo_id)
 
     def mostrar_conteudo_modulo(self, modulo_id, metodo_nome='mostrar_inicio'):
-        """Mostra o conteúdo do módulo selecionado"""
-        # Limpa o conteúdo anterior
-        for widget in self.content_frame.winfo_children():
-            widget.destroy()
+        """Mostra o conteúdo do módulo selecionado (instância mantida viva entre trocas)"""
+        if self.modulo_manager is None:
+            self.modulo_manager = GerenciadorModulos(self.content_frame)
             
         try:
-            if modulo_id == 'atendimento':
-                # Cria um frame para o módulo que ocupa todo o espaço
-                modulo_frame = tk.Frame(self.content_frame, bg='#f0f2f5')
-                modulo_frame.pack(fill='both', expand=True)
-                
-                # Importa o módulo de atendimento
-                from views.modulos.atendimento.atendimento_module import AtendimentoModule
-                from src.db.database import db
-                
-                # Obtém a conexão com o banco de dados
-                db_connection = db.get_connection()
-                
-                # Cria a instância do módulo
-                modulo = AtendimentoModule(modulo_frame, self, db_connection)
-                
-                # Configura o frame do módulo para ocupar todo o espaço
-                modulo.frame.pack(fill='both', expand=True, padx=10, pady=10)
-                
-                # Se for uma ação específica, chama o método executar_acao
-                if metodo_nome and metodo_nome != 'mostrar_inicio':
-                    modulo.executar_acao(metodo_nome)
-                else:
-                    modulo.mostrar_inicio()
-    
-                    
-            elif modulo_id == 'cadastro':
-                # Cria um frame para o módulo que ocupa todo o espaço
-                modulo_frame = tk.Frame(self.content_frame, bg='#f0f2f5')
-                modulo_frame.pack(fill='both', expand=True)
-                
-                # Importa o módulo de cadastro
-                from views.modulos.cadastro.cadastro_module import CadastroModule
-                from src.db.database import db
-                
-                # Obtém a conexão com o banco de dados
-                db_connection = db.get_connection()
-                
-                # Cria a instância do módulo
-                modulo = CadastroModule(modulo_frame, self, db_connection)
-                
-                # Configura o frame do módulo para ocupar todo o espaço
-                modulo.frame.pack(fill='both', expand=True, padx=10, pady=10)
-                
-                # Chama o método solicitado ou o padrão
-                if hasattr(modulo, 'executar_acao'):
-                    modulo.executar_acao(metodo_nome)
-                elif hasattr(modulo, metodo_nome):
-                    metodo = getattr(modulo, metodo_nome)
-                    metodo()
-                else:
-                    modulo.mostrar_inicio()
-            
-            elif modulo_id == 'configuracao':
-                # Cria um frame para o módulo que ocupa todo o espaço
-                modulo_frame = tk.Frame(self.content_frame, bg='#f0f2f5')
-                modulo_frame.pack(fill='both', expand=True)
-                
-                # Importa o módulo de configuração
-                from views.modulos.configuracao.configuracao_module import ConfiguracaoModule
-                
-                # Cria a instância do módulo
-                modulo = ConfiguracaoModule(modulo_frame, self)
-                
-                # Configura o frame do módulo para ocupar todo o espaço
-                modulo.frame.pack(fill='both', expand=True, padx=10, pady=10)
-                
-                # Se for uma ação específica (como 'impressoras'), chama diretamente o método correspondente
-                if metodo_nome and metodo_nome != 'mostrar_inicio':
-                    if hasattr(modulo, f'_show_{metodo_nome}'):
-                        metodo = getattr(modulo, f'_show_{metodo_nome}')
-                        metodo()
-                    else:
-                        modulo.show(metodo_nome)
-                else:
-                    modulo.show()
-                    
-            elif modulo_id == 'financeiro':
-                # Cria um frame para o módulo que ocupa todo o espaço
-                modulo_frame = tk.Frame(self.content_frame, bg='#f0f2f5')
-                modulo_frame.pack(fill='both', expand=True)
-                
-                # Importa o módulo de financeiro
-                from src.views.modulos.financeiro.financeiro_module import FinanceiroModule
-                from src.db.database import db
-                
-                # Obtém a conexão com o banco de dados
-                db_connection = db.get_connection()
-                
-                # Cria a instância do módulo
-                modulo = FinanceiroModule(modulo_frame, self)
-                
-                # Define a conexão com o banco de dados
-                self.db_connection = db_connection
-                
-                # Configura o frame do módulo para ocupar todo o espaço
-                modulo.frame.pack(fill='both', expand=True, padx=10, pady=10)
-                
-                # Se for uma ação específica, chama o método correspondente
-                if metodo_nome and metodo_nome != 'mostrar_inicio':
-                    modulo.show(metodo_nome)
-                else:
-                    modulo.show()
-            
-            elif modulo_id == 'chat':
-                # Cria um frame para o módulo que ocupa todo o espaço
-                modulo_frame = tk.Frame(self.content_frame, bg='#f0f2f5')
-                modulo_frame.pack(fill='both', expand=True)
-                
-                # Importa o módulo de chat
-                from src.views.modulos.chat.chat_module import ChatModule
-                
-                # Cria a instância do módulo
-                modulo = ChatModule(modulo_frame, self)
-                
-                # Configura o frame do módulo para ocupar todo o espaço
-                modulo.frame.pack(fill='both', expand=True, padx=10, pady=10)
-                
-                # Exibe o conteúdo principal do chat (respeitando ação)
-                if hasattr(modulo, 'show'):
-                    if metodo_nome and metodo_nome != 'mostrar_inicio':
-                        modulo.show(metodo_nome)
-                    else:
-                        modulo.show()
-                else:
-                    try:
-                        modulo.render(modulo_frame)
-                    except Exception:
-                        pass
-
-                # Ao abrir o chat, limpar notificação de não lidas
-                try:
-                    self.notify_chat_unread(0)
-                except Exception:
-                    pass
+            self.modulo_manager.exibir(modulo_id, self._criar_modulo, self._executar_acao_modulo, metodo_nome)
                     
             # Força a atualização da interface
             self.content_frame.update_idletasks()
@@ -813,6 +761,112 @@ class SistemaPDV:
             )
             error_label.pack(pady=20, padx=20, anchor='w')
 
+    def _criar_modulo(self, modulo_id, modulo_frame):
+        """Cria a instância do módulo dentro de modulo_frame (chamado uma vez por módulo)"""
+        if modulo_id == 'atendimento':
+            # Importa o módulo de atendimento
+            from views.modulos.atendimento.atendimento_module import AtendimentoModule
+            from src.db.database import db
+            
+            # Obtém a conexão com o banco de dados
+            db_connection = db.get_connection()
+            
+            # Cria a instância do módulo
+            modulo = AtendimentoModule(modulo_frame, self, db_connection)
+                
+        elif modulo_id == 'cadastro':
+            # Importa o módulo de cadastro
+            from views.modulos.cadastro.cadastro_module import CadastroModule
+            from src.db.database import db
+            
+            # Obtém a conexão com o banco de dados
+            db_connection = db.get_connection()
+            
+            # Cria a instância do módulo
+            modulo = CadastroModule(modulo_frame, self, db_connection)
+        
+        elif modulo_id == 'configuracao':
+            # Importa o módulo de configuração
+            from views.modulos.configuracao.configuracao_module import ConfiguracaoModule
+            
+            # Cria a instância do módulo
+            modulo = ConfiguracaoModule(modulo_frame, self)
+                
+        elif modulo_id == 'financeiro':
+            # Importa o módulo de financeiro
+            from src.views.modulos.financeiro.financeiro_module import FinanceiroModule
+            from src.db.database import db
+            
+            # Cria a instância do módulo
+            modulo = FinanceiroModule(modulo_frame, self)
+            
+            # Define a conexão com o banco de dados
+            self.db_connection = db.get_connection()
+        
+        elif modulo_id == 'chat':
+            # Importa o módulo de chat
+            from src.views.modulos.chat.chat_module import ChatModule
+            
+            # Cria a instância do módulo
+            modulo = ChatModule(modulo_frame, self)
+        
+        else:
+            raise ValueError(f"Módulo desconhecido: {modulo_id}")
+            
+        # Configura o frame do módulo para ocupar todo o espaço
+        modulo.frame.pack(fill='both', expand=True, padx=10, pady=10)
+        return modulo
+
+    def _executar_acao_modulo(self, modulo_id, modulo, metodo_nome):
+        """Abre no módulo a tela da ação solicitada ou a tela inicial"""
+        if modulo_id == 'atendimento':
+            # Se for uma ação específica, chama o método executar_acao
+            if metodo_nome and metodo_nome != 'mostrar_inicio':
+                modulo.executar_acao(metodo_nome)
+            else:
+                modulo.mostrar_inicio()
+                
+        elif modulo_id == 'cadastro':
+            # Chama o método solicitado ou o padrão
+            if hasattr(modulo, 'executar_acao'):
+                modulo.executar_acao(metodo_nome)
+            elif hasattr(modulo, metodo_nome):
+                metodo = getattr(modulo, metodo_nome)
+                metodo()
+            else:
+                modulo.mostrar_inicio()
+        
+        elif modulo_id == 'configuracao':
+            # Se for uma ação específica (como 'impressoras'), chama diretamente o método correspondente
+            if metodo_nome and metodo_nome != 'mostrar_inicio':
+                if hasattr(modulo, f'_show_{metodo_nome}'):
+                    metodo = getattr(modulo, f'_show_{metodo_nome}')
+                    metodo()
+                else:
+                    modulo.show(metodo_nome)
+            else:
+                modulo.show()
+                
+        elif modulo_id == 'financeiro':
+            # Se for uma ação específica, chama o método correspondente
+            if metodo_nome and metodo_nome != 'mostrar_inicio':
+                modulo.show(metodo_nome)
+            else:
+                modulo.show()
+        
+        elif modulo_id == 'chat':
+            # Exibe o conteúdo principal do chat (respeitando ação)
+            if hasattr(modulo, 'show'):
+                if metodo_nome and metodo_nome != 'mostrar_inicio':
+                    modulo.show(metodo_nome)
+                else:
+                    modulo.show()
+            else:
+                try:
+                    modulo.render(modulo.parent)
+                except Exception:
+                    pass
+
     # =========================
     # Chat Notifications (Blink)
     # =========================
@@ -827,15 +881,16 @@ class SistemaPDV:
     def _start_chat_blink(self):
         if self._chat_blink_job is not None:
             return
+        lbl = self._modulo_labels.get('chat')
+        if not lbl:
+            return
         self._chat_blink_on = False
         self._blink_chat_label()
+        self._chat_blink_job = agendador.registrar('chat_blink', self._blink_chat_label, 600, jitter=0, dono=lbl)
 
     def _stop_chat_blink(self):
         if self._chat_blink_job is not None:
-            try:
-                self.root.after_cancel(self._chat_blink_job)
-            except Exception:
-                pass
+            agendador.cancelar('chat_blink')
             self._chat_blink_job = None
         self._chat_blink_on = False
         # Restaura cor do botão Chat
@@ -857,28 +912,16 @@ class SistemaPDV:
             lbl.config(bg=bg1 if self._chat_blink_on else bg2)
         except Exception:
             pass
-        # agenda próximo toggle
-        try:
-            self._chat_blink_job = self.root.after(600, self._blink_chat_label)
-        except Exception:
-            self._chat_blink_job = None
     
     def sair(self):
         """Fecha a aplicação"""
         # [LOGOUT->SESSÃO] Remove a sessão do chat ao sair
         try:
-            # Cancela heartbeat global se estiver agendado
-            try:
-                if hasattr(self, '_chat_hb_job') and self._chat_hb_job:
-                    self.root.after_cancel(self._chat_hb_job)
-                    self._chat_hb_job = None
-            except Exception:
-                pass
-            # Cancela polling global de não lidas se estiver agendado
+            # Encerra o sincronizador do chat antes de remover a sessão
             try:
-                if hasattr(self, '_chat_poll_job') and self._chat_poll_job:
-                    self.root.after_cancel(self._chat_poll_job)
-                    self._chat_poll_job = None
+                if getattr(self, 'chat_sync', None) is not None:
+                    self.chat_sync.parar()
+                    self.chat_sync = None
             except Exception:
                 pass
             usuario_nome = getattr(getattr(self, 'usuario', None), 'nome', None)
@@ -890,31 +933,21 @@ class SistemaPDV:
                 chat_db = ChatDB(conn)
                 try:
                     if sessao_id:
-                        chat_db.remover_sessao_por_id(sessao_id)
-                    else:
+                        removidas = chat_db.remover_sessao_por_id(sessao_id)
+                    if not sessao_id or not removidas:
                         chat_db.remover_sessao_por_nome_dispositivo(usuario_nome, dispositivo)
                 except Exception as e2:
                     print(f"[SAIR] Erro ao remover sessão com conexão existente: {e2}")
             else:
                 try:
-                    import mysql.connector
-                    from src.db.config import get_db_config
+                    from src.db.database import db
                     from src.db.chat_db import ChatDB
-                    cfg = get_db_config()
-                    for k in ['pool_name', 'pool_size', 'pool_reset_session']:
-                        cfg.pop(k, None)
-                    conn2 = mysql.connector.connect(**cfg)
-                    try:
+                    with db.checkout(timeout=5) as conn2:
                         chat_db2 = ChatDB(conn2)
                         if sessao_id:
-                            chat_db2.remover_sessao_por_id(sessao_id)
-                        else:
+                            removidas = chat_db2.remover_sessao_por_id(sessao_id)
+                        if not sessao_id or not removidas:
                             chat_db2.remover_sessao_por_nome_dispositivo(usuario_nome, dispositivo)
-                    finally:
-                        try:
-                            conn2.close()
-                        except Exception:
-                            pass
                 except Exception as e3:
                     print(f"[SAIR][FB] Falha no fallback de conexão direta: {e3}")
         except Exception as e:
@@ -931,115 +964,24 @@ class SistemaPDV:
             except Exception:
                 pass
 
-    # ------------------------- Heartbeat Global de Chat -------------------------
-    def _start_global_chat_heartbeat(self):
-        """Inicia o heartbeat global do chat (fora da tela de chat), a cada 10s."""
-        try:
-            # Cancela anterior se houver
-            if hasattr(self, '_chat_hb_job') and self._chat_hb_job:
-                self.root.after_cancel(self._chat_hb_job)
-        except Exception:
-            pass
-        # Agenda primeira execução imediata
-        self._do_global_chat_heartbeat()
-
-    def _do_global_chat_heartbeat(self):
-        try:
-            if hasattr(self, 'usuario') and getattr(self.usuario, 'id', None) is not None:
-                from src.db.chat_db import ChatDB
-                conn = getattr(self, 'db_connection', None)
-                if conn is not None and getattr(conn, 'is_connected', lambda: True)():
-                    chat_db = ChatDB(conn)
-                    uid = self.usuario.id
-                    uname = getattr(self.usuario, 'nome', 'Usuário')
-                    disp = getattr(self, '_chat_dispositivo', None)
-                    if not disp:
-                        import socket
-                        disp = socket.gethostname()
-                        self._chat_dispositivo = disp
-                    chat_db.heartbeat(uid, uname, disp)
-                    # mantém id da sessão atualizado
-                    self._chat_sessao_id = chat_db.obter_sessao_id(uid, uname, disp)
-                else:
-                    # Conexão indisponível: ignora e tenta novamente no próximo ciclo
-                    pass
-        except Exception as e:
-            print(f"[CHAT] Erro no heartbeat global: {e}")
-        finally:
-            try:
-                # Agenda próximo ciclo em 10s
-                self._chat_hb_job = self.root.after(10000, self._do_global_chat_heartbeat)
-            except Exception:
-                self._chat_hb_job = None
-
-    # ------------------------- Poll Global de Não Lidas -------------------------
-    def _start_global_chat_unread_poll(self):
-        """Inicia polling global de mensagens não lidas para piscar o botão Chat.
-        Roda mesmo quando a tela do chat não está aberta.
-        """
-        try:
-            # Cancela anterior se houver
-            if hasattr(self, '_chat_poll_job') and self._chat_poll_job:
-                self.root.after_cancel(self._chat_poll_job)
-        except Exception:
-            pass
-        # Agenda primeira execução imediata
-        self._do_global_chat_unread_poll()
-
-    def _do_global_chat_unread_poll(self):
-        try:
-            # Garante que temos usuário válido
-            uid = getattr(getattr(self, 'usuario', None), 'id', None)
-            if uid is None:
-                return
-            uname = getattr(self.usuario, 'nome', 'Usuário')
-            disp = getattr(self, '_chat_dispositivo', None)
-            if not disp:
-                try:
-                    import socket
-                    disp = socket.gethostname()
-                    self._chat_dispositivo = disp
-                except Exception:
-                    disp = None
-
-            # Usa a conexão principal se disponível
-            conn = getattr(self, 'db_connection', None)
-            if conn is not None and getattr(conn, 'is_connected', lambda: True)():
-                from src.db.chat_db import ChatDB
-                chat_db = ChatDB(conn)
-                try:
-                    nao_lidas = chat_db.listar_nao_lidas_para(uid, uname, disp)
-                    total = len(nao_lidas or [])
-                    self.notify_chat_unread(total)
-                except Exception as e:
-                    print(f"[CHAT] Poll não lidas (conn existente) falhou: {e}")
-            else:
-                # Fallback: tenta abrir uma conexão direta só para a consulta
-                try:
-                    import mysql.connector
-                    from src.db.config import get_db_config
-                    from src.db.chat_db import ChatDB
-                    cfg = get_db_config()
-                    for k in ['pool_name', 'pool_size', 'pool_reset_session']:
-                        cfg.pop(k, None)
-                    conn2 = mysql.connector.connect(**cfg)
-                    try:
-                        chat_db2 = ChatDB(conn2)
-                        nao_lidas = chat_db2.listar_nao_lidas_para(uid, uname, disp)
-                        total = len(nao_lidas or [])
-                        self.notify_chat_unread(total)
-                    finally:
-                        try:
-                            conn2.close()
-                        except Exception:
-                            pass
-                except Exception as e2:
-                    print(f"[CHAT][FB] Poll não lidas (fallback) falhou: {e2}")
-        except Exception as e:
-            print(f"[CHAT] Erro no poll global de não lidas: {e}")
-        finally:
-            # Agenda próximo ciclo (~1.5s)
-            try:
-                self._chat_poll_job = self.root.after(1500, self._do_global_chat_unread_poll)
-            except Exception:
-                self._chat_poll_job = None
\ No newline at end of file
+    # ------------------------- Sincronizador do Chat -------------------------
+    def _iniciar_chat_sync(self):
+        """Inicia o sincronizador do chat desta estação (uma thread com conexão própria).
+        As mudanças de não lidas chegam pela fila do sincronizador, drenada por after()."""
+        from src.utils.sincronizador_chat import SincronizadorChat
+        if getattr(self, 'chat_sync', None) is not None:
+            return
+        self.chat_sync = SincronizadorChat(
+            self.usuario.id,
+            getattr(self.usuario, 'nome', 'Usuário'),
+            getattr(self, '_chat_dispositivo', None),
+        )
+        self.chat_sync.assinar(self._on_chat_sync)
+        self.chat_sync.iniciar(self.root)
+        # Mensagem nova para este usuário (evento do hub): sincroniza sem esperar o intervalo
+        from src.utils.notificador import notificador
+        notificador.assinar(f'chat:{self.usuario.id}', lambda topico, dados: self.chat_sync and self.chat_sync.acordar())
+
+    def _on_chat_sync(self, evento: dict):
+        if 'nao_lidas' in evento:
+            self.notify_chat_unread(evento['nao_lidas'])
\ No newline at end of file